@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script para calcular las sugerencias de stock mínimo/máximo y reorden
+desde el historial de ventas y mermas (ver services/analitica_demanda.py)
+
+Uso:
+    python analizar_demanda.py                  # Calcular y guardar en sugerencias_reabastecimiento
+    python analizar_demanda.py --aplicar        # Además, escribir los mínimos/máximos en inventario
+    python analizar_demanda.py --dias 730 --entrega 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Agregar el directorio actual al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.postgres_manager import PostgresManager
+from services.analitica_demanda import analizar_demanda
+from utils.config import Config
+
+
+def main():
+    """Analizar la demanda e imprimir lo que hay que pedir"""
+    parser = argparse.ArgumentParser(description="Sugerencias de stock desde el historial de salidas")
+    parser.add_argument('--aplicar', action='store_true', help="Escribir los mínimos/máximos sugeridos en inventario")
+    parser.add_argument('--dias', type=int, help="Días de historial (POS_DEMANDA_DIAS_HISTORIA)")
+    parser.add_argument('--entrega', type=float, help="Días de entrega del proveedor (POS_DEMANDA_DIAS_ENTREGA)")
+    parser.add_argument('--revision', type=float, help="Días entre pedidos (POS_DEMANDA_DIAS_REVISION)")
+    args = parser.parse_args()
+
+    parametros = {
+        clave: valor for clave, valor in (
+            ('dias_historia', args.dias), ('dias_entrega', args.entrega), ('dias_revision', args.revision)
+        ) if valor is not None
+    }
+
+    try:
+        config_obj = Config()
+        if not config_obj.validate_config():
+            logging.error("❌ Configuración de PostgreSQL inválida. Verifique las variables de entorno.")
+            return False
+
+        db = PostgresManager(db_config=config_obj.get_postgres_config())
+        sugerencias = analizar_demanda(db, aplicar=args.aplicar, parametros=parametros)
+        if sugerencias is None:
+            logging.error("❌ No se pudo analizar la demanda")
+            return False
+
+        por_pedir = [s for s in sugerencias if s['cantidad_reorden'] > 0]
+        clases = {c: sum(1 for s in sugerencias if s['clase_ingreso'] == c) for c in 'ABC'}
+        logging.info(f"📊 Filas con salidas: {len(sugerencias)} (A: {clases['A']}, B: {clases['B']}, C: {clases['C']})")
+        logging.info(f"📦 Filas por reordenar: {len(por_pedir)}")
+        if args.aplicar:
+            logging.info("✅ Mínimos y máximos aplicados en inventario")
+        db.close()
+        return True
+
+    except Exception as e:
+        logging.error(f"❌ Error: {e}")
+        import traceback
+        logging.error(traceback.format_exc())
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1 @@
+# Suite de benchmarks del POS (ver benchmarks/suite.py)
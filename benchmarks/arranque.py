@@ -0,0 +1,168 @@
+"""
+Benchmark de arranque: tiempo hasta que la pantalla de login es visible
+
+Lanza la aplicación varias veces con POS_ARCHIVO_ARRANQUE; main.py escribe
+ahí los ms desde el inicio del proceso hasta cada etapa y se cierra solo:
+
+    qt_listo_ms               QApplication, fuentes, configuración y monitor
+    login_visible_ms          primer pintado del login
+    bd_lista_ms               conexión en segundo plano verificada
+    pantallas_precargadas_ms  módulos de pantallas importados
+
+Desde fuera se mide además lo que ocurre antes de la primera línea de
+main.py (intérprete, y la descompresión en el ejecutable onefile de
+PyInstaller), así que 'login_total' es lo que ve el usuario. La primera
+corrida (caché de disco fría) se reporta aparte.
+
+Requiere la base de datos del .env (la aplicación sale con error si no conecta).
+
+Uso:
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --repeticiones 20
+    python -m benchmarks.arranque --comando dist/HTF_Gimnasio_POS.exe
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_RAIZ = os.path.dirname(DIRECTORIO_BENCHMARKS)
+DIRECTORIO_ARRANQUE = os.path.join(DIRECTORIO_BENCHMARKS, 'resultados', 'arranque')
+
+sys.path.insert(0, DIRECTORIO_RAIZ)
+
+from benchmarks.suite import resumir, commit_actual, guardar_resultados, buscar_referencia, comparar
+
+ETAPAS = ('qt_listo_ms', 'login_visible_ms', 'bd_lista_ms', 'pantallas_precargadas_ms')
+INTERVALO_SONDEO_S = 0.005
+
+
+def medir_arranque(comando, timeout):
+    """
+    Lanzar la aplicación una vez y devolver sus tiempos:
+    {etapa: ms, 'interprete_ms', 'login_total_ms'} o {'error': ...}
+    """
+    descriptor, archivo = tempfile.mkstemp(prefix='arranque_', suffix='.json')
+    os.close(descriptor)
+    os.remove(archivo)
+
+    entorno = dict(os.environ, POS_ARCHIVO_ARRANQUE=archivo, POS_OVERLAY_RENDIMIENTO='0')
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        comando, cwd=DIRECTORIO_RAIZ, env=entorno,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while not os.path.exists(archivo):
+            if proceso.poll() is not None and not os.path.exists(archivo):
+                return {'error': f"la aplicación terminó con código {proceso.returncode} sin reportar tiempos"}
+            if time.perf_counter() - inicio > timeout:
+                return {'error': f"sin respuesta en {timeout} s"}
+            time.sleep(INTERVALO_SONDEO_S)
+        detectado_ms = (time.perf_counter() - inicio) * 1000
+
+        # El archivo puede estar a medio escribir en el instante en que aparece
+        for _ in range(100):
+            try:
+                with open(archivo, encoding='utf-8') as f:
+                    tiempos = json.load(f)
+                break
+            except (ValueError, OSError):
+                time.sleep(INTERVALO_SONDEO_S)
+        else:
+            return {'error': "archivo de tiempos ilegible"}
+
+        if 'error' in tiempos:
+            return tiempos
+
+        # Lo anterior a _INICIO_PROCESO: la última etapa se escribió justo antes de detectarse
+        tiempos['interprete_ms'] = round(max(0.0, detectado_ms - max(tiempos[e] for e in ETAPAS)), 1)
+        tiempos['login_total_ms'] = round(tiempos['interprete_ms'] + tiempos['login_visible_ms'], 1)
+        return tiempos
+    finally:
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+        if os.path.exists(archivo):
+            os.remove(archivo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo hasta la pantalla de login")
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--comando', help="Ejecutable a medir (por defecto: python main.py)")
+    parser.add_argument('--timeout', type=float, default=60, help="Segundos máximos por arranque")
+    parser.add_argument('--salida', default=DIRECTORIO_ARRANQUE)
+    parser.add_argument('--comparar', help="Archivo de resultados de referencia (por defecto el último compatible)")
+    parser.add_argument('--umbral', type=float, default=0.20, help="Cambio relativo de p95 que cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    comando = [args.comando] if args.comando else [sys.executable, os.path.join(DIRECTORIO_RAIZ, 'main.py')]
+    corridas = []
+    for i in range(args.repeticiones):
+        tiempos = medir_arranque(comando, args.timeout)
+        if 'error' in tiempos:
+            print(f"❌ Arranque {i + 1}: {tiempos['error']}")
+            return 1
+        corridas.append(tiempos)
+        print(f"  Arranque {i + 1:>3}: login visible a los {tiempos['login_total_ms']:>8.1f} ms "
+              f"(intérprete {tiempos['interprete_ms']:.0f} ms, BD lista {tiempos['bd_lista_ms']:.0f} ms)")
+
+    # La primera corrida (caché fría) no se mezcla con las demás
+    calientes = corridas[1:] or corridas
+    resultados = {
+        etapa.replace('_ms', ''): resumir([c[etapa] for c in calientes])
+        for etapa in ('interprete_ms',) + ETAPAS + ('login_total_ms',)
+    }
+    documento = {
+        'commit': commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {
+            'comando': 'ejecutable' if args.comando else 'python main.py',
+            'repeticiones': args.repeticiones,
+        },
+        'entorno': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+        },
+        'primera_corrida': corridas[0],
+        'resultados': resultados,
+    }
+
+    r = resultados['login_total']
+    print(f"\n📊 Login visible (sin la primera corrida): p50 {r['p50_ms']:.0f} ms, p95 {r['p95_ms']:.0f} ms; "
+          f"primera corrida {corridas[0]['login_total_ms']:.0f} ms")
+
+    ruta = guardar_resultados(documento, args.salida)
+    print(f"\n✅ Resultados guardados en {ruta}")
+
+    if args.comparar:
+        ruta_ref = args.comparar
+        with open(ruta_ref, encoding='utf-8') as f:
+            referencia = json.load(f)
+    else:
+        ruta_ref, referencia = buscar_referencia(args.salida, documento['parametros'], excluir=ruta)
+
+    if referencia:
+        regresiones = comparar(documento, referencia, args.umbral)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones sobre el umbral de {args.umbral:.0%}")
+            return 1
+    else:
+        print("\nSin resultados previos compatibles para comparar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
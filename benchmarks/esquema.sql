@@ -0,0 +1,285 @@
+-- Esquema mínimo del POS para la instancia temporal de benchmarks
+--
+-- Reconstruido a partir de las columnas que usan database/postgres_manager.py
+-- y las ventanas de ui/. No reemplaza al esquema de producción: solo contiene
+-- lo necesario para ejecutar las operaciones medidas con índices equivalentes
+-- (llaves primarias, únicos y el índice de código de barras).
+
+-- ========== TIPOS ==========
+
+CREATE TYPE tipo_rol_usuario AS ENUM ('administrador', 'recepcionista', 'sistemas');
+
+CREATE TYPE tipo_metodo_pago AS ENUM (
+    'efectivo', 'tarjeta_debito', 'tarjeta_credito', 'transferencia',
+    'cheque', 'deposito', 'vale', 'credito', 'mixto'
+);
+
+CREATE TYPE tipo_venta AS ENUM ('producto', 'mixta', 'servicio');
+
+CREATE TYPE tipo_movimiento_inventario AS ENUM (
+    'entrada', 'venta', 'merma', 'ajuste', 'devolucion', 'transferencia'
+);
+
+CREATE TYPE tipo_producto_detalle AS ENUM (
+    'varios', 'suplemento', 'accesorio', 'bebida', 'alimento', 'servicio'
+);
+
+-- ========== USUARIOS Y CLIENTES ==========
+
+CREATE TABLE usuarios (
+    id_usuario SERIAL PRIMARY KEY,
+    nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
+    contrasenia TEXT NOT NULL,
+    nombre_completo VARCHAR(150) NOT NULL,
+    rol tipo_rol_usuario NOT NULL DEFAULT 'recepcionista',
+    activo BOOLEAN NOT NULL DEFAULT TRUE,
+    ultimo_acceso TIMESTAMP
+);
+
+CREATE TABLE clientes (
+    id_cliente SERIAL PRIMARY KEY,
+    codigo VARCHAR(20) NOT NULL UNIQUE,
+    nombres VARCHAR(100) NOT NULL,
+    apellido_paterno VARCHAR(100),
+    apellido_materno VARCHAR(100),
+    nombre_completo VARCHAR(300) GENERATED ALWAYS AS (
+        nombres || ' ' || COALESCE(apellido_paterno, '') || ' ' || COALESCE(apellido_materno, '')
+    ) STORED,
+    telefono VARCHAR(20),
+    email VARCHAR(150),
+    rfc VARCHAR(13),
+    fecha_nacimiento DATE,
+    contacto_emergencia VARCHAR(150),
+    telefono_emergencia VARCHAR(20),
+    limite_credito NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    notas TEXT,
+    activo BOOLEAN NOT NULL DEFAULT TRUE,
+    fecha_registro TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    usuario_registro INTEGER REFERENCES usuarios(id_usuario)
+);
+
+-- ========== CATÁLOGOS ==========
+
+CREATE TABLE ca_ubicaciones (
+    id_ubicacion SERIAL PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    descripcion TEXT,
+    activa BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE TABLE ca_categorias_producto (
+    id_categoria SERIAL PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL UNIQUE
+);
+
+CREATE TABLE ca_unidades_medida (
+    id_unidad_medida SERIAL PRIMARY KEY,
+    nombre VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE ca_productos (
+    id_producto SERIAL PRIMARY KEY,
+    codigo_interno VARCHAR(50) NOT NULL UNIQUE,
+    codigo_barras VARCHAR(50),
+    nombre VARCHAR(200) NOT NULL,
+    descripcion TEXT,
+    id_categoria INTEGER REFERENCES ca_categorias_producto(id_categoria),
+    tipo_producto_fisico tipo_producto_detalle NOT NULL DEFAULT 'varios',
+    precio_venta NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    precio_mayoreo NUMERIC(12, 2),
+    cantidad_mayoreo INTEGER,
+    costo_promedio NUMERIC(12, 4) NOT NULL DEFAULT 0,
+    cantidad_medida NUMERIC(12, 3),
+    id_unidad_medida INTEGER REFERENCES ca_unidades_medida(id_unidad_medida),
+    requiere_refrigeracion BOOLEAN NOT NULL DEFAULT FALSE,
+    es_inventariable BOOLEAN NOT NULL DEFAULT TRUE,
+    permite_venta_sin_stock BOOLEAN NOT NULL DEFAULT FALSE,
+    aplica_iva BOOLEAN NOT NULL DEFAULT TRUE,
+    porcentaje_iva NUMERIC(5, 2) NOT NULL DEFAULT 16,
+    aplica_ieps BOOLEAN NOT NULL DEFAULT FALSE,
+    porcentaje_ieps NUMERIC(5, 2) NOT NULL DEFAULT 0,
+    activo BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE INDEX idx_productos_codigo_barras ON ca_productos (codigo_barras);
+
+CREATE TABLE ca_proveedores (
+    id_proveedor SERIAL PRIMARY KEY,
+    codigo VARCHAR(20) NOT NULL UNIQUE,
+    razon_social VARCHAR(200) NOT NULL,
+    nombre_comercial VARCHAR(200),
+    rfc VARCHAR(13),
+    contacto_nombre VARCHAR(150),
+    contacto_telefono VARCHAR(20),
+    contacto_email VARCHAR(150),
+    direccion TEXT,
+    dias_credito INTEGER NOT NULL DEFAULT 0,
+    limite_credito NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    saldo_actual NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    activo BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE TABLE ca_tipo_cuenta_pagar (
+    id_tipo_cuenta_pagar SERIAL PRIMARY KEY,
+    codigo VARCHAR(20) NOT NULL UNIQUE,
+    nombre VARCHAR(100) NOT NULL,
+    descripcion TEXT,
+    categoria VARCHAR(30) NOT NULL DEFAULT 'compras',
+    requiere_proveedor BOOLEAN NOT NULL DEFAULT FALSE,
+    cuenta_contable VARCHAR(50),
+    activo BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+-- ========== INVENTARIO ==========
+
+CREATE TABLE inventario (
+    id_inventario SERIAL PRIMARY KEY,
+    id_producto INTEGER NOT NULL REFERENCES ca_productos(id_producto),
+    id_ubicacion INTEGER NOT NULL REFERENCES ca_ubicaciones(id_ubicacion),
+    seccion VARCHAR(50),
+    stock_actual NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    stock_reservado NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    stock_disponible NUMERIC(12, 3) GENERATED ALWAYS AS (stock_actual - stock_reservado) STORED,
+    stock_minimo NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    stock_maximo NUMERIC(12, 3),
+    costo_promedio NUMERIC(12, 4) NOT NULL DEFAULT 0,
+    fecha_ultima_entrada TIMESTAMP,
+    fecha_ultima_salida TIMESTAMP,
+    activo BOOLEAN NOT NULL DEFAULT TRUE,
+    UNIQUE (id_producto, id_ubicacion)
+);
+
+-- ========== TURNOS Y VENTAS ==========
+
+CREATE TABLE turnos_caja (
+    id_turno SERIAL PRIMARY KEY,
+    numero_turno VARCHAR(30) NOT NULL,
+    id_usuario INTEGER NOT NULL REFERENCES usuarios(id_usuario),
+    fecha_apertura TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    fecha_cierre TIMESTAMP,
+    monto_inicial NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    total_efectivo NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    total_ventas NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    monto_esperado_efectivo NUMERIC(12, 2),
+    monto_real_efectivo NUMERIC(12, 2),
+    diferencia_efectivo NUMERIC(12, 2),
+    notas_apertura TEXT,
+    cerrado BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE ventas (
+    id_venta SERIAL PRIMARY KEY,
+    numero_ticket VARCHAR(30) NOT NULL,
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id_vendedor INTEGER NOT NULL REFERENCES usuarios(id_usuario),
+    id_cliente INTEGER REFERENCES clientes(id_cliente),
+    id_turno INTEGER REFERENCES turnos_caja(id_turno),
+    subtotal NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    descuento_general NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    iva NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    total NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    metodo_pago tipo_metodo_pago NOT NULL DEFAULT 'efectivo',
+    tipo_venta tipo_venta NOT NULL DEFAULT 'producto',
+    estado VARCHAR(20) NOT NULL DEFAULT 'completada',
+    es_credito BOOLEAN NOT NULL DEFAULT FALSE,
+    pagado BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE TABLE detalles_venta (
+    id_detalle SERIAL PRIMARY KEY,
+    id_venta INTEGER NOT NULL REFERENCES ventas(id_venta),
+    id_producto INTEGER REFERENCES ca_productos(id_producto),
+    tipo_producto tipo_producto_detalle NOT NULL DEFAULT 'varios',
+    codigo_interno VARCHAR(50),
+    cantidad NUMERIC(12, 3) NOT NULL,
+    precio_unitario NUMERIC(12, 2) NOT NULL,
+    subtotal_linea NUMERIC(12, 2) NOT NULL,
+    total_linea NUMERIC(12, 2) NOT NULL,
+    nombre_producto VARCHAR(200),
+    descripcion_producto TEXT,
+    utilidad_linea NUMERIC(12, 2)
+);
+
+CREATE TABLE movimientos_inventario (
+    id_movimiento SERIAL PRIMARY KEY,
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id_producto INTEGER NOT NULL REFERENCES ca_productos(id_producto),
+    id_ubicacion INTEGER REFERENCES ca_ubicaciones(id_ubicacion),
+    tipo_movimiento tipo_movimiento_inventario NOT NULL,
+    cantidad NUMERIC(12, 3) NOT NULL,
+    stock_anterior NUMERIC(12, 3),
+    stock_nuevo NUMERIC(12, 3),
+    costo_unitario NUMERIC(12, 4),
+    costo_promedio_anterior NUMERIC(12, 4),
+    costo_promedio_nuevo NUMERIC(12, 4),
+    id_usuario INTEGER REFERENCES usuarios(id_usuario),
+    id_venta INTEGER REFERENCES ventas(id_venta),
+    motivo TEXT
+);
+
+-- ========== CUENTAS POR COBRAR ==========
+
+CREATE TABLE cuentas_por_cobrar (
+    id_cxc SERIAL PRIMARY KEY,
+    numero_cuenta VARCHAR(30) NOT NULL,
+    id_cliente INTEGER NOT NULL REFERENCES clientes(id_cliente),
+    id_venta INTEGER NOT NULL REFERENCES ventas(id_venta),
+    total NUMERIC(12, 2) NOT NULL,
+    pagado NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    saldo NUMERIC(12, 2) NOT NULL,
+    fecha_vencimiento TIMESTAMP,
+    estado VARCHAR(20) NOT NULL DEFAULT 'activa',
+    creada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    pagada BOOLEAN NOT NULL DEFAULT FALSE,
+    activo BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE TABLE cxc_detalle_pagos (
+    id_pago SERIAL PRIMARY KEY,
+    id_cxc INTEGER NOT NULL REFERENCES cuentas_por_cobrar(id_cxc),
+    fecha_pago TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    monto NUMERIC(12, 2) NOT NULL,
+    metodo_pago tipo_metodo_pago NOT NULL DEFAULT 'efectivo',
+    id_usuario INTEGER REFERENCES usuarios(id_usuario)
+);
+
+-- ========== CUENTAS POR PAGAR ==========
+
+CREATE TABLE cuentas_por_pagar (
+    id_cuenta_pagar SERIAL PRIMARY KEY,
+    numero_cuenta VARCHAR(30) NOT NULL,
+    id_tipo_cuenta_pagar INTEGER NOT NULL REFERENCES ca_tipo_cuenta_pagar(id_tipo_cuenta_pagar),
+    id_proveedor INTEGER REFERENCES ca_proveedores(id_proveedor),
+    id_usuario INTEGER REFERENCES usuarios(id_usuario),
+    fecha_cuenta DATE NOT NULL DEFAULT CURRENT_DATE,
+    subtotal NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    descuento NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    impuestos NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    total NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    pagado NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    saldo NUMERIC(12, 2) GENERATED ALWAYS AS (total - pagado) STORED,
+    estado VARCHAR(20) NOT NULL DEFAULT 'activa',
+    numero_factura VARCHAR(50),
+    forma_pago VARCHAR(30) DEFAULT 'credito',
+    fecha_vencimiento DATE,
+    notas TEXT
+);
+
+CREATE TABLE cxp_detalle_productos (
+    id_detalle SERIAL PRIMARY KEY,
+    id_cuenta_pagar INTEGER NOT NULL REFERENCES cuentas_por_pagar(id_cuenta_pagar),
+    id_producto INTEGER NOT NULL REFERENCES ca_productos(id_producto),
+    cantidad NUMERIC(12, 3) NOT NULL,
+    precio_unitario NUMERIC(12, 4) NOT NULL,
+    descuento_linea NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    subtotal_linea NUMERIC(12, 2) NOT NULL
+);
+
+CREATE TABLE cxp_pagos (
+    id_pago SERIAL PRIMARY KEY,
+    id_cuenta_pagar INTEGER NOT NULL REFERENCES cuentas_por_pagar(id_cuenta_pagar),
+    fecha_pago TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    monto NUMERIC(12, 2) NOT NULL,
+    forma_pago VARCHAR(30),
+    id_usuario INTEGER REFERENCES usuarios(id_usuario)
+);
@@ -0,0 +1,662 @@
+"""
+Generador de datos sintéticos a escala de producción
+
+Llena el esquema del POS con proporciones realistas: catálogo de productos
+repartido en ca_ubicaciones, clientes, turnos de caja por cajero y día,
+ventas con estacionalidad por hora y día de la semana, detalles de venta,
+movimientos de inventario, cuentas por cobrar con sus pagos y cuentas por
+pagar con sus detalles, pagos y entradas de inventario.
+
+Es determinista: con la misma semilla, escala y fecha final produce
+exactamente los mismos datos (ids incluidos). La carga se hace con COPY,
+repartiendo los días en bloques que varios procesos cargan en paralelo.
+
+Uso:
+    python -m benchmarks.generador --escala media --procesos 4
+    python -m benchmarks.generador --escala produccion --fecha-fin 2026-06-30 \\
+        --host 127.0.0.1 --port 5433 --database pos_bench --user postgres --password bench
+"""
+
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+import random
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_RAIZ)
+
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+    logging.warning("psycopg2 no está instalado. Instala con: pip install psycopg2-binary")
+
+
+# ========== PARÁMETROS ==========
+
+ESCALAS = {
+    'pequena': {
+        'productos': 2000, 'clientes': 500, 'cajeros': 3, 'proveedores': 20,
+        'dias': 60, 'ventas_dia': 150,
+    },
+    'media': {
+        'productos': 10000, 'clientes': 5000, 'cajeros': 5, 'proveedores': 60,
+        'dias': 180, 'ventas_dia': 800,
+    },
+    # ~2.2 M ventas, ~6 M detalles y ~6 M movimientos
+    'produccion': {
+        'productos': 30000, 'clientes': 20000, 'cajeros': 8, 'proveedores': 150,
+        'dias': 730, 'ventas_dia': 3000,
+    },
+}
+
+UBICACIONES = [
+    'Mostrador', 'Recepción', 'Bodega 1', 'Bodega 2', 'Almacén',
+    'Refrigerador 1', 'Refrigerador 2', 'Área de Ventas',
+]
+CATEGORIAS = [
+    'Bebidas', 'Suplementos', 'Accesorios', 'Alimentos', 'Snacks',
+    'Higiene', 'Ropa', 'Servicios', 'Lockers', 'Varios',
+]
+UNIDADES = ['pieza', 'kg', 'g', 'litro', 'ml', 'caja', 'paquete']
+TIPOS_PRODUCTO = ['bebida', 'suplemento', 'accesorio', 'alimento', 'alimento', 'varios', 'accesorio', 'servicio', 'varios', 'varios']
+
+NOMBRES_BASE = ['Agua', 'Proteína', 'Barra', 'Toalla', 'Guantes', 'Bebida', 'Creatina', 'Shaker',
+                'Electrolitos', 'Pre-entreno', 'Galletas', 'Café', 'Jabón', 'Playera', 'Cinturón', 'Vitamina']
+VARIANTES = ['Natural', 'Chocolate', 'Vainilla', 'Fresa', 'Limón', 'Grande', 'Chica', 'Mediana', 'Negra', 'Azul']
+NOMBRES_PERSONA = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Miguel',
+                   'Fernanda', 'Diego', 'Valeria', 'Andrés', 'Paola', 'Ricardo']
+APELLIDOS = ['García', 'López', 'Martínez', 'Hernández', 'Pérez', 'Sánchez', 'Ramírez', 'Torres',
+             'Flores', 'Rivera', 'Gómez', 'Díaz', 'Ruiz', 'Morales', 'Jiménez', 'Vargas']
+
+# Peso relativo de ventas por hora del día (horario del gimnasio 6:00-22:59):
+# picos en la mañana temprano y al salir del trabajo
+PESOS_HORA = {
+    6: 6, 7: 10, 8: 9, 9: 6, 10: 4, 11: 3, 12: 3, 13: 4, 14: 3,
+    15: 3, 16: 4, 17: 7, 18: 11, 19: 12, 20: 9, 21: 5, 22: 2,
+}
+# Lunes a domingo
+PESOS_DIA_SEMANA = [1.0, 1.0, 0.95, 0.95, 0.9, 0.65, 0.35]
+# Líneas por ticket (1 a 8)
+PESOS_LINEAS = [35, 25, 15, 10, 6, 4, 3, 2]
+MAX_LINEAS = len(PESOS_LINEAS)
+PESOS_CANTIDAD = [80, 15, 5]
+METODOS_PAGO = ['efectivo', 'tarjeta_debito', 'tarjeta_credito', 'transferencia', 'credito']
+PESOS_METODO = [55, 20, 12, 8, 5]
+
+HASH_PLACEHOLDER = '$2b$12$generadorgeneradorgeneradorgeneradorgeneradorgenerad'
+DIAS_POR_BLOQUE = 7
+
+
+def _rng(semilla, *partes):
+    """RNG independiente y reproducible para una parte del generador"""
+    return random.Random('-'.join(str(p) for p in (semilla,) + partes))
+
+
+def _dinero(valor):
+    return Decimal(valor).quantize(Decimal('0.01'))
+
+
+# ========== COPY ==========
+
+def _copy(cursor, tabla, columnas, filas):
+    """Cargar filas con COPY ... FROM STDIN (CSV); None se carga como NULL"""
+    if not filas:
+        return 0
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerows(filas)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    return len(filas)
+
+
+def _conectar(db_config):
+    return psycopg2.connect(
+        host=db_config.get('host', 'localhost'),
+        port=db_config.get('port', '5432'),
+        database=db_config.get('database'),
+        user=db_config.get('user'),
+        password=db_config.get('password')
+    )
+
+
+# ========== CATÁLOGOS ==========
+
+def generar_catalogo(semilla, escala):
+    """
+    Generar catálogos, usuarios, clientes, productos e inventario.
+    Devuelve (tablas, catalogo) donde tablas = [(tabla, columnas, filas)]
+    y catalogo es el resumen que necesitan los procesos de ventas.
+    """
+    rng = _rng(semilla, 'catalogo')
+    tablas = []
+
+    tablas.append(('ca_ubicaciones', ['id_ubicacion', 'nombre', 'descripcion', 'activa'], [
+        (i + 1, nombre, f'Ubicación {nombre}', True) for i, nombre in enumerate(UBICACIONES)
+    ]))
+    tablas.append(('ca_categorias_producto', ['id_categoria', 'nombre'], [
+        (i + 1, nombre) for i, nombre in enumerate(CATEGORIAS)
+    ]))
+    tablas.append(('ca_unidades_medida', ['id_unidad_medida', 'nombre'], [
+        (i + 1, nombre) for i, nombre in enumerate(UNIDADES)
+    ]))
+
+    # Usuarios: 1 = admin, 2..N+1 = cajeros
+    usuarios = [(1, 'admin', HASH_PLACEHOLDER, 'Administrador', 'administrador', True)]
+    for c in range(escala['cajeros']):
+        usuarios.append((c + 2, f'cajero{c + 1}', HASH_PLACEHOLDER, f'Cajero {c + 1}', 'recepcionista', True))
+    tablas.append(('usuarios', ['id_usuario', 'nombre_usuario', 'contrasenia', 'nombre_completo', 'rol', 'activo'], usuarios))
+
+    # Clientes: 1 y 2 son los genéricos que usa la aplicación
+    clientes = [
+        (1, 'CLI000001', 'Público', 'General', None, None, 0, datetime(2020, 1, 1)),
+        (2, 'CLI000002', 'Cliente', 'Mostrador', None, None, 0, datetime(2020, 1, 1)),
+    ]
+    for i in range(3, escala['clientes'] + 3):
+        clientes.append((
+            i, f'CLI{i:06d}',
+            rng.choice(NOMBRES_PERSONA), rng.choice(APELLIDOS), rng.choice(APELLIDOS),
+            f'55{rng.randrange(10 ** 8):08d}',
+            rng.choice([0, 0, 1000, 2000, 5000]),
+            datetime(2020, 1, 1) + timedelta(days=rng.randrange(1500)),
+        ))
+    tablas.append(('clientes', [
+        'id_cliente', 'codigo', 'nombres', 'apellido_paterno', 'apellido_materno',
+        'telefono', 'limite_credito', 'fecha_registro'
+    ], clientes))
+
+    productos = []
+    inventario = []
+    precios, costos, nombres, codigos, tipos, ubicacion_principal = [], [], [], [], [], []
+    id_inventario = 0
+    for i in range(1, escala['productos'] + 1):
+        categoria = rng.randrange(len(CATEGORIAS))
+        nombre = f'{rng.choice(NOMBRES_BASE)} {rng.choice(VARIANTES)} {i}'
+        precio = _dinero(rng.lognormvariate(4.2, 0.8) + 5)
+        costo = (precio * Decimal(str(round(rng.uniform(0.45, 0.8), 2)))).quantize(Decimal('0.0001'))
+        activo = rng.random() > 0.03
+        productos.append((
+            i, f'PROD{i:07d}', f'750{i:010d}', nombre, f'Producto sintético {i}',
+            categoria + 1, TIPOS_PRODUCTO[categoria], precio,
+            _dinero(precio * Decimal('0.9')) if rng.random() < 0.2 else None,
+            rng.choice([6, 12, 24]) if rng.random() < 0.2 else None,
+            costo, 1, rng.random() < 0.1, categoria != 7, activo,
+        ))
+        precios.append(precio)
+        costos.append(costo)
+        nombres.append(nombre)
+        codigos.append(f'PROD{i:07d}')
+        tipos.append(TIPOS_PRODUCTO[categoria])
+
+        # 1 a 3 ubicaciones por producto
+        ubicaciones = rng.sample(range(1, len(UBICACIONES) + 1), rng.choice([1, 1, 1, 2, 2, 3]))
+        ubicacion_principal.append(ubicaciones[0])
+        for id_ubicacion in ubicaciones:
+            id_inventario += 1
+            minimo = rng.choice([5, 5, 10, 20])
+            maximo = minimo * rng.choice([10, 15, 20])
+            inventario.append((
+                id_inventario, i, id_ubicacion, f'S{rng.randrange(1, 20)}',
+                rng.randrange(0, maximo + 20), minimo, maximo, costo, True,
+            ))
+
+    tablas.append(('ca_productos', [
+        'id_producto', 'codigo_interno', 'codigo_barras', 'nombre', 'descripcion',
+        'id_categoria', 'tipo_producto_fisico', 'precio_venta', 'precio_mayoreo',
+        'cantidad_mayoreo', 'costo_promedio', 'id_unidad_medida', 'requiere_refrigeracion',
+        'es_inventariable', 'activo'
+    ], productos))
+    tablas.append(('inventario', [
+        'id_inventario', 'id_producto', 'id_ubicacion', 'seccion', 'stock_actual',
+        'stock_minimo', 'stock_maximo', 'costo_promedio', 'activo'
+    ], inventario))
+
+    proveedores = []
+    for i in range(1, escala['proveedores'] + 1):
+        proveedores.append((
+            i, f'PROV{i:04d}', f'Proveedor {i} SA de CV', f'Proveedor {i}',
+            f'55{rng.randrange(10 ** 8):08d}', rng.choice([0, 15, 30, 30, 60]),
+            rng.choice([20000, 50000, 100000]), True,
+        ))
+    tablas.append(('ca_proveedores', [
+        'id_proveedor', 'codigo', 'razon_social', 'nombre_comercial', 'contacto_telefono',
+        'dias_credito', 'limite_credito', 'activo'
+    ], proveedores))
+
+    tablas.append(('ca_tipo_cuenta_pagar', [
+        'id_tipo_cuenta_pagar', 'codigo', 'nombre', 'categoria', 'requiere_proveedor', 'activo'
+    ], [
+        (1, 'COMP', 'Compra de mercancía', 'compras', True, True),
+        (2, 'SERV', 'Servicios', 'servicios', True, True),
+        (3, 'RENT', 'Renta', 'gastos', False, True),
+        (4, 'UTIL', 'Luz, agua y teléfono', 'gastos', False, True),
+    ]))
+
+    # Popularidad tipo Zipf sobre una permutación de los productos activos
+    activos = [p[0] for p in productos if p[-1]]
+    rng.shuffle(activos)
+    pesos_acumulados = list(accumulate(1 / (rango + 1) ** 0.9 for rango in range(len(activos))))
+
+    catalogo = {
+        'productos_activos': activos,
+        'pesos_acumulados': pesos_acumulados,
+        'precios': precios,
+        'costos': costos,
+        'nombres': nombres,
+        'codigos': codigos,
+        'tipos': tipos,
+        'ubicacion_principal': ubicacion_principal,
+        'cajeros': [c + 2 for c in range(escala['cajeros'])],
+        'clientes': escala['clientes'],
+    }
+    return tablas, catalogo
+
+
+def planear_dias(semilla, escala, fecha_fin):
+    """
+    Número de ventas por día (tendencia + día de la semana + ruido) y el
+    primer id_venta de cada día, para que los bloques paralelos no choquen.
+    """
+    rng = _rng(semilla, 'plan')
+    dias = []
+    siguiente_id = 1
+    total_dias = escala['dias']
+    for indice in range(total_dias):
+        fecha = fecha_fin - timedelta(days=total_dias - 1 - indice)
+        tendencia = 0.8 + 0.4 * indice / max(total_dias - 1, 1)
+        n = max(1, round(escala['ventas_dia'] * tendencia * PESOS_DIA_SEMANA[fecha.weekday()] * rng.uniform(0.85, 1.15)))
+        dias.append((indice, fecha, n, siguiente_id))
+        siguiente_id += n
+    return dias
+
+
+# ========== VENTAS (PROCESOS) ==========
+
+_CATALOGO = None
+
+
+def _inicializar_proceso(catalogo):
+    global _CATALOGO
+    _CATALOGO = catalogo
+
+
+def generar_bloque(semilla, numero_bloque, dias, fecha_fin):
+    """
+    Generar turnos, ventas, detalles, movimientos y CxC de un bloque de días.
+    Los ids se derivan del plan (id_venta) para ser estables entre corridas:
+        id_detalle = id_movimiento = (id_venta - 1) * MAX_LINEAS + línea
+        id_cxc = id_venta, id_pago = id_cxc * 4 + n
+    """
+    catalogo = _CATALOGO
+    rng = _rng(semilla, 'bloque', numero_bloque)
+    cajeros = catalogo['cajeros']
+    horas = list(PESOS_HORA)
+    pesos_horas = list(PESOS_HORA.values())
+    stock_corriente = {}
+
+    turnos, ventas, detalles, movimientos, cxc, pagos = [], [], [], [], [], []
+
+    for indice_dia, fecha, n_ventas, primer_id in dias:
+        apertura = datetime.combine(fecha, datetime.min.time()) + timedelta(hours=6)
+        acumulado = {c: {'efectivo': Decimal('0'), 'total': Decimal('0')} for c in cajeros}
+
+        # Horas ordenadas para que los tickets del día sean cronológicos
+        momentos = sorted(
+            apertura + timedelta(hours=h - 6, seconds=rng.randrange(3600))
+            for h in rng.choices(horas, weights=pesos_horas, k=n_ventas)
+        )
+
+        for consecutivo, momento in enumerate(momentos):
+            id_venta = primer_id + consecutivo
+            posicion_cajero = rng.randrange(len(cajeros))
+            id_vendedor = cajeros[posicion_cajero]
+            id_turno = indice_dia * len(cajeros) + posicion_cajero + 1
+            metodo = rng.choices(METODOS_PAGO, weights=PESOS_METODO)[0]
+            es_credito = metodo == 'credito'
+            id_cliente = rng.randrange(3, catalogo['clientes'] + 3) if es_credito or rng.random() < 0.1 else 2
+
+            n_lineas = rng.choices(range(1, MAX_LINEAS + 1), weights=PESOS_LINEAS)[0]
+            elegidos = rng.choices(catalogo['productos_activos'], cum_weights=catalogo['pesos_acumulados'], k=n_lineas)
+            total = Decimal('0')
+            for linea, id_producto in enumerate(dict.fromkeys(elegidos)):
+                cantidad = rng.choices((1, 2, 3), weights=PESOS_CANTIDAD)[0]
+                precio = catalogo['precios'][id_producto - 1]
+                costo = catalogo['costos'][id_producto - 1]
+                importe = precio * cantidad
+                total += importe
+                id_detalle = (id_venta - 1) * MAX_LINEAS + linea + 1
+                detalles.append((
+                    id_detalle, id_venta, id_producto, catalogo['tipos'][id_producto - 1], catalogo['codigos'][id_producto - 1],
+                    cantidad, precio, importe, importe, catalogo['nombres'][id_producto - 1],
+                    _dinero((precio - costo) * cantidad),
+                ))
+
+                # Stock aproximado: corre por bloque (los bloques se generan en paralelo)
+                anterior = stock_corriente.get(id_producto, rng.randrange(50, 300))
+                nuevo = anterior - cantidad
+                if nuevo < 0:
+                    nuevo = anterior + rng.randrange(50, 200)  # Reabasto implícito
+                stock_corriente[id_producto] = nuevo
+                movimientos.append((
+                    id_detalle, momento, id_producto, catalogo['ubicacion_principal'][id_producto - 1],
+                    'venta', -cantidad, anterior, nuevo, costo, costo, costo, id_vendedor, id_venta,
+                    f"Venta TKT-{fecha:%Y%m%d}-{consecutivo + 1:06d}",
+                ))
+
+            ventas.append((
+                id_venta, f'TKT-{fecha:%Y%m%d}-{consecutivo + 1:06d}', momento, id_vendedor, id_cliente,
+                id_turno, total, 0, 0, total, metodo, 'producto',
+                'cancelada' if rng.random() < 0.005 else 'completada', es_credito, not es_credito,
+            ))
+            acumulado[id_vendedor]['total'] += total
+            if metodo == 'efectivo':
+                acumulado[id_vendedor]['efectivo'] += total
+
+            if es_credito:
+                vencimiento = momento + timedelta(days=30)
+                pagado = Decimal('0')
+                for n in range(rng.choice([0, 0, 1, 1, 2, 3])):
+                    fecha_pago = momento + timedelta(days=rng.randrange(1, 45))
+                    if fecha_pago.date() > fecha_fin:
+                        break
+                    monto = min(total - pagado, _dinero(total * Decimal(str(rng.choice([0.25, 0.5, 1])))))
+                    if monto <= 0:
+                        break
+                    pagado += monto
+                    pagos.append((id_venta * 4 + n, id_venta, fecha_pago, monto, 'efectivo', id_vendedor))
+                saldo = total - pagado
+                if saldo == 0:
+                    estado = 'pagada'
+                elif vencimiento.date() < fecha_fin:
+                    estado = 'vencida'
+                else:
+                    estado = 'activa'
+                cxc.append((
+                    id_venta, f'CXC-{id_venta:08d}', id_cliente, id_venta, total, pagado, saldo,
+                    vencimiento, estado, momento, saldo == 0, True,
+                ))
+
+        for posicion, id_usuario in enumerate(cajeros):
+            inicial = Decimal('500')
+            esperado = inicial + acumulado[id_usuario]['efectivo']
+            real = esperado + _dinero(rng.choice([0, 0, 0, -10, 10, -50, 20]))
+            turnos.append((
+                indice_dia * len(cajeros) + posicion + 1,
+                f'TURNO-{fecha:%Y%m%d}-{posicion + 1:04d}', id_usuario,
+                apertura, apertura + timedelta(hours=17), inicial,
+                acumulado[id_usuario]['efectivo'], acumulado[id_usuario]['total'],
+                esperado, real, real - esperado, True,
+            ))
+
+    return turnos, ventas, detalles, movimientos, cxc, pagos
+
+
+def cargar_bloque(db_config, semilla, numero_bloque, dias, fecha_fin):
+    """Generar un bloque y cargarlo con COPY en su propia conexión y transacción"""
+    inicio = time.perf_counter()
+    turnos, ventas, detalles, movimientos, cxc, pagos = generar_bloque(semilla, numero_bloque, dias, fecha_fin)
+
+    conexion = _conectar(db_config)
+    try:
+        with conexion.cursor() as cursor:
+            _copy(cursor, 'turnos_caja', [
+                'id_turno', 'numero_turno', 'id_usuario', 'fecha_apertura', 'fecha_cierre',
+                'monto_inicial', 'total_efectivo', 'total_ventas', 'monto_esperado_efectivo',
+                'monto_real_efectivo', 'diferencia_efectivo', 'cerrado'
+            ], turnos)
+            _copy(cursor, 'ventas', [
+                'id_venta', 'numero_ticket', 'fecha', 'id_vendedor', 'id_cliente', 'id_turno',
+                'subtotal', 'descuento_general', 'iva', 'total', 'metodo_pago', 'tipo_venta',
+                'estado', 'es_credito', 'pagado'
+            ], ventas)
+            _copy(cursor, 'detalles_venta', [
+                'id_detalle', 'id_venta', 'id_producto', 'tipo_producto', 'codigo_interno',
+                'cantidad', 'precio_unitario', 'subtotal_linea', 'total_linea',
+                'nombre_producto', 'utilidad_linea'
+            ], detalles)
+            _copy(cursor, 'movimientos_inventario', [
+                'id_movimiento', 'fecha', 'id_producto', 'id_ubicacion', 'tipo_movimiento',
+                'cantidad', 'stock_anterior', 'stock_nuevo', 'costo_unitario',
+                'costo_promedio_anterior', 'costo_promedio_nuevo', 'id_usuario', 'id_venta', 'motivo'
+            ], movimientos)
+            _copy(cursor, 'cuentas_por_cobrar', [
+                'id_cxc', 'numero_cuenta', 'id_cliente', 'id_venta', 'total', 'pagado', 'saldo',
+                'fecha_vencimiento', 'estado', 'creada_en', 'pagada', 'activo'
+            ], cxc)
+            _copy(cursor, 'cxc_detalle_pagos', [
+                'id_pago', 'id_cxc', 'fecha_pago', 'monto', 'metodo_pago', 'id_usuario'
+            ], pagos)
+        conexion.commit()
+    finally:
+        conexion.close()
+
+    return {
+        'bloque': numero_bloque,
+        'ventas': len(ventas),
+        'detalles': len(detalles),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+# ========== CUENTAS POR PAGAR ==========
+
+def generar_cuentas_por_pagar(semilla, escala, catalogo, fecha_fin):
+    """Compras a proveedores (con detalle, pagos y entradas de inventario) y gastos fijos"""
+    rng = _rng(semilla, 'cxp')
+    cuentas, detalles, pagos, entradas = [], [], [], []
+    id_cuenta = 0
+    id_detalle = 0
+    id_pago = 0
+    dias_credito = {}
+
+    inicio = fecha_fin - timedelta(days=escala['dias'] - 1)
+    for indice in range(escala['dias']):
+        fecha = inicio + timedelta(days=indice)
+
+        # Compras: ~1 por cada 3 proveedores a la semana
+        compras_hoy = sum(1 for _ in range(escala['proveedores']) if rng.random() < 1 / 21)
+        # Gastos fijos el día 1 de cada mes (renta y servicios)
+        gastos_hoy = [3, 4] if fecha.day == 1 else []
+
+        for tipo in [1] * compras_hoy + gastos_hoy:
+            id_cuenta += 1
+            id_proveedor = rng.randrange(1, escala['proveedores'] + 1) if tipo == 1 else None
+            plazo = dias_credito.setdefault(id_proveedor, rng.choice([0, 15, 30, 30, 60]))
+            total = Decimal('0')
+
+            if tipo == 1:
+                for id_producto in dict.fromkeys(rng.choices(catalogo['productos_activos'], cum_weights=catalogo['pesos_acumulados'], k=rng.randrange(3, 16))):
+                    id_detalle += 1
+                    cantidad = rng.choice([6, 12, 24, 48])
+                    costo = catalogo['costos'][id_producto - 1]
+                    importe = _dinero(costo * cantidad)
+                    total += importe
+                    detalles.append((id_detalle, id_cuenta, id_producto, cantidad, costo, 0, importe))
+                    entradas.append((
+                        datetime.combine(fecha, datetime.min.time()) + timedelta(hours=10),
+                        id_producto, catalogo['ubicacion_principal'][id_producto - 1], 'entrada',
+                        cantidad, costo, costo, costo, 1, f'Compra CXP-{id_cuenta:06d}',
+                    ))
+            else:
+                total = _dinero(rng.uniform(3000, 25000))
+
+            vencimiento = fecha + timedelta(days=plazo)
+            pagado = Decimal('0')
+            if vencimiento < fecha_fin - timedelta(days=5) or plazo == 0:
+                id_pago += 1
+                pagado = total
+                pagos.append((id_pago, id_cuenta, datetime.combine(min(vencimiento, fecha_fin), datetime.min.time()) + timedelta(hours=12), total, 'transferencia', 1))
+            estado = 'pagada' if pagado == total else ('vencida' if vencimiento < fecha_fin else 'activa')
+
+            cuentas.append((
+                id_cuenta, f'CXP-{id_cuenta:06d}', tipo, id_proveedor, 1, fecha,
+                total, 0, 0, total, pagado, estado, f'F-{id_cuenta}',
+                'contado' if plazo == 0 else 'credito', vencimiento,
+            ))
+
+    return [
+        ('cuentas_por_pagar', [
+            'id_cuenta_pagar', 'numero_cuenta', 'id_tipo_cuenta_pagar', 'id_proveedor', 'id_usuario',
+            'fecha_cuenta', 'subtotal', 'descuento', 'impuestos', 'total', 'pagado', 'estado',
+            'numero_factura', 'forma_pago', 'fecha_vencimiento'
+        ], cuentas),
+        ('cxp_detalle_productos', [
+            'id_detalle', 'id_cuenta_pagar', 'id_producto', 'cantidad', 'precio_unitario',
+            'descuento_linea', 'subtotal_linea'
+        ], detalles),
+        ('cxp_pagos', [
+            'id_pago', 'id_cuenta_pagar', 'fecha_pago', 'monto', 'forma_pago', 'id_usuario'
+        ], pagos),
+        # Sin id explícito: se numeran después de los movimientos de venta
+        ('movimientos_inventario', [
+            'fecha', 'id_producto', 'id_ubicacion', 'tipo_movimiento', 'cantidad',
+            'costo_unitario', 'costo_promedio_anterior', 'costo_promedio_nuevo', 'id_usuario', 'motivo'
+        ], entradas),
+    ]
+
+
+# ========== ORQUESTACIÓN ==========
+
+SECUENCIAS = [
+    ('usuarios', 'id_usuario'), ('clientes', 'id_cliente'), ('ca_ubicaciones', 'id_ubicacion'),
+    ('ca_categorias_producto', 'id_categoria'), ('ca_unidades_medida', 'id_unidad_medida'),
+    ('ca_productos', 'id_producto'), ('inventario', 'id_inventario'), ('ca_proveedores', 'id_proveedor'),
+    ('ca_tipo_cuenta_pagar', 'id_tipo_cuenta_pagar'), ('turnos_caja', 'id_turno'), ('ventas', 'id_venta'),
+    ('detalles_venta', 'id_detalle'), ('movimientos_inventario', 'id_movimiento'),
+    ('cuentas_por_cobrar', 'id_cxc'), ('cxc_detalle_pagos', 'id_pago'),
+    ('cuentas_por_pagar', 'id_cuenta_pagar'), ('cxp_detalle_productos', 'id_detalle'), ('cxp_pagos', 'id_pago'),
+]
+
+
+def _ajustar_secuencias(cursor):
+    for tabla, columna in SECUENCIAS:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX({columna}) FROM {tabla}), 0) + 1, FALSE)",
+            (tabla, columna)
+        )
+
+
+def generar(db_config, escala='pequena', semilla=42, procesos=None, fecha_fin=None, parametros=None):
+    """
+    Llenar la base de datos indicada. La base debe tener el esquema y estar vacía.
+
+    Args:
+        db_config: configuración en el formato de Config.get_postgres_config()
+        escala: 'pequena', 'media' o 'produccion'
+        semilla: semilla de todos los generadores
+        procesos: procesos de carga en paralelo (por defecto, CPUs disponibles)
+        fecha_fin: último día con ventas (por defecto hoy; fíjala para reproducir exacto)
+        parametros: valores que reemplazan los de la escala (p. ej. {'dias': 30})
+
+    Returns:
+        Diccionario con los conteos cargados y el tiempo total
+    """
+    if not PSYCOPG2_AVAILABLE:
+        raise ImportError("psycopg2 library not installed")
+
+    escala_parametros = dict(ESCALAS[escala])
+    escala_parametros.update(parametros or {})
+    fecha_fin = fecha_fin or date.today()
+    procesos = procesos or os.cpu_count() or 2
+    inicio = time.perf_counter()
+
+    conexion = _conectar(db_config)
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM ca_productos) OR EXISTS (SELECT 1 FROM ventas)")
+            if cursor.fetchone()[0]:
+                raise RuntimeError("La base de datos ya tiene datos; el generador solo llena bases vacías")
+
+        tablas, catalogo = generar_catalogo(semilla, escala_parametros)
+        with conexion.cursor() as cursor:
+            for tabla, columnas, filas in tablas:
+                _copy(cursor, tabla, columnas, filas)
+        conexion.commit()
+        logging.info(f"✅ Catálogos cargados ({escala_parametros['productos']} productos)")
+
+        plan = planear_dias(semilla, escala_parametros, fecha_fin)
+        bloques = [plan[i:i + DIAS_POR_BLOQUE] for i in range(0, len(plan), DIAS_POR_BLOQUE)]
+
+        total_ventas = 0
+        total_detalles = 0
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso, initargs=(catalogo,)) as pool:
+            futuros = [
+                pool.submit(cargar_bloque, db_config, semilla, numero, bloque, fecha_fin)
+                for numero, bloque in enumerate(bloques)
+            ]
+            for futuro in futuros:
+                resultado = futuro.result()
+                total_ventas += resultado['ventas']
+                total_detalles += resultado['detalles']
+                logging.info(
+                    f"Bloque {resultado['bloque'] + 1}/{len(bloques)}: {resultado['ventas']} ventas "
+                    f"en {resultado['segundos']:.1f} s"
+                )
+
+        with conexion.cursor() as cursor:
+            _ajustar_secuencias(cursor)
+            for tabla, columnas, filas in generar_cuentas_por_pagar(semilla, escala_parametros, catalogo, fecha_fin):
+                _copy(cursor, tabla, columnas, filas)
+            _ajustar_secuencias(cursor)
+        conexion.commit()
+
+        # ANALYZE fuera de transacción para que el planificador vea los volúmenes reales
+        conexion.autocommit = True
+        with conexion.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        conexion.close()
+
+    resumen = {
+        'escala': escala,
+        'parametros': escala_parametros,
+        'semilla': semilla,
+        'fecha_fin': fecha_fin.isoformat(),
+        'ventas': total_ventas,
+        'detalles_venta': total_detalles,
+        'segundos': round(time.perf_counter() - inicio, 1),
+    }
+    logging.info(f"✅ Datos generados: {total_ventas} ventas, {total_detalles} detalles en {resumen['segundos']} s")
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos del POS")
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--fecha-fin', type=date.fromisoformat, default=None, help="AAAA-MM-DD (por defecto hoy)")
+    parser.add_argument('--host')
+    parser.add_argument('--port')
+    parser.add_argument('--database')
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    args = parser.parse_args(argv)
+
+    # Por defecto la base del .env; cada opción la reemplaza
+    from utils.config import Config
+    db_config = Config().get_postgres_config()
+    for clave in ('host', 'port', 'database', 'user', 'password'):
+        if getattr(args, clave):
+            db_config[clave] = getattr(args, clave)
+
+    resumen = generar(db_config, args.escala, args.semilla, args.procesos, args.fecha_fin)
+    print(f"✅ {resumen['ventas']} ventas y {resumen['detalles_venta']} detalles en {resumen['segundos']} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Instancia temporal de PostgreSQL para benchmarks
+Crea un cluster con initdb en un directorio temporal, lo arranca en un puerto
+libre, aplica el esquema y lo destruye al terminar
+"""
+
+import glob
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_RAIZ = os.path.dirname(DIRECTORIO_BENCHMARKS)
+
+# Scripts que se aplican después del esquema base, en orden.
+# setup_postgres_trigger.sql no se incluye: pertenece a otro sistema (miembros).
+SCRIPTS_SETUP = [
+    'setup_rollups_ventas.sql',
+    'setup_cxc_antiguedad.sql',
+    'setup_cxp_saldos.sql',
+    'setup_analitica_demanda.sql',
+]
+
+
+def buscar_binarios_postgres():
+    """
+    Localizar el directorio con initdb/pg_ctl.
+    Orden: variable PG_BIN, PATH, instalaciones comunes de Debian/Ubuntu y Windows.
+    """
+    candidatos = []
+    if os.getenv('PG_BIN'):
+        candidatos.append(os.getenv('PG_BIN'))
+
+    initdb = shutil.which('initdb')
+    if initdb:
+        candidatos.append(os.path.dirname(initdb))
+
+    candidatos += sorted(glob.glob('/usr/lib/postgresql/*/bin'), reverse=True)
+    candidatos += sorted(glob.glob(r'C:\Program Files\PostgreSQL\*\bin'), reverse=True)
+
+    for directorio in candidatos:
+        nombre = 'initdb.exe' if os.name == 'nt' else 'initdb'
+        if os.path.exists(os.path.join(directorio, nombre)):
+            return directorio
+
+    raise FileNotFoundError(
+        "No se encontró initdb. Instala PostgreSQL o define PG_BIN con la ruta a sus binarios"
+    )
+
+
+def _puerto_libre():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class InstanciaTemporal:
+    """
+    Cluster de PostgreSQL desechable.
+
+    Uso:
+        with InstanciaTemporal() as instancia:
+            db = PostgresManager(instancia.get_postgres_config())
+    """
+
+    def __init__(self, directorio=None, conservar=False, opciones_servidor=None):
+        self.bin_dir = buscar_binarios_postgres()
+        self.directorio = directorio or tempfile.mkdtemp(prefix='pos_bench_')
+        self.datos_dir = os.path.join(self.directorio, 'datos')
+        self.log_path = os.path.join(self.directorio, 'postgres.log')
+        self.conservar = conservar
+        self.puerto = _puerto_libre()
+        self.usuario = 'postgres'
+        self.password = 'bench'
+        self.database = 'pos_bench'
+        # Ajustes del servidor para que los resultados no dependan del disco
+        self.opciones_servidor = {
+            'shared_buffers': '256MB',
+            'max_connections': '100',
+            'fsync': 'on',
+            'synchronous_commit': 'on',
+        }
+        self.opciones_servidor.update(opciones_servidor or {})
+
+    def _bin(self, nombre):
+        return os.path.join(self.bin_dir, nombre)
+
+    def _ejecutar(self, *args, **kwargs):
+        return subprocess.run(args, check=True, capture_output=True, text=True, **kwargs)
+
+    def iniciar(self):
+        """Crear el cluster, arrancarlo y crear la base de datos"""
+        archivo_password = os.path.join(self.directorio, 'pwfile')
+        with open(archivo_password, 'w') as f:
+            f.write(self.password)
+
+        self._ejecutar(
+            self._bin('initdb'), '-D', self.datos_dir, '-U', self.usuario,
+            '--pwfile', archivo_password, '-A', 'md5', '-E', 'UTF8', '--locale=C'
+        )
+
+        opciones = ' '.join(f'-c {k}={v}' for k, v in self.opciones_servidor.items())
+        self._ejecutar(
+            self._bin('pg_ctl'), '-D', self.datos_dir, '-l', self.log_path, '-w',
+            '-o', f'-p {self.puerto} -c listen_addresses=127.0.0.1 {opciones}', 'start'
+        )
+        logging.info(f"✅ Instancia temporal iniciada en puerto {self.puerto} ({self.directorio})")
+
+        self.psql('-d', 'postgres', '-c', f'CREATE DATABASE {self.database}')
+        return self
+
+    def psql(self, *args):
+        """Ejecutar psql contra la instancia"""
+        env = dict(os.environ, PGPASSWORD=self.password)
+        return self._ejecutar(
+            self._bin('psql'), '-h', '127.0.0.1', '-p', str(self.puerto), '-U', self.usuario,
+            '-v', 'ON_ERROR_STOP=1', '-q', *args, env=env
+        )
+
+    def aplicar_esquema(self):
+        """Aplicar el esquema mínimo y los scripts setup_*.sql del repositorio"""
+        self.psql('-d', self.database, '-f', os.path.join(DIRECTORIO_BENCHMARKS, 'esquema.sql'))
+        for script in SCRIPTS_SETUP:
+            self.psql('-d', self.database, '-f', os.path.join(DIRECTORIO_RAIZ, script))
+        logging.info("✅ Esquema aplicado")
+
+    def get_postgres_config(self):
+        """Configuración en el formato de Config.get_postgres_config()"""
+        return {
+            'host': '127.0.0.1',
+            'port': str(self.puerto),
+            'database': self.database,
+            'user': self.usuario,
+            'password': self.password,
+            # Los reportes usan su propia conexión (misma instancia, retraso 0)
+            'reportes_dsn': f"host=127.0.0.1 port={self.puerto} dbname={self.database} "
+                            f"user={self.usuario} password={self.password}",
+        }
+
+    def detener(self):
+        """Detener el servidor y borrar el directorio (salvo conservar=True)"""
+        try:
+            self._ejecutar(self._bin('pg_ctl'), '-D', self.datos_dir, '-m', 'fast', '-w', 'stop')
+        except Exception as e:
+            logging.error(f"Error deteniendo instancia temporal: {e}")
+
+        if self.conservar:
+            logging.info(f"Instancia conservada en {self.directorio}")
+        else:
+            # En Windows el servidor puede tardar en soltar los archivos
+            for _ in range(5):
+                try:
+                    shutil.rmtree(self.directorio)
+                    break
+                except OSError:
+                    time.sleep(0.5)
+
+    def __enter__(self):
+        try:
+            self.iniciar()
+            self.aplicar_esquema()
+        except Exception:
+            self.detener()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+        return False
@@ -0,0 +1,439 @@
+"""
+Simulador de carga con varias cajas
+
+Lanza N cajeros virtuales en paralelo contra la misma base de datos usando la
+API real de PostgresManager (una conexión por cajero, como una caja física):
+
+    abrir_turno_caja → [get_product_by_barcode ... → create_sale] * → cerrar_turno_caja
+
+con tiempos de espera (escaneo, cobro, siguiente cliente) y tamaños de canasta
+configurables. Al final reporta throughput, percentiles de latencia por
+operación, esperas por bloqueos, deadlocks y números de ticket/turno repetidos.
+
+Uso:
+    python -m benchmarks.simulador --cajas 8 --duracion 120
+    python -m benchmarks.simulador --cajas 4 --factor-tiempo 0 --canasta "1:50,3:30,10:20"
+    python -m benchmarks.simulador --database pos_pruebas --cajas 6   # base existente (escribe ventas)
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from itertools import accumulate
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_RAIZ = os.path.dirname(DIRECTORIO_BENCHMARKS)
+DIRECTORIO_SIMULACIONES = os.path.join(DIRECTORIO_BENCHMARKS, 'resultados', 'simulaciones')
+
+sys.path.insert(0, DIRECTORIO_RAIZ)
+
+from database.postgres_manager import PostgresManager
+from benchmarks import generador
+from benchmarks.instancia import InstanciaTemporal
+from benchmarks.suite import resumir, commit_actual, guardar_resultados
+
+CANASTA_POR_DEFECTO = '1:35,2:25,3:15,4:10,6:8,10:5,20:2'
+METODOS_PAGO = ['efectivo', 'tarjeta_debito', 'tarjeta_credito', 'transferencia']
+PESOS_METODO = [60, 20, 12, 8]
+
+
+def parsear_canasta(texto):
+    """'1:35,2:25,10:5' → ([1, 2, 10], [35, 25, 5])"""
+    tamanos, pesos = [], []
+    for parte in texto.split(','):
+        tamano, peso = parte.split(':')
+        tamanos.append(int(tamano))
+        pesos.append(float(peso))
+    return tamanos, pesos
+
+
+# ========== ERRORES DE POSTGRESMANAGER ==========
+
+class ContadorErroresBD(logging.Handler):
+    """
+    PostgresManager registra los errores y devuelve None/False, así que los
+    deadlocks solo se ven en el log: este handler los cuenta por tipo.
+    """
+
+    PATRONES = {
+        'deadlocks': 'deadlock detected',
+        'serializacion': 'could not serialize',
+        'timeouts_bloqueo': 'lock timeout',
+        'duplicados': 'duplicate key',
+    }
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self._lock = threading.Lock()
+        self.conteos = {clave: 0 for clave in self.PATRONES}
+
+    def emit(self, record):
+        mensaje = record.getMessage()
+        with self._lock:
+            for clave, patron in self.PATRONES.items():
+                if patron in mensaje:
+                    self.conteos[clave] += 1
+
+
+# ========== MONITOR DE BLOQUEOS ==========
+
+class MonitorBloqueos(threading.Thread):
+    """Muestrea pg_stat_activity para contar sesiones esperando un bloqueo"""
+
+    def __init__(self, db_config, intervalo=0.1):
+        super().__init__(daemon=True)
+        self.db = PostgresManager(db_config)
+        # Cada muestra en su propia transacción: pg_stat_activity se congela dentro de una
+        self.db.connection.autocommit = True
+        self.intervalo = intervalo
+        self.detener_evento = threading.Event()
+        self.muestras = 0
+        self.muestras_con_espera = 0
+        self.max_simultaneas = 0
+        self.segundos_espera = 0.0
+        self.relaciones = {}
+
+    def run(self):
+        while not self.detener_evento.wait(self.intervalo):
+            filas = self.db.query("""
+                SELECT COALESCE(l.relation::regclass::text, l.locktype) AS objeto
+                FROM pg_stat_activity a
+                JOIN pg_locks l ON l.pid = a.pid AND NOT l.granted
+                WHERE a.datname = current_database() AND a.wait_event_type = 'Lock'
+            """)
+            self.muestras += 1
+            if filas:
+                self.muestras_con_espera += 1
+                self.max_simultaneas = max(self.max_simultaneas, len(filas))
+                self.segundos_espera += len(filas) * self.intervalo
+                for fila in filas:
+                    self.relaciones[fila['objeto']] = self.relaciones.get(fila['objeto'], 0) + 1
+
+    def detener(self):
+        self.detener_evento.set()
+        self.join()
+        self.db.close()
+
+    def resumen(self):
+        return {
+            'muestras': self.muestras,
+            'muestras_con_espera': self.muestras_con_espera,
+            'max_sesiones_esperando': self.max_simultaneas,
+            'segundos_espera_estimados': round(self.segundos_espera, 2),
+            'objetos': dict(sorted(self.relaciones.items(), key=lambda x: -x[1])),
+        }
+
+
+# ========== CAJERO VIRTUAL ==========
+
+class CajeroVirtual(threading.Thread):
+    """Una caja: su propia conexión, su turno y un flujo continuo de clientes"""
+
+    def __init__(self, numero, id_usuario, db_config, codigos, pesos_acumulados, opciones, fin):
+        super().__init__(name=f'caja-{numero}', daemon=True)
+        self.numero = numero
+        self.id_usuario = id_usuario
+        self.db_config = db_config
+        self.codigos = codigos
+        self.pesos_acumulados = pesos_acumulados
+        self.opciones = opciones
+        self.fin = fin
+        self.rng = random.Random(f"{opciones['semilla']}-caja-{numero}")
+        self.latencias = {'abrir_turno': [], 'escanear': [], 'crear_venta': [], 'cerrar_turno': []}
+        self.errores = {clave: 0 for clave in self.latencias}
+        self.ventas = 0
+        self.articulos = 0
+        self.ids_venta = []
+        self.id_turno = None
+
+    def _medir(self, operacion, funcion, *args):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        self.latencias[operacion].append((time.perf_counter() - inicio) * 1000)
+        if resultado is None or resultado is False:
+            self.errores[operacion] += 1
+        return resultado
+
+    def _pensar(self, media):
+        """Espera exponencial (escalada por factor_tiempo) sin pasarse del fin"""
+        segundos = self.rng.expovariate(1 / media) * self.opciones['factor_tiempo'] if media > 0 else 0
+        segundos = min(segundos, max(0, self.fin - time.monotonic()))
+        if segundos > 0:
+            time.sleep(segundos)
+
+    def run(self):
+        db = PostgresManager(self.db_config)
+        try:
+            monto_inicial = Decimal('500')
+            id_turno = self._medir('abrir_turno', db.abrir_turno_caja, self.id_usuario, monto_inicial)
+            self.id_turno = id_turno
+            efectivo = Decimal('0')
+
+            while time.monotonic() < self.fin:
+                tamano = self.rng.choices(self.opciones['tamanos'], weights=self.opciones['pesos'])[0]
+                carrito = {}
+                for codigo in self.rng.choices(self.codigos, cum_weights=self.pesos_acumulados, k=tamano):
+                    self._pensar(self.opciones['pensar_escaneo'])
+                    producto = self._medir('escanear', db.get_product_by_barcode, codigo)
+                    if not producto:
+                        continue
+                    linea = carrito.setdefault(producto['id_producto'], {
+                        'id_producto': producto['id_producto'],
+                        'cantidad': 0,
+                        'precio': producto['precio_venta'],
+                    })
+                    linea['cantidad'] += 1
+
+                if not carrito:
+                    continue
+
+                self._pensar(self.opciones['pensar_cobro'])
+                total = sum(l['precio'] * l['cantidad'] for l in carrito.values())
+                metodo = self.rng.choices(METODOS_PAGO, weights=PESOS_METODO)[0]
+                id_venta = self._medir('crear_venta', db.create_sale, {
+                    'id_vendedor': self.id_usuario,
+                    'id_turno': id_turno,
+                    'productos': list(carrito.values()),
+                    'subtotal': total,
+                    'descuento': 0,
+                    'impuestos': 0,
+                    'total': total,
+                    'metodo_pago': metodo,
+                    'tipo_venta': 'producto',
+                })
+                if id_venta:
+                    self.ventas += 1
+                    self.articulos += sum(l['cantidad'] for l in carrito.values())
+                    self.ids_venta.append(id_venta)
+                    if metodo == 'efectivo':
+                        efectivo += total
+
+                self._pensar(self.opciones['pensar_cliente'])
+
+            if id_turno:
+                self._medir('cerrar_turno', db.cerrar_turno_caja, id_turno, monto_inicial + efectivo)
+        except Exception as e:
+            logging.error(f"❌ Caja {self.numero} detenida: {e}")
+        finally:
+            db.close()
+
+
+# ========== SIMULACIÓN ==========
+
+def preparar_cajeros(db, cantidad):
+    """ids de usuario para las cajas; crea usuarios 'simuladorN' si no alcanzan los recepcionistas"""
+    usuarios = [u['id_usuario'] for u in db.query("""
+        SELECT id_usuario FROM usuarios
+        WHERE rol = 'recepcionista' AND activo = TRUE
+        ORDER BY id_usuario
+    """)]
+    for n in range(len(usuarios) + 1, cantidad + 1):
+        db.execute("""
+            INSERT INTO usuarios (nombre_usuario, contrasenia, nombre_completo, rol)
+            VALUES (%s, %s, %s, 'recepcionista')
+            ON CONFLICT (nombre_usuario) DO NOTHING
+        """, (f'simulador{n}', generador.HASH_PLACEHOLDER, f'Caja simulada {n}'))
+        fila = db.query("SELECT id_usuario FROM usuarios WHERE nombre_usuario = %s", (f'simulador{n}',))
+        if fila:
+            usuarios.append(fila[0]['id_usuario'])
+    return usuarios[:cantidad]
+
+
+def colisiones(db, columna, tabla, columna_id, ids):
+    """Valores de columna repetidos entre las filas creadas por la simulación"""
+    if not ids:
+        return []
+    return db.query(f"""
+        SELECT {columna} AS valor, COUNT(*) AS veces
+        FROM {tabla}
+        WHERE {columna} IN (SELECT {columna} FROM {tabla} WHERE {columna_id} = ANY(%s))
+        GROUP BY {columna}
+        HAVING COUNT(*) > 1
+        ORDER BY COUNT(*) DESC
+    """, (list(ids),))
+
+
+def deadlocks_servidor(db):
+    fila = db.query("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+    return fila[0]['deadlocks'] if fila else 0
+
+
+def simular(db_config, cajas, duracion, opciones):
+    """Ejecutar la simulación y devolver el documento de resultados"""
+    db = PostgresManager(db_config)
+    try:
+        productos = db.query("""
+            SELECT codigo_barras FROM ca_productos
+            WHERE activo = TRUE AND codigo_barras IS NOT NULL
+            ORDER BY id_producto
+        """)
+        if not productos:
+            raise RuntimeError("No hay productos con código de barras para simular")
+
+        # Popularidad tipo Zipf (pocos productos concentran la mayoría de las ventas)
+        rng = random.Random(f"{opciones['semilla']}-catalogo")
+        codigos = [p['codigo_barras'] for p in productos]
+        rng.shuffle(codigos)
+        pesos_acumulados = list(accumulate(1 / (rango + 1) ** 0.9 for rango in range(len(codigos))))
+
+        usuarios = preparar_cajeros(db, cajas)
+        if len(usuarios) < cajas:
+            raise RuntimeError(f"Solo hay {len(usuarios)} usuarios disponibles para {cajas} cajas")
+
+        deadlocks_antes = deadlocks_servidor(db)
+        contador = ContadorErroresBD()
+        logging.getLogger().addHandler(contador)
+        monitor = MonitorBloqueos(db_config)
+
+        fin = time.monotonic() + duracion
+        cajeros = [
+            CajeroVirtual(n + 1, usuarios[n], db_config, codigos, pesos_acumulados, opciones, fin)
+            for n in range(cajas)
+        ]
+        inicio = time.monotonic()
+        monitor.start()
+        for cajero in cajeros:
+            cajero.start()
+        for cajero in cajeros:
+            cajero.join()
+        transcurrido = time.monotonic() - inicio
+        monitor.detener()
+        logging.getLogger().removeHandler(contador)
+
+        # Las estadísticas del servidor se publican con un pequeño retraso
+        time.sleep(1)
+        deadlocks = deadlocks_servidor(db) - deadlocks_antes
+
+        ids_venta = [i for c in cajeros for i in c.ids_venta]
+        tickets_repetidos = colisiones(db, 'numero_ticket', 'ventas', 'id_venta', ids_venta)
+        turnos_repetidos = colisiones(
+            db, 'numero_turno', 'turnos_caja', 'id_turno', [c.id_turno for c in cajeros if c.id_turno]
+        )
+    finally:
+        db.close()
+
+    latencias = {}
+    for operacion in cajeros[0].latencias:
+        muestras = [m for c in cajeros for m in c.latencias[operacion]]
+        latencias[operacion] = resumir(muestras, sum(c.errores[operacion] for c in cajeros))
+
+    ventas = sum(c.ventas for c in cajeros)
+    return {
+        'commit': commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {
+            'cajas': cajas,
+            'duracion_s': duracion,
+            **{k: v for k, v in opciones.items() if k not in ('tamanos', 'pesos')},
+            'canasta': dict(zip(opciones['tamanos'], opciones['pesos'])),
+        },
+        'throughput': {
+            'segundos': round(transcurrido, 2),
+            'ventas': ventas,
+            'articulos': sum(c.articulos for c in cajeros),
+            'ventas_por_segundo': round(ventas / transcurrido, 2) if transcurrido else None,
+            'ventas_por_caja': {c.numero: c.ventas for c in cajeros},
+        },
+        'latencias': latencias,
+        'bloqueos': monitor.resumen(),
+        'errores_bd': dict(contador.conteos, deadlocks_servidor=deadlocks),
+        'colisiones': {
+            'tickets': [{'valor': f['valor'], 'veces': f['veces']} for f in tickets_repetidos],
+            'turnos': [{'valor': f['valor'], 'veces': f['veces']} for f in turnos_repetidos],
+        },
+    }
+
+
+def imprimir_reporte(documento):
+    t = documento['throughput']
+    print(f"\n📊 {documento['parametros']['cajas']} cajas durante {t['segundos']} s")
+    print(f"  Ventas: {t['ventas']} ({t['ventas_por_segundo']}/s), artículos: {t['articulos']}")
+
+    print("\n  Latencias")
+    for operacion, r in documento['latencias'].items():
+        if not r['n']:
+            continue
+        print(f"  {operacion:<14} n {r['n']:>7}   p50 {r['p50_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   "
+              f"p99 {r['p99_ms']:>9.2f} ms   errores {r['errores']}")
+
+    b = documento['bloqueos']
+    print(f"\n  Esperas por bloqueo: {b['muestras_con_espera']}/{b['muestras']} muestras, "
+          f"máx. {b['max_sesiones_esperando']} sesiones, ~{b['segundos_espera_estimados']} s")
+    for objeto, veces in list(b['objetos'].items())[:5]:
+        print(f"    {objeto}: {veces}")
+
+    e = documento['errores_bd']
+    print(f"  Deadlocks: {e['deadlocks_servidor']} (servidor), {e['deadlocks']} (log); "
+          f"llaves duplicadas: {e['duplicados']}")
+
+    c = documento['colisiones']
+    marca = '❌' if c['tickets'] else '✅'
+    print(f"  {marca} Tickets repetidos: {len(c['tickets'])}" +
+          (f" (p. ej. {c['tickets'][0]['valor']} x{c['tickets'][0]['veces']})" if c['tickets'] else ''))
+    marca = '❌' if c['turnos'] else '✅'
+    print(f"  {marca} Turnos repetidos: {len(c['turnos'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de carga con varias cajas")
+    parser.add_argument('--cajas', type=int, default=4)
+    parser.add_argument('--duracion', type=float, default=60, help="Segundos de simulación")
+    parser.add_argument('--canasta', default=CANASTA_POR_DEFECTO, help="Distribución tamaño:peso,...")
+    parser.add_argument('--pensar-escaneo', type=float, default=1.5, help="Segundos medios entre escaneos")
+    parser.add_argument('--pensar-cobro', type=float, default=8.0, help="Segundos medios para cobrar")
+    parser.add_argument('--pensar-cliente', type=float, default=5.0, help="Segundos medios entre clientes")
+    parser.add_argument('--factor-tiempo', type=float, default=0.05,
+                        help="Multiplica las esperas (1 = tiempo real, 0 = sin esperas)")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--escala', choices=sorted(generador.ESCALAS), default='pequena',
+                        help="Escala de datos de la instancia temporal")
+    parser.add_argument('--salida', default=DIRECTORIO_SIMULACIONES)
+    parser.add_argument('--conservar', action='store_true', help="No borrar la instancia temporal al terminar")
+    parser.add_argument('--host')
+    parser.add_argument('--port')
+    parser.add_argument('--database', help="Usar una base existente en lugar de una instancia temporal")
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tamanos, pesos = parsear_canasta(args.canasta)
+    opciones = {
+        'tamanos': tamanos,
+        'pesos': pesos,
+        'pensar_escaneo': args.pensar_escaneo,
+        'pensar_cobro': args.pensar_cobro,
+        'pensar_cliente': args.pensar_cliente,
+        'factor_tiempo': args.factor_tiempo,
+        'semilla': args.semilla,
+    }
+
+    if args.database:
+        from utils.config import Config
+        db_config = Config().get_postgres_config()
+        for clave in ('host', 'port', 'database', 'user', 'password'):
+            if getattr(args, clave):
+                db_config[clave] = getattr(args, clave)
+        print(f"⚠️ Simulando sobre la base existente {db_config['database']}: se registrarán ventas y turnos")
+        documento = simular(db_config, args.cajas, args.duracion, opciones)
+    else:
+        with InstanciaTemporal(conservar=args.conservar) as instancia:
+            generador.generar(instancia.get_postgres_config(), args.escala, args.semilla)
+            documento = simular(instancia.get_postgres_config(), args.cajas, args.duracion, opciones)
+        documento['parametros']['escala'] = args.escala
+
+    imprimir_reporte(documento)
+    ruta = guardar_resultados(documento, args.salida)
+    print(f"\n✅ Resultados guardados en {ruta}")
+    return 1 if documento['colisiones']['tickets'] or documento['errores_bd']['deadlocks_servidor'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
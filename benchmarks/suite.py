@@ -0,0 +1,497 @@
+"""
+Suite de benchmarks de las operaciones críticas del POS
+
+Levanta una instancia temporal de PostgreSQL, la llena con datos sintéticos
+deterministas, mide las operaciones de PostgresManager y de las pantallas de
+historial/exportación, y guarda percentiles en benchmarks/resultados/ para
+comparar entre commits.
+
+Uso:
+    python -m benchmarks
+    python -m benchmarks --escala media --iteraciones 300
+    python -m benchmarks --comparar benchmarks/resultados/20260101_120000_abc1234.json
+"""
+
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_RAIZ = os.path.dirname(DIRECTORIO_BENCHMARKS)
+DIRECTORIO_RESULTADOS = os.path.join(DIRECTORIO_BENCHMARKS, 'resultados')
+
+sys.path.insert(0, DIRECTORIO_RAIZ)
+
+from database.postgres_manager import PostgresManager
+from benchmarks import generador
+from benchmarks.instancia import InstanciaTemporal
+
+# Consultas que las pantallas ejecutan directamente con pg_manager.query
+# (copiadas de ui/ para medirlas igual que las corre la aplicación)
+CONSULTAS_PANTALLAS = {
+    # ui/ventas/historial.py: cargar_historial_completo y exportar_datos
+    'historial_ventas': """
+        SELECT
+            v.id_venta,
+            v.fecha,
+            v.total,
+            u.nombre_completo as nombre_usuario
+        FROM ventas v
+        LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
+        WHERE v.fecha >= %s AND v.fecha <= %s
+        ORDER BY v.fecha DESC
+    """,
+    # ui/historial_turnos_window.py: cargar_turnos
+    'historial_turnos': """
+        SELECT
+            tc.id_turno,
+            tc.numero_turno,
+            tc.fecha_apertura,
+            tc.fecha_cierre,
+            tc.monto_inicial,
+            tc.total_efectivo,
+            tc.monto_esperado_efectivo,
+            tc.monto_real_efectivo as monto_real_cierre,
+            tc.diferencia_efectivo as diferencia,
+            tc.cerrado,
+            u.nombre_completo as nombre_usuario,
+            u.nombre_usuario as username
+        FROM turnos_caja tc
+        LEFT JOIN usuarios u ON tc.id_usuario = u.id_usuario
+        ORDER BY tc.fecha_apertura DESC
+    """,
+    # ui/ventas/ventas_dia.py: actualizar_datos / cargar_ventas
+    'ventas_turno': """
+        SELECT v.id_venta, v.fecha, v.total, u.nombre_completo
+        FROM ventas v
+        LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
+        WHERE v.id_turno = %s
+        ORDER BY v.fecha DESC
+    """,
+}
+
+TAMANOS_CANASTA = (1, 5, 20, 50)
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ========== MEDICIÓN ==========
+
+def percentil(muestras_ordenadas, p):
+    """Percentil por rango más cercano (muestras ya ordenadas)"""
+    if not muestras_ordenadas:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(muestras_ordenadas)) - 1)
+    return muestras_ordenadas[indice]
+
+
+def resumir(muestras_ms, errores=0):
+    """Resumen estadístico de una lista de tiempos en milisegundos"""
+    ordenadas = sorted(muestras_ms)
+    resumen = {
+        'n': len(ordenadas),
+        'errores': errores,
+        'media_ms': round(sum(ordenadas) / len(ordenadas), 3) if ordenadas else None,
+        'min_ms': round(ordenadas[0], 3) if ordenadas else None,
+        'max_ms': round(ordenadas[-1], 3) if ordenadas else None,
+    }
+    for p in PERCENTILES:
+        valor = percentil(ordenadas, p)
+        resumen[f'p{p}_ms'] = round(valor, 3) if valor is not None else None
+    return resumen
+
+
+def medir(nombre, funcion, iteraciones, calentamiento=5):
+    """
+    Ejecutar funcion(i) varias veces y devolver el resumen de tiempos.
+    Una llamada que devuelve None/False cuenta como error (convención de
+    PostgresManager: los errores se registran y se devuelve None/False/[]).
+    """
+    for i in range(calentamiento):
+        funcion(i)
+
+    muestras = []
+    errores = 0
+    for i in range(iteraciones):
+        inicio = time.perf_counter()
+        resultado = funcion(i)
+        muestras.append((time.perf_counter() - inicio) * 1000)
+        if resultado is None or resultado is False:
+            errores += 1
+
+    resumen = resumir(muestras, errores)
+    print(f"  {nombre:<40} p50 {resumen['p50_ms']:>9.2f} ms   p95 {resumen['p95_ms']:>9.2f} ms   "
+          f"p99 {resumen['p99_ms']:>9.2f} ms   errores {errores}")
+    return resumen
+
+
+# ========== PREPARACIÓN ==========
+
+def sembrar(instancia, escala, semilla, procesos=None):
+    """Cargar los datos sintéticos con el generador (benchmarks/generador.py)"""
+    resumen = generador.generar(instancia.get_postgres_config(), escala, semilla, procesos)
+    print(f"✅ Datos sembrados en {resumen['segundos']:.1f} s "
+          f"(escala {escala}: {resumen['parametros']['productos']} productos, {resumen['ventas']} ventas, "
+          f"{resumen['parametros']['dias']} días)")
+
+
+def version_servidor(db):
+    resultado = db.query("SHOW server_version")
+    return resultado[0]['server_version'] if resultado else None
+
+
+def commit_actual():
+    """Hash corto del commit actual (o 'desconocido' fuera de git)"""
+    try:
+        salida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO_RAIZ,
+            capture_output=True, text=True, check=True
+        )
+        return salida.stdout.strip()
+    except Exception:
+        return 'desconocido'
+
+
+# ========== BENCHMARKS ==========
+
+def ejecutar_benchmarks(db, iteraciones, semilla):
+    """Medir todas las operaciones; devuelve {nombre: resumen}"""
+    rng = random.Random(semilla)
+    resultados = {}
+
+    productos = db.query("""
+        SELECT id_producto, codigo_barras, nombre, precio_venta
+        FROM ca_productos
+        WHERE activo = TRUE
+        ORDER BY id_producto
+    """)
+    codigos = [p['codigo_barras'] for p in productos]
+    fragmentos = sorted({p['nombre'].split()[0] for p in productos} | {p['nombre'].split()[1] for p in productos})
+    cajero = db.query("SELECT id_usuario FROM usuarios WHERE nombre_usuario = 'cajero1'")[0]['id_usuario']
+
+    hoy = date.today()
+    desde_30 = hoy - timedelta(days=30)
+    turno_historico = db.query("""
+        SELECT id_turno FROM turnos_caja WHERE cerrado = TRUE ORDER BY fecha_apertura DESC LIMIT 1
+    """)[0]['id_turno']
+
+    print("\n📦 Productos")
+    resultados['get_product_by_barcode'] = medir(
+        'get_product_by_barcode',
+        lambda i: db.get_product_by_barcode(rng.choice(codigos)),
+        iteraciones
+    )
+    resultados['search_products'] = medir(
+        'search_products',
+        lambda i: db.search_products(rng.choice(fragmentos)),
+        max(iteraciones // 5, 10)
+    )
+
+    print("\n💳 Ventas")
+    id_turno = db.abrir_turno_caja(cajero, Decimal('500'))
+    for tamano in TAMANOS_CANASTA:
+        def vender(i, tamano=tamano):
+            canasta = rng.sample(productos, tamano)
+            total = sum(Decimal(str(p['precio_venta'])) for p in canasta)
+            return db.create_sale({
+                'id_vendedor': cajero,
+                'id_turno': id_turno,
+                'productos': [
+                    {'id_producto': p['id_producto'], 'cantidad': 1, 'precio': Decimal(str(p['precio_venta']))}
+                    for p in canasta
+                ],
+                'subtotal': total,
+                'total': total,
+                'metodo_pago': rng.choice(['efectivo', 'tarjeta_debito']),
+                'tipo_venta': 'producto'
+            })
+        resultados[f'create_sale_{tamano}_lineas'] = medir(
+            f'create_sale ({tamano} líneas)', vender, max(iteraciones // max(tamano // 5, 1), 10)
+        )
+    db.cerrar_turno_caja(id_turno, Decimal('500'))
+
+    print("\n🚚 Compras")
+    tipo_compra = db.query("SELECT id_tipo_cuenta_pagar FROM ca_tipo_cuenta_pagar ORDER BY id_tipo_cuenta_pagar LIMIT 1")[0]
+    proveedor = db.query("SELECT id_proveedor FROM ca_proveedores ORDER BY id_proveedor LIMIT 1")[0]
+    for lineas in (30, 300):
+        def recibir(i, lineas=lineas):
+            detalles = [
+                {
+                    'id_producto': p['id_producto'],
+                    'cantidad': rng.randint(1, 24),
+                    'precio_unitario': Decimal(str(p['precio_venta'])) * Decimal('0.6'),
+                }
+                for p in rng.sample(productos, min(lineas, len(productos)))
+            ]
+            for d in detalles:
+                d['subtotal'] = d['cantidad'] * d['precio_unitario']
+            total = sum(d['subtotal'] for d in detalles)
+            return db.guardar_compra_gasto({
+                'numero_cuenta': f'BENCH-{lineas}-{i}',
+                'id_tipo_cuenta_pagar': tipo_compra['id_tipo_cuenta_pagar'],
+                'id_proveedor': proveedor['id_proveedor'],
+                'id_usuario': cajero,
+                'fecha_cuenta': hoy,
+                'subtotal': total,
+                'descuento': 0,
+                'impuestos': 0,
+                'total': total,
+                'fecha_vencimiento': hoy + timedelta(days=30),
+                'tipo_compra': 'compra',
+                'detalles': detalles,
+            })
+        resultados[f'guardar_compra_{lineas}_lineas'] = medir(
+            f'guardar_compra_gasto ({lineas} líneas)', recibir, max(iteraciones // max(lineas // 10, 1), 5)
+        )
+
+    print("\n📦 Movimientos de inventario")
+    resultados['registrar_movimiento'] = medir(
+        'registrar_movimiento (ajuste)',
+        lambda i: db.registrar_movimiento(
+            rng.choice(productos)['id_producto'], 'ajuste', rng.choice([-1, 1]),
+            id_usuario=cajero, permitir_negativo=True
+        ),
+        iteraciones
+    )
+    def lote_movimientos(i):
+        return db.registrar_movimientos([
+            {'id_producto': p['id_producto'], 'tipo_movimiento': 'entrada', 'cantidad': rng.randint(1, 12),
+             'costo_unitario': Decimal(str(p['precio_venta'])) * Decimal('0.6')}
+            for p in rng.sample(productos, min(100, len(productos)))
+        ], id_usuario=cajero, motivo='Benchmark')
+    resultados['registrar_movimientos_100_lineas'] = medir(
+        'registrar_movimientos (100 líneas)', lote_movimientos, max(iteraciones // 10, 5)
+    )
+
+    # Conteo físico: la conciliación de toda una ubicación es una sentencia y un commit
+    contables = db.query("""
+        SELECT id_producto, stock_actual FROM inventario
+        WHERE id_ubicacion = 1 AND activo = TRUE
+        ORDER BY id_producto
+        LIMIT 5000
+    """)
+    def conteo(i):
+        conteos = {p['id_producto']: max(p['stock_actual'] + rng.choice([-1, 0, 0, 0, 1]), 0) for p in contables}
+        diferencias = db.obtener_diferencias_conteo(1, conteos)
+        return db.aplicar_conteo_fisico(1, diferencias, id_usuario=cajero, motivo='Benchmark')
+    resultados[f'conteo_fisico_{len(contables)}_productos'] = medir(
+        f'obtener_diferencias_conteo + aplicar_conteo_fisico ({len(contables)} productos)', conteo, 5
+    )
+
+    # Análisis de demanda: historial completo en lotes, cálculo vectorizado y guardado en un commit
+    from services.analitica_demanda import analizar_demanda
+    resultados['analizar_demanda'] = medir(
+        'analizar_demanda (historial completo)', lambda i: analizar_demanda(db), 3
+    )
+
+    print("\n💰 Cuentas por cobrar")
+    resultados['obtener_cuentas_por_cobrar'] = medir(
+        'obtener_cuentas_por_cobrar',
+        lambda i: db.obtener_cuentas_por_cobrar(),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_cuentas_por_cobrar_pendientes'] = medir(
+        'obtener_cuentas_por_cobrar (pendientes)',
+        lambda i: db.obtener_cuentas_por_cobrar({'solo_pendientes': True}),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_cuentas_por_cobrar_cliente'] = medir(
+        'obtener_cuentas_por_cobrar (cliente)',
+        lambda i: db.obtener_cuentas_por_cobrar({'cliente': rng.choice(['Ana', 'García', 'Luis Pérez'])}),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_cuentas_por_cobrar_pagina'] = medir(
+        'obtener_cuentas_por_cobrar (página de 50)',
+        lambda i: db.obtener_cuentas_por_cobrar({'solo_pendientes': True}, limite=50, desplazamiento=(i % 5) * 50),
+        iteraciones
+    )
+    resultados['resumir_cuentas_por_cobrar'] = medir(
+        'resumir_cuentas_por_cobrar',
+        lambda i: db.resumir_cuentas_por_cobrar({'solo_pendientes': True}),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_antiguedad_cxc'] = medir(
+        'obtener_antiguedad_cxc',
+        lambda i: db.obtener_antiguedad_cxc(),
+        max(iteraciones // 10, 5)
+    )
+
+    print("\n📋 Historiales")
+    resultados['historial_ventas_30_dias'] = medir(
+        'historial ventas (30 días)',
+        lambda i: db.query(CONSULTAS_PANTALLAS['historial_ventas'], (desde_30, hoy)),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_movimientos_completos'] = medir(
+        'obtener_movimientos_completos(1000)',
+        lambda i: db.obtener_movimientos_completos(1000),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_inventario_completo'] = medir(
+        'obtener_inventario_completo',
+        lambda i: db.obtener_inventario_completo(),
+        max(iteraciones // 20, 5)
+    )
+    resultados['historial_turnos'] = medir(
+        'historial turnos',
+        lambda i: db.query(CONSULTAS_PANTALLAS['historial_turnos']),
+        max(iteraciones // 10, 5)
+    )
+    def cargar_cuentas_por_pagar(i):
+        # Mismas consultas que CuentasPorPagarWindow.cargar_cuentas_completo
+        filtros = {'fecha_desde': desde_30, 'fecha_hasta': hoy}
+        db.resumir_cuentas_por_pagar(filtros)
+        return db.obtener_cuentas_por_pagar(filtros, limite=50)
+    resultados['cuentas_por_pagar_30_dias'] = medir(
+        'cuentas por pagar (30 días)', cargar_cuentas_por_pagar, max(iteraciones // 10, 5)
+    )
+    resultados['obtener_cxp_por_vencer'] = medir(
+        'obtener_cxp_por_vencer (7 días)',
+        lambda i: db.obtener_cxp_por_vencer(7),
+        max(iteraciones // 10, 5)
+    )
+    resultados['obtener_saldos_proveedores'] = medir(
+        'obtener_saldos_proveedores',
+        lambda i: db.obtener_saldos_proveedores(),
+        max(iteraciones // 10, 5)
+    )
+    resultados['ventas_turno'] = medir(
+        'ventas del turno',
+        lambda i: db.query(CONSULTAS_PANTALLAS['ventas_turno'], (turno_historico,)),
+        iteraciones
+    )
+
+    print("\n📤 Exportaciones")
+    def exportar_historial(i):
+        # Mismas consultas que HistorialVentasWindow.exportar_datos
+        filas = db.query(CONSULTAS_PANTALLAS['historial_ventas'], (desde_30, hoy))
+        for dimension in ('metodo_pago', 'vendedor', 'producto'):
+            db.obtener_rollup_ventas(dimension, desde_30, hoy)
+        return filas
+    resultados['exportar_historial_ventas'] = medir(
+        'exportar historial ventas (30 días)', exportar_historial, max(iteraciones // 20, 5)
+    )
+
+    return resultados
+
+
+# ========== RESULTADOS ==========
+
+def guardar_resultados(documento, directorio):
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{documento['commit']}.json"
+    ruta = os.path.join(directorio, nombre)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def buscar_referencia(directorio, parametros, excluir):
+    """Último resultado guardado con los mismos parámetros de escala"""
+    for ruta in sorted(glob.glob(os.path.join(directorio, '*.json')), reverse=True):
+        if os.path.abspath(ruta) == os.path.abspath(excluir):
+            continue
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                documento = json.load(f)
+            if documento.get('parametros') == parametros:
+                return ruta, documento
+        except Exception:
+            continue
+    return None, None
+
+
+def comparar(actual, referencia, umbral, metrica='p95_ms'):
+    """Imprimir la comparación y devolver la lista de regresiones"""
+    regresiones = []
+    print(f"\n📊 Comparación contra {referencia['commit']} ({referencia['fecha']}) - {metrica}")
+    for nombre, resumen in actual['resultados'].items():
+        anterior = referencia['resultados'].get(nombre)
+        if not anterior or not anterior.get(metrica) or resumen.get(metrica) is None:
+            print(f"  {nombre:<40} (sin referencia)")
+            continue
+        cambio = (resumen[metrica] - anterior[metrica]) / anterior[metrica]
+        marca = ''
+        if cambio > umbral:
+            marca = '❌ REGRESIÓN'
+            regresiones.append(nombre)
+        elif cambio < -umbral:
+            marca = '✅ mejora'
+        print(f"  {nombre:<40} {anterior[metrica]:>9.2f} → {resumen[metrica]:>9.2f} ms  ({cambio:+.0%}) {marca}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de operaciones críticas del POS")
+    parser.add_argument('--escala', choices=sorted(generador.ESCALAS), default='pequena')
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos de carga del generador")
+    parser.add_argument('--iteraciones', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default=DIRECTORIO_RESULTADOS, help="Directorio de resultados")
+    parser.add_argument('--comparar', help="Archivo de resultados de referencia (por defecto el último compatible)")
+    parser.add_argument('--umbral', type=float, default=0.20, help="Cambio relativo de p95 que cuenta como regresión")
+    parser.add_argument('--conservar', action='store_true', help="No borrar la instancia temporal al terminar")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    parametros = {
+        'escala': args.escala,
+        'iteraciones': args.iteraciones,
+        'semilla': args.semilla,
+    }
+
+    with InstanciaTemporal(conservar=args.conservar) as instancia:
+        sembrar(instancia, args.escala, args.semilla, args.procesos)
+
+        db = PostgresManager(instancia.get_postgres_config())
+        try:
+            db.actualizar_rollups_ventas()
+            documento = {
+                'commit': commit_actual(),
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'parametros': parametros,
+                'entorno': {
+                    'python': platform.python_version(),
+                    'plataforma': platform.platform(),
+                    'postgres': version_servidor(db),
+                },
+                'resultados': ejecutar_benchmarks(db, args.iteraciones, args.semilla),
+            }
+            # Ninguna operación debe dejar la sesión con una transacción abierta
+            inactivas = db.sesiones_en_transaccion()
+        finally:
+            db.close()
+
+    ruta = guardar_resultados(documento, args.salida)
+    print(f"\n✅ Resultados guardados en {ruta}")
+
+    if inactivas:
+        for sesion in inactivas:
+            print(f"❌ Sesión {sesion['pid']} ({sesion['application_name']}) idle in transaction: {sesion['ultima_consulta']}")
+        return 1
+
+    if args.comparar:
+        ruta_ref = args.comparar
+        with open(ruta_ref, encoding='utf-8') as f:
+            referencia = json.load(f)
+    else:
+        ruta_ref, referencia = buscar_referencia(args.salida, parametros, excluir=ruta)
+
+    if referencia:
+        regresiones = comparar(documento, referencia, args.umbral)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones sobre el umbral de {args.umbral:.0%}")
+            return 1
+    else:
+        print("\nSin resultados previos compatibles para comparar")
+    return 0
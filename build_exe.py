@@ -76,6 +76,9 @@ def build_exe() -> bool:
         "--hidden-import=dotenv",
         "--hidden-import=supabase",
         "--hidden-import=psycopg2",
+        # Las pantallas se importan por nombre (ui/registro_pantallas.py); sin esto
+        # PyInstaller no analiza sus módulos ni sus dependencias (pandas, etc.)
+        "--collect-submodules=ui",
         main_script,
     ]
 
@@ -0,0 +1,236 @@
+"""
+Lecturas y escrituras del análisis de demanda para PostgresManager
+El cálculo está en services/analitica_demanda.py; aquí solo se lee el
+historial agregado por día (en lotes, con un cursor del lado del servidor)
+y se guardan las sugerencias en una sola transacción.
+
+setup_analitica_demanda.sql agrega la tabla sugerencias_reabastecimiento y el
+índice de salidas por fecha; sin él las sugerencias solo pueden aplicarse
+directo a inventario.
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from database.instrumentacion import instrumentar_metodos
+
+try:
+    import psycopg2.extensions
+    from database.instrumentacion import CursorInstrumentado, MedicionCursor
+
+    class CursorTuplas(MedicionCursor, psycopg2.extensions.cursor):
+        """Cursor instrumentado de tuplas simples (historial en lotes, sin dict por renglón)"""
+
+except ImportError:
+    CursorInstrumentado = None
+    CursorTuplas = None
+
+# Renglones por viaje del cursor del lado del servidor
+LOTE_HISTORIAL = 50000
+
+
+@instrumentar_metodos
+class OperacionesAnalitica:
+    """
+    Métodos de análisis de demanda de PostgresManager (se mezclan en la clase).
+    Usan self.connection, self.connect(), self.query(), self.rollups_disponibles()
+    y self._notificar_cambio_stock().
+    """
+
+    # ========== ANÁLISIS DE DEMANDA ==========
+
+    def sugerencias_disponibles(self) -> bool:
+        """
+        Verificar si la tabla de sugerencias existe (setup_analitica_demanda.sql).
+        El resultado se guarda para no consultar el catálogo en cada análisis.
+        """
+        if self._sugerencias_disponibles is None:
+            try:
+                with self._cursor_lectura() as cursor:
+                    cursor.execute("SELECT to_regclass('sugerencias_reabastecimiento') IS NOT NULL AS existe")
+                    self._sugerencias_disponibles = bool(cursor.fetchone()['existe'])
+            except Exception as e:
+                logging.error(f"Error verificando tabla de sugerencias: {e}")
+                return False
+        return self._sugerencias_disponibles
+
+    def obtener_filas_analisis_demanda(self) -> List[Dict]:
+        """Filas de inventario activas de productos inventariables, con su stock y límites actuales"""
+        return self.query("""
+            SELECT i.id_inventario, i.id_producto, i.id_ubicacion,
+                   i.stock_disponible, i.stock_minimo, i.stock_maximo
+            FROM inventario i
+            JOIN ca_productos p ON p.id_producto = i.id_producto
+            WHERE i.activo = TRUE AND p.activo = TRUE AND p.es_inventariable = TRUE
+            ORDER BY i.id_inventario
+        """, compactas=True)
+
+    def leer_salidas_diarias(self, desde, hasta, procesar_lote: Callable[[list], None],
+                             lote: int = LOTE_HISTORIAL) -> Optional[int]:
+        """
+        Recorrer las salidas (ventas y mermas) del periodo, agregadas en SQL a un
+        renglón por fila de inventario y día, con un cursor del lado del servidor:
+        la memoria no depende de los años de historial.
+
+        Args:
+            desde, hasta: Fechas del periodo (inclusivas); el día 0 es desde
+            procesar_lote: Recibe cada lote como lista de (id_inventario, dia, cantidad)
+            lote: Renglones por viaje a la base de datos
+
+        Returns:
+            Renglones leídos o None si hubo error
+        """
+        conexion = None
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            leidos = 0
+            with self._cursor_lectura(name='analitica_salidas_diarias', cursor_factory=CursorTuplas,
+                                      reporte=True) as cursor:
+                conexion = cursor.connection
+                cursor.itersize = lote
+                cursor.execute("""
+                    SELECT i.id_inventario,
+                           m.fecha::date - %(desde)s::date AS dia,
+                           SUM(ABS(m.cantidad))::float8 AS cantidad
+                    FROM movimientos_inventario m
+                    JOIN inventario i ON i.id_producto = m.id_producto AND i.id_ubicacion = m.id_ubicacion
+                    WHERE m.tipo_movimiento IN ('venta', 'merma')
+                      AND m.fecha >= %(desde)s::date
+                      AND m.fecha < %(hasta)s::date + 1
+                    GROUP BY i.id_inventario, m.fecha::date
+                """, {'desde': desde, 'hasta': hasta})
+                while True:
+                    filas = cursor.fetchmany(lote)
+                    if not filas:
+                        break
+                    procesar_lote(filas)
+                    leidos += len(filas)
+            return leidos
+
+        except Exception as e:
+            # Deshacer en la conexión de reportes (o de carga) que hizo la lectura,
+            # no en la principal: su transacción es de la interfaz
+            if conexion is not None and conexion is not self.connection and not conexion.closed:
+                try:
+                    conexion.rollback()
+                except Exception:
+                    conexion.close()
+            logging.error(f"Error leyendo historial de salidas: {e}")
+            return None
+
+    def obtener_totales_venta_producto(self, desde, hasta) -> List[Dict]:
+        """
+        Ingreso y utilidad por producto en el periodo (para las clases ABC).
+        Con los rollups instalados se suma rollup_ventas_producto_dia (un
+        renglón por producto y día); si no, detalles_venta de las ventas completadas.
+        """
+        if self.rollups_disponibles():
+            return self.query("""
+                SELECT id_producto, SUM(total) AS ingreso, SUM(utilidad) AS utilidad
+                FROM rollup_ventas_producto_dia
+                WHERE fecha BETWEEN %s AND %s
+                GROUP BY id_producto
+            """, (desde, hasta), compactas=True, reporte=True)
+
+        return self.query("""
+            SELECT d.id_producto,
+                   SUM(d.total_linea) AS ingreso,
+                   SUM(COALESCE(d.utilidad_linea, 0)) AS utilidad
+            FROM detalles_venta d
+            JOIN ventas v ON v.id_venta = d.id_venta
+            WHERE v.estado = 'completada'
+              AND v.fecha >= %s::date AND v.fecha < %s::date + 1
+              AND d.id_producto IS NOT NULL
+            GROUP BY d.id_producto
+        """, (desde, hasta), compactas=True, reporte=True)
+
+    def guardar_sugerencias_stock(self, sugerencias: List[Dict], aplicar: bool = False) -> Optional[int]:
+        """
+        Guardar un análisis completo (reemplaza al anterior) y, si se pide,
+        escribir los mínimos/máximos sugeridos en inventario. Todo en un commit.
+
+        Args:
+            sugerencias: Ver services.analitica_demanda.calcular_sugerencias
+            aplicar: Actualizar stock_minimo/stock_maximo de las filas de inventario
+
+        Returns:
+            Filas de inventario modificadas (0 si no se aplicó) o None si hubo error
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            columnas = {
+                c: [s[c] for s in sugerencias] for c in (
+                    'id_inventario', 'id_producto', 'id_ubicacion', 'velocidad_diaria',
+                    'pronostico_diario', 'desviacion_diaria', 'clase_ingreso', 'clase_utilidad',
+                    'stock_minimo_sugerido', 'stock_maximo_sugerido', 'cantidad_reorden',
+                )
+            }
+            modificadas = []
+
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
+                if self.sugerencias_disponibles():
+                    cursor.execute("DELETE FROM sugerencias_reabastecimiento")
+                    cursor.execute("""
+                        INSERT INTO sugerencias_reabastecimiento (
+                            id_inventario, id_producto, id_ubicacion, velocidad_diaria,
+                            pronostico_diario, desviacion_diaria, clase_ingreso, clase_utilidad,
+                            stock_minimo_sugerido, stock_maximo_sugerido, cantidad_reorden
+                        )
+                        SELECT * FROM unnest(
+                            %(id_inventario)s::int[], %(id_producto)s::int[], %(id_ubicacion)s::int[],
+                            %(velocidad_diaria)s::numeric[], %(pronostico_diario)s::numeric[],
+                            %(desviacion_diaria)s::numeric[], %(clase_ingreso)s::text[],
+                            %(clase_utilidad)s::text[], %(stock_minimo_sugerido)s::numeric[],
+                            %(stock_maximo_sugerido)s::numeric[], %(cantidad_reorden)s::numeric[]
+                        )
+                    """, columnas)
+                elif not aplicar:
+                    logging.warning("⚠️ Tabla de sugerencias no instalada (ejecutar setup_analitica_demanda.sql)")
+                    return 0
+
+                if aplicar:
+                    cursor.execute("""
+                        UPDATE inventario i
+                        SET stock_minimo = s.minimo,
+                            stock_maximo = s.maximo
+                        FROM unnest(%(id_inventario)s::int[], %(stock_minimo_sugerido)s::numeric[],
+                                    %(stock_maximo_sugerido)s::numeric[]) AS s(id_inventario, minimo, maximo)
+                        WHERE i.id_inventario = s.id_inventario
+                          AND (i.stock_minimo, i.stock_maximo) IS DISTINCT FROM (s.minimo, s.maximo)
+                        RETURNING i.id_producto
+                    """, columnas)
+                    modificadas = [row['id_producto'] for row in cursor.fetchall()]
+
+            self._confirmar()
+            logging.info(f"✅ Sugerencias de stock guardadas: {len(sugerencias)}, aplicadas: {len(modificadas)}")
+            if modificadas:
+                # Los límites nuevos cambian qué filas están en alerta
+                self._notificar_cambio_stock(sorted(set(modificadas)))
+            return len(modificadas)
+
+        except Exception as e:
+            try:
+                self._revertir()
+            except:
+                pass
+            logging.error(f"Error guardando sugerencias de stock: {e}")
+            return None
+
+    def obtener_sugerencias_reabastecimiento(self, solo_reorden: bool = True) -> List[Dict]:
+        """Último análisis guardado, con producto y ubicación; por defecto solo lo que hay que pedir"""
+        if not self.sugerencias_disponibles():
+            return []
+        return self.query(f"""
+            SELECT s.*, p.codigo_interno, p.nombre, u.nombre AS ubicacion,
+                   i.stock_actual, i.stock_disponible, i.stock_minimo, i.stock_maximo
+            FROM sugerencias_reabastecimiento s
+            JOIN inventario i ON i.id_inventario = s.id_inventario
+            JOIN ca_productos p ON p.id_producto = s.id_producto
+            LEFT JOIN ca_ubicaciones u ON u.id_ubicacion = s.id_ubicacion
+            {'WHERE s.cantidad_reorden > 0' if solo_reorden else ''}
+            ORDER BY s.clase_ingreso, s.cantidad_reorden DESC, p.nombre
+        """)
@@ -0,0 +1,140 @@
+"""
+Filas compactas para resultados grandes
+Una Fila es una tupla (sin __dict__) con el índice de columnas compartido por
+todas las filas del mismo resultado. Se lee como un dict (fila['nombre'],
+fila.get('nombre'), dict(fila)) o por atributo (fila.nombre), y ocupa una
+fracción de un RealDictRow, así que las pantallas de listas pueden guardar
+las filas tal cual sin copiarlas a otro dict.
+
+Al iterar se comporta como tupla (valores); para pares columna/valor usar
+items() o dict(fila). Son de solo lectura.
+
+Una columna con el nombre de un método de la tupla o de Fila (count, index,
+get, keys...) se lee por atributo con "_" al final (fila.count_); por clave
+(fila['count']) no cambia.
+
+Uso:
+    with conexion.cursor(cursor_factory=CursorFilas) as cursor: ...
+    pg_manager.query(sql, params, compactas=True)
+"""
+
+import operator
+import threading
+
+try:
+    import psycopg2.extensions
+    from database.instrumentacion import MedicionCursor
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+
+class Fila(tuple):
+    """Tupla con acceso por nombre de columna"""
+
+    __slots__ = ()
+    _columnas = ()
+    _indices = {}
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            try:
+                return tuple.__getitem__(self, self._indices[clave])
+            except KeyError:
+                raise KeyError(clave) from None
+        return tuple.__getitem__(self, clave)
+
+    def __contains__(self, clave):
+        return clave in self._indices
+
+    def get(self, clave, por_defecto=None):
+        indice = self._indices.get(clave)
+        return por_defecto if indice is None else tuple.__getitem__(self, indice)
+
+    def keys(self):
+        return self._columnas
+
+    def values(self):
+        return tuple(tuple.__iter__(self))
+
+    def items(self):
+        return zip(self._columnas, tuple.__iter__(self))
+
+    def _asdict(self):
+        return dict(zip(self._columnas, tuple.__iter__(self)))
+
+    def __repr__(self):
+        return f"Fila({', '.join(f'{c}={v!r}' for c, v in self.items())})"
+
+
+_CLASES = {}  # columnas -> subclase de Fila
+_lock = threading.Lock()
+
+
+def clase_fila(columnas):
+    """Subclase de Fila para un juego de columnas (se crea una vez y se reutiliza)"""
+    columnas = tuple(columnas)
+    clase = _CLASES.get(columnas)
+    if clase is not None:
+        return clase
+
+    atributos = {
+        '__slots__': (),
+        '_columnas': columnas,
+        # Con columnas repetidas (dos "nombre" en un JOIN) gana la primera, como en un dict
+        '_indices': {c: i for i, c in reversed(list(enumerate(columnas)))},
+    }
+    for indice, columna in enumerate(columnas):
+        if not columna.isidentifier():
+            continue
+        atributo = columna
+        # "SELECT COUNT(*)" trae una columna count: no tapar tuple.count ni los métodos de Fila
+        while hasattr(Fila, atributo) or (atributo != columna and atributo in columnas):
+            atributo += '_'
+        if atributo not in atributos:
+            atributos[atributo] = property(operator.itemgetter(indice))
+
+    with _lock:
+        return _CLASES.setdefault(columnas, type('Fila', (Fila,), atributos))
+
+
+if PSYCOPG2_AVAILABLE:
+
+    class CursorFilas(MedicionCursor, psycopg2.extensions.cursor):
+        """Cursor instrumentado que devuelve Filas en lugar de RealDictRow"""
+
+        def _clase(self):
+            return clase_fila(c.name for c in self.description)
+
+        def fetchone(self):
+            fila = super().fetchone()
+            return None if fila is None else self._clase()(fila)
+
+        def fetchmany(self, size=None):
+            filas = super().fetchmany(self.arraysize if size is None else size)
+            if not filas:
+                return []
+            clase = self._clase()
+            return [clase(f) for f in filas]
+
+        def fetchall(self):
+            filas = super().fetchall()
+            if not filas:
+                return []
+            clase = self._clase()
+            return [clase(f) for f in filas]
+
+        def __iter__(self):
+            iterador = super().__iter__()
+            try:
+                primera = next(iterador)
+            except StopIteration:
+                return
+            clase = self._clase()
+            yield clase(primera)
+            # next() explícito: iterar el cursor con for volvería a llamar a este __iter__
+            while True:
+                try:
+                    yield clase(next(iterador))
+                except StopIteration:
+                    return
@@ -0,0 +1,495 @@
+"""
+Instrumentación de PostgresManager
+Tiempos por método y por sentencia SQL (histogramas y percentiles de una
+ventana reciente), registro de consultas lentas con huella de la sentencia
+y, opcionalmente, EXPLAIN (ANALYZE, BUFFERS) de las más lentas. También
+lleva la conexión de cada hilo de carga, para cancelar su sentencia en el
+servidor desde otro hilo, y cuenta las canceladas y las que agotaron su
+statement_timeout.
+
+Configuración por variables de entorno (.env):
+    POS_UMBRAL_CONSULTA_LENTA_MS   Umbral del registro de lentas (200)
+    POS_EXPLAIN_CONSULTAS_LENTAS   1 para capturar EXPLAIN de SELECT lentos (0)
+    POS_UMBRAL_EXPLAIN_MS          Umbral para capturar EXPLAIN (1000)
+    POS_DIRECTORIO_LOGS            Directorio de logs/consultas_lentas.log
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+try:
+    import psycopg2.extensions
+    from psycopg2.extras import RealDictCursor
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+# Límites superiores (ms) de las cubetas del histograma; la última es "más de 5000"
+LIMITES_HISTOGRAMA_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+VENTANA_PERCENTILES = 500
+MAX_CONSULTAS_LENTAS = 200
+
+
+# ========== ARCHIVOS DE LOG ==========
+
+def directorio_logs():
+    """logs/ junto al ejecutable (PyInstaller) o en la raíz del proyecto; POS_DIRECTORIO_LOGS lo reemplaza"""
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('POS_DIRECTORIO_LOGS') or os.path.join(base, 'logs')
+
+
+def crear_logger_rotativo(nombre, archivo, formato='%(asctime)s - %(message)s'):
+    """Logger que escribe solo a logs/<archivo> (2 MB x 5 respaldos), sin propagar a la consola"""
+    logger = logging.getLogger(nombre)
+    logger.propagate = False
+    if logger.handlers:
+        return logger
+    try:
+        directorio = directorio_logs()
+        os.makedirs(directorio, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(directorio, archivo),
+            maxBytes=2 * 1024 * 1024, backupCount=5, encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter(formato))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    except Exception as e:
+        logging.error(f"❌ No se pudo abrir logs/{archivo}: {e}")
+    return logger
+
+
+# ========== HUELLAS SQL ==========
+
+_RE_COMENTARIOS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_PARAMETROS = re.compile(r'%\(\w+\)s|%s')
+_RE_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_RE_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar_sql(sql):
+    """
+    Sentencia sin valores: literales, números y parámetros se reemplazan por ?
+    y las listas IN (?, ?, ...) se colapsan, para agrupar ejecuciones iguales.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', errors='replace')
+    sql = _RE_COMENTARIOS.sub(' ', str(sql))
+    sql = _RE_CADENAS.sub('?', sql)
+    sql = _RE_PARAMETROS.sub('?', sql)
+    sql = _RE_NUMEROS.sub('?', sql)
+    sql = _RE_LISTAS.sub('(?...)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+def huella_sql(sql_normalizado):
+    return hashlib.md5(sql_normalizado.encode('utf-8')).hexdigest()[:12]
+
+
+def describir_parametros(params):
+    """Tipos de los parámetros, nunca sus valores"""
+    if params is None:
+        return '-'
+    if isinstance(params, dict):
+        return ', '.join(f'{k}:{type(v).__name__}' for k, v in params.items())
+    return ', '.join(type(v).__name__ for v in params)
+
+
+# ========== ESTADÍSTICAS ==========
+
+class EstadisticasOperacion:
+    """Contadores, histograma acumulado y ventana reciente de una operación"""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.filas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histograma = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        self.recientes = deque(maxlen=VENTANA_PERCENTILES)
+
+    def registrar(self, ms, filas, error):
+        self.llamadas += 1
+        self.errores += 1 if error else 0
+        self.filas += filas or 0
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recientes.append(ms)
+        for indice, limite in enumerate(LIMITES_HISTOGRAMA_MS):
+            if ms <= limite:
+                self.histograma[indice] += 1
+                break
+        else:
+            self.histograma[-1] += 1
+
+    def resumen(self):
+        ordenadas = sorted(self.recientes)
+
+        def percentil(p):
+            if not ordenadas:
+                return None
+            return round(ordenadas[max(0, -(-p * len(ordenadas) // 100) - 1)], 2)
+
+        return {
+            'llamadas': self.llamadas,
+            'errores': self.errores,
+            'filas': self.filas,
+            'filas_promedio': round(self.filas / self.llamadas, 1) if self.llamadas else 0,
+            'total_ms': round(self.total_ms, 1),
+            'media_ms': round(self.total_ms / self.llamadas, 2) if self.llamadas else None,
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': percentil(50),
+            'p95_ms': percentil(95),
+            'p99_ms': percentil(99),
+            'histograma': dict(zip(
+                [f'<={l}' for l in LIMITES_HISTOGRAMA_MS] + [f'>{LIMITES_HISTOGRAMA_MS[-1]}'],
+                self.histograma
+            )),
+        }
+
+
+class Instrumentacion:
+    """Registro (por proceso) de tiempos de métodos y sentencias SQL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.metodos = {}
+        self.consultas = {}
+        self.textos = {}
+        self.lentas = deque(maxlen=MAX_CONSULTAS_LENTAS)
+        self.interrumpidas = deque(maxlen=MAX_CONSULTAS_LENTAS)
+        self.conteo_interrumpidas = {'canceladas': 0, 'tiempo_agotado': 0}
+        self.desde = datetime.now()
+        self.umbral_lento_ms = 200.0
+        self.explicar = False
+        self.umbral_explain_ms = 1000.0
+        self._logger_lentas = None
+
+    def configurar(self):
+        """Leer la configuración del entorno (se llama al crear un PostgresManager)"""
+        self.umbral_lento_ms = float(os.getenv('POS_UMBRAL_CONSULTA_LENTA_MS', '200'))
+        self.explicar = os.getenv('POS_EXPLAIN_CONSULTAS_LENTAS', '0') == '1'
+        self.umbral_explain_ms = float(os.getenv('POS_UMBRAL_EXPLAIN_MS', '1000'))
+
+    def _logger(self):
+        """Logger propio con archivo rotativo (se crea en la primera consulta lenta)"""
+        if self._logger_lentas is None:
+            self._logger_lentas = crear_logger_rotativo('pos.consultas_lentas', 'consultas_lentas.log')
+        return self._logger_lentas
+
+    # ----- Contexto del hilo -----
+
+    @property
+    def metodo_actual(self):
+        pila = getattr(self._local, 'pila', None)
+        return pila[-1] if pila else None
+
+    def _entrar(self, nombre):
+        if not hasattr(self._local, 'pila'):
+            self._local.pila = []
+            self._local.errores_sql = 0
+        self._local.pila.append(nombre)
+        return self._local.errores_sql
+
+    def _salir(self):
+        self._local.pila.pop()
+        return self._local.errores_sql
+
+    # ----- Registro -----
+
+    def registrar_metodo(self, nombre, ms, filas, error):
+        with self._lock:
+            self.metodos.setdefault(nombre, EstadisticasOperacion()).registrar(ms, filas, error)
+
+    def registrar_consulta(self, sql, params, ms, filas, error):
+        """Registrar una sentencia; devuelve su huella si fue lenta (si no, None)"""
+        normalizado = normalizar_sql(sql)
+        huella = huella_sql(normalizado)
+        if error:
+            if not hasattr(self._local, 'errores_sql'):
+                self._local.errores_sql = 0
+            self._local.errores_sql += 1
+
+        with self._lock:
+            self.consultas.setdefault(huella, EstadisticasOperacion()).registrar(ms, filas, error)
+            self.textos.setdefault(huella, normalizado)
+
+        if ms < self.umbral_lento_ms:
+            return None
+
+        entrada = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(ms, 1),
+            'huella': huella,
+            'metodo': self.metodo_actual,
+            'origen': self._origen(),
+            'filas': filas,
+            'parametros': describir_parametros(params),
+            'sql': normalizado,
+            'plan': None,
+        }
+        with self._lock:
+            self.lentas.append(entrada)
+        self._logger().info(
+            f"{entrada['ms']:.1f} ms | {entrada['metodo'] or '-'} | {entrada['origen'] or '-'} | "
+            f"{huella} | filas={filas} | params=({entrada['parametros']}) | {normalizado}"
+        )
+        return entrada
+
+    def registrar_interrupcion(self, sql, ms, cancelada):
+        """Sentencia cancelada (cancelar_consulta) o detenida por statement_timeout"""
+        motivo = 'canceladas' if cancelada else 'tiempo_agotado'
+        normalizado = normalizar_sql(sql) if sql else '-'
+        entrada = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(ms, 1),
+            'motivo': motivo,
+            'huella': huella_sql(normalizado),
+            'metodo': self.metodo_actual,
+            'origen': self._origen(),
+            'sql': normalizado,
+        }
+        with self._lock:
+            self.conteo_interrumpidas[motivo] += 1
+            self.interrumpidas.append(entrada)
+        self._logger().info(
+            f"{'CANCELADA' if cancelada else 'TIEMPO AGOTADO'} {entrada['ms']:.1f} ms | "
+            f"{entrada['metodo'] or '-'} | {entrada['origen'] or '-'} | {entrada['huella']} | {normalizado}"
+        )
+
+    def adjuntar_plan(self, entrada, plan):
+        entrada['plan'] = plan
+        self._logger().info(f"EXPLAIN {entrada['huella']}:\n{plan}")
+
+    @staticmethod
+    def _origen():
+        """Primer marco de ui/ o services/ en la pila: la pantalla que originó la consulta"""
+        for marco in reversed(traceback.extract_stack()[:-3]):
+            ruta = marco.filename.replace('\\', '/')
+            for carpeta in ('/ui/', '/services/'):
+                indice = ruta.rfind(carpeta)
+                if indice >= 0:
+                    return f"{ruta[indice + 1:]}:{marco.name}"
+        return None
+
+    # ----- Consulta -----
+
+    def instantanea(self):
+        """Copia de las estadísticas para mostrar o exportar"""
+        with self._lock:
+            metodos = {nombre: e.resumen() for nombre, e in self.metodos.items()}
+            consultas = {
+                huella: dict(e.resumen(), sql=self.textos.get(huella))
+                for huella, e in self.consultas.items()
+            }
+            lentas = list(self.lentas)
+            interrumpidas = dict(self.conteo_interrumpidas, recientes=list(self.interrumpidas))
+        return {
+            'desde': self.desde.isoformat(timespec='seconds'),
+            'umbral_lento_ms': self.umbral_lento_ms,
+            'metodos': metodos,
+            'consultas': consultas,
+            'lentas': lentas,
+            'interrumpidas': interrumpidas,
+        }
+
+    def reiniciar(self):
+        with self._lock:
+            self.metodos.clear()
+            self.consultas.clear()
+            self.textos.clear()
+            self.lentas.clear()
+            self.interrumpidas.clear()
+            self.conteo_interrumpidas = {'canceladas': 0, 'tiempo_agotado': 0}
+            self.desde = datetime.now()
+
+
+ESTADISTICAS = Instrumentacion()
+
+
+# ========== CANCELACIÓN ==========
+
+class ConexionesDeCarga:
+    """
+    Conexión propia de cada hilo de carga (PostgresManager.conexion_de_carga).
+    cancelar(hilo) manda connection.cancel() a esa conexión, que nadie más
+    usa: el servidor detiene la sentencia del hilo y no la de otro. La marca
+    de cancelado evita además que el hilo empiece otra lectura.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_hilo = {}
+        self._cancelados = set()
+
+    def registrar(self, conexion):
+        with self._lock:
+            self._por_hilo[threading.get_ident()] = conexion
+
+    def quitar(self):
+        hilo = threading.get_ident()
+        with self._lock:
+            self._por_hilo.pop(hilo, None)
+            self._cancelados.discard(hilo)
+
+    def cancelada(self):
+        """Si la carga del hilo actual fue cancelada"""
+        return threading.get_ident() in self._cancelados
+
+    def cancelar(self, hilo):
+        """Cancelar la carga del hilo (threading.get_ident()); False si no tiene conexión de carga"""
+        with self._lock:
+            conexion = self._por_hilo.get(hilo)
+            if conexion is None or conexion.closed:
+                return False
+            self._cancelados.add(hilo)
+            try:
+                conexion.cancel()
+            except Exception as e:
+                logging.warning(f"⚠️ No se pudo cancelar la consulta: {e}")
+            return True
+
+
+CONEXIONES_DE_CARGA = ConexionesDeCarga()
+
+
+# ========== CURSOR ==========
+
+_RE_SOLO_LECTURA = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+_RE_ESCRITURA = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|FOR\s+UPDATE|FOR\s+SHARE|NEXTVAL|SETVAL)\b', re.I)
+
+if PSYCOPG2_AVAILABLE:
+
+    class MedicionCursor:
+        """Mixin de cursor que mide cada execute() en ESTADISTICAS (ver CursorInstrumentado y database/filas.py)"""
+
+        def execute(self, query, vars=None):
+            inicio = time.perf_counter()
+            try:
+                resultado = super().execute(query, vars)
+            except Exception as e:
+                ms = (time.perf_counter() - inicio) * 1000
+                ESTADISTICAS.registrar_consulta(query, vars, ms, 0, True)
+                if isinstance(e, psycopg2.extensions.QueryCanceledError):
+                    ESTADISTICAS.registrar_interrupcion(query, ms, CONEXIONES_DE_CARGA.cancelada())
+                raise
+            ms = (time.perf_counter() - inicio) * 1000
+            lenta = ESTADISTICAS.registrar_consulta(query, vars, ms, max(self.rowcount, 0), False)
+            if lenta and ESTADISTICAS.explicar and ms >= ESTADISTICAS.umbral_explain_ms:
+                self._explicar(query, vars, lenta)
+            return resultado
+
+        def executemany(self, query, vars_list):
+            inicio = time.perf_counter()
+            try:
+                resultado = super().executemany(query, vars_list)
+            except Exception:
+                ESTADISTICAS.registrar_consulta(query, None, (time.perf_counter() - inicio) * 1000, 0, True)
+                raise
+            ESTADISTICAS.registrar_consulta(query, None, (time.perf_counter() - inicio) * 1000, max(self.rowcount, 0), False)
+            return resultado
+
+        def fetchmany(self, *args, **kwargs):
+            """En un cursor con nombre cada lote es un viaje al servidor: también puede interrumpirse"""
+            if not self.name:
+                return super().fetchmany(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return super().fetchmany(*args, **kwargs)
+            except psycopg2.extensions.QueryCanceledError:
+                ESTADISTICAS.registrar_interrupcion(
+                    self.query, (time.perf_counter() - inicio) * 1000, CONEXIONES_DE_CARGA.cancelada()
+                )
+                raise
+
+        def _explicar(self, query, vars, entrada):
+            """
+            EXPLAIN (ANALYZE, BUFFERS) de un SELECT lento. ANALYZE vuelve a
+            ejecutar la sentencia, así que solo se hace con lecturas y dentro
+            de un SAVEPOINT para no abortar la transacción del llamador.
+            """
+            texto = query.decode('utf-8', errors='replace') if isinstance(query, bytes) else str(query)
+            if not _RE_SOLO_LECTURA.match(texto) or _RE_ESCRITURA.search(texto):
+                return
+            conexion = self.connection
+            en_transaccion = not conexion.autocommit
+            try:
+                # Cursor sin instrumentar para no medir (ni explicar) el propio EXPLAIN
+                with conexion.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                    if en_transaccion:
+                        cursor.execute("SAVEPOINT instrumentacion_explain")
+                    try:
+                        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + texto, vars)
+                        plan = '\n'.join(fila[0] for fila in cursor.fetchall())
+                    finally:
+                        if en_transaccion:
+                            cursor.execute("ROLLBACK TO SAVEPOINT instrumentacion_explain")
+                            cursor.execute("RELEASE SAVEPOINT instrumentacion_explain")
+                ESTADISTICAS.adjuntar_plan(entrada, plan)
+            except Exception as e:
+                logging.warning(f"⚠️ No se pudo obtener EXPLAIN de {entrada['huella']}: {e}")
+
+    class CursorInstrumentado(MedicionCursor, RealDictCursor):
+        """RealDictCursor que mide cada execute() en ESTADISTICAS"""
+
+
+# ========== MÉTODOS ==========
+
+# Métodos de ciclo de vida y de la propia instrumentación que no se miden
+METODOS_EXCLUIDOS = {
+    'connect', 'close', 'close_connection', 'obtener_estadisticas', 'reiniciar_estadisticas',
+    'agregar_observador_stock', 'quitar_observador_stock', 'transaccion', 'conexion_lectura',
+    'conexion_reportes', 'reportes_en_replica', 'conexion_de_carga', 'cancelar_consulta',
+}
+
+
+def instrumentar_metodos(cls):
+    """
+    Decorador de clase: mide cada método público. Un método cuenta como error
+    si lanza una excepción o si alguna de sus sentencias falló (los métodos
+    de PostgresManager capturan el error y devuelven None/False/[]).
+    """
+    for nombre, atributo in list(vars(cls).items()):
+        if nombre.startswith('_') or nombre in METODOS_EXCLUIDOS or not callable(atributo):
+            continue
+        setattr(cls, nombre, _medir_metodo(nombre, atributo))
+    return cls
+
+
+def _medir_metodo(nombre, funcion):
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        errores_antes = ESTADISTICAS._entrar(nombre)
+        inicio = time.perf_counter()
+        error = True
+        resultado = None
+        try:
+            resultado = funcion(*args, **kwargs)
+            error = False
+            return resultado
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            error = ESTADISTICAS._salir() > errores_antes or error
+            if isinstance(resultado, (list, tuple)):
+                filas = len(resultado)
+            else:
+                filas = 0 if resultado is None or resultado is False else 1
+            ESTADISTICAS.registrar_metodo(nombre, ms, filas, error)
+    return envoltura
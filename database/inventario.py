@@ -0,0 +1,505 @@
+"""
+Operaciones de inventario para PostgresManager
+Cada movimiento (o lote de movimientos) cambia el stock y escribe su fila en
+movimientos_inventario en una sola sentencia con CTEs que modifican datos:
+un viaje a la base de datos y una transacción, sin leer el stock en Python.
+
+Tipos de movimiento (enum tipo_movimiento_inventario):
+    entrada        suma; con costo_unitario recalcula el costo promedio
+    devolucion     suma
+    merma, venta   restan
+    ajuste         cantidad con signo, o stock_contado (fija el stock)
+    transferencia  resta en id_ubicacion y suma en id_ubicacion_destino
+
+El conteo físico (services/conteo_fisico.py) se concilia igual: todas las
+líneas contadas como ajustes con stock_contado, en una sola sentencia.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from database.instrumentacion import instrumentar_metodos
+
+try:
+    from database.instrumentacion import CursorInstrumentado
+except ImportError:
+    CursorInstrumentado = None
+
+TIPOS_MOVIMIENTO = ('entrada', 'devolucion', 'merma', 'venta', 'ajuste', 'transferencia')
+
+# Stock y costo de cada línea en el orden recibido; las filas de inventario
+# tocadas se bloquean (FOR UPDATE) antes de calcular.
+SQL_MOVIMIENTOS = """
+    WITH lineas AS (
+        SELECT l.orden,
+               COALESCE(l.id_producto, p.id_producto) AS id_producto,
+               l.tipo::tipo_movimiento_inventario AS tipo,
+               l.cantidad,
+               l.stock_contado,
+               l.costo_unitario,
+               COALESCE(l.motivo, %(motivo)s) AS motivo,
+               COALESCE(
+                   l.id_ubicacion,
+                   (SELECT i.id_ubicacion FROM inventario i
+                    WHERE i.id_producto = COALESCE(l.id_producto, p.id_producto) AND i.activo = TRUE
+                    ORDER BY i.stock_actual DESC, i.id_ubicacion LIMIT 1),
+                   (SELECT u.id_ubicacion FROM ca_ubicaciones u
+                    WHERE u.activa = TRUE ORDER BY u.id_ubicacion LIMIT 1)
+               ) AS id_ubicacion,
+               l.id_ubicacion_destino
+        FROM unnest(
+            %(productos)s::int[], %(codigos)s::text[], %(tipos)s::text[], %(cantidades)s::numeric[],
+            %(contados)s::numeric[], %(costos)s::numeric[], %(motivos)s::text[],
+            %(ubicaciones)s::int[], %(destinos)s::int[]
+        ) WITH ORDINALITY AS l(id_producto, codigo_interno, tipo, cantidad, stock_contado, costo_unitario,
+                               motivo, id_ubicacion, id_ubicacion_destino, orden)
+        LEFT JOIN ca_productos p ON l.id_producto IS NULL AND p.codigo_interno = l.codigo_interno
+    ),
+    -- Cada línea como cambios por ubicación (una transferencia son dos)
+    cambios AS (
+        SELECT orden, 0 AS parte, id_producto, id_ubicacion, NULL::int AS id_ubicacion_origen,
+               tipo, cantidad, stock_contado, costo_unitario, motivo
+        FROM lineas
+        UNION ALL
+        SELECT orden, 1, id_producto, id_ubicacion_destino, id_ubicacion,
+               tipo, ABS(cantidad), NULL, NULL, motivo
+        FROM lineas
+        WHERE tipo = 'transferencia'
+    ),
+    actual AS (
+        SELECT i.id_producto, i.id_ubicacion, i.stock_actual, i.costo_promedio
+        FROM inventario i
+        WHERE (i.id_producto, i.id_ubicacion) IN (SELECT id_producto, id_ubicacion FROM cambios)
+        FOR UPDATE
+    ),
+    con_base AS (
+        SELECT c.*,
+               COALESCE(a.stock_actual, 0) AS stock_base,
+               COALESCE(a.costo_promedio, p.costo_promedio, 0) AS costo_anterior,
+               CASE
+                   WHEN c.stock_contado IS NOT NULL THEN 0  -- se calcula en corridos
+                   WHEN c.parte = 1 OR c.tipo IN ('entrada', 'devolucion') THEN ABS(c.cantidad)
+                   WHEN c.tipo IN ('merma', 'venta', 'transferencia') THEN -ABS(c.cantidad)
+                   ELSE c.cantidad
+               END AS delta_fijo,
+               CASE
+                   WHEN c.tipo = 'entrada' THEN c.costo_unitario
+                   WHEN c.parte = 1 THEN COALESCE(o.costo_promedio, p.costo_promedio, 0)
+               END AS costo_entrada
+        FROM cambios c
+        JOIN ca_productos p ON p.id_producto = c.id_producto
+        LEFT JOIN actual a ON a.id_producto = c.id_producto AND a.id_ubicacion = c.id_ubicacion
+        LEFT JOIN actual o ON o.id_producto = c.id_producto AND o.id_ubicacion = c.id_ubicacion_origen
+    ),
+    -- Un conteo fija el stock: cada conteo abre un tramo y las líneas
+    -- siguientes del mismo producto y ubicación suman sobre lo contado
+    tramos AS (
+        SELECT b.*, COUNT(b.stock_contado) OVER w AS tramo
+        FROM con_base b
+        WINDOW w AS (PARTITION BY b.id_producto, b.id_ubicacion ORDER BY b.orden, b.parte)
+    ),
+    corridos AS (
+        SELECT t.*,
+               CASE WHEN t.tramo = 0 THEN t.stock_base ELSE FIRST_VALUE(t.stock_contado) OVER wt END
+               + SUM(t.delta_fijo) OVER wt AS stock_nuevo
+        FROM tramos t
+        WINDOW wt AS (PARTITION BY t.id_producto, t.id_ubicacion, t.tramo ORDER BY t.orden, t.parte)
+    ),
+    movs AS (
+        SELECT r.*,
+               COALESCE(LAG(r.stock_nuevo) OVER w, r.stock_base) AS stock_anterior,
+               r.stock_nuevo - COALESCE(LAG(r.stock_nuevo) OVER w, r.stock_base) AS delta
+        FROM corridos r
+        WINDOW w AS (PARTITION BY r.id_producto, r.id_ubicacion ORDER BY r.orden, r.parte)
+    ),
+    totales AS (
+        SELECT id_producto, id_ubicacion,
+               MIN(stock_base) AS stock_base,
+               MIN(costo_anterior) AS costo_anterior,
+               SUM(delta) AS delta,
+               SUM(delta * costo_entrada) FILTER (WHERE costo_entrada IS NOT NULL AND delta > 0) AS valor_entrada,
+               SUM(delta) FILTER (WHERE costo_entrada IS NOT NULL AND delta > 0) AS cantidad_entrada,
+               BOOL_OR(delta > 0) AS hubo_entrada,
+               BOOL_OR(delta < 0) AS hubo_salida,
+               MIN(stock_nuevo) FILTER (WHERE delta < 0) AS minimo_tras_salida
+        FROM movs
+        GROUP BY id_producto, id_ubicacion
+    ),
+    rechazo AS (
+        SELECT NOT %(permitir_negativo)s AND EXISTS (
+            SELECT 1 FROM totales WHERE minimo_tras_salida < 0
+        ) AS rechazado
+    ),
+    inv AS (
+        INSERT INTO inventario AS i (
+            id_producto, id_ubicacion, stock_actual, costo_promedio,
+            fecha_ultima_entrada, fecha_ultima_salida
+        )
+        SELECT t.id_producto, t.id_ubicacion, t.delta,
+               COALESCE(ROUND(
+                   (GREATEST(t.stock_base, 0) * t.costo_anterior + t.valor_entrada)
+                   / NULLIF(GREATEST(t.stock_base, 0) + t.cantidad_entrada, 0), 4
+               ), t.costo_anterior),
+               CASE WHEN t.hubo_entrada THEN CURRENT_TIMESTAMP END,
+               CASE WHEN t.hubo_salida THEN CURRENT_TIMESTAMP END
+        FROM totales t
+        WHERE NOT (SELECT rechazado FROM rechazo)
+          AND (t.hubo_entrada OR t.hubo_salida)  -- un conteo igual al stock no reescribe la fila
+        ON CONFLICT (id_producto, id_ubicacion) DO UPDATE SET
+            stock_actual = i.stock_actual + EXCLUDED.stock_actual,
+            costo_promedio = EXCLUDED.costo_promedio,
+            fecha_ultima_entrada = COALESCE(EXCLUDED.fecha_ultima_entrada, i.fecha_ultima_entrada),
+            fecha_ultima_salida = COALESCE(EXCLUDED.fecha_ultima_salida, i.fecha_ultima_salida)
+        RETURNING i.id_producto, i.id_ubicacion, i.costo_promedio
+    ),
+    registrados AS (
+        INSERT INTO movimientos_inventario (
+            id_producto, id_ubicacion, tipo_movimiento,
+            cantidad, stock_anterior, stock_nuevo,
+            costo_unitario, costo_promedio_anterior, costo_promedio_nuevo,
+            id_usuario, motivo
+        )
+        SELECT m.id_producto, m.id_ubicacion, m.tipo,
+               m.delta, m.stock_anterior, m.stock_nuevo,
+               COALESCE(m.costo_entrada, m.costo_anterior), m.costo_anterior, n.costo_promedio,
+               %(id_usuario)s, m.motivo
+        FROM movs m
+        JOIN inv n ON n.id_producto = m.id_producto AND n.id_ubicacion = m.id_ubicacion
+        WHERE m.delta <> 0
+        ORDER BY m.orden, m.parte
+        RETURNING id_movimiento, id_producto, id_ubicacion, tipo_movimiento,
+                  cantidad, stock_anterior, stock_nuevo, costo_promedio_nuevo
+    )
+    SELECT r.rechazado, g.*
+    FROM rechazo r
+    LEFT JOIN registrados g ON TRUE
+    ORDER BY g.id_movimiento
+"""
+
+
+@instrumentar_metodos
+class OperacionesInventario:
+    """
+    Métodos de inventario de PostgresManager (se mezclan en la clase).
+    Usan self.connection, self.connect() y self._notificar_cambio_stock().
+    """
+
+    # ========== CONSULTAS DE PRODUCTO CON STOCK ==========
+
+    def get_product_with_stock(self, codigo_interno: str) -> Optional[Dict]:
+        """Producto activo por código interno con su stock sumado en todas las ubicaciones"""
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    SELECT
+                        p.id_producto, p.codigo_interno, p.codigo_barras, p.nombre,
+                        p.descripcion, p.precio_venta, p.costo_promedio, p.es_inventariable,
+                        p.tipo_producto_fisico AS tipo_producto,
+                        COALESCE(SUM(i.stock_actual), 0) AS stock_actual,
+                        COALESCE(SUM(i.stock_disponible), 0) AS stock_disponible
+                    FROM ca_productos p
+                    LEFT JOIN inventario i ON p.id_producto = i.id_producto AND i.activo = TRUE
+                    WHERE p.codigo_interno = %s AND p.activo = TRUE
+                    GROUP BY p.id_producto
+                """, (codigo_interno,))
+                producto = cursor.fetchone()
+                return dict(producto) if producto else None
+
+        except Exception as e:
+            logging.error(f"Error obteniendo producto con stock {codigo_interno}: {e}")
+            return None
+
+    def buscar_productos(self, busqueda: str, limite: int = 10) -> List[Dict]:
+        """
+        Buscar productos activos por código de barras, código interno o nombre.
+        Las coincidencias exactas de código van primero.
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            texto = busqueda.strip()
+            if not texto:
+                return []
+
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    SELECT
+                        p.id_producto, p.codigo_interno, p.codigo_barras, p.nombre,
+                        p.descripcion, p.precio_venta, p.costo_promedio, p.es_inventariable,
+                        p.tipo_producto_fisico AS tipo_producto,
+                        COALESCE(SUM(i.stock_actual), 0) AS stock_actual,
+                        COALESCE(SUM(i.stock_disponible), 0) AS stock_disponible
+                    FROM ca_productos p
+                    LEFT JOIN inventario i ON p.id_producto = i.id_producto AND i.activo = TRUE
+                    WHERE p.activo = TRUE
+                      AND (p.codigo_barras = %(texto)s OR p.codigo_interno = %(texto)s
+                           OR p.nombre ILIKE %(patron)s OR p.codigo_interno ILIKE %(patron)s)
+                    GROUP BY p.id_producto
+                    ORDER BY (p.codigo_barras = %(texto)s OR p.codigo_interno = %(texto)s) DESC, p.nombre
+                    LIMIT %(limite)s
+                """, {'texto': texto, 'patron': f"%{texto}%", 'limite': limite})
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logging.error(f"Error buscando productos '{busqueda}': {e}")
+            return []
+
+    # ========== MOVIMIENTOS ==========
+
+    def registrar_movimientos(self, lineas: List[Dict], id_usuario: int = None, motivo: str = None,
+                              permitir_negativo: bool = False) -> Optional[List[Dict]]:
+        """
+        Aplicar un lote de movimientos de inventario en una sola sentencia y
+        una transacción (todo o nada).
+
+        Args:
+            lineas: [{'id_producto' o 'codigo_interno', 'tipo_movimiento', 'cantidad',
+                      'id_ubicacion' (opcional), 'costo_unitario' (entradas, opcional),
+                      'id_ubicacion_destino' (transferencias), 'stock_contado' (ajustes
+                      a un stock fijo, contra el stock que dejan las líneas anteriores
+                      del lote, opcional), 'motivo' (opcional)}]
+                     Sin id_ubicacion se usa la ubicación con más stock del producto,
+                     o la primera ubicación activa.
+            id_usuario: Usuario que registra
+            motivo: Motivo por defecto de las líneas que no traen uno
+            permitir_negativo: Si es False y alguna salida deja stock negativo,
+                               no se aplica nada
+
+        Returns:
+            Lista de movimientos registrados ({'id_movimiento', 'id_producto', 'id_ubicacion',
+            'tipo_movimiento', 'cantidad', 'stock_anterior', 'stock_nuevo',
+            'costo_promedio_nuevo'}) o None si hubo error o stock insuficiente
+        """
+        if not lineas:
+            return []
+
+        for linea in lineas:
+            tipo = linea.get('tipo_movimiento')
+            if tipo not in TIPOS_MOVIMIENTO:
+                logging.error(f"Tipo de movimiento inválido: {tipo}")
+                return None
+            if tipo == 'transferencia' and not (linea.get('id_ubicacion') and linea.get('id_ubicacion_destino')):
+                logging.error("Una transferencia requiere id_ubicacion e id_ubicacion_destino")
+                return None
+
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(SQL_MOVIMIENTOS, {
+                    'productos': [l.get('id_producto') for l in lineas],
+                    'codigos': [l.get('codigo_interno') for l in lineas],
+                    'tipos': [l['tipo_movimiento'] for l in lineas],
+                    'cantidades': [l.get('cantidad', 0) for l in lineas],
+                    'contados': [l.get('stock_contado') for l in lineas],
+                    'costos': [l.get('costo_unitario') for l in lineas],
+                    'motivos': [l.get('motivo') for l in lineas],
+                    'ubicaciones': [l.get('id_ubicacion') for l in lineas],
+                    'destinos': [l.get('id_ubicacion_destino') for l in lineas],
+                    'motivo': motivo,
+                    'id_usuario': id_usuario,
+                    'permitir_negativo': permitir_negativo,
+                })
+                filas = cursor.fetchall()
+
+                if filas and filas[0]['rechazado']:
+                    self._revertir()
+                    logging.warning("⚠️ Movimiento rechazado: stock insuficiente")
+                    return None
+
+                self._confirmar()
+                movimientos = [
+                    {k: v for k, v in dict(fila).items() if k != 'rechazado'}
+                    for fila in filas if fila['id_movimiento'] is not None
+                ]
+                logging.info(f"✅ {len(movimientos)} movimientos de inventario registrados ({len(lineas)} líneas)")
+                self._notificar_cambio_stock([m['id_producto'] for m in movimientos])
+                return movimientos
+
+        except Exception as e:
+            try:
+                self._revertir()
+            except:
+                pass
+            logging.error(f"Error registrando movimientos de inventario: {e}")
+            return None
+
+    def registrar_movimiento(self, id_producto: int, tipo_movimiento: str, cantidad, id_ubicacion: int = None,
+                             id_usuario: int = None, motivo: str = None, costo_unitario=None,
+                             id_ubicacion_destino: int = None, permitir_negativo: bool = False) -> Optional[Dict]:
+        """
+        Aplicar un movimiento de inventario (ver registrar_movimientos).
+
+        Returns:
+            El movimiento de la ubicación de origen (stock_anterior, stock_nuevo, ...)
+            o None si hubo error o stock insuficiente
+        """
+        movimientos = self.registrar_movimientos([{
+            'id_producto': id_producto,
+            'tipo_movimiento': tipo_movimiento,
+            'cantidad': cantidad,
+            'id_ubicacion': id_ubicacion,
+            'costo_unitario': costo_unitario,
+            'id_ubicacion_destino': id_ubicacion_destino,
+            'motivo': motivo,
+        }], id_usuario=id_usuario, permitir_negativo=permitir_negativo)
+        if not movimientos:
+            return None
+        return movimientos[0]
+
+    def registrar_movimiento_inventario(self, movimiento_data: Dict) -> Optional[Dict]:
+        """
+        Registrar un movimiento desde un diccionario (formulario de movimientos).
+
+        Args:
+            movimiento_data: {'id_producto' o 'codigo_interno', 'tipo_movimiento',
+                              'cantidad' (con signo en ajustes), 'motivo', 'id_usuario',
+                              'id_ubicacion', 'costo_unitario', 'id_ubicacion_destino'}
+        """
+        linea = dict(movimiento_data)
+        id_usuario = linea.pop('id_usuario', None)
+        movimientos = self.registrar_movimientos(
+            [linea], id_usuario=id_usuario, permitir_negativo=linea.pop('permitir_negativo', False)
+        )
+        if not movimientos:
+            return None
+        return movimientos[0]
+
+    def actualizar_stock(self, codigo_interno: str, tipo_producto: str = None, nuevo_stock=0,
+                         fecha_entrada=None, fecha_salida=None, id_ubicacion: int = None,
+                         id_usuario: int = None, motivo: str = None) -> bool:
+        """
+        Fijar el stock de un producto (ajuste por la diferencia contra el stock
+        bloqueado en la base, con su movimiento). tipo_producto y las fechas se
+        aceptan por compatibilidad: las fechas de entrada/salida las pone la base.
+        """
+        movimientos = self.registrar_movimientos([{
+            'codigo_interno': codigo_interno,
+            'tipo_movimiento': 'ajuste',
+            'stock_contado': nuevo_stock,
+            'id_ubicacion': id_ubicacion,
+            'motivo': motivo or "Ajuste de stock",
+        }], id_usuario=id_usuario, permitir_negativo=True)
+        if movimientos is None:
+            return False
+        if movimientos:
+            return True
+        # Sin movimientos: el stock ya era ese, o el código no existe y no se escribió nada
+        if not self.query("SELECT 1 FROM ca_productos WHERE codigo_interno = %s", (codigo_interno,)):
+            logging.error(f"Producto {codigo_interno} no encontrado, no se ajustó el stock")
+            return False
+        return True
+
+    # ========== CONTEO FÍSICO ==========
+
+    def obtener_catalogo_conteo(self) -> List[Dict]:
+        """Productos inventariables activos con sus códigos (se carga una vez por sesión de conteo)"""
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    SELECT id_producto, codigo_interno, codigo_barras, nombre
+                    FROM ca_productos
+                    WHERE activo = TRUE AND es_inventariable = TRUE
+                    ORDER BY id_producto
+                """)
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logging.error(f"Error obteniendo catálogo para conteo: {e}")
+            return []
+
+    def obtener_diferencias_conteo(self, id_ubicacion: int, conteos: Dict[int, object],
+                                   no_contados_en_cero: bool = False) -> Optional[List[Dict]]:
+        """
+        Comparar un conteo contra el stock de la ubicación (una consulta).
+
+        Args:
+            id_ubicacion: Ubicación contada
+            conteos: {id_producto: cantidad contada}
+            no_contados_en_cero: Incluir los productos con stock en la ubicación
+                                 que no se contaron (contado = 0)
+
+        Returns:
+            Solo los productos con diferencia: [{'id_producto', 'codigo_interno', 'nombre',
+            'stock_sistema', 'contado', 'diferencia', 'valor_diferencia'}], de mayor a
+            menor valor absoluto; None si hubo error
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    WITH contados AS (
+                        SELECT * FROM unnest(%(productos)s::int[], %(cantidades)s::numeric[])
+                            AS c(id_producto, contado)
+                    ),
+                    alcance AS (
+                        SELECT id_producto FROM contados
+                        UNION
+                        SELECT i.id_producto FROM inventario i
+                        WHERE %(no_contados_en_cero)s
+                          AND i.id_ubicacion = %(id_ubicacion)s AND i.activo = TRUE AND i.stock_actual <> 0
+                    ),
+                    comparacion AS (
+                        SELECT p.id_producto, p.codigo_interno, p.nombre,
+                               COALESCE(i.stock_actual, 0) AS stock_sistema,
+                               COALESCE(c.contado, 0) AS contado,
+                               COALESCE(c.contado, 0) - COALESCE(i.stock_actual, 0) AS diferencia,
+                               COALESCE(i.costo_promedio, p.costo_promedio, 0) AS costo
+                        FROM alcance a
+                        JOIN ca_productos p ON p.id_producto = a.id_producto
+                        LEFT JOIN contados c ON c.id_producto = a.id_producto
+                        LEFT JOIN inventario i ON i.id_producto = a.id_producto AND i.id_ubicacion = %(id_ubicacion)s
+                    )
+                    SELECT id_producto, codigo_interno, nombre, stock_sistema, contado, diferencia,
+                           ROUND(diferencia * costo, 2) AS valor_diferencia
+                    FROM comparacion
+                    WHERE diferencia <> 0
+                    ORDER BY ABS(diferencia * costo) DESC, nombre
+                """, {
+                    'productos': list(conteos.keys()),
+                    'cantidades': list(conteos.values()),
+                    'id_ubicacion': id_ubicacion,
+                    'no_contados_en_cero': no_contados_en_cero,
+                })
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logging.error(f"Error calculando diferencias de conteo: {e}")
+            return None
+
+    def aplicar_conteo_fisico(self, id_ubicacion: int, diferencias: List[Dict], id_usuario: int = None,
+                              motivo: str = None) -> Optional[List[Dict]]:
+        """
+        Conciliar un conteo con las diferencias que se revisaron
+        (obtener_diferencias_conteo): cada producto recibe un ajuste de
+        contado - stock_sistema sobre su stock actual, todo en una sentencia y
+        un commit. Una venta entre la revisión y la aplicación se conserva (el
+        ajuste no fija el stock al contado); una venta entre el escaneo y la
+        revisión aparece como diferencia.
+
+        Returns:
+            Movimientos registrados o None si hubo error
+        """
+        movimientos = self.registrar_movimientos([
+            {
+                'id_producto': d['id_producto'],
+                'tipo_movimiento': 'ajuste',
+                'cantidad': d['contado'] - d['stock_sistema'],
+                'id_ubicacion': id_ubicacion,
+            }
+            for d in diferencias if d['contado'] != d['stock_sistema']
+        ], id_usuario=id_usuario, motivo=motivo or "Conteo físico", permitir_negativo=True)
+
+        if movimientos is not None:
+            logging.info(f"✅ Conteo físico aplicado: {len(movimientos)} ajustes")
+        return movimientos
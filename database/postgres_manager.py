@@ -7,19 +7,35 @@ Usa PostgreSQL local o en servidor dedicado
 import logging
 import bcrypt
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 import traceback
+from contextlib import contextmanager
+
+from database.instrumentacion import CONEXIONES_DE_CARGA, ESTADISTICAS, instrumentar_metodos
+from database.inventario import OperacionesInventario
+from database.analitica import OperacionesAnalitica
+from database.referencias import CacheReferencias
+from database.transacciones import TIEMPOS_LIMITE_MS, UnidadDeTrabajo
 
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from database.instrumentacion import CursorInstrumentado
+    from database.filas import CursorFilas
     PSYCOPG2_AVAILABLE = True
 except ImportError:
     PSYCOPG2_AVAILABLE = False
     logging.warning("psycopg2 no está instalado. Instala con: pip install psycopg2-binary")
 
+# Nombre de las sesiones en pg_stat_activity
+NOMBRE_APLICACION = os.getenv('POS_NOMBRE_APLICACION', 'HTF POS')
+
+# Cada cuánto se vuelve a medir el retraso de la base de reportes (o reintentar conectarla)
+INTERVALO_REVISION_REPORTES_S = float(os.getenv('POS_REPORTES_REVISION_S', '15'))
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,7 +43,8 @@ logging.basicConfig(
 )
 
 
-class PostgresManager:
+@instrumentar_metodos
+class PostgresManager(OperacionesInventario, OperacionesAnalitica, UnidadDeTrabajo):
     """Gestor de conexión y operaciones con PostgreSQL"""
     
     def __init__(self, db_config: Dict[str, str]):
@@ -47,6 +64,20 @@ class PostgresManager:
         self.db_config = db_config
         self.connection = None
         self.is_connected = False
+        self._rollups_disponibles = None  # Se detecta en el primer uso
+        self._antiguedad_cxc_disponible = None  # setup_cxc_antiguedad.sql, se detecta en el primer uso
+        self._saldos_cxp_disponibles = None  # setup_cxp_saldos.sql, se detecta en el primer uso
+        self._sugerencias_disponibles = None  # setup_analitica_demanda.sql, se detecta en el primer uso
+        self._observadores_stock = []  # Callbacks que reciben los id_producto modificados
+        self.referencias = CacheReferencias()  # Ubicaciones, categorías, tipos de cuenta y proveedores
+        self._hilos = threading.local()  # Estado por hilo: bloques transaccion() abiertos (database/transacciones.py)
+        self._lectura = None  # Conexión de solo lectura en autocommit (se abre en la primera consulta)
+        self._lectura_deshabilitada = os.getenv('POS_CONEXION_LECTURA', '1') == '0'
+        self._reportes = None  # Conexión a la base de reportes (réplica), si hay DSN
+        self._reportes_principal = None  # Reportes en la principal, con el límite de tiempo de reporte
+        self._reportes_estado = {'destino': 'lectura', 'retraso_s': None, 'revisado': 0.0}
+        self._reportes_lock = threading.Lock()  # Una sola revisión de la base de reportes a la vez
+        ESTADISTICAS.configurar()
         self.connect()
     
     def connect(self):
@@ -57,14 +88,7 @@ class PostgresManager:
                 raise ImportError("psycopg2 library not installed")
             
             # Conectar a PostgreSQL
-            self.connection = psycopg2.connect(
-                host=self.db_config.get('host', 'localhost'),
-                port=self.db_config.get('port', '5432'),
-                database=self.db_config.get('database'),
-                user=self.db_config.get('user'),
-                password=self.db_config.get('password'),
-                cursor_factory=RealDictCursor
-            )
+            self.connection = self._abrir_conexion(NOMBRE_APLICACION)
             
             self.is_connected = True
             logging.info("✅ Conexión exitosa a PostgreSQL")
@@ -74,8 +98,187 @@ class PostgresManager:
             self.is_connected = False
             raise
     
+    def _abrir_conexion(self, nombre_aplicacion: str, dsn: str = None, tiempo_limite_ms: int = 0):
+        """Conexión nueva con db_config (o con un DSN), cursores instrumentados y statement_timeout"""
+        opciones = {'options': f"-c statement_timeout={int(tiempo_limite_ms)}"} if tiempo_limite_ms else {}
+        if dsn:
+            return psycopg2.connect(dsn, application_name=nombre_aplicacion,
+                                    cursor_factory=CursorInstrumentado, **opciones)
+        return psycopg2.connect(
+            host=self.db_config.get('host', 'localhost'),
+            port=self.db_config.get('port', '5432'),
+            database=self.db_config.get('database'),
+            user=self.db_config.get('user'),
+            password=self.db_config.get('password'),
+            application_name=nombre_aplicacion,
+            cursor_factory=CursorInstrumentado,
+            **opciones
+        )
+    
+    def _abrir_conexion_lectura(self, nombre: str, tiempo_limite_ms: int, dsn: str = None):
+        """Conexión nueva de solo lectura en autocommit, con el statement_timeout de su clase"""
+        conexion = self._abrir_conexion(f"{NOMBRE_APLICACION} ({nombre})", dsn, tiempo_limite_ms)
+        conexion.set_session(readonly=True, autocommit=True)
+        return conexion
+    
+    def conexion_lectura(self):
+        """
+        Conexión de las consultas: solo lectura y autocommit, así ninguna
+        lectura deja la sesión "idle in transaction" reteniendo un snapshot.
+        Se abre la primera vez; con POS_CONEXION_LECTURA=0, o si no se puede
+        abrir, se usa la principal desde el hilo principal (y cada lectura
+        cierra su transacción); otros hilos abren una conexión por lectura.
+        """
+        if self._lectura is not None and not self._lectura.closed:
+            return self._lectura
+        if self._lectura_deshabilitada:
+            return self.connection
+        try:
+            conexion = self._abrir_conexion_lectura('lectura', TIEMPOS_LIMITE_MS['consulta'])
+            self._lectura = conexion
+            logging.info("✅ Conexión de lectura abierta")
+            return conexion
+        except Exception as e:
+            logging.warning(f"⚠️ Sin conexión de lectura, las consultas usan la principal: {e}")
+            self._lectura_deshabilitada = True
+            return self.connection
+    
+    def conexion_reportes(self):
+        """
+        Conexión de los reportes pesados (historiales, exportaciones, antigüedad
+        de CxC, análisis de demanda). Con reportes_dsn en db_config va a esa base,
+        típicamente una réplica, en solo lectura; cada INTERVALO_REVISION_REPORTES_S
+        se mide su retraso y, si pasa de reportes_retraso_max_s o no responde, los
+        reportes vuelven a la principal. En la principal usan su propia conexión
+        de solo lectura: el límite de tiempo de reporte queda fijo en ella y no
+        alcanza a las consultas de pantallas.
+        """
+        if self.reportes_en_replica():
+            return self._reportes
+        if self._lectura_deshabilitada:
+            return self.connection
+        if self._reportes_principal is not None and not self._reportes_principal.closed:
+            return self._reportes_principal
+        try:
+            self._reportes_principal = self._abrir_conexion_lectura('reportes', TIEMPOS_LIMITE_MS['reporte'])
+            return self._reportes_principal
+        except Exception as e:
+            logging.warning(f"⚠️ Sin conexión de reportes, los reportes usan la de lectura: {e}")
+            return self.conexion_lectura()
+
+    def reportes_en_replica(self) -> bool:
+        """Si los reportes van ahora a la base de reportes (DSN configurado, conectada y al día)"""
+        dsn = self.db_config.get('reportes_dsn')
+        if not dsn:
+            return False
+
+        estado = self._reportes_estado
+        # Si otro hilo está revisando no se espera: se usa el último destino decidido
+        if self._reportes_lock.acquire(blocking=False):
+            try:
+                ahora = time.monotonic()
+                if ahora - estado['revisado'] >= INTERVALO_REVISION_REPORTES_S:
+                    estado['revisado'] = ahora
+                    self._revisar_reportes(dsn)
+            finally:
+                self._reportes_lock.release()
+
+        return estado['destino'] == 'reportes' and self._reportes is not None and not self._reportes.closed
+
+    def _revisar_reportes(self, dsn: str):
+        """Medir el retraso de la base de reportes y decidir a dónde van los reportes (con _reportes_lock tomado)"""
+        estado = self._reportes_estado
+        retraso_max = float(self.db_config.get('reportes_retraso_max_s', 30))
+        anterior = estado['destino']
+        try:
+            if self._reportes is None or self._reportes.closed:
+                # En autocommit, como la de lectura: la comparten varios hilos y
+                # ninguno debe cerrar (rollback) la transacción de otro
+                self._reportes = self._abrir_conexion_lectura('reportes', TIEMPOS_LIMITE_MS['reporte'], dsn)
+
+            with self._reportes.cursor() as cursor:
+                # En la principal (o una réplica al día) el retraso es 0
+                cursor.execute("""
+                    SELECT CASE
+                        WHEN NOT pg_is_in_recovery() THEN 0
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                    END::float8 AS retraso_s
+                """)
+                estado['retraso_s'] = cursor.fetchone()['retraso_s']
+
+            estado['destino'] = 'reportes' if estado['retraso_s'] <= retraso_max else 'lectura'
+            if estado['destino'] != anterior:
+                if estado['destino'] == 'reportes':
+                    logging.info(f"✅ Reportes en la base de reportes (retraso {estado['retraso_s']:.1f} s)")
+                else:
+                    logging.warning(f"⚠️ Base de reportes atrasada {estado['retraso_s']:.1f} s, reportes en la principal")
+        except Exception as e:
+            estado['retraso_s'] = None
+            if self._reportes is not None and not self._reportes.closed:
+                self._reportes.close()
+            if anterior != 'sin_conexion':
+                logging.warning(f"⚠️ Base de reportes no disponible, reportes en la principal: {e}")
+            estado['destino'] = 'sin_conexion'
+
+    @contextmanager
+    def conexion_de_carga(self, reporte: bool = False):
+        """
+        Conexión propia del hilo de carga de una pantalla mientras dura el bloque:
+        las lecturas del hilo van a ella, con el límite de tiempo de su clase
+        fijado al abrirla, y cancelar_consulta(hilo) la cancela sin tocar lo que
+        ejecutan la interfaz u otros hilos en las conexiones compartidas.
+
+            with self.pg_manager.conexion_de_carga(reporte=True):
+                filas = self.pg_manager.obtener_movimientos_completos(500)
+
+        Si no se puede abrir, las lecturas siguen por las conexiones compartidas.
+        """
+        clase = 'reporte' if reporte else 'consulta'
+        conexion = None
+        try:
+            dsn = self.db_config.get('reportes_dsn') if reporte and self.reportes_en_replica() else None
+            conexion = self._abrir_conexion(f"{NOMBRE_APLICACION} (carga)", dsn, TIEMPOS_LIMITE_MS[clase])
+            # Sin autocommit (los cursores con nombre necesitan transacción): la
+            # conexión es solo de este hilo y _cursor_lectura() cierra cada lectura
+            conexion.set_session(readonly=True)
+        except Exception as e:
+            logging.warning(f"⚠️ Sin conexión de carga propia, se usan las compartidas: {e}")
+            conexion = None
+
+        if conexion is not None:
+            self._hilos.carga = conexion
+            CONEXIONES_DE_CARGA.registrar(conexion)
+        try:
+            yield conexion
+        finally:
+            if conexion is not None:
+                self._hilos.carga = None
+                CONEXIONES_DE_CARGA.quitar()
+                conexion.close()
+
+    def cancelar_consulta(self, hilo: int) -> bool:
+        """
+        Cancelar en el servidor la carga de un hilo (threading.get_ident() tomado
+        dentro del hilo, que lee dentro de conexion_de_carga()). Al cerrar una
+        pantalla, su consulta se detiene y la conexión queda libre de inmediato;
+        el hilo ya no empieza otra lectura.
+
+        Returns:
+            True si el hilo tenía una conexión de carga y se pidió la cancelación
+        """
+        cancelada = CONEXIONES_DE_CARGA.cancelar(hilo)
+        if cancelada:
+            logging.info("🛑 Consulta cancelada en el servidor")
+        return cancelada
+
     def close(self):
         """Cerrar conexión a PostgreSQL"""
+        for conexion in (self._reportes, self._reportes_principal):
+            if conexion is not None and not conexion.closed:
+                conexion.close()
+        if self._lectura is not None and not self._lectura.closed:
+            self._lectura.close()
         if self.connection:
             self.connection.close()
             self.is_connected = False
@@ -99,7 +302,7 @@ class PostgresManager:
                 self.connect()
             
             # Probar acceso a tabla usuarios
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("SELECT id_usuario FROM usuarios LIMIT 1")
             
             logging.info("✅ Base de datos PostgreSQL verificada correctamente")
@@ -108,16 +311,63 @@ class PostgresManager:
         except Exception as e:
             logging.error(f"❌ Error verificando base de datos: {e}")
             return False
-    
+
+    # ========== INSTRUMENTACIÓN ==========
+
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Estadísticas de rendimiento del proceso (ver database/instrumentacion.py)
+
+        Returns:
+            {'desde', 'umbral_lento_ms',
+             'metodos': {nombre: resumen}, 'consultas': {huella: resumen + sql},
+             'lentas': [últimas consultas lentas con origen y plan],
+             'referencias': {tabla: aciertos/fallos de la caché de referencias},
+             'reportes': {'destino': 'reportes' | 'lectura' | 'sin_conexion', 'retraso_s'}}
+        """
+        datos = ESTADISTICAS.instantanea()
+        datos['referencias'] = self.referencias.estadisticas()
+        datos['reportes'] = {
+            'destino': self._reportes_estado['destino'] if self.db_config.get('reportes_dsn') else 'lectura',
+            'retraso_s': self._reportes_estado['retraso_s'],
+        }
+        return datos
+
+    def sesiones_en_transaccion(self) -> List[Dict]:
+        """
+        Sesiones de la aplicación (cualquier proceso) que están "idle in
+        transaction": retienen un snapshot y bloquean el vacuum. Con las
+        lecturas en la conexión de autocommit debería estar vacía.
+        """
+        return self.query("""
+            SELECT pid, application_name, state,
+                   now() - xact_start AS duracion, left(query, 200) AS ultima_consulta
+            FROM pg_stat_activity
+            WHERE application_name LIKE %s
+              AND state LIKE 'idle in transaction%%'
+              AND pid <> pg_backend_pid()
+            ORDER BY xact_start
+        """, (NOMBRE_APLICACION + '%',))
+
+    def reiniciar_estadisticas(self):
+        """Poner en cero los contadores y la lista de consultas lentas"""
+        ESTADISTICAS.reiniciar()
+        self.referencias.reiniciar_contadores()
+        logging.info("Estadísticas de rendimiento reiniciadas")
+
     # ========== UTILIDADES ==========
     
-    def query(self, sql: str, params: tuple = None) -> List[Dict]:
+    def query(self, sql: str, params: tuple = None, compactas: bool = False, reporte: bool = False) -> List[Dict]:
         """
         Ejecutar una consulta SELECT y devolver resultados como lista de diccionarios.
         
         Args:
             sql: Sentencia SQL SELECT
             params: Tupla de parámetros para la consulta (opcional)
+            compactas: Devolver Filas de solo lectura (database/filas.py) en lugar
+                       de diccionarios; para listas grandes que se guardan en memoria
+            reporte: Consulta pesada de reporte; va a la base de reportes si hay
+                     una configurada y al día (ver conexion_reportes)
             
         Returns:
             Lista de diccionarios con los resultados
@@ -126,7 +376,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura(cursor_factory=CursorFilas if compactas else None, reporte=reporte) as cursor:
                 if params:
                     cursor.execute(sql, params)
                 else:
@@ -160,13 +410,14 @@ class PostgresManager:
                     cursor.execute(sql)
                 
                 # Confirmar la transacción
-                self.connection.commit()
+                self._confirmar()
+                self._despues_de_confirmar(lambda: self.referencias.invalidar_por_sql(sql))
                 return True
         except Exception as e:
             logging.error(f"Error en execute: {e}")
             # Hacer rollback en caso de error
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             return False
@@ -194,7 +445,8 @@ class PostgresManager:
                 
                 # Obtener el ID retornado
                 result = cursor.fetchone()
-                self.connection.commit()
+                self._confirmar()
+                self._despues_de_confirmar(lambda: self.referencias.invalidar_por_sql(sql))
                 
                 if result:
                     return result[0] if isinstance(result, (tuple, list)) else result
@@ -203,7 +455,7 @@ class PostgresManager:
             logging.error(f"Error en execute_with_returning: {e}")
             # Hacer rollback en caso de error
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             return None
@@ -225,8 +477,9 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
-                # Consultar usuario por nombre de usuario
+            # Consultar usuario por nombre de usuario (conexión de lectura: un
+            # usuario inexistente o una contraseña incorrecta no dejan transacción abierta)
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT id_usuario, nombre_usuario, contrasenia, nombre_completo, rol
                     FROM usuarios
@@ -234,34 +487,33 @@ class PostgresManager:
                 """, (username,))
                 
                 user = cursor.fetchone()
+            
+            if not user:
+                logging.warning(f"Usuario no encontrado o inactivo: {username}")
+                return None
+            
+            stored_password = user['contrasenia']
+            
+            # Verificar la contraseña usando bcrypt
+            if bcrypt.checkpw(password.encode('utf-8'), stored_password.encode('utf-8')):
+                logging.info(f"✅ Autenticación exitosa para usuario: {username}")
                 
-                if not user:
-                    logging.warning(f"Usuario no encontrado o inactivo: {username}")
-                    return None
-                
-                stored_password = user['contrasenia']
+                # Actualizar último acceso (confirma o revierte en execute)
+                self.execute("""
+                    UPDATE usuarios 
+                    SET ultimo_acceso = %s 
+                    WHERE id_usuario = %s
+                """, (datetime.now(), user['id_usuario']))
                 
-                # Verificar la contraseña usando bcrypt
-                if bcrypt.checkpw(password.encode('utf-8'), stored_password.encode('utf-8')):
-                    logging.info(f"✅ Autenticación exitosa para usuario: {username}")
-                    
-                    # Actualizar último acceso
-                    cursor.execute("""
-                        UPDATE usuarios 
-                        SET ultimo_acceso = %s 
-                        WHERE id_usuario = %s
-                    """, (datetime.now(), user['id_usuario']))
-                    self.connection.commit()
-                    
-                    return {
-                        "id_usuario": user['id_usuario'],
-                        "username": user['nombre_usuario'],
-                        "nombre_completo": user['nombre_completo'],
-                        "rol": user['rol']
-                    }
-                else:
-                    logging.warning(f"Contraseña incorrecta para usuario: {username}")
-                    return None
+                return {
+                    "id_usuario": user['id_usuario'],
+                    "username": user['nombre_usuario'],
+                    "nombre_completo": user['nombre_completo'],
+                    "rol": user['rol']
+                }
+            else:
+                logging.warning(f"Contraseña incorrecta para usuario: {username}")
+                return None
                 
         except Exception as e:
             logging.error(f"Error durante la autenticación: {e}")
@@ -289,18 +541,20 @@ class PostgresManager:
                 logging.error("El nombre de usuario debe tener al menos 3 caracteres")
                 return None
             
-            with self.connection.cursor() as cursor:
-                # Verificar si el usuario ya existe
+            # Verificar si el usuario ya existe (conexión de lectura: el aviso no deja transacción abierta)
+            with self._cursor_lectura() as cursor:
                 cursor.execute("SELECT id_usuario FROM usuarios WHERE nombre_usuario = %s", (username,))
-                
-                if cursor.fetchone():
-                    logging.warning(f"El usuario '{username}' ya existe")
-                    return None
-                
-                # Hashear la contraseña
-                salt = bcrypt.gensalt()
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
-                
+                existe = cursor.fetchone()
+            
+            if existe:
+                logging.warning(f"El usuario '{username}' ya existe")
+                return None
+            
+            # Hashear la contraseña
+            salt = bcrypt.gensalt()
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+            
+            with self.connection.cursor() as cursor:
                 # Insertar nuevo usuario
                 cursor.execute("""
                     INSERT INTO usuarios (nombre_usuario, contrasenia, nombre_completo, rol, activo)
@@ -309,14 +563,14 @@ class PostgresManager:
                 """, (username, hashed_password, nombre_completo, rol))
                 
                 user_id = cursor.fetchone()['id_usuario']
-                self.connection.commit()
+                self._confirmar()
                 
                 logging.info(f"✅ Usuario '{username}' creado exitosamente con ID: {user_id}")
                 return user_id
                 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error al crear usuario: {e}")
@@ -343,6 +597,7 @@ class PostgresManager:
                 user = cursor.fetchone()
                 
                 if not user:
+                    self._revertir()
                     logging.warning(f"Usuario no encontrado: {username}")
                     return False
                 
@@ -359,13 +614,13 @@ class PostgresManager:
                     WHERE id_usuario = %s
                 """, (hashed_password, user_id))
                 
-                self.connection.commit()
+                self._confirmar()
                 logging.info(f"✅ Contraseña actualizada para usuario: {username}")
                 return True
                     
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error al actualizar contraseña: {e}")
@@ -379,7 +634,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT 
                         p.id_producto, p.codigo_interno, p.codigo_barras, p.nombre,
@@ -408,7 +663,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 if search_text.strip():
                     # Búsqueda con texto
                     search_pattern = f"%{search_text}%"
@@ -451,7 +706,7 @@ class PostgresManager:
     def obtener_producto_por_codigo(self, codigo_interno: str) -> Optional[Dict]:
         """Obtener producto por código interno"""
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
                 cursor.execute("""
                     SELECT 
                         p.id_producto, p.codigo_interno, p.nombre, p.es_inventariable,
@@ -466,12 +721,15 @@ class PostgresManager:
             return None
     
     def obtener_movimientos_completos(self, limite: int = 1000) -> List[Dict]:
-        """Obtener movimientos de inventario completos con información de productos y usuarios"""
+        """
+        Obtener movimientos de inventario completos con información de productos y usuarios.
+        Devuelve Filas compactas (database/filas.py): la pantalla las guarda sin copiarlas.
+        """
         try:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura(cursor_factory=CursorFilas, reporte=True) as cursor:
                 cursor.execute("""
                     SELECT 
                         mi.id_movimiento,
@@ -482,11 +740,11 @@ class PostgresManager:
                         mi.cantidad,
                         mi.stock_anterior,
                         mi.stock_nuevo,
-                        mi.motivo,
+                        COALESCE(mi.motivo, '') as motivo,
                         mi.id_usuario,
                         mi.id_venta,
                         p.nombre as nombre_producto,
-                        u.nombre_completo as nombre_usuario
+                        COALESCE(u.nombre_completo, 'Usuario desconocido') as nombre_usuario
                     FROM movimientos_inventario mi
                     INNER JOIN ca_productos p ON mi.id_producto = p.id_producto
                     INNER JOIN usuarios u ON mi.id_usuario = u.id_usuario
@@ -508,10 +766,12 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT 
                         p.id_producto,
+                        i.id_inventario,
+                        i.id_ubicacion,
                         p.codigo_interno,
                         p.nombre,
                         p.descripcion,
@@ -522,6 +782,7 @@ class PostgresManager:
                         p.cantidad_mayoreo,
                         i.stock_actual,
                         i.stock_minimo,
+                        i.stock_maximo,
                         i.costo_promedio,
                         u.nombre as ubicacion,
                         p.requiere_refrigeracion,
@@ -549,7 +810,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 if categoria:
                     # Obtener productos de una categoría específica
                     cursor.execute("""
@@ -633,11 +894,15 @@ class PostgresManager:
                     WHERE codigo_interno = %s
                 """, values)
                 
-                self.connection.commit()
+                self._confirmar()
                 logging.info(f"Producto {codigo_interno} actualizado correctamente")
                 return True
             
         except Exception as e:
+            try:
+                self._revertir()
+            except:
+                pass
             logging.error(f"Error actualizando producto {codigo_interno}: {e}")
             return False
     
@@ -647,7 +912,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT 
                         p.id_producto, p.codigo_interno, p.codigo_barras, p.nombre,
@@ -678,7 +943,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT 
                         p.id_producto, p.codigo_interno, p.codigo_barras, p.nombre,
@@ -717,7 +982,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT id_producto 
                     FROM ca_productos 
@@ -790,14 +1055,14 @@ class PostgresManager:
                 ))
                 
                 id_producto = cursor.fetchone()['id_producto']
-                self.connection.commit()
+                self._confirmar()
                 
                 logging.info(f"✅ Producto '{producto_data['nombre']}' insertado con ID: {id_producto}")
                 return id_producto
                 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error insertando producto: {e}")
@@ -845,35 +1110,136 @@ class PostgresManager:
                 ))
                 
                 id_inventario = cursor.fetchone()['id_inventario']
-                self.connection.commit()
+                self._confirmar()
                 
                 logging.info(f"Inventario creado con ID: {id_inventario}")
                 return id_inventario
                 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error creando inventario: {e}")
             return None
     
+    # ========== OBSERVADORES DE STOCK ==========
+    
+    def agregar_observador_stock(self, callback):
+        """
+        Registrar un callback que se llama después de cada commit que modifica
+        inventario, con la lista de id_producto afectados.
+        """
+        if callback not in self._observadores_stock:
+            self._observadores_stock.append(callback)
+    
+    def quitar_observador_stock(self, callback):
+        """Quitar un callback registrado con agregar_observador_stock"""
+        if callback in self._observadores_stock:
+            self._observadores_stock.remove(callback)
+    
+    def _notificar_cambio_stock(self, ids_producto: List[int]):
+        """Avisar a los observadores qué productos cambiaron (solo después del commit)"""
+        ids = list({i for i in ids_producto if i is not None})
+        if not ids:
+            return
+        if self.en_transaccion:
+            # Dentro de una unidad de trabajo el commit es al salir del bloque externo
+            self._despues_de_confirmar(lambda: self._notificar_cambio_stock(ids))
+            return
+        for callback in list(self._observadores_stock):
+            try:
+                callback(ids)
+            except Exception as e:
+                logging.error(f"Error notificando cambio de stock: {e}")
+    
+    def obtener_estado_stock(self, ids_producto: List[int]) -> List[Dict]:
+        """
+        Obtener stock y límites de las filas de inventario de ciertos productos.
+        Usado por el motor de alertas para reevaluar solo lo que cambió.
+        """
+        return self.query("""
+            SELECT 
+                i.id_inventario,
+                i.id_producto,
+                i.id_ubicacion,
+                p.codigo_interno,
+                p.nombre,
+                u.nombre as ubicacion,
+                i.stock_actual,
+                i.stock_minimo,
+                i.stock_maximo
+            FROM inventario i
+            JOIN ca_productos p ON p.id_producto = i.id_producto
+            LEFT JOIN ca_ubicaciones u ON u.id_ubicacion = i.id_ubicacion
+            WHERE i.id_producto = ANY(%s)
+              AND i.activo = TRUE
+              AND p.activo = TRUE
+        """, (list(ids_producto),))
+    
+    def obtener_inventario_en_alerta(self) -> List[Dict]:
+        """Obtener las filas de inventario fuera de rango mínimo/máximo (carga inicial de alertas)"""
+        return self.query("""
+            SELECT 
+                i.id_inventario,
+                i.id_producto,
+                i.id_ubicacion,
+                p.codigo_interno,
+                p.nombre,
+                u.nombre as ubicacion,
+                i.stock_actual,
+                i.stock_minimo,
+                i.stock_maximo
+            FROM inventario i
+            JOIN ca_productos p ON p.id_producto = i.id_producto
+            LEFT JOIN ca_ubicaciones u ON u.id_ubicacion = i.id_ubicacion
+            WHERE i.activo = TRUE
+              AND p.activo = TRUE
+              AND (i.stock_actual <= i.stock_minimo
+                   OR (i.stock_maximo > 0 AND i.stock_actual > i.stock_maximo))
+        """)
+    
+    # ========== TABLAS DE REFERENCIA ==========
+    
+    def _consultar_referencia(self, sql: str, params: tuple = None) -> List[Dict]:
+        """Lectura para la caché de referencias: lanza la excepción en lugar de devolver [] (un error no se guarda)"""
+        if not self.connection or self.connection.closed:
+            self.connect()
+        with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def obtener_categorias_producto(self) -> List[Dict]:
+        """Obtener las categorías de producto (caché de referencias)"""
+        try:
+            return self.referencias.obtener('ca_categorias_producto', 'todas', lambda: self._consultar_referencia("""
+                SELECT id_categoria, nombre
+                FROM ca_categorias_producto
+                ORDER BY nombre
+            """))
+        except Exception as e:
+            logging.error(f"Error obteniendo categorías de producto: {e}")
+            return []
+    
+    def precargar_referencias(self):
+        """Llenar la caché de referencias (al arrancar, mientras se muestra el login)"""
+        self.get_ubicaciones()
+        self.obtener_ubicacion_por_defecto()
+        self.obtener_categorias_producto()
+        self.obtener_tipos_cuenta_pagar()
+        self.obtener_proveedores_activos()
+    
     # ========== UBICACIONES ==========
     
     def get_ubicaciones(self) -> List[Dict]:
-        """Obtener todas las ubicaciones activas"""
+        """Obtener todas las ubicaciones activas (caché de referencias)"""
         try:
-            if not self.connection or self.connection.closed:
-                self.connect()
-            
-            with self.connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT id_ubicacion, nombre, descripcion, activa
-                    FROM ca_ubicaciones
-                    WHERE activa = TRUE
-                    ORDER BY nombre
-                """)
-                return cursor.fetchall()
+            return self.referencias.obtener('ca_ubicaciones', 'activas', lambda: self._consultar_referencia("""
+                SELECT id_ubicacion, nombre, descripcion, activa
+                FROM ca_ubicaciones
+                WHERE activa = TRUE
+                ORDER BY nombre
+            """))
         except Exception as e:
             logging.error(f"Error obteniendo ubicaciones: {e}")
             return []
@@ -884,7 +1250,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT id_ubicacion, nombre, descripcion, activa
                     FROM ca_ubicaciones
@@ -1067,19 +1433,276 @@ class PostgresManager:
                         WHERE id_turno = %s AND cerrado = FALSE
                     """, (venta_data['total'], id_turno))
                 
-                self.connection.commit()
+                # Acumular en los rollups de reportes (al final para retener
+                # los bloqueos de las filas agregadas el menor tiempo posible)
+                if self.rollups_disponibles():
+                    self._acumular_rollups_ventas(cursor, [venta_id])
+                
+                self._confirmar()
                 logging.info(f"✅ Venta creada: {numero_ticket}, Total: ${venta_data['total']:.2f}")
+                self._notificar_cambio_stock([item['id_producto'] for item in venta_data.get('productos', [])])
                 return venta_id
                 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error creando venta: {e}")
             logging.error(traceback.format_exc())
             return None
     
+    # ========== ROLLUPS DE VENTAS ==========
+    
+    # Dimensiones disponibles: (tabla, columnas clave, join de nombres, columnas de nombre, métricas)
+    _DIMENSIONES_ROLLUP = {
+        'producto': (
+            'rollup_ventas_producto_dia',
+            'r.id_producto',
+            'LEFT JOIN ca_productos p ON p.id_producto = r.id_producto',
+            'p.codigo_interno, p.nombre',
+            'SUM(r.cantidad) AS cantidad, SUM(r.total) AS total, '
+            'SUM(r.utilidad) AS utilidad, SUM(r.num_lineas) AS num_lineas'
+        ),
+        'vendedor': (
+            'rollup_ventas_vendedor_dia',
+            'r.id_vendedor',
+            'LEFT JOIN usuarios u ON u.id_usuario = r.id_vendedor',
+            'u.nombre_completo',
+            'SUM(r.num_ventas) AS num_ventas, SUM(r.total) AS total'
+        ),
+        'metodo_pago': (
+            'rollup_ventas_metodo_pago_dia',
+            'r.metodo_pago',
+            '',
+            '',
+            'SUM(r.num_ventas) AS num_ventas, SUM(r.total) AS total'
+        ),
+        'hora': (
+            'rollup_ventas_hora',
+            'r.hora',
+            '',
+            '',
+            'SUM(r.num_ventas) AS num_ventas, SUM(r.total) AS total'
+        ),
+    }
+    
+    def rollups_disponibles(self) -> bool:
+        """
+        Verificar si las tablas de rollup existen (setup_rollups_ventas.sql).
+        El resultado se guarda para no consultar el catálogo en cada venta.
+        """
+        if self._rollups_disponibles is None:
+            try:
+                with self._cursor_lectura() as cursor:
+                    cursor.execute("SELECT to_regclass('rollup_marcas') IS NOT NULL AS existe")
+                    self._rollups_disponibles = bool(cursor.fetchone()['existe'])
+            except Exception as e:
+                logging.error(f"Error verificando tablas de rollup: {e}")
+                return False
+        return self._rollups_disponibles
+    
+    def _acumular_rollups_ventas(self, cursor, ids_venta: List[int]) -> int:
+        """
+        Acumular un conjunto de ventas en las tablas de rollup.
+        
+        Se ejecuta dentro de la transacción del llamador (no hace commit).
+        La bandera ventas.en_rollup se marca en la misma sentencia, así una
+        venta nunca se cuenta dos veces aunque el catch-up corra en paralelo.
+        
+        Returns:
+            Número de ventas acumuladas
+        """
+        cursor.execute("""
+            WITH v AS (
+                UPDATE ventas
+                SET en_rollup = TRUE
+                WHERE id_venta = ANY(%s)
+                  AND en_rollup = FALSE
+                  AND estado = 'completada'
+                RETURNING id_venta, fecha, id_vendedor, metodo_pago, total
+            ),
+            por_producto AS (
+                INSERT INTO rollup_ventas_producto_dia AS r
+                    (fecha, id_producto, cantidad, total, utilidad, num_lineas)
+                SELECT v.fecha::date, d.id_producto, SUM(d.cantidad), SUM(d.total_linea),
+                       SUM(COALESCE(d.utilidad_linea, 0)), COUNT(*)
+                FROM v
+                JOIN detalles_venta d ON d.id_venta = v.id_venta
+                WHERE d.id_producto IS NOT NULL
+                GROUP BY v.fecha::date, d.id_producto
+                ON CONFLICT (fecha, id_producto) DO UPDATE SET
+                    cantidad = r.cantidad + EXCLUDED.cantidad,
+                    total = r.total + EXCLUDED.total,
+                    utilidad = r.utilidad + EXCLUDED.utilidad,
+                    num_lineas = r.num_lineas + EXCLUDED.num_lineas
+            ),
+            por_vendedor AS (
+                INSERT INTO rollup_ventas_vendedor_dia AS r (fecha, id_vendedor, num_ventas, total)
+                SELECT v.fecha::date, v.id_vendedor, COUNT(*), SUM(v.total)
+                FROM v
+                GROUP BY v.fecha::date, v.id_vendedor
+                ON CONFLICT (fecha, id_vendedor) DO UPDATE SET
+                    num_ventas = r.num_ventas + EXCLUDED.num_ventas,
+                    total = r.total + EXCLUDED.total
+            ),
+            por_metodo AS (
+                INSERT INTO rollup_ventas_metodo_pago_dia AS r (fecha, metodo_pago, num_ventas, total)
+                SELECT v.fecha::date, COALESCE(v.metodo_pago::text, 'sin_especificar'), COUNT(*), SUM(v.total)
+                FROM v
+                GROUP BY 1, 2
+                ON CONFLICT (fecha, metodo_pago) DO UPDATE SET
+                    num_ventas = r.num_ventas + EXCLUDED.num_ventas,
+                    total = r.total + EXCLUDED.total
+            ),
+            por_hora AS (
+                INSERT INTO rollup_ventas_hora AS r (fecha, hora, num_ventas, total)
+                SELECT v.fecha::date, EXTRACT(HOUR FROM v.fecha)::smallint, COUNT(*), SUM(v.total)
+                FROM v
+                GROUP BY 1, 2
+                ON CONFLICT (fecha, hora) DO UPDATE SET
+                    num_ventas = r.num_ventas + EXCLUDED.num_ventas,
+                    total = r.total + EXCLUDED.total
+            )
+            SELECT COUNT(*) AS acumuladas FROM v
+        """, (list(ids_venta),))
+        return cursor.fetchone()['acumuladas']
+    
+    def actualizar_rollups_ventas(self, lote: int = 5000, detener=None) -> int:
+        """
+        Job de catch-up: acumular las ventas que no entraron a los rollups
+        (ventas anteriores a la instalación, o de un proceso que no los usaba).
+        Corre al iniciar la aplicación, en el hilo de arranque.
+        
+        Recorre todas las ventas con en_rollup = FALSE por el índice parcial
+        idx_ventas_pendientes_rollup, sin importar qué tan atrás queden; la fila
+        de rollup_marcas sirve de candado entre jobs y guarda hasta dónde llegó.
+        Usa una conexión propia (puede correr en cualquier hilo sin tocar la
+        transacción de la interfaz) y hace commit por lote.
+        
+        Args:
+            lote: ventas por transacción
+            detener: función opcional; si devuelve True se para entre lotes
+        
+        Returns:
+            Número total de ventas acumuladas
+        """
+        total_acumuladas = 0
+        conexion = None
+        try:
+            if not self.rollups_disponibles():
+                logging.warning("⚠️ Tablas de rollup no instaladas (ejecutar setup_rollups_ventas.sql)")
+                return 0
+            
+            conexion = self._abrir_conexion(f"{NOMBRE_APLICACION} (rollups)")
+            with conexion.cursor() as cursor:
+                desde_id = 0
+                while True:
+                    # Bloquear la marca para que dos jobs no procesen el mismo lote
+                    cursor.execute("""
+                        SELECT ultimo_id FROM rollup_marcas
+                        WHERE nombre = 'ventas'
+                        FOR UPDATE
+                    """)
+                    
+                    # Pendientes por el índice parcial (en_rollup = FALSE), en orden de id
+                    cursor.execute("""
+                        SELECT id_venta FROM ventas
+                        WHERE en_rollup = FALSE AND id_venta > %s AND estado = 'completada'
+                        ORDER BY id_venta
+                        LIMIT %s
+                    """, (desde_id, lote))
+                    ids = [row['id_venta'] for row in cursor.fetchall()]
+                    
+                    if ids:
+                        total_acumuladas += self._acumular_rollups_ventas(cursor, ids)
+                        hasta_id = desde_id = ids[-1]
+                    else:
+                        cursor.execute("SELECT COALESCE(MAX(id_venta), 0) AS max_id FROM ventas")
+                        hasta_id = cursor.fetchone()['max_id']
+                    
+                    cursor.execute("""
+                        INSERT INTO rollup_marcas (nombre, ultimo_id) VALUES ('ventas', %s)
+                        ON CONFLICT (nombre) DO UPDATE SET
+                            ultimo_id = GREATEST(rollup_marcas.ultimo_id, EXCLUDED.ultimo_id),
+                            actualizado_en = CURRENT_TIMESTAMP
+                    """, (hasta_id,))
+                    conexion.commit()
+                    
+                    if len(ids) < lote or (detener and detener()):
+                        break
+            
+            logging.info(f"✅ Rollups de ventas actualizados: {total_acumuladas} ventas")
+            return total_acumuladas
+            
+        except Exception as e:
+            if conexion is not None and not conexion.closed:
+                conexion.rollback()
+            logging.error(f"Error actualizando rollups de ventas: {e}")
+            return total_acumuladas
+        finally:
+            if conexion is not None:
+                conexion.close()
+    
+    def obtener_rollup_ventas(self, dimension: str, fecha_desde, fecha_hasta, por_dia: bool = False) -> List[Dict]:
+        """
+        Consultar ventas pre-agregadas por dimensión.
+        
+        Args:
+            dimension: 'producto', 'vendedor', 'metodo_pago' u 'hora'
+            fecha_desde, fecha_hasta: rango de fechas (inclusive)
+            por_dia: True para una fila por fecha y clave, False para totales del periodo
+        
+        Returns:
+            Lista de filas ordenadas por fecha y total descendente
+        """
+        if dimension not in self._DIMENSIONES_ROLLUP:
+            logging.error(f"Dimensión de rollup no válida: {dimension}")
+            return []
+        
+        tabla, clave, join, nombres, metricas = self._DIMENSIONES_ROLLUP[dimension]
+        columnas = ', '.join(c for c in (('r.fecha' if por_dia else ''), clave, nombres) if c)
+        orden = 'r.fecha, total DESC' if por_dia else 'total DESC'
+        if dimension == 'hora':
+            orden = 'r.fecha, r.hora' if por_dia else 'r.hora'
+        
+        return self.query(f"""
+            SELECT {columnas}, {metricas}
+            FROM {tabla} r
+            {join}
+            WHERE r.fecha BETWEEN %s AND %s
+            GROUP BY {columnas}
+            ORDER BY {orden}
+        """, (fecha_desde, fecha_hasta), reporte=True)
+    
+    def obtener_resumen_ventas_periodo(self, fecha_desde, fecha_hasta) -> Optional[Dict]:
+        """
+        Totales del periodo desde los rollups (número de ventas, total y ticket promedio).
+        """
+        resultado = self.query("""
+            SELECT COALESCE(SUM(num_ventas), 0) AS num_ventas,
+                   COALESCE(SUM(total), 0) AS total,
+                   COALESCE(SUM(total) / NULLIF(SUM(num_ventas), 0), 0) AS ticket_promedio
+            FROM rollup_ventas_metodo_pago_dia
+            WHERE fecha BETWEEN %s AND %s
+        """, (fecha_desde, fecha_hasta), reporte=True)
+        return resultado[0] if resultado else None
+    
+    def obtener_resumen_ventas_turno(self, id_turno: int) -> Dict:
+        """
+        Número de ventas y total de un turno de caja.
+        
+        Se suman en vivo las ventas del turno (índice idx_ventas_turno): el cierre
+        de caja no depende de que el catch-up de los rollups haya corrido.
+        """
+        sql = """
+            SELECT COUNT(*) AS num_ventas, COALESCE(SUM(total), 0) AS total
+            FROM ventas
+            WHERE id_turno = %s AND estado = 'completada'
+        """
+        resultado = self.query(sql, (id_turno,))
+        return resultado[0] if resultado else {'num_ventas': 0, 'total': 0}
+    
     # ========== CLIENTES ==========
     
     def get_cliente_by_codigo(self, codigo: str) -> Optional[Dict]:
@@ -1088,7 +1711,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT id_cliente, codigo, nombre_completo, telefono, email, activo
                     FROM clientes
@@ -1107,7 +1730,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("SELECT COUNT(*) FROM clientes WHERE activo = TRUE")
                 result = cursor.fetchone()
                 return result['count'] if result else 0
@@ -1121,7 +1744,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT codigo FROM clientes
                     WHERE codigo LIKE 'CLI%'
@@ -1140,7 +1763,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT COUNT(*) FROM clientes
                     WHERE codigo = %s
@@ -1187,36 +1810,116 @@ class PostgresManager:
                 result = cursor.fetchone()
                 cliente_id = result[0] if result else None
                 
-                self.connection.commit()
+                self._confirmar()
                 logging.info(f"Cliente guardado: {cliente_data['codigo']} (ID: {cliente_id})")
                 return cliente_id
                 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error guardando cliente: {e}")
             return None
     
-    def obtener_cuentas_por_cobrar(self, filtros=None) -> List[Dict]:
-        """Obtener listado de cuentas por cobrar con filtros"""
+    # ========== CUENTAS POR COBRAR ==========
+    
+    # Antigüedad de saldos: días desde el vencimiento (lo no vencido cae en 0-30)
+    TRAMOS_ANTIGUEDAD_CXC = (('d0_30', 0, 30), ('d31_60', 31, 60), ('d61_90', 61, 90), ('d90_mas', 91, None))
+    
+    def antiguedad_cxc_disponible(self) -> bool:
+        """
+        Verificar si está instalado setup_cxc_antiguedad.sql (columna
+        ultimo_pago mantenida por trigger). Se guarda para no consultar el catálogo.
+        """
+        if self._antiguedad_cxc_disponible is None:
+            try:
+                with self._cursor_lectura() as cursor:
+                    cursor.execute("SELECT to_regprocedure('cxc_aplicar_pagos()') IS NOT NULL AS existe")
+                    self._antiguedad_cxc_disponible = bool(cursor.fetchone()['existe'])
+            except Exception as e:
+                logging.error(f"Error verificando antigüedad de cuentas por cobrar: {e}")
+                return False
+        return self._antiguedad_cxc_disponible
+    
+    def _where_cuentas_por_cobrar(self, filtros: Dict):
+        """Condiciones WHERE (sobre cxc y c) y parámetros para los filtros del listado"""
+        condiciones = ["cxc.activo = TRUE"]
+        params = []
+        
+        # Misma expresión que el índice trigram de setup_cxc_antiguedad.sql
+        nombre_cliente = (
+            "LOWER(c.nombres || ' ' || COALESCE(c.apellido_paterno, '') || ' ' || COALESCE(c.apellido_materno, ''))"
+        )
+        if filtros.get('cliente'):
+            condiciones.append(f"{nombre_cliente} LIKE %s")
+            params.append(f"%{filtros['cliente'].lower()}%")
+        
+        if filtros.get('busqueda'):
+            condiciones.append(f"({nombre_cliente} LIKE %s OR LOWER(cxc.numero_cuenta) LIKE %s)")
+            patron = f"%{filtros['busqueda'].lower()}%"
+            params.extend([patron, patron])
+        
+        if 'id_cliente' in filtros:
+            condiciones.append("cxc.id_cliente = %s")
+            params.append(filtros['id_cliente'])
+        
+        if 'estado' in filtros:
+            condiciones.append("cxc.estado = %s")
+            params.append(filtros['estado'])
+        
+        if 'fecha_desde' in filtros:
+            condiciones.append("cxc.fecha_vencimiento >= %s")
+            params.append(filtros['fecha_desde'])
+        
+        if 'fecha_hasta' in filtros:
+            # Hasta el final del día
+            condiciones.append("cxc.fecha_vencimiento < %s::date + 1")
+            params.append(filtros['fecha_hasta'])
+        
+        if filtros.get('solo_pendientes'):
+            condiciones.append("cxc.estado IN ('activa', 'vencida') AND cxc.saldo > 0")
+        
+        return " AND ".join(condiciones), params
+    
+    def obtener_cuentas_por_cobrar(self, filtros=None, limite: int = None, desplazamiento: int = 0) -> List[Dict]:
+        """
+        Obtener listado de cuentas por cobrar con filtros, paginado en el servidor.
+        
+        Args:
+            filtros: cliente, busqueda (cliente o número de cuenta), id_cliente,
+                     estado, fecha_desde, fecha_hasta, solo_pendientes
+            limite: Filas por página (None = todas)
+            desplazamiento: Filas a saltar (página * limite)
+        """
         try:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            filtros = filtros or {}
+            where, params = self._where_cuentas_por_cobrar(filtros or {})
+            
+            # ultimo_pago: columna mantenida por trigger, o un JOIN agrupado sin el script
+            if self.antiguedad_cxc_disponible():
+                ultimo_pago, join_pagos = "cxc.ultimo_pago::date", ""
+            else:
+                ultimo_pago = "p.ultimo_pago::date"
+                join_pagos = """
+                LEFT JOIN (
+                    SELECT id_cxc, MAX(fecha_pago) AS ultimo_pago
+                    FROM cxc_detalle_pagos
+                    GROUP BY id_cxc
+                ) p ON p.id_cxc = cxc.id_cxc"""
             
-            query = """
+            query = f"""
                 SELECT 
                     cxc.id_cxc,
                     cxc.numero_cuenta,
                     cxc.total,
                     cxc.saldo,
                     cxc.pagado,
-                    cxc.fecha_vencimiento,
+                    cxc.fecha_vencimiento::date AS fecha_vencimiento,
                     cxc.estado,
-                    cxc.creada_en,
+                    cxc.creada_en::date AS creada_en,
                     cxc.pagada,
                     -- Información del cliente
                     c.id_cliente,
@@ -1226,71 +1929,170 @@ class PostgresManager:
                     -- Información de la venta
                     v.id_venta,
                     v.numero_ticket,
-                    v.fecha as fecha_venta,
+                    v.fecha::date AS fecha_venta,
                     -- Cálculos
                     CASE 
                         WHEN cxc.fecha_vencimiento < CURRENT_DATE AND cxc.saldo > 0 
-                        THEN CURRENT_DATE - cxc.fecha_vencimiento 
+                        THEN CURRENT_DATE - cxc.fecha_vencimiento::date
                         ELSE 0 
                     END as dias_vencidos,
-                    -- Último pago
-                    (SELECT MAX(fecha_pago) FROM cxc_detalle_pagos WHERE id_cxc = cxc.id_cxc) as ultimo_pago
+                    {ultimo_pago} AS ultimo_pago
                 FROM cuentas_por_cobrar cxc
                 INNER JOIN clientes c ON cxc.id_cliente = c.id_cliente
-                INNER JOIN ventas v ON cxc.id_venta = v.id_venta
-                WHERE cxc.activo = TRUE
+                INNER JOIN ventas v ON cxc.id_venta = v.id_venta{join_pagos}
+                WHERE {where}
+                ORDER BY cxc.fecha_vencimiento ASC, cxc.saldo DESC, cxc.id_cxc
             """
             
-            params = []
+            if limite:
+                query += " LIMIT %s OFFSET %s"
+                params.extend([limite, desplazamiento])
             
-            # Aplicar filtros
-            if 'cliente' in filtros:
-                query += " AND LOWER(CONCAT(c.nombres, ' ', COALESCE(c.apellido_paterno, ''), ' ', COALESCE(c.apellido_materno, ''))) LIKE LOWER(%s)"
-                params.append(f"%{filtros['cliente']}%")
-            
-            if 'estado' in filtros:
-                query += " AND cxc.estado = %s"
-                params.append(filtros['estado'])
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error obteniendo cuentas por cobrar: {e}")
+            return []
+    
+    def _tramos_antiguedad_sql(self, dias: str) -> str:
+        """Columnas SUM(saldo) FILTER por tramo de antigüedad"""
+        columnas = []
+        for nombre, desde, hasta in self.TRAMOS_ANTIGUEDAD_CXC:
+            condicion = f"{dias} >= {desde}" + (f" AND {dias} <= {hasta}" if hasta is not None else "")
+            columnas.append(f"COALESCE(SUM(cxc.saldo) FILTER (WHERE {condicion}), 0) AS {nombre}")
+        return ",\n                    ".join(columnas)
+    
+    def resumir_cuentas_por_cobrar(self, filtros=None) -> Dict:
+        """
+        Total de cuentas del listado filtrado (para paginar) y saldo por tramo
+        de antigüedad, en una sola consulta agregada.
+        
+        Returns:
+            {'cuentas', 'saldo', 'd0_30', 'd31_60', 'd61_90', 'd90_mas'}
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
             
-            if 'fecha_desde' in filtros:
-                query += " AND cxc.fecha_vencimiento >= %s"
-                params.append(filtros['fecha_desde'])
+            where, params = self._where_cuentas_por_cobrar(filtros or {})
+            dias = "GREATEST(CURRENT_DATE - COALESCE(cxc.fecha_vencimiento, cxc.creada_en)::date, 0)"
             
-            if 'fecha_hasta' in filtros:
-                query += " AND cxc.fecha_vencimiento <= %s"
-                params.append(filtros['fecha_hasta'])
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado, reporte=True) as cursor:
+                cursor.execute(f"""
+                    SELECT 
+                        COUNT(*) AS cuentas,
+                        COALESCE(SUM(cxc.saldo), 0) AS saldo,
+                        {self._tramos_antiguedad_sql(dias)}
+                    FROM cuentas_por_cobrar cxc
+                    INNER JOIN clientes c ON cxc.id_cliente = c.id_cliente
+                    WHERE {where}
+                """, params)
+                return dict(cursor.fetchone())
+                
+        except Exception as e:
+            logging.error(f"Error resumiendo cuentas por cobrar: {e}")
+            return {'cuentas': 0, 'saldo': 0, **{nombre: 0 for nombre, _, _ in self.TRAMOS_ANTIGUEDAD_CXC}}
+    
+    def obtener_antiguedad_cxc(self, filtros=None) -> List[Dict]:
+        """
+        Antigüedad de saldos por cliente (0-30, 31-60, 61-90, 90+ días desde
+        el vencimiento) de las cuentas abiertas, en una consulta agrupada.
+        
+        Returns:
+            Lista ordenada por saldo: {'id_cliente', 'cliente', 'cuentas', 'saldo',
+            'd0_30', 'd31_60', 'd61_90', 'd90_mas', 'vencimiento_mas_antiguo', 'ultimo_pago'}
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
             
-            if filtros.get('solo_pendientes'):
-                query += " AND cxc.estado IN ('activa', 'vencida') AND cxc.saldo > 0"
+            filtros = dict(filtros or {}, solo_pendientes=True)
+            where, params = self._where_cuentas_por_cobrar(filtros)
+            dias = "GREATEST(CURRENT_DATE - COALESCE(cxc.fecha_vencimiento, cxc.creada_en)::date, 0)"
+            ultimo_pago = (
+                "MAX(cxc.ultimo_pago)::date AS ultimo_pago," if self.antiguedad_cxc_disponible() else ""
+            )
             
-            # Ordenar por fecha de vencimiento
-            query += " ORDER BY cxc.fecha_vencimiento ASC, cxc.saldo DESC"
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado, reporte=True) as cursor:
+                cursor.execute(f"""
+                    SELECT 
+                        c.id_cliente,
+                        CONCAT(c.nombres, ' ', COALESCE(c.apellido_paterno, ''), ' ', COALESCE(c.apellido_materno, '')) AS cliente,
+                        COUNT(*) AS cuentas,
+                        SUM(cxc.saldo) AS saldo,
+                        {self._tramos_antiguedad_sql(dias)},
+                        {ultimo_pago}
+                        MIN(cxc.fecha_vencimiento)::date AS vencimiento_mas_antiguo
+                    FROM cuentas_por_cobrar cxc
+                    INNER JOIN clientes c ON cxc.id_cliente = c.id_cliente
+                    WHERE {where}
+                    GROUP BY c.id_cliente
+                    ORDER BY saldo DESC
+                """, params)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error obteniendo antigüedad de cuentas por cobrar: {e}")
+            return []
+    
+    def registrar_pago_cxc(self, id_cxc: int, monto: Decimal, metodo_pago: str = 'efectivo',
+                           id_usuario: int = None) -> Optional[Dict]:
+        """
+        Registrar un pago a una cuenta por cobrar.
+        
+        Con setup_cxc_antiguedad.sql el trigger actualiza pagado, saldo,
+        ultimo_pago y estado; sin él se actualizan aquí, en la misma transacción.
+        
+        Returns:
+            dict con la cuenta actualizada (saldo, pagado, estado, ultimo_pago) o None
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
             
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                # Convertir a lista de diccionarios
-                cuentas = []
-                for row in rows:
-                    cuenta = dict(row)
-                    # Convertir fechas
-                    if cuenta.get('fecha_vencimiento'):
-                        cuenta['fecha_vencimiento'] = cuenta['fecha_vencimiento'].date()
-                    if cuenta.get('fecha_venta'):
-                        cuenta['fecha_venta'] = cuenta['fecha_venta'].date()
-                    if cuenta.get('ultimo_pago'):
-                        cuenta['ultimo_pago'] = cuenta['ultimo_pago'].date()
-                    if cuenta.get('creada_en'):
-                        cuenta['creada_en'] = cuenta['creada_en'].date()
-                    
-                    cuentas.append(cuenta)
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    INSERT INTO cxc_detalle_pagos (id_cxc, monto, metodo_pago, id_usuario)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING fecha_pago
+                """, (id_cxc, monto, metodo_pago, id_usuario))
+                fecha_pago = cursor.fetchone()['fecha_pago']
                 
-                return cuentas
+                if not self.antiguedad_cxc_disponible():
+                    cursor.execute("""
+                        UPDATE cuentas_por_cobrar
+                        SET pagado = pagado + %s,
+                            saldo = saldo - %s,
+                            pagada = (saldo - %s) <= 0,
+                            estado = CASE WHEN (saldo - %s) <= 0 THEN 'pagada' ELSE estado END
+                        WHERE id_cxc = %s
+                    """, (monto, monto, monto, monto, id_cxc))
+                
+                cursor.execute("""
+                    SELECT id_cxc, total, pagado, saldo, estado, pagada
+                    FROM cuentas_por_cobrar
+                    WHERE id_cxc = %s
+                """, (id_cxc,))
+                cuenta = cursor.fetchone()
+                if not cuenta:
+                    self._revertir()
+                    logging.error(f"Cuenta por cobrar {id_cxc} no encontrada")
+                    return None
+                
+                self._confirmar()
+                cuenta = dict(cuenta, ultimo_pago=fecha_pago)
+                logging.info(f"✅ Pago de ${monto} registrado en cuenta por cobrar {id_cxc} (saldo ${cuenta['saldo']})")
+                return cuenta
                 
         except Exception as e:
-            logging.error(f"Error obteniendo cuentas por cobrar: {e}")
-            return []
+            try:
+                self._revertir()
+            except:
+                pass
+            logging.error(f"Error registrando pago de cuenta por cobrar: {e}")
+            return None
     
     # ========== TURNOS DE CAJA ==========
     
@@ -1300,9 +2102,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            from psycopg2.extras import RealDictCursor
-            
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
                 # Generar número de turno
                 cursor.execute("""
                     SELECT 'TURNO-' || TO_CHAR(CURRENT_DATE, 'YYYYMMDD') || '-' || 
@@ -1326,15 +2126,15 @@ class PostgresManager:
                 id_turno = result['id_turno'] if result else None
                 
                 if id_turno:
-                    self.connection.commit()
+                    self._confirmar()
                     logging.info(f"✅ Turno de caja abierto: {numero_turno} (ID: {id_turno})")
                     return id_turno
                 else:
-                    self.connection.rollback()
+                    self._revertir()
                     return None
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error abriendo turno de caja: {str(e)}")
@@ -1348,7 +2148,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor() as cursor:
+            with self._cursor_lectura() as cursor:
                 cursor.execute("""
                     SELECT 
                         id_turno, numero_turno, id_usuario, fecha_apertura, 
@@ -1369,7 +2169,7 @@ class PostgresManager:
             if not self.connection or self.connection.closed:
                 self.connect()
             
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
                 # Obtener datos del turno
                 cursor.execute("""
                     SELECT monto_inicial, total_efectivo
@@ -1379,6 +2179,7 @@ class PostgresManager:
                 
                 turno = cursor.fetchone()
                 if not turno:
+                    self._revertir()
                     logging.warning(f"Turno {id_turno} no encontrado o ya cerrado")
                     return False
                 
@@ -1401,81 +2202,490 @@ class PostgresManager:
                     WHERE id_turno = %s
                 """, (monto_esperado, monto_real_cierre, diferencia, id_turno))
                 
-                self.connection.commit()
+                self._confirmar()
                 logging.info(f"✅ Turno {id_turno} cerrado. Diferencia: ${diferencia:.2f}")
                 return True
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error cerrando turno de caja: {e}")
             return False
 
+    # ========== CUENTAS POR PAGAR ==========
+    
+    # Cuenta abierta: misma condición que los índices parciales de setup_cxp_saldos.sql
+    CONDICION_CXP_ABIERTA = "cxp.estado IN ('activa', 'vencida') AND cxp.total > cxp.pagado"
+    
+    def saldos_cxp_disponibles(self) -> bool:
+        """
+        Verificar si está instalado setup_cxp_saldos.sql (saldo, cuentas abiertas
+        y próximo vencimiento del proveedor mantenidos por trigger).
+        Se guarda para no consultar el catálogo.
+        """
+        if self._saldos_cxp_disponibles is None:
+            try:
+                with self._cursor_lectura() as cursor:
+                    cursor.execute("SELECT to_regprocedure('cxp_recalcular_proveedor(integer)') IS NOT NULL AS existe")
+                    self._saldos_cxp_disponibles = bool(cursor.fetchone()['existe'])
+            except Exception as e:
+                logging.error(f"Error verificando saldos de proveedores: {e}")
+                return False
+        return self._saldos_cxp_disponibles
+    
+    def _actualizar_saldo_proveedor(self, cursor, id_proveedor):
+        """
+        Recalcular saldo_actual del proveedor dentro de la transacción en curso.
+        Con setup_cxp_saldos.sql lo hace el trigger (y además cuentas abiertas
+        y próximo vencimiento); sin él solo existe saldo_actual.
+        """
+        if not id_proveedor or self.saldos_cxp_disponibles():
+            return
+        cursor.execute(f"""
+            UPDATE ca_proveedores
+            SET saldo_actual = (
+                SELECT COALESCE(SUM(cxp.total - cxp.pagado), 0)
+                FROM cuentas_por_pagar cxp
+                WHERE cxp.id_proveedor = %s AND {self.CONDICION_CXP_ABIERTA}
+            )
+            WHERE id_proveedor = %s
+        """, (id_proveedor, id_proveedor))
+    
+    def _where_cuentas_por_pagar(self, filtros: Dict):
+        """Condiciones WHERE (sobre cxp y prov) y parámetros para los filtros del listado"""
+        condiciones = ["TRUE"]
+        params = []
+        
+        if filtros.get('busqueda'):
+            condiciones.append(
+                "(LOWER(cxp.numero_cuenta) LIKE %s OR LOWER(prov.razon_social) LIKE %s OR cxp.total::text LIKE %s)"
+            )
+            patron = f"%{filtros['busqueda'].lower()}%"
+            params.extend([patron, patron, patron])
+        
+        if 'id_proveedor' in filtros:
+            condiciones.append("cxp.id_proveedor = %s")
+            params.append(filtros['id_proveedor'])
+        
+        if 'estado' in filtros:
+            condiciones.append("cxp.estado = %s")
+            params.append(filtros['estado'])
+        
+        if 'fecha_desde' in filtros:
+            condiciones.append("cxp.fecha_cuenta >= %s")
+            params.append(filtros['fecha_desde'])
+        
+        if 'fecha_hasta' in filtros:
+            condiciones.append("cxp.fecha_cuenta <= %s")
+            params.append(filtros['fecha_hasta'])
+        
+        if filtros.get('solo_pendientes'):
+            condiciones.append(self.CONDICION_CXP_ABIERTA)
+        
+        return " AND ".join(condiciones), params
+    
+    def obtener_cuentas_por_pagar(self, filtros=None, limite: int = None, desplazamiento: int = 0) -> List[Dict]:
+        """
+        Obtener listado de cuentas por pagar con filtros, paginado en el servidor.
+        
+        Args:
+            filtros: busqueda (número, proveedor o monto), id_proveedor, estado,
+                     fecha_desde, fecha_hasta (fecha de la cuenta), solo_pendientes
+            limite: Filas por página (None = todas)
+            desplazamiento: Filas a saltar (página * limite)
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+            
+            where, params = self._where_cuentas_por_pagar(filtros or {})
+            query = f"""
+                SELECT
+                    cxp.id_cuenta_pagar,
+                    cxp.numero_cuenta,
+                    cxp.fecha_cuenta,
+                    cxp.id_proveedor,
+                    COALESCE(prov.razon_social, 'N/A') AS proveedor,
+                    cxp.total,
+                    cxp.pagado,
+                    cxp.total - cxp.pagado AS saldo,
+                    cxp.estado,
+                    cxp.numero_factura,
+                    cxp.fecha_vencimiento
+                FROM cuentas_por_pagar cxp
+                LEFT JOIN ca_proveedores prov ON cxp.id_proveedor = prov.id_proveedor
+                WHERE {where}
+                ORDER BY cxp.fecha_cuenta DESC, cxp.id_cuenta_pagar DESC
+            """
+            
+            if limite:
+                query += " LIMIT %s OFFSET %s"
+                params.extend([limite, desplazamiento])
+            
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error obteniendo cuentas por pagar: {e}")
+            return []
+    
+    def resumir_cuentas_por_pagar(self, filtros=None) -> Dict:
+        """
+        Total de cuentas del listado filtrado (para paginar), saldo pendiente
+        y saldo vencido, en una sola consulta agregada.
+        
+        Returns:
+            {'cuentas', 'total', 'saldo', 'saldo_vencido', 'vencidas'}
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+            
+            where, params = self._where_cuentas_por_pagar(filtros or {})
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(f"""
+                    SELECT
+                        COUNT(*) AS cuentas,
+                        COALESCE(SUM(cxp.total), 0) AS total,
+                        COALESCE(SUM(cxp.total - cxp.pagado) FILTER (WHERE {self.CONDICION_CXP_ABIERTA}), 0) AS saldo,
+                        COALESCE(SUM(cxp.total - cxp.pagado) FILTER (
+                            WHERE {self.CONDICION_CXP_ABIERTA} AND cxp.fecha_vencimiento < CURRENT_DATE
+                        ), 0) AS saldo_vencido,
+                        COUNT(*) FILTER (
+                            WHERE {self.CONDICION_CXP_ABIERTA} AND cxp.fecha_vencimiento < CURRENT_DATE
+                        ) AS vencidas
+                    FROM cuentas_por_pagar cxp
+                    LEFT JOIN ca_proveedores prov ON cxp.id_proveedor = prov.id_proveedor
+                    WHERE {where}
+                """, params)
+                return dict(cursor.fetchone())
+                
+        except Exception as e:
+            logging.error(f"Error resumiendo cuentas por pagar: {e}")
+            return {'cuentas': 0, 'total': 0, 'saldo': 0, 'saldo_vencido': 0, 'vencidas': 0}
+    
+    def obtener_cxp_por_vencer(self, dias: int = 7, id_proveedor: int = None, limite: int = None) -> List[Dict]:
+        """
+        Cuentas por pagar abiertas vencidas o que vencen en los próximos días,
+        de la más antigua a la más nueva (índice parcial por vencimiento).
+        
+        Returns:
+            Lista de {'id_cuenta_pagar', 'numero_cuenta', 'id_proveedor', 'proveedor',
+            'total', 'saldo', 'fecha_vencimiento', 'dias_para_vencer'} (negativo = vencida)
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+            
+            condiciones = [self.CONDICION_CXP_ABIERTA, "cxp.fecha_vencimiento <= CURRENT_DATE + %s"]
+            params = [dias]
+            if id_proveedor:
+                condiciones.append("cxp.id_proveedor = %s")
+                params.append(id_proveedor)
+            
+            query = f"""
+                SELECT
+                    cxp.id_cuenta_pagar,
+                    cxp.numero_cuenta,
+                    cxp.id_proveedor,
+                    COALESCE(prov.razon_social, 'N/A') AS proveedor,
+                    cxp.total,
+                    cxp.total - cxp.pagado AS saldo,
+                    cxp.fecha_vencimiento,
+                    cxp.fecha_vencimiento - CURRENT_DATE AS dias_para_vencer
+                FROM cuentas_por_pagar cxp
+                LEFT JOIN ca_proveedores prov ON cxp.id_proveedor = prov.id_proveedor
+                WHERE {" AND ".join(condiciones)}
+                ORDER BY cxp.fecha_vencimiento, cxp.id_cuenta_pagar
+            """
+            if limite:
+                query += " LIMIT %s"
+                params.append(limite)
+            
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error obteniendo cuentas por pagar por vencer: {e}")
+            return []
+    
+    def obtener_saldos_proveedores(self, solo_con_saldo: bool = False) -> List[Dict]:
+        """
+        Proveedores con su saldo pendiente, cuentas abiertas y próximo vencimiento.
+        Con setup_cxp_saldos.sql se leen las columnas precalculadas; sin él se
+        agregan las cuentas abiertas con un JOIN agrupado.
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+            
+            if self.saldos_cxp_disponibles():
+                saldos, join_saldos = (
+                    "prov.saldo_actual, prov.cuentas_abiertas, prov.proximo_vencimiento", ""
+                )
+            else:
+                saldos = (
+                    "COALESCE(a.saldo, 0) AS saldo_actual, COALESCE(a.cuentas, 0) AS cuentas_abiertas, "
+                    "a.proximo_vencimiento"
+                )
+                join_saldos = f"""
+                LEFT JOIN (
+                    SELECT cxp.id_proveedor,
+                           SUM(cxp.total - cxp.pagado) AS saldo,
+                           COUNT(*) AS cuentas,
+                           MIN(cxp.fecha_vencimiento) AS proximo_vencimiento
+                    FROM cuentas_por_pagar cxp
+                    WHERE {self.CONDICION_CXP_ABIERTA}
+                    GROUP BY cxp.id_proveedor
+                ) a ON a.id_proveedor = prov.id_proveedor"""
+            
+            query = f"""
+                SELECT prov.id_proveedor, prov.codigo, prov.razon_social, prov.nombre_comercial,
+                       prov.contacto_nombre, prov.contacto_telefono, prov.contacto_email,
+                       prov.dias_credito, prov.limite_credito, prov.activo,
+                       {saldos}
+                FROM ca_proveedores prov{join_saldos}
+            """
+            if solo_con_saldo:
+                query = f"SELECT * FROM ({query}) s WHERE s.cuentas_abiertas > 0"
+            query += " ORDER BY razon_social"
+            
+            with self._cursor_lectura(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute(query)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error obteniendo saldos de proveedores: {e}")
+            return []
+    
+    def registrar_pago_cxp(self, id_cuenta_pagar: int, monto: Decimal, forma_pago: str = 'efectivo',
+                           id_usuario: int = None) -> Optional[Dict]:
+        """
+        Registrar un pago a una cuenta por pagar.
+        
+        Con setup_cxp_saldos.sql los triggers actualizan pagado y estado de la
+        cuenta y el saldo del proveedor; sin él se actualizan aquí, en la misma
+        transacción.
+        
+        Returns:
+            dict con la cuenta actualizada (total, pagado, saldo, estado) o None
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+            
+            with self.connection.cursor(cursor_factory=CursorInstrumentado) as cursor:
+                cursor.execute("""
+                    INSERT INTO cxp_pagos (id_cuenta_pagar, monto, forma_pago, id_usuario)
+                    VALUES (%s, %s, %s, %s)
+                """, (id_cuenta_pagar, monto, forma_pago, id_usuario))
+                
+                if not self.saldos_cxp_disponibles():
+                    cursor.execute("""
+                        UPDATE cuentas_por_pagar
+                        SET pagado = pagado + %s,
+                            estado = CASE WHEN total - (pagado + %s) <= 0 THEN 'pagada' ELSE estado END
+                        WHERE id_cuenta_pagar = %s
+                    """, (monto, monto, id_cuenta_pagar))
+                
+                cursor.execute("""
+                    SELECT id_cuenta_pagar, id_proveedor, total, pagado, total - pagado AS saldo, estado
+                    FROM cuentas_por_pagar
+                    WHERE id_cuenta_pagar = %s
+                """, (id_cuenta_pagar,))
+                cuenta = cursor.fetchone()
+                if not cuenta:
+                    self._revertir()
+                    logging.error(f"Cuenta por pagar {id_cuenta_pagar} no encontrada")
+                    return None
+                
+                self._actualizar_saldo_proveedor(cursor, cuenta['id_proveedor'])
+                self._confirmar()
+                self._despues_de_confirmar(lambda: self.referencias.invalidar('ca_proveedores'))
+                logging.info(f"✅ Pago de ${monto} registrado en cuenta por pagar {id_cuenta_pagar} (saldo ${cuenta['saldo']})")
+                return dict(cuenta)
+                
+        except Exception as e:
+            try:
+                self._revertir()
+            except:
+                pass
+            logging.error(f"Error registrando pago de cuenta por pagar: {e}")
+            return None
+    
     # ==================== MÉTODOS PARA COMPRAS Y GASTOS ====================
 
     def obtener_tipos_cuenta_pagar(self) -> List[Dict]:
-        """Obtener lista de tipos de cuenta por pagar activos"""
+        """Obtener lista de tipos de cuenta por pagar activos (caché de referencias)"""
         try:
-            # Asegurar que no haya transacciones pendientes
-            if self.connection and not self.connection.closed:
-                try:
-                    self.connection.rollback()
-                except:
-                    pass
-            
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT id_tipo_cuenta_pagar, codigo, nombre, descripcion, categoria
-                    FROM ca_tipo_cuenta_pagar
-                    WHERE activo = TRUE
-                    ORDER BY nombre
-                """)
-                return [dict(row) for row in cursor.fetchall()]
+            return self.referencias.obtener('ca_tipo_cuenta_pagar', 'activos', lambda: self._consultar_referencia("""
+                SELECT id_tipo_cuenta_pagar, codigo, nombre, descripcion, categoria
+                FROM ca_tipo_cuenta_pagar
+                WHERE activo = TRUE
+                ORDER BY nombre
+            """))
         except Exception as e:
             logging.error(f"Error obteniendo tipos de cuenta por pagar: {e}")
             return []
 
     def obtener_proveedores_activos(self) -> List[Dict]:
-        """Obtener lista de proveedores activos"""
+        """Obtener lista de proveedores activos (caché de referencias)"""
         try:
-            # Asegurar que no haya transacciones pendientes
-            if self.connection and not self.connection.closed:
-                try:
-                    self.connection.rollback()
-                except:
-                    pass
-            
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT id_proveedor, codigo, razon_social, nombre_comercial,
-                           contacto_telefono, contacto_email as email, activo
-                    FROM ca_proveedores
-                    WHERE activo = TRUE
-                    ORDER BY razon_social
-                """)
-                return [dict(row) for row in cursor.fetchall()]
+            return self.referencias.obtener('ca_proveedores', 'activos', lambda: self._consultar_referencia("""
+                SELECT id_proveedor, codigo, razon_social, nombre_comercial,
+                       contacto_telefono, contacto_email as email, activo
+                FROM ca_proveedores
+                WHERE activo = TRUE
+                ORDER BY razon_social
+            """))
         except Exception as e:
             logging.error(f"Error obteniendo proveedores activos: {e}")
             return []
 
     def obtener_proveedor_por_id(self, id_proveedor: int) -> Optional[Dict]:
-        """Obtener proveedor por ID"""
+        """Obtener proveedor por ID (caché de referencias; compras y pagos la invalidan por el saldo)"""
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT * FROM ca_proveedores
-                    WHERE id_proveedor = %s AND activo = TRUE
-                """, (id_proveedor,))
-                result = cursor.fetchone()
-                return dict(result) if result else None
+            filas = self.referencias.obtener('ca_proveedores', id_proveedor, lambda: self._consultar_referencia("""
+                SELECT * FROM ca_proveedores
+                WHERE id_proveedor = %s AND activo = TRUE
+            """, (id_proveedor,)))
+            return filas[0] if filas else None
         except Exception as e:
             logging.error(f"Error obteniendo proveedor por ID: {e}")
             return None
 
+    def _recibir_mercancia(self, cursor, id_cuenta_pagar: int, detalles: List[Dict], id_ubicacion: Optional[int],
+                           id_usuario: int, motivo: str) -> int:
+        """
+        Recepción de una compra en una sola sentencia (dentro de la transacción
+        del llamador, sin commit):
+        
+        1. Inserta todas las líneas en cxp_detalle_productos.
+        2. Agrupa por producto las líneas inventariables y bloquea sus filas de
+           inventario en la ubicación (FOR UPDATE) para leer stock y costo anteriores.
+        3. Suma el stock (creando la fila si no existe) y recalcula el costo
+           promedio ponderado: (stock * costo + cantidad * costo_compra) / (stock + cantidad).
+        4. Registra un movimiento de entrada por producto.
+        5. Actualiza ca_productos.costo_promedio ponderando todas las ubicaciones.
+        
+        Sin ubicación solo se insertan los detalles.
+        
+        Returns:
+            Número de productos que entraron al inventario
+        """
+        cursor.execute("""
+            WITH lineas AS (
+                SELECT *
+                FROM unnest(%(productos)s::int[], %(cantidades)s::numeric[],
+                            %(precios)s::numeric[], %(subtotales)s::numeric[])
+                     WITH ORDINALITY AS l(id_producto, cantidad, precio_unitario, subtotal_linea, orden)
+            ),
+            detalle AS (
+                INSERT INTO cxp_detalle_productos (
+                    id_cuenta_pagar, id_producto, cantidad, precio_unitario,
+                    descuento_linea, subtotal_linea
+                )
+                SELECT %(id_cuenta)s, id_producto, cantidad, precio_unitario, 0, subtotal_linea
+                FROM lineas
+                ORDER BY orden
+            ),
+            entradas AS (
+                SELECT l.id_producto,
+                       SUM(l.cantidad) AS cantidad,
+                       SUM(l.cantidad * l.precio_unitario) / NULLIF(SUM(l.cantidad), 0) AS costo_unitario
+                FROM lineas l
+                JOIN ca_productos p ON p.id_producto = l.id_producto
+                WHERE p.es_inventariable AND %(id_ubicacion)s::int IS NOT NULL
+                GROUP BY l.id_producto
+                HAVING SUM(l.cantidad) > 0
+            ),
+            actual AS (
+                SELECT i.id_producto, i.stock_actual, i.costo_promedio
+                FROM inventario i
+                WHERE i.id_ubicacion = %(id_ubicacion)s
+                  AND i.id_producto IN (SELECT id_producto FROM entradas)
+                FOR UPDATE
+            ),
+            inv AS (
+                INSERT INTO inventario AS i (
+                    id_producto, id_ubicacion, stock_actual, costo_promedio, fecha_ultima_entrada
+                )
+                SELECT e.id_producto, %(id_ubicacion)s, e.cantidad, ROUND(e.costo_unitario, 4), CURRENT_TIMESTAMP
+                FROM entradas e
+                LEFT JOIN actual a ON a.id_producto = e.id_producto
+                ON CONFLICT (id_producto, id_ubicacion) DO UPDATE SET
+                    stock_actual = i.stock_actual + EXCLUDED.stock_actual,
+                    costo_promedio = COALESCE(ROUND(
+                        (GREATEST(i.stock_actual, 0) * i.costo_promedio
+                         + EXCLUDED.stock_actual * EXCLUDED.costo_promedio)
+                        / NULLIF(GREATEST(i.stock_actual, 0) + EXCLUDED.stock_actual, 0), 4
+                    ), EXCLUDED.costo_promedio),
+                    fecha_ultima_entrada = EXCLUDED.fecha_ultima_entrada
+                RETURNING i.id_producto, i.stock_actual, i.costo_promedio
+            ),
+            movimientos AS (
+                INSERT INTO movimientos_inventario (
+                    id_producto, id_ubicacion, tipo_movimiento,
+                    cantidad, stock_anterior, stock_nuevo,
+                    costo_unitario, costo_promedio_anterior, costo_promedio_nuevo,
+                    id_usuario, motivo
+                )
+                SELECT n.id_producto, %(id_ubicacion)s, 'entrada',
+                       e.cantidad, COALESCE(a.stock_actual, 0), n.stock_actual,
+                       e.costo_unitario, COALESCE(a.costo_promedio, 0), n.costo_promedio,
+                       %(id_usuario)s, %(motivo)s
+                FROM inv n
+                JOIN entradas e ON e.id_producto = n.id_producto
+                LEFT JOIN actual a ON a.id_producto = n.id_producto
+            ),
+            costo_producto AS (
+                UPDATE ca_productos p
+                SET costo_promedio = c.costo
+                FROM (
+                    SELECT n.id_producto,
+                           ROUND(
+                               (GREATEST(n.stock_actual, 0) * n.costo_promedio
+                                + COALESCE(SUM(GREATEST(o.stock_actual, 0) * o.costo_promedio), 0))
+                               / NULLIF(GREATEST(n.stock_actual, 0) + COALESCE(SUM(GREATEST(o.stock_actual, 0)), 0), 0), 4
+                           ) AS costo
+                    FROM inv n
+                    LEFT JOIN inventario o ON o.id_producto = n.id_producto
+                                          AND o.id_ubicacion <> %(id_ubicacion)s
+                                          AND o.activo = TRUE
+                    GROUP BY n.id_producto, n.stock_actual, n.costo_promedio
+                ) c
+                WHERE p.id_producto = c.id_producto AND c.costo IS NOT NULL
+            )
+            SELECT COUNT(*) AS recibidos FROM inv
+        """, {
+            'id_cuenta': id_cuenta_pagar,
+            'id_ubicacion': id_ubicacion,
+            'id_usuario': id_usuario,
+            'motivo': motivo,
+            'productos': [d['id_producto'] for d in detalles],
+            'cantidades': [d['cantidad'] for d in detalles],
+            'precios': [d['precio_unitario'] for d in detalles],
+            'subtotales': [d['subtotal'] for d in detalles],
+        })
+        return cursor.fetchone()['recibidos']
+
     def guardar_compra_gasto(self, datos_compra: Dict) -> bool:
-        """Guardar una compra o gasto en la base de datos"""
+        """
+        Guardar una compra o gasto en la base de datos.
+        
+        La cuenta, sus líneas, la entrada al inventario con el costo promedio
+        y el saldo del proveedor se escriben en una sola transacción.
+        """
         try:
+            if not self.connection or self.connection.closed:
+                self.connect()
+
+            detalles = datos_compra.get('detalles') or []
+            es_compra = datos_compra.get('tipo_compra') == 'compra' and detalles
+
             with self.connection.cursor() as cursor:
                 # Insertar en cuentas_por_pagar
                 cursor.execute("""
@@ -1501,64 +2711,52 @@ class PostgresManager:
                     datos_compra.get('notas')
                 ))
 
-                id_cuenta_pagar = cursor.fetchone()[0]
+                id_cuenta_pagar = cursor.fetchone()['id_cuenta_pagar']
+
+                # Si es una compra con productos: detalles, inventario y costo promedio
+                if es_compra:
+                    id_ubicacion = datos_compra.get('id_ubicacion')
+                    if not id_ubicacion:
+                        ubicacion = self.obtener_ubicacion_por_defecto()
+                        id_ubicacion = ubicacion['id_ubicacion'] if ubicacion else None
+                    if not id_ubicacion:
+                        logging.warning("⚠️ Sin ubicación activa: la compra se guarda sin entrada al inventario")
 
-                # Si es una compra con productos, insertar detalles
-                if datos_compra.get('tipo_compra') == 'compra' and datos_compra.get('detalles'):
-                    for detalle in datos_compra['detalles']:
-                        cursor.execute("""
-                            INSERT INTO cxp_detalle_productos (
-                                id_cuenta_pagar, id_producto, cantidad, precio_unitario,
-                                descuento_linea, subtotal_linea
-                            ) VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (
-                            id_cuenta_pagar,
-                            detalle['id_producto'],
-                            detalle['cantidad'],
-                            detalle['precio_unitario'],
-                            0,  # descuento_linea
-                            detalle['subtotal']
-                        ))
+                    recibidos = self._recibir_mercancia(
+                        cursor, id_cuenta_pagar, detalles, id_ubicacion,
+                        datos_compra['id_usuario'], f"Compra {datos_compra['numero_cuenta']}"
+                    )
+                    logging.info(f"Entrada al inventario: {recibidos} productos de {len(detalles)} líneas")
 
-                        # Actualizar stock si es compra de productos inventariables
-                        producto = self.obtener_producto_por_codigo(detalle['codigo_interno'])
-                        if producto and producto.get('es_inventariable', True):
-                            # Obtener ubicación por defecto (primera activa)
-                            ubicacion = self.obtener_ubicacion_por_defecto()
-                            if ubicacion:
-                                self.actualizar_stock(
-                                    detalle['codigo_interno'],
-                                    producto['tipo_producto'],
-                                    detalle['cantidad'],
-                                    id_ubicacion=ubicacion['id_ubicacion'],
-                                    costo_unitario=detalle['precio_unitario']
-                                )
+                # Saldo del proveedor en la misma transacción que la compra
+                self._actualizar_saldo_proveedor(cursor, datos_compra.get('id_proveedor'))
 
-                self.connection.commit()
+                self._confirmar()
+                self._despues_de_confirmar(lambda: self.referencias.invalidar('ca_proveedores'))
                 logging.info(f"✅ Compra/gasto guardado: {datos_compra['numero_cuenta']}")
+                if es_compra:
+                    self._notificar_cambio_stock([d.get('id_producto') for d in detalles])
                 return True
 
         except Exception as e:
             try:
-                self.connection.rollback()
+                self._revertir()
             except:
                 pass
             logging.error(f"Error guardando compra/gasto: {e}")
             return False
 
     def obtener_ubicacion_por_defecto(self) -> Optional[Dict]:
-        """Obtener la primera ubicación activa como ubicación por defecto"""
+        """Obtener la primera ubicación activa como ubicación por defecto (caché de referencias)"""
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT id_ubicacion, nombre
-                    FROM ca_ubicaciones
-                    WHERE activa = TRUE
-                    ORDER BY id_ubicacion
-                    LIMIT 1
-                """)
-                result = cursor.fetchone()
-                return dict(result) if result else None
+            filas = self.referencias.obtener('ca_ubicaciones', 'por_defecto', lambda: self._consultar_referencia("""
+                SELECT id_ubicacion, nombre
+                FROM ca_ubicaciones
+                WHERE activa = TRUE
+                ORDER BY id_ubicacion
+                LIMIT 1
+            """))
+            return filas[0] if filas else None
         except Exception as e:
             logging.error(f"Error obteniendo ubicación por defecto: {e}")
             return None
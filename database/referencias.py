@@ -0,0 +1,118 @@
+"""
+Caché de tablas de referencia para PostgresManager
+Ubicaciones, categorías, tipos de cuenta por pagar y proveedores cambian
+poco y se leen en cada apertura de formulario o cambio de combo. Cada
+lectura se guarda por (tabla, clave) con vigencia (TTL); al vencer, o al
+escribir en la tabla, la siguiente lectura vuelve a la base de datos.
+
+Invalidación:
+    - PostgresManager.execute / execute_with_returning detectan la tabla
+      escrita (INSERT INTO / UPDATE / DELETE FROM) y la invalidan
+    - Los métodos que escriben en una de estas tablas dentro de otra
+      transacción llaman a invalidar(tabla) (p. ej. el saldo del proveedor)
+    - El TTL acota lo que otra caja pueda haber cambiado
+
+Configuración por variables de entorno (.env):
+    POS_TTL_REFERENCIAS_S     Vigencia de cada lectura en segundos (300, 0 = sin caché)
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+
+# Tablas que se guardan en caché
+TABLAS_REFERENCIA = ('ca_ubicaciones', 'ca_categorias_producto', 'ca_tipo_cuenta_pagar', 'ca_proveedores')
+
+_RE_ESCRITURA = re.compile(r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(?:ONLY\s+)?([A-Za-z_][\w.]*)', re.I)
+
+
+def tablas_escritas(sql):
+    """Tablas de referencia a las que escribe una sentencia"""
+    texto = sql.decode('utf-8', errors='replace') if isinstance(sql, bytes) else str(sql)
+    return {
+        tabla for tabla in (t.split('.')[-1].lower() for t in _RE_ESCRITURA.findall(texto))
+        if tabla in TABLAS_REFERENCIA
+    }
+
+
+def _copiar(valor):
+    """Copia para el llamador: una pantalla que modifica su lista no altera la caché"""
+    if isinstance(valor, list):
+        return [dict(f) for f in valor]
+    if isinstance(valor, dict):
+        return dict(valor)
+    return valor
+
+
+class CacheReferencias:
+    """
+    Lecturas de tablas de referencia con vigencia e invalidación por tabla.
+    Las cargas ocurren fuera del candado: dos hilos que fallan a la vez
+    consultan los dos, pero ninguno espera a la base de datos del otro.
+    """
+
+    def __init__(self, ttl_s=None):
+        self.ttl_s = float(os.getenv('POS_TTL_REFERENCIAS_S', '300')) if ttl_s is None else ttl_s
+        self._entradas = {}  # (tabla, clave) -> (expira, generación, valor)
+        self._generaciones = {}  # tabla -> contador de invalidaciones
+        self._contadores = {}  # tabla -> {'aciertos', 'fallos', 'invalidaciones'}
+        self._lock = threading.Lock()
+
+    def _contador(self, tabla):
+        return self._contadores.setdefault(tabla, {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0})
+
+    def obtener(self, tabla, clave, cargar, ttl_s=None):
+        """
+        Valor en caché de (tabla, clave) o el resultado de cargar().
+        Si cargar() lanza una excepción no se guarda nada y la excepción sigue.
+        """
+        ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get((tabla, clave))
+            if entrada is not None and entrada[0] > ahora and entrada[1] == self._generaciones.get(tabla, 0):
+                self._contador(tabla)['aciertos'] += 1
+                return _copiar(entrada[2])
+            self._contador(tabla)['fallos'] += 1
+            generacion = self._generaciones.get(tabla, 0)
+
+        valor = cargar()
+
+        if ttl_s > 0:
+            with self._lock:
+                # Una invalidación durante la carga deja este valor sin guardar
+                if self._generaciones.get(tabla, 0) == generacion:
+                    self._entradas[(tabla, clave)] = (ahora + ttl_s, generacion, valor)
+        return _copiar(valor)
+
+    def invalidar(self, *tablas):
+        """Descartar lo guardado de ciertas tablas (o de todas si no se indica ninguna)"""
+        with self._lock:
+            tablas = tablas or tuple({t for t, _ in self._entradas} | set(self._generaciones))
+            for tabla in tablas:
+                self._generaciones[tabla] = self._generaciones.get(tabla, 0) + 1
+                self._contador(tabla)['invalidaciones'] += 1
+            self._entradas = {k: v for k, v in self._entradas.items() if k[0] not in tablas}
+        if tablas:
+            logging.debug(f"Caché de referencias invalidada: {', '.join(tablas)}")
+
+    def invalidar_por_sql(self, sql):
+        """Invalidar las tablas de referencia a las que escribe una sentencia ya ejecutada"""
+        tablas = tablas_escritas(sql)
+        if tablas:
+            self.invalidar(*tablas)
+
+    def estadisticas(self):
+        """{tabla: {'aciertos', 'fallos', 'invalidaciones', 'entradas'}}"""
+        with self._lock:
+            resultado = {tabla: dict(c, entradas=0) for tabla, c in self._contadores.items()}
+            for tabla, _ in self._entradas:
+                resultado.setdefault(tabla, {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0, 'entradas': 0})
+                resultado[tabla]['entradas'] += 1
+            return resultado
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self._contadores = {}
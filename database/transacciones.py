@@ -0,0 +1,242 @@
+"""
+Unidad de trabajo para PostgresManager
+Agrupa varias llamadas en una sola transacción y un solo commit:
+
+    with pg_manager.transaccion() as unidad:
+        id_producto = pg_manager.insertar_producto(datos)
+        pg_manager.crear_inventario({...})
+    if unidad.fallida: ...
+
+Dentro del bloque, los métodos que normalmente confirman (self._confirmar())
+se unen a la transacción y el commit ocurre una vez, al salir del bloque
+más externo. Cada bloque abre un SAVEPOINT:
+    - Si un método falla (self._revertir()), se deshace lo hecho en el bloque
+      más interno, el bloque queda marcado como fallido y la conexión sigue
+      utilizable. Al salir, un bloque fallido se descarta completo; el externo
+      hace ROLLBACK en lugar de commit.
+    - Un bloque anidado fallido no arrastra al externo: sirve para pasos que
+      pueden fallar por separado (p. ej. un producto de un lote).
+    - Una excepción que sale del bloque lo descarta y se propaga.
+
+Lo que debe ocurrir solo con los datos confirmados (avisos de cambio de stock,
+invalidar la caché de referencias) se registra con self._despues_de_confirmar()
+y corre tras el commit; si la unidad se revierte, se descarta.
+
+Cada hilo tiene su propia pila de bloques: una unidad abierta en la interfaz
+no arrastra las lecturas de un hilo de carga.
+
+Las lecturas (self._cursor_lectura()) van fuera de la unidad a la conexión
+de solo lectura en autocommit, y los reportes a la base de reportes si está
+configurada: no abren transacción en la principal. Dentro de una unidad
+usan la principal, para ver lo que la unidad ya escribió. La principal es
+del hilo principal (la interfaz): la lectura de otro hilo nunca va a ella.
+Un hilo de carga dentro de self.conexion_de_carga() lee en su propia conexión.
+
+Cada clase de consulta (consulta o reporte) tiene su conexión compartida,
+abierta con su statement_timeout: el límite no se cambia en una conexión
+que usan otros hilos.
+
+Configuración por variables de entorno (.env):
+    POS_TIMEOUT_CONSULTA_MS   Límite de las consultas de pantallas (15000, 0 = sin límite)
+    POS_TIMEOUT_REPORTE_MS    Límite de historiales, exportaciones y análisis (120000)
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from database.instrumentacion import CONEXIONES_DE_CARGA
+
+try:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE, QueryCanceledError, cursor as CursorSimple
+except ImportError:
+    TRANSACTION_STATUS_IDLE = 0
+    QueryCanceledError = Exception
+    CursorSimple = None
+
+# statement_timeout por clase de consulta en ms (0 = sin límite)
+TIEMPOS_LIMITE_MS = {
+    'consulta': int(os.getenv('POS_TIMEOUT_CONSULTA_MS', '15000')),
+    'reporte': int(os.getenv('POS_TIMEOUT_REPORTE_MS', '120000')),
+}
+
+
+class BloqueTransaccion:
+    """Estado de un bloque transaccion() (savepoint, fallo y acciones diferidas)"""
+
+    __slots__ = ('savepoint', 'fallida', 'despues')
+
+    def __init__(self, savepoint):
+        self.savepoint = savepoint
+        self.fallida = False
+        self.despues = []  # Callables a ejecutar tras el commit
+
+
+class UnidadDeTrabajo:
+    """
+    Métodos de transacción de PostgresManager (se mezclan en la clase).
+    Usan self.connection, self.connect(), self.referencias, self._hilos
+    (threading.local) y las conexiones de lectura y reportes
+    (self.conexion_lectura(), self.conexion_reportes(), self._abrir_conexion_lectura()).
+    """
+
+    # ========== UNIDAD DE TRABAJO ==========
+
+    @property
+    def _bloques(self):
+        """Bloques transaccion() abiertos por el hilo actual"""
+        hilo = self._hilos
+        if not hasattr(hilo, 'bloques'):
+            hilo.bloques = []
+        return hilo.bloques
+
+    @property
+    def en_transaccion(self) -> bool:
+        """Si hay un bloque transaccion() abierto"""
+        return bool(self._bloques)
+
+    @contextmanager
+    def transaccion(self):
+        """Bloque transaccional; los bloques anidados se unen a la transacción externa con un SAVEPOINT"""
+        if not self._bloques and (not self.connection or self.connection.closed):
+            self.connect()
+
+        bloque = BloqueTransaccion(f"unidad_{len(self._bloques)}")
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {bloque.savepoint}")
+        self._bloques.append(bloque)
+
+        try:
+            yield bloque
+        except BaseException:
+            self._bloques.pop()
+            self._cerrar_bloque(bloque, confirmar=False)
+            raise
+        else:
+            self._bloques.pop()
+            self._cerrar_bloque(bloque, confirmar=not bloque.fallida)
+
+    def _cerrar_bloque(self, bloque, confirmar):
+        externo = not self._bloques
+        if confirmar:
+            if externo:
+                self.connection.commit()
+                for accion in bloque.despues:
+                    try:
+                        accion()
+                    except Exception as e:
+                        logging.error(f"Error en acción posterior al commit: {e}")
+            else:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"RELEASE SAVEPOINT {bloque.savepoint}")
+                self._bloques[-1].despues.extend(bloque.despues)
+            return
+
+        try:
+            if externo:
+                self.connection.rollback()
+                # Lo leído dentro de la unidad pudo incluir escrituras revertidas
+                self.referencias.invalidar()
+            else:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {bloque.savepoint}")
+                    cursor.execute(f"RELEASE SAVEPOINT {bloque.savepoint}")
+        except Exception as e:
+            logging.error(f"Error revirtiendo bloque {bloque.savepoint}: {e}")
+        logging.warning(f"⚠️ Transacción revertida ({bloque.savepoint})")
+
+    def _confirmar(self):
+        """commit, o nada si hay una unidad abierta (confirma el bloque externo)"""
+        if not self._bloques:
+            self.connection.commit()
+
+    def _revertir(self):
+        """rollback, o deshacer el bloque más interno y marcarlo como fallido"""
+        if not self._bloques:
+            self.connection.rollback()
+            return
+        bloque = self._bloques[-1]
+        bloque.fallida = True
+        with self.connection.cursor() as cursor:
+            # Volver al inicio del bloque sin soltar el savepoint: la conexión sigue utilizable
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {bloque.savepoint}")
+
+    @contextmanager
+    def _cursor_lectura(self, cursor_factory=None, name=None, reporte=False):
+        """
+        Cursor para consultas que no escriben.
+            - Dentro de una unidad del hilo: la conexión principal (misma transacción)
+            - Hilo de carga (self.conexion_de_carga()): su propia conexión
+            - reporte=True: la base de reportes si está configurada y al día
+              (self.conexion_reportes()); si no, como cualquier lectura
+            - Si no: la conexión de lectura en autocommit (self.conexion_lectura())
+            - Un cursor con nombre (del lado del servidor) en una conexión en
+              autocommit se declara WITH HOLD
+        Sin conexión de lectura (POS_CONEXION_LECTURA=0) el hilo principal lee
+        en la principal y cierra la transacción que abrió al salir: la sesión
+        no queda "idle in transaction"; otro hilo abre una conexión solo para
+        esa lectura.
+
+        Las conexiones de lectura, de reportes y de carga abren con el límite
+        de su clase y no se cambia por lectura. Solo en la principal (hilo
+        principal, sin conexión de lectura) se fija con SET LOCAL para esa
+        lectura; dentro de una unidad no (es la transacción del llamador).
+        """
+        kwargs = {'cursor_factory': cursor_factory} if cursor_factory is not None else {}
+        if self._bloques:
+            with self.connection.cursor(**kwargs) as cursor:
+                yield cursor
+            return
+
+        carga = getattr(self._hilos, 'carga', None)
+        if carga is not None and CONEXIONES_DE_CARGA.cancelada():
+            # La pantalla ya se cerró: no empezar otra lectura
+            raise QueryCanceledError("carga cancelada")
+
+        if carga is not None:
+            conexion = carga
+        else:
+            conexion = self.conexion_reportes() if reporte else self.conexion_lectura()
+        limite = TIEMPOS_LIMITE_MS['reporte' if reporte else 'consulta']
+        temporal = None
+        if conexion is self.connection and threading.current_thread() is not threading.main_thread():
+            # La transacción de la principal es de la interfaz: no leer ni hacer rollback en ella
+            temporal = conexion = self._abrir_conexion_lectura('lectura', limite)
+
+        try:
+            if conexion.autocommit:
+                if name:
+                    kwargs['withhold'] = True
+                with conexion.cursor(name, **kwargs) if name else conexion.cursor(**kwargs) as cursor:
+                    yield cursor
+                return
+
+            # Principal desde el hilo principal, o la conexión de carga del hilo:
+            # una transacción ya abierta (escritura pendiente del llamador) no se toca
+            cerrar = conexion.get_transaction_status() == TRANSACTION_STATUS_IDLE
+            try:
+                if cerrar and conexion is self.connection and limite:
+                    # SET LOCAL termina con el rollback de abajo
+                    self._fijar_tiempo_limite(conexion, limite, local=True)
+                with conexion.cursor(name, **kwargs) if name else conexion.cursor(**kwargs) as cursor:
+                    yield cursor
+            finally:
+                if cerrar and not conexion.closed:
+                    conexion.rollback()
+        finally:
+            if temporal is not None:
+                temporal.close()
+
+    @staticmethod
+    def _fijar_tiempo_limite(conexion, ms, local=False):
+        # Cursor sin instrumentar: el SET no cuenta como consulta
+        with conexion.cursor(cursor_factory=CursorSimple) as cursor:
+            cursor.execute(f"SET {'LOCAL ' if local else ''}statement_timeout = {int(ms)}")
+
+    def _despues_de_confirmar(self, accion):
+        """Ejecutar ahora o, dentro de una unidad, después de su commit"""
+        if self._bloques:
+            self._bloques[-1].despues.append(accion)
+        else:
+            accion()
@@ -6,7 +6,12 @@ Usando PySide6 para la interfaz
 
 import sys
 import os
+import json
 import logging
+import time
+
+# Referencia para medir el arranque (tiempo hasta que el login es visible)
+_INICIO_PROCESO = time.perf_counter()
 
 # CONFIGURACIÓN PARA SUPRIMIR ERRORES DE FUENTES ANTES DE CUALQUIER IMPORTACIÓN
 # Deshabilitar completamente errores de DirectWrite y logging de fuentes
@@ -34,7 +39,7 @@ logging.getLogger('websockets').setLevel(logging.WARNING)
 logging.getLogger('asyncio').setLevel(logging.WARNING)
 
 from PySide6.QtWidgets import QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QMessageBox
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont
 
 
@@ -65,11 +70,12 @@ def _ensure_utf8_stdio_windows() -> None:
 _ensure_utf8_stdio_windows()
 
 try:
+    # Solo lo necesario para mostrar el login; la ventana principal, las
+    # pantallas y PostgresManager se importan después (ver ConexionInicialThread)
     from ui.login_window_pyside import LoginWindow
-    from ui.main_pos_window import MainPOSWindow
-    from ui.abrir_turno_dialog import AbrirTurnoDialog
-    from database.postgres_manager import PostgresManager
     from utils.config import Config
+    from services.monitor_ui import MonitorUI, FiltroPrimerPintado
+    from services.autenticacion import SesionesTurno, ConcesionesSupervisor
     from ui.components import show_warning_dialog, show_confirmation_dialog
 except ImportError as e:
     logging.error(f"Error importando módulos: {e}")
@@ -82,6 +88,50 @@ except ImportError as e:
     sys.exit(1)
 
 
+class ConexionInicialThread(QThread):
+    """
+    Arranque en segundo plano mientras el login ya está visible:
+    conectar a PostgreSQL, calentar cachés, precargar los módulos de pantallas
+    y poner al día los rollups de ventas
+    """
+    
+    conectado = Signal(object)  # PostgresManager listo
+    error = Signal(str)
+    precarga_terminada = Signal(float)  # ms empleados en importar las pantallas
+    
+    def __init__(self, db_config, parent=None):
+        super().__init__(parent)
+        self.db_config = db_config
+    
+    def run(self):
+        try:
+            from database.postgres_manager import PostgresManager
+            
+            pg_manager = PostgresManager(self.db_config)
+            if not pg_manager.initialize_database():
+                raise Exception("BD no disponible")
+            
+            # Cachés que de otro modo se llenan en la primera venta/reporte
+            pg_manager.rollups_disponibles()
+            pg_manager.precargar_referencias()
+        except Exception as e:
+            logging.error(f"Error fatal inicializando BD: {e}")
+            self.error.emit(str(e))
+            return
+        
+        self.conectado.emit(pg_manager)
+        
+        # Importar las pantallas mientras el usuario escribe su contraseña
+        from ui.registro_pantallas import precargar
+        ms = precargar(detener=self.isInterruptionRequested)
+        self.precarga_terminada.emit(ms)
+        
+        # Ventas que aún no están en los rollups de reportes (anteriores a su
+        # instalación o de otro proceso); usa una conexión propia
+        if pg_manager.rollups_disponibles() and not self.isInterruptionRequested():
+            pg_manager.actualizar_rollups_ventas(detener=self.isInterruptionRequested)
+
+
 class POSApplication:
     def __init__(self):
         """Inicializar la aplicación POS"""
@@ -93,7 +143,7 @@ class POSApplication:
             # CONFIGURACIÓN DE FUENTES PARA EVITAR ERRORES DE DIRECTWRITE
             # Configurar fuentes seguras para evitar problemas con fuentes corruptas del sistema
             try:
-                from PySide6.QtGui import QFont
+                from PySide6.QtGui import QFont, QFontDatabase
                 
                 # SUPRIMIR COMPLETAMENTE LOS ERRORES DE FUENTES ANTES DE CUALQUIER OPERACIÓN QT
                 import os
@@ -112,16 +162,14 @@ class POSApplication:
                 ]
                 
                 font_configured = False
+                # Consultar las familias instaladas una vez (sin crear widgets de prueba)
+                familias_instaladas = set(QFontDatabase.families())
                 for font_name, font_size in safe_fonts:
                     try:
-                        font = QFont(font_name, font_size)
-                        # Verificar si la fuente existe creando un QLabel de prueba
-                        from PySide6.QtWidgets import QLabel
-                        test_label = QLabel("Test")
-                        test_label.setFont(font)
+                        if font_name not in familias_instaladas:
+                            continue
                         
-                        # Si no hay excepciones, la fuente es segura
-                        self.app.setFont(font)
+                        self.app.setFont(QFont(font_name, font_size))
                         logging.info(f"Fuente configurada exitosamente: {font_name}")
                         font_configured = True
                         break
@@ -140,25 +188,24 @@ class POSApplication:
             # Inicializar configuración
             self.config = Config()
             
-            # Inicializar PostgreSQL
-            try:
-                db_config = self.config.get_postgres_config()
-                self.postgres_manager = PostgresManager(db_config)
-                if not self.postgres_manager.initialize_database():
-                    logging.error("Error crítico: No se pudo conectar a la base de datos PostgreSQL")
-                    raise Exception("BD no disponible")
-            except Exception as e:
-                logging.error(f"Error fatal inicializando BD: {e}")
-                QMessageBox.critical(
-                    None, 
-                    "Error de Conexión",
-                    f"No se pudo conectar a PostgreSQL:\n{e}\n\n"
-                    f"Verifica que:\n"
-                    f"1. PostgreSQL esté ejecutándose\n"
-                    f"2. La base de datos 'pos_sivp' exista\n"
-                    f"3. Las credenciales en .env sean correctas"
-                )
-                sys.exit(1)
+            # Monitor de latencia de la interfaz (logs/metricas_ui.log); arranca
+            # antes del login para registrar también los congelamientos de esa etapa
+            self.monitor_ui = MonitorUI.obtener()
+            if self.monitor_ui:
+                self.monitor_ui.iniciar()
+            
+            # Tiempos de arranque (ms desde el inicio del proceso)
+            self.tiempos_arranque = {}
+            self._marcar_arranque('qt_listo_ms')
+            
+            # PostgreSQL se conecta en segundo plano: el login aparece de inmediato
+            # y atiende el primer intento de acceso en cuanto la conexión esté lista
+            self.postgres_manager = None
+            self.hilo_conexion = ConexionInicialThread(self.config.get_postgres_config())
+            # Encoladas: los slots tocan ventanas y deben correr en el hilo de Qt
+            self.hilo_conexion.conectado.connect(self.on_bd_conectada, Qt.QueuedConnection)
+            self.hilo_conexion.error.connect(self.on_error_bd, Qt.QueuedConnection)
+            self.hilo_conexion.precarga_terminada.connect(self.on_precarga_terminada, Qt.QueuedConnection)
             
             # Variable para usuario actual
             self.current_user = None
@@ -167,6 +214,7 @@ class POSApplication:
             
             # Mostrar ventana de login
             self.show_login()
+            self.hilo_conexion.start()
             
         except Exception as e:
             logging.error(f"Error crítico en __init__: {e}")
@@ -176,11 +224,66 @@ class POSApplication:
                 pass
             sys.exit(1)
         
+    # ========== ARRANQUE ==========
+    
+    def _marcar_arranque(self, etapa):
+        """Registrar los ms transcurridos desde el inicio del proceso hasta una etapa"""
+        if etapa in self.tiempos_arranque:
+            return
+        self.tiempos_arranque[etapa] = round((time.perf_counter() - _INICIO_PROCESO) * 1000, 1)
+        logging.info(f"⏱️ Arranque - {etapa}: {self.tiempos_arranque[etapa]:.0f} ms")
+        
+        # Modo benchmark (benchmarks/arranque.py): escribir los tiempos y salir
+        archivo = os.getenv('POS_ARCHIVO_ARRANQUE')
+        etapas = {'login_visible_ms', 'bd_lista_ms', 'pantallas_precargadas_ms'}
+        if archivo and etapas <= set(self.tiempos_arranque):
+            self._escribir_arranque(archivo, self.tiempos_arranque)
+            self.app.exit(0)
+    
+    @staticmethod
+    def _escribir_arranque(archivo, datos):
+        try:
+            with open(archivo, 'w', encoding='utf-8') as f:
+                json.dump(datos, f)
+        except Exception as e:
+            logging.error(f"No se pudieron escribir los tiempos de arranque: {e}")
+    
+    def on_bd_conectada(self, postgres_manager):
+        """La conexión de segundo plano quedó lista"""
+        self.postgres_manager = postgres_manager
+        self._marcar_arranque('bd_lista_ms')
+        if getattr(self, 'login_window', None):
+            self.login_window.set_pg_manager(postgres_manager)
+    
+    def on_error_bd(self, mensaje):
+        """No se pudo conectar: mismo aviso que antes del arranque en segundo plano"""
+        archivo = os.getenv('POS_ARCHIVO_ARRANQUE')
+        if archivo:
+            self._escribir_arranque(archivo, dict(self.tiempos_arranque, error=mensaje))
+            self.app.exit(1)
+            return
+        
+        QMessageBox.critical(
+            getattr(self, 'login_window', None),
+            "Error de Conexión",
+            f"No se pudo conectar a PostgreSQL:\n{mensaje}\n\n"
+            f"Verifica que:\n"
+            f"1. PostgreSQL esté ejecutándose\n"
+            f"2. La base de datos 'pos_sivp' exista\n"
+            f"3. Las credenciales en .env sean correctas"
+        )
+        self.app.exit(1)
+    
+    def on_precarga_terminada(self, ms):
+        logging.info(f"Pantallas precargadas en segundo plano ({ms:.0f} ms)")
+        self._marcar_arranque('pantallas_precargadas_ms')
+    
     def show_login(self):
         """Mostrar ventana de login"""
         try:
             login_window = LoginWindow(self.postgres_manager)
             login_window.login_success.connect(self.on_login_success)
+            FiltroPrimerPintado(login_window, lambda: self._marcar_arranque('login_visible_ms'))
             login_window.show()
             
             # Guardar referencia para evitar que se destruya
@@ -204,6 +307,7 @@ class POSApplication:
             
             if not turno_abierto:
                 # Abrir diálogo para iniciar turno
+                from ui.abrir_turno_dialog import AbrirTurnoDialog
                 dialog = AbrirTurnoDialog(self.postgres_manager, self.current_user)
                 if dialog.exec():
                     self.turno_id = dialog.get_turno_id()
@@ -219,12 +323,28 @@ class POSApplication:
                 self.turno_id = turno_abierto['id_turno']
                 logging.info(f"Usuario tiene turno {self.turno_id} ya abierto")
             
+            # PIN para reanudar el turno sin contraseña (una vez por turno)
+            self.ofrecer_pin_turno()
+            
             # Mostrar ventana principal
             self.show_main_window()
             
         except Exception as e:
             logging.error(f"Error al procesar login exitoso: {e}")
     
+    def ofrecer_pin_turno(self):
+        """Pedir el PIN de reanudación si el usuario aún no tiene uno vigente"""
+        sesiones = SesionesTurno.obtener()
+        if not sesiones.habilitado or not self.turno_id or sesiones.activa(self.current_user['username']):
+            return
+        try:
+            from ui.pin_turno_dialog import PinTurnoDialog
+            dialog = PinTurnoDialog(self.current_user)
+            if dialog.exec():
+                sesiones.abrir(self.current_user, dialog.get_pin())
+        except Exception as e:
+            logging.error(f"Error definiendo PIN de turno: {e}")
+    
     def verificar_turno_abierto(self):
         """Verificar si el usuario tiene un turno abierto"""
         try:
@@ -241,6 +361,8 @@ class POSApplication:
     def show_main_window(self):
         """Mostrar ventana principal del POS"""
         try:
+            from ui.main_pos_window import MainPOSWindow
+            
             self.main_window = MainPOSWindow(
                 self.current_user,
                 self.postgres_manager,
@@ -255,9 +377,15 @@ class POSApplication:
     def on_logout(self):
         """Manejar cierre de sesión"""
         try:
+            # Las autorizaciones de supervisor no pasan al siguiente usuario
+            ConcesionesSupervisor.obtener().revocar_todas()
+            
             # Verificar si hay turno abierto
             if self.turno_id:
                 turno_info = self.verificar_estado_turno()
+                if turno_info and turno_info.get('cerrado') and self.current_user:
+                    # Turno cerrado: el PIN ya no sirve para reanudarlo
+                    SesionesTurno.obtener().revocar(self.current_user['username'])
                 if turno_info and not turno_info.get('cerrado'):
                     # Mostrar advertencia
                     if self.main_window:
@@ -291,16 +419,13 @@ class POSApplication:
             if not self.postgres_manager or not self.turno_id:
                 return None
                 
-            # Obtener turno directamente con PostgreSQL
-            with self.postgres_manager.connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT id_turno, numero_turno, fecha_apertura, monto_inicial, cerrado
-                    FROM turnos_caja
-                    WHERE id_turno = %s
-                """, (self.turno_id,))
-                
-                result = cursor.fetchone()
-                return dict(result) if result else None
+            # Obtener turno (conexión de lectura, sin transacción abierta)
+            result = self.postgres_manager.query("""
+                SELECT id_turno, numero_turno, fecha_apertura, monto_inicial, cerrado
+                FROM turnos_caja
+                WHERE id_turno = %s
+            """, (self.turno_id,))
+            return dict(result[0]) if result else None
             
         except Exception as e:
             logging.error(f"Error verificando estado del turno: {e}")
@@ -314,6 +439,10 @@ class POSApplication:
             logging.error(f"Error durante ejecución: {e}")
             return 1
         finally:
+            self.hilo_conexion.requestInterruption()
+            self.hilo_conexion.wait(2000)
+            if self.monitor_ui:
+                self.monitor_ui.detener()
             # Asegurar que el logging se cierre correctamente
             logging.shutdown()
 
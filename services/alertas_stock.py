@@ -0,0 +1,150 @@
+"""
+Motor de alertas de stock bajo para HTF POS
+Reevalúa únicamente los productos tocados por ventas, compras o movimientos
+y mantiene en memoria el conjunto vivo de alertas (sin escaneos periódicos)
+"""
+
+from PySide6.QtCore import QObject, Signal, QTimer
+import logging
+
+
+class MotorAlertasStock(QObject):
+    """
+    Conjunto vivo de alertas de inventario.
+
+    Las alertas se indexan por id_inventario (producto + ubicación). Cada
+    cambio de stock llega desde PostgresManager con los id_producto
+    afectados; los cambios se agrupan y se reevalúan en una sola consulta
+    en la siguiente vuelta del event loop.
+
+    Tipos de alerta:
+        'sin_stock'   stock_actual <= 0
+        'bajo_stock'  stock_actual <= stock_minimo
+        'sobre_stock' stock_actual > stock_maximo (si stock_maximo > 0)
+    """
+
+    alerta_nueva = Signal(dict)       # Fila de inventario que entra en alerta (o cambia de tipo)
+    alerta_actualizada = Signal(dict) # Fila que sigue en el mismo tipo de alerta con otro stock o límites
+    alerta_resuelta = Signal(dict)    # Fila de inventario que sale de alerta
+    alertas_actualizadas = Signal()   # El conjunto de alertas cambió
+
+    # Señal interna para pasar los cambios al hilo del motor (los
+    # observadores de PostgresManager pueden llamarse desde un QThread)
+    _productos_modificados = Signal(list)
+
+    def __init__(self, pg_manager, parent=None, retraso_ms=200):
+        super().__init__(parent)
+        self.pg_manager = pg_manager
+        self.alertas = {}  # id_inventario -> fila con 'tipo_alerta'
+        self._pendientes = set()
+
+        # Agrupar ráfagas de cambios (varias líneas o ventas seguidas)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(retraso_ms)
+        self._timer.timeout.connect(self._reevaluar_pendientes)
+
+        self._productos_modificados.connect(self._encolar)
+        self.pg_manager.agregar_observador_stock(self._productos_modificados.emit)
+
+    @staticmethod
+    def clasificar(fila):
+        """Devolver el tipo de alerta de una fila de inventario, o None si está en rango"""
+        stock = fila.get('stock_actual') or 0
+        minimo = fila.get('stock_minimo') or 0
+        maximo = fila.get('stock_maximo') or 0
+
+        if stock <= 0:
+            return 'sin_stock'
+        if stock <= minimo:
+            return 'bajo_stock'
+        if maximo > 0 and stock > maximo:
+            return 'sobre_stock'
+        return None
+
+    def cargar_inicial(self):
+        """Cargar las alertas existentes (una sola consulta, al iniciar sesión)"""
+        try:
+            filas = self.pg_manager.obtener_inventario_en_alerta()
+            self.alertas = {}
+            for fila in filas:
+                fila = dict(fila)
+                fila['tipo_alerta'] = self.clasificar(fila)
+                self.alertas[fila['id_inventario']] = fila
+
+            logging.info(f"Alertas de stock cargadas: {len(self.alertas)}")
+            self.alertas_actualizadas.emit()
+        except Exception as e:
+            logging.error(f"Error cargando alertas de stock: {e}")
+
+    def detener(self):
+        """Dejar de escuchar cambios de stock"""
+        self._timer.stop()
+        self.pg_manager.quitar_observador_stock(self._productos_modificados.emit)
+
+    def _encolar(self, ids_producto):
+        """Acumular productos a reevaluar y programar la reevaluación"""
+        self._pendientes.update(ids_producto)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _reevaluar_pendientes(self):
+        """Reevaluar solo los productos modificados desde la última vuelta"""
+        if not self._pendientes:
+            return
+
+        ids = list(self._pendientes)
+        self._pendientes.clear()
+
+        try:
+            filas = self.pg_manager.obtener_estado_stock(ids)
+        except Exception as e:
+            logging.error(f"Error reevaluando stock: {e}")
+            return
+
+        ids_consultados = set(ids)
+        vistos = set()
+        hubo_cambios = False
+
+        for fila in filas:
+            fila = dict(fila)
+            id_inventario = fila['id_inventario']
+            vistos.add(id_inventario)
+
+            tipo = self.clasificar(fila)
+            anterior = self.alertas.get(id_inventario)
+
+            if tipo:
+                fila['tipo_alerta'] = tipo
+                self.alertas[id_inventario] = fila
+                if not anterior or anterior['tipo_alerta'] != tipo:
+                    self.alerta_nueva.emit(fila)
+                elif any(anterior.get(c) != fila.get(c) for c in ('stock_actual', 'stock_minimo', 'stock_maximo')):
+                    self.alerta_actualizada.emit(fila)
+                hubo_cambios = True
+            elif anterior:
+                del self.alertas[id_inventario]
+                self.alerta_resuelta.emit(fila)
+                hubo_cambios = True
+
+        # Filas que dejaron de existir o se desactivaron
+        for id_inventario, alerta in list(self.alertas.items()):
+            if alerta['id_producto'] in ids_consultados and id_inventario not in vistos:
+                del self.alertas[id_inventario]
+                self.alerta_resuelta.emit(alerta)
+                hubo_cambios = True
+
+        if hubo_cambios:
+            self.alertas_actualizadas.emit()
+
+    def ids_inventario(self, tipos=('sin_stock', 'bajo_stock')):
+        """Conjunto de id_inventario con alguno de los tipos de alerta indicados"""
+        return {
+            id_inventario for id_inventario, alerta in self.alertas.items()
+            if alerta['tipo_alerta'] in tipos
+        }
+
+    def stock_actual(self, id_inventario):
+        """Último stock conocido de una fila en alerta (None si no está en alerta)"""
+        alerta = self.alertas.get(id_inventario)
+        return alerta['stock_actual'] if alerta else None
@@ -0,0 +1,299 @@
+"""
+Análisis de demanda de inventario para HTF POS
+
+- Velocidad: unidades que salen por día (ventas y mermas) de cada fila de
+  inventario, contando desde su primera salida dentro del periodo analizado.
+- Pronóstico: suavizado exponencial (EWMA) de la salida diaria; los días sin
+  salidas cuentan como cero.
+- Clases ABC de cada producto por ingreso y por utilidad (80% / 95% acumulado).
+- Sugerencias por fila de inventario:
+    stock mínimo   demanda durante la entrega + stock de seguridad
+                   (z de la clase × desviación diaria × √días de entrega)
+    stock máximo   mínimo + demanda del periodo de revisión
+    reorden        máximo - disponible, si el disponible ya está en el mínimo
+
+El historial llega por lotes, un renglón por fila de inventario y día con
+salidas (ver OperacionesAnalitica.leer_salidas_diarias), y se acumula con
+sumas ponderadas (np.bincount) sin armar la matriz producto × día: el costo
+crece con los renglones leídos, no con productos × días.
+
+NumPy es opcional (viene con pandas, requirements.txt): sin él se acumula con
+diccionarios y el resultado es el mismo.
+
+Configuración por variables de entorno (.env):
+    POS_DEMANDA_DIAS_HISTORIA   Días de historial analizados (365)
+    POS_DEMANDA_DIAS_ENTREGA    Días que tarda en llegar un pedido (7)
+    POS_DEMANDA_DIAS_REVISION   Días entre un pedido y el siguiente (14)
+    POS_DEMANDA_ALFA            Factor de suavizado del pronóstico (0.1)
+"""
+
+import logging
+import math
+import os
+import time
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+    # Un renglón del historial; convertir las tuplas con tipos fijos es más rápido que a float
+    RENGLON_HISTORIAL = np.dtype([('id_inventario', np.int64), ('dia', np.int64), ('cantidad', np.float64)])
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Corte del ingreso (o utilidad) acumulado para cada clase
+CORTES_ABC = (('A', 0.80), ('B', 0.95))
+
+# Factor de seguridad por clase (nivel de servicio aproximado 95% / 90% / 80%)
+FACTOR_SEGURIDAD = {'A': 1.65, 'B': 1.28, 'C': 0.84}
+
+
+def parametros_demanda():
+    """Parámetros del análisis desde el entorno"""
+    return {
+        'dias_historia': int(os.getenv('POS_DEMANDA_DIAS_HISTORIA', '365')),
+        'dias_entrega': float(os.getenv('POS_DEMANDA_DIAS_ENTREGA', '7')),
+        'dias_revision': float(os.getenv('POS_DEMANDA_DIAS_REVISION', '14')),
+        'alfa': float(os.getenv('POS_DEMANDA_ALFA', '0.1')),
+    }
+
+
+def clasificar_abc(ids, valores):
+    """
+    Clase A/B/C de cada id según su participación acumulada en el total.
+    Un producto es A si el acumulado antes de él no llega al 80% (así el que
+    cruza el corte queda dentro); sin valor positivo siempre es C.
+
+    Returns:
+        {id: 'A' | 'B' | 'C'}
+    """
+    if NUMPY_AVAILABLE:
+        ids = np.asarray(ids)
+        valores = np.asarray(valores, dtype=float)
+        positivos = np.clip(valores, 0, None)
+        total = positivos.sum()
+        clases = np.full(len(ids), 'C', dtype='<U1')
+        if total > 0:
+            orden = np.argsort(-positivos, kind='stable')
+            previo = (np.cumsum(positivos[orden]) - positivos[orden]) / total
+            ordenadas = np.full(len(ids), 'C', dtype='<U1')
+            for clase, corte in reversed(CORTES_ABC):
+                ordenadas[previo < corte] = clase
+            ordenadas[positivos[orden] <= 0] = 'C'
+            clases[orden] = ordenadas
+        return dict(zip(ids.tolist(), clases.tolist()))
+
+    pares = sorted(zip(ids, valores), key=lambda p: -max(float(p[1]), 0))
+    total = sum(max(float(v), 0) for _, v in pares)
+    clases, acumulado = {}, 0.0
+    for id_, valor in pares:
+        valor = max(float(valor), 0)
+        clase = 'C'
+        if total > 0 and valor > 0:
+            for letra, corte in CORTES_ABC:
+                if acumulado / total < corte:
+                    clase = letra
+                    break
+        clases[id_] = clase
+        acumulado += valor
+    return clases
+
+
+class AcumuladorDemanda:
+    """
+    Sumas por fila de inventario de las salidas diarias del periodo.
+
+    Args:
+        ids_inventario: id_inventario de las filas analizadas
+        dias: Días del periodo (el día 0 es el primero, dias - 1 es hoy)
+        alfa: Factor de suavizado del pronóstico
+    """
+
+    def __init__(self, ids_inventario, dias, alfa):
+        self.dias = int(dias)
+        self.alfa = float(alfa)
+        self.renglones = 0
+        n = len(ids_inventario)
+        if NUMPY_AVAILABLE:
+            # id_inventario -> posición en un arreglo directo (los id son un SERIAL, sin huecos grandes)
+            ids = np.asarray(ids_inventario, dtype=np.int64)
+            self._posiciones = np.full(int(ids.max()) + 1 if n else 0, -1, dtype=np.int64)
+            self._posiciones[ids] = np.arange(n)
+            self.total = np.zeros(n)
+            self.cuadrados = np.zeros(n)
+            self.ponderado = np.zeros(n)
+            self.primer_dia = np.full(n, self.dias, dtype=np.int64)
+        else:
+            self._posiciones = {id_: i for i, id_ in enumerate(ids_inventario)}
+            self.total = [0.0] * n
+            self.cuadrados = [0.0] * n
+            self.ponderado = [0.0] * n
+            self.primer_dia = [self.dias] * n
+
+    def agregar_lote(self, filas):
+        """Acumular un lote de (id_inventario, dia, cantidad); a lo más un renglón por fila y día"""
+        if not filas:
+            return
+        self.renglones += len(filas)
+        decaimiento = 1.0 - self.alfa
+        ultimo = self.dias - 1
+
+        if NUMPY_AVAILABLE:
+            datos = np.array(filas, dtype=RENGLON_HISTORIAL)
+            ids, dia, cantidad = datos['id_inventario'], datos['dia'], datos['cantidad']
+
+            # Las filas fuera del análisis (inactivas o creadas después) se descartan
+            posicion = np.full(len(ids), -1, dtype=np.int64)
+            dentro = ids < len(self._posiciones)
+            posicion[dentro] = self._posiciones[ids[dentro]]
+            validas = posicion >= 0
+            posicion, dia, cantidad = posicion[validas], dia[validas], cantidad[validas]
+
+            n = len(self.total)
+            self.total += np.bincount(posicion, weights=cantidad, minlength=n)
+            self.cuadrados += np.bincount(posicion, weights=cantidad * cantidad, minlength=n)
+            self.ponderado += np.bincount(posicion, weights=cantidad * decaimiento ** (ultimo - dia), minlength=n)
+            np.minimum.at(self.primer_dia, posicion, dia)
+            return
+
+        for id_inventario, dia, cantidad in filas:
+            i = self._posiciones.get(id_inventario)
+            if i is None:
+                continue
+            cantidad = float(cantidad)
+            self.total[i] += cantidad
+            self.cuadrados[i] += cantidad * cantidad
+            self.ponderado[i] += cantidad * decaimiento ** (ultimo - dia)
+            if dia < self.primer_dia[i]:
+                self.primer_dia[i] = dia
+
+    def estadisticas(self):
+        """
+        Por fila (en el orden de ids_inventario): (velocidad, pronóstico, desviación).
+        Los días observados van de la primera salida a hoy; el EWMA se corrige
+        por su arranque en cero dividiendo entre el peso acumulado 1 - (1 - alfa)^días.
+        """
+        decaimiento = 1.0 - self.alfa
+        if NUMPY_AVAILABLE:
+            observados = np.maximum(self.dias - self.primer_dia, 1).astype(float)
+            velocidad = self.total / observados
+            varianza = np.clip(self.cuadrados / observados - velocidad ** 2, 0, None)
+            pronostico = self.alfa * self.ponderado / (1.0 - decaimiento ** observados)
+            return velocidad, pronostico, np.sqrt(varianza)
+
+        velocidad, pronostico, desviacion = [], [], []
+        for total, cuadrados, ponderado, primer in zip(self.total, self.cuadrados, self.ponderado, self.primer_dia):
+            observados = float(max(self.dias - primer, 1))
+            media = total / observados
+            velocidad.append(media)
+            pronostico.append(self.alfa * ponderado / (1.0 - decaimiento ** observados))
+            desviacion.append(math.sqrt(max(cuadrados / observados - media * media, 0.0)))
+        return velocidad, pronostico, desviacion
+
+
+def calcular_sugerencias(filas_inventario, acumulador, clases_ingreso, clases_utilidad, parametros):
+    """
+    Sugerencias de las filas de inventario con salidas en el periodo.
+
+    Args:
+        filas_inventario: [{'id_inventario', 'id_producto', 'id_ubicacion', 'stock_disponible', ...}]
+                          en el mismo orden que el acumulador
+        acumulador: AcumuladorDemanda ya alimentado con el historial
+        clases_ingreso, clases_utilidad: {id_producto: clase} (ver clasificar_abc)
+        parametros: ver parametros_demanda()
+
+    Returns:
+        [{'id_inventario', 'id_producto', 'id_ubicacion', 'velocidad_diaria', 'pronostico_diario',
+          'desviacion_diaria', 'clase_ingreso', 'clase_utilidad', 'stock_minimo_sugerido',
+          'stock_maximo_sugerido', 'cantidad_reorden'}]
+    """
+    entrega = parametros['dias_entrega']
+    revision = parametros['dias_revision']
+    velocidad, pronostico, desviacion = acumulador.estadisticas()
+
+    ingreso = [clases_ingreso.get(f['id_producto'], 'C') for f in filas_inventario]
+    utilidad = [clases_utilidad.get(f['id_producto'], 'C') for f in filas_inventario]
+    # El nivel de servicio sigue a la mejor de las dos clases
+    factor = [FACTOR_SEGURIDAD[min(a, b)] for a, b in zip(ingreso, utilidad)]
+    disponible = [float(f.get('stock_disponible') or 0) for f in filas_inventario]
+
+    if NUMPY_AVAILABLE:
+        disponible_np = np.asarray(disponible, dtype=float)
+        minimo = np.ceil(pronostico * entrega + np.asarray(factor) * desviacion * math.sqrt(entrega))
+        maximo = np.maximum(np.ceil(minimo + pronostico * revision), minimo)
+        reorden = np.where(disponible_np <= minimo, np.ceil(np.clip(maximo - disponible_np, 0, None)), 0.0)
+        indices = np.flatnonzero(acumulador.total > 0).tolist()
+        velocidad, pronostico, desviacion = velocidad.tolist(), pronostico.tolist(), desviacion.tolist()
+        minimo, maximo, reorden = minimo.tolist(), maximo.tolist(), reorden.tolist()
+    else:
+        minimo, maximo, reorden = [], [], []
+        for p, d, z, stock in zip(pronostico, desviacion, factor, disponible):
+            m = math.ceil(p * entrega + z * d * math.sqrt(entrega))
+            x = max(math.ceil(m + p * revision), m)
+            minimo.append(m)
+            maximo.append(x)
+            reorden.append(math.ceil(max(x - stock, 0)) if stock <= m else 0)
+        indices = [i for i, total in enumerate(acumulador.total) if total > 0]
+
+    return [
+        {
+            'id_inventario': filas_inventario[i]['id_inventario'],
+            'id_producto': filas_inventario[i]['id_producto'],
+            'id_ubicacion': filas_inventario[i]['id_ubicacion'],
+            'velocidad_diaria': round(velocidad[i], 4),
+            'pronostico_diario': round(pronostico[i], 4),
+            'desviacion_diaria': round(desviacion[i], 4),
+            'clase_ingreso': ingreso[i],
+            'clase_utilidad': utilidad[i],
+            'stock_minimo_sugerido': minimo[i],
+            'stock_maximo_sugerido': maximo[i],
+            'cantidad_reorden': reorden[i],
+        }
+        for i in indices
+    ]
+
+
+def analizar_demanda(pg_manager, guardar=True, aplicar=False, parametros=None, hoy=None):
+    """
+    Leer el historial, calcular las sugerencias y (opcionalmente) guardarlas.
+
+    Args:
+        pg_manager: PostgresManager conectado
+        guardar: Guardar en sugerencias_reabastecimiento (setup_analitica_demanda.sql)
+        aplicar: Además, escribir los mínimos/máximos sugeridos en inventario
+        parametros: Reemplaza parametros_demanda()
+        hoy: Último día del periodo (por defecto, hoy)
+
+    Returns:
+        Lista de sugerencias (ver calcular_sugerencias) o None si hubo error
+    """
+    try:
+        inicio = time.perf_counter()
+        parametros = {**parametros_demanda(), **(parametros or {})}
+        hoy = hoy or date.today()
+        desde = hoy - timedelta(days=parametros['dias_historia'] - 1)
+
+        filas = pg_manager.obtener_filas_analisis_demanda()
+        acumulador = AcumuladorDemanda([f['id_inventario'] for f in filas], parametros['dias_historia'],
+                                       parametros['alfa'])
+        if pg_manager.leer_salidas_diarias(desde, hoy, acumulador.agregar_lote) is None:
+            return None
+
+        totales = pg_manager.obtener_totales_venta_producto(desde, hoy)
+        ids = [t['id_producto'] for t in totales]
+        clases_ingreso = clasificar_abc(ids, [float(t['ingreso'] or 0) for t in totales])
+        clases_utilidad = clasificar_abc(ids, [float(t['utilidad'] or 0) for t in totales])
+
+        sugerencias = calcular_sugerencias(filas, acumulador, clases_ingreso, clases_utilidad, parametros)
+        logging.info(
+            f"✅ Demanda analizada: {acumulador.renglones} renglones de historial, "
+            f"{len(sugerencias)} filas con salidas, {(time.perf_counter() - inicio):.2f}s"
+        )
+
+        if (guardar or aplicar) and pg_manager.guardar_sugerencias_stock(sugerencias, aplicar=aplicar) is None:
+            return None
+        return sugerencias
+
+    except Exception as e:
+        logging.error(f"Error analizando demanda: {e}")
+        return None
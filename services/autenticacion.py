@@ -0,0 +1,180 @@
+"""
+Autenticación sin bloquear la interfaz para HTF POS
+
+- AutenticacionThread: bcrypt.checkpw (cientos de ms a propósito) corre en
+  un hilo; la ventana solo muestra el estado "verificando".
+- SesionesTurno: tras un login con contraseña, el cajero puede definir un
+  PIN corto para reanudar durante su turno. El PIN se verifica contra un
+  token de sesión que vive solo en memoria (nunca en la base de datos) y la
+  sesión se revoca tras varios intentos fallidos o al vencer.
+- ConcesionesSupervisor: una autorización de administrador queda vigente
+  unos segundos para la misma acción (p. ej. activar/desactivar varios
+  productos seguidos sin volver a escribir la contraseña).
+
+Configuración por variables de entorno (.env):
+    POS_PIN_RAPIDO=0                  Desactivar la reanudación con PIN
+    POS_VIGENCIA_PIN_H                Horas de vigencia de una sesión con PIN (12)
+    POS_VIGENCIA_AUTORIZACION_S       Segundos de vigencia de una autorización (120)
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+LONGITUD_PIN = (4, 6)
+INTENTOS_PIN = 5
+
+
+class AutenticacionThread(QThread):
+    """Verificar usuario y contraseña fuera del hilo de Qt"""
+
+    terminada = Signal(object)  # dict del usuario o None si las credenciales no son válidas
+    error = Signal(str)
+
+    def __init__(self, pg_manager, username, password, parent=None):
+        super().__init__(parent)
+        self.pg_manager = pg_manager
+        self.username = username
+        self.password = password
+
+    def run(self):
+        try:
+            inicio = time.perf_counter()
+            usuario = self.pg_manager.authenticate_user(self.username, self.password)
+            logging.info(f"Autenticación de {self.username} en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            self.terminada.emit(usuario)
+        except Exception as e:
+            logging.error(f"Error en autenticación en segundo plano: {e}")
+            self.error.emit(str(e))
+        finally:
+            self.password = None
+
+
+def pin_valido(pin):
+    """Si el texto tiene forma de PIN (solo dígitos, 4 a 6)"""
+    return pin.isdigit() and LONGITUD_PIN[0] <= len(pin) <= LONGITUD_PIN[1]
+
+
+# ========== SESIONES DE TURNO (PIN) ==========
+
+class SesionesTurno:
+    """Sesiones de reanudación rápida, una por nombre de usuario"""
+
+    _instancia = None
+
+    @classmethod
+    def obtener(cls):
+        if cls._instancia is None:
+            cls._instancia = SesionesTurno()
+        return cls._instancia
+
+    def __init__(self):
+        self.habilitado = os.getenv('POS_PIN_RAPIDO', '1') != '0'
+        self.vigencia_s = float(os.getenv('POS_VIGENCIA_PIN_H', '12')) * 3600
+        self._sesiones = {}  # username -> {'usuario', 'token', 'firma', 'vence', 'intentos'}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _firmar(token, pin):
+        return hmac.new(token, pin.encode('utf-8'), hashlib.sha256).digest()
+
+    def abrir(self, usuario, pin):
+        """Registrar el PIN del usuario recién autenticado con contraseña"""
+        if not self.habilitado or not pin_valido(pin):
+            return False
+        token = secrets.token_bytes(32)
+        with self._lock:
+            self._sesiones[usuario['username']] = {
+                'usuario': dict(usuario),
+                'token': token,
+                'firma': self._firmar(token, pin),
+                'vence': time.monotonic() + self.vigencia_s,
+                'intentos': 0,
+            }
+        logging.info(f"✅ PIN de reanudación definido para {usuario['username']}")
+        return True
+
+    def activa(self, username):
+        """Si el usuario tiene una sesión con PIN vigente"""
+        with self._lock:
+            sesion = self._sesiones.get(username)
+            if sesion and sesion['vence'] < time.monotonic():
+                del self._sesiones[username]
+                return False
+            return sesion is not None
+
+    def reanudar(self, username, pin):
+        """
+        Verificar el PIN. Devuelve una copia de los datos del usuario, o None
+        si no hay sesión o el PIN no coincide (sin contar el intento; ver
+        registrar_fallo).
+        """
+        if not self.activa(username) or not pin_valido(pin):
+            return None
+        with self._lock:
+            sesion = self._sesiones.get(username)
+            if sesion and hmac.compare_digest(sesion['firma'], self._firmar(sesion['token'], pin)):
+                sesion['intentos'] = 0
+                return dict(sesion['usuario'])
+        return None
+
+    def registrar_fallo(self, username):
+        """Contar un intento fallido; al llegar al límite la sesión se revoca"""
+        with self._lock:
+            sesion = self._sesiones.get(username)
+            if not sesion:
+                return
+            sesion['intentos'] += 1
+            if sesion['intentos'] >= INTENTOS_PIN:
+                del self._sesiones[username]
+                logging.warning(f"⚠️ Sesión con PIN de {username} revocada tras {INTENTOS_PIN} intentos fallidos")
+
+    def revocar(self, username):
+        with self._lock:
+            self._sesiones.pop(username, None)
+
+    def revocar_todas(self):
+        with self._lock:
+            self._sesiones.clear()
+
+
+# ========== AUTORIZACIONES DE SUPERVISOR ==========
+
+class ConcesionesSupervisor:
+    """Autorizaciones de administrador reutilizables por poco tiempo, por acción"""
+
+    _instancia = None
+
+    @classmethod
+    def obtener(cls):
+        if cls._instancia is None:
+            cls._instancia = ConcesionesSupervisor()
+        return cls._instancia
+
+    def __init__(self):
+        self.vigencia_s = float(os.getenv('POS_VIGENCIA_AUTORIZACION_S', '120'))
+        self._concesiones = {}  # accion -> (autorizacion, vence)
+
+    def guardar(self, accion, autorizacion):
+        if accion and self.vigencia_s > 0:
+            self._concesiones[accion] = (dict(autorizacion), time.monotonic() + self.vigencia_s)
+
+    def vigente(self, accion):
+        """Autorización vigente para la acción, o None"""
+        concesion = self._concesiones.get(accion)
+        if not concesion:
+            return None
+        autorizacion, vence = concesion
+        if vence < time.monotonic():
+            del self._concesiones[accion]
+            return None
+        return dict(autorizacion)
+
+    def revocar_todas(self):
+        self._concesiones.clear()
@@ -0,0 +1,212 @@
+"""
+Sesiones de conteo físico de inventario para HTF POS
+
+- SesionConteo: cada escaneo suma en un contador en memoria por producto
+  (id_producto -> cantidad) y se anota en un diario local (una línea JSON por
+  escaneo), sin ir a la base de datos. El catálogo de códigos se carga una
+  sola vez al abrir la sesión.
+- Si la caja se cierra a medio conteo, el diario permite retomar la sesión
+  (sesiones_pendientes / SesionConteo.retomar).
+- Al terminar, la conciliación calcula las diferencias contra inventario y
+  aplica esas diferencias como ajustes en una sentencia y una transacción
+  (ver OperacionesInventario.aplicar_conteo_fisico).
+
+Configuración por variables de entorno (.env):
+    POS_DIRECTORIO_CONTEOS      Directorio de los diarios de conteo (conteos/)
+"""
+
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+
+def directorio_conteos():
+    """conteos/ junto al ejecutable (PyInstaller) o en la raíz del proyecto; POS_DIRECTORIO_CONTEOS lo reemplaza"""
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('POS_DIRECTORIO_CONTEOS') or os.path.join(base, 'conteos')
+
+
+def indexar_catalogo(productos):
+    """Mapa código de barras / código interno -> producto (ver obtener_catalogo_conteo)"""
+    catalogo = {}
+    for producto in productos:
+        producto = dict(producto)
+        for clave in ('codigo_interno', 'codigo_barras'):
+            codigo = (producto.get(clave) or '').strip()
+            if codigo:
+                # El código de barras no pisa un código interno igual de otro producto
+                catalogo.setdefault(codigo, producto)
+    return catalogo
+
+
+def sesiones_pendientes(directorio=None):
+    """Diarios de conteos sin aplicar ni descartar: [{'archivo', 'id_ubicacion', 'id_usuario', 'inicio'}]"""
+    directorio = directorio or directorio_conteos()
+    if not os.path.isdir(directorio):
+        return []
+
+    pendientes = []
+    for nombre in sorted(os.listdir(directorio)):
+        if not nombre.endswith('.jsonl'):
+            continue
+        archivo = os.path.join(directorio, nombre)
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                encabezado = json.loads(f.readline())
+            pendientes.append({
+                'archivo': archivo,
+                'id_ubicacion': encabezado.get('id_ubicacion'),
+                'id_usuario': encabezado.get('id_usuario'),
+                'inicio': encabezado.get('inicio'),
+            })
+        except Exception as e:
+            logging.warning(f"⚠️ Diario de conteo ilegible {archivo}: {e}")
+    return pendientes
+
+
+class SesionConteo:
+    """
+    Conteo en curso de una ubicación.
+
+    Operaciones del diario (una línea JSON cada una, después del encabezado):
+        {"op": "sumar", "id": <id_producto>, "cantidad": "<n>"}
+        {"op": "fijar", "id": <id_producto>, "cantidad": "<n>"}
+        {"op": "deshacer"}
+    """
+
+    def __init__(self, id_ubicacion, catalogo, id_usuario=None, directorio=None, archivo=None):
+        self.id_ubicacion = id_ubicacion
+        self.id_usuario = id_usuario
+        self.catalogo = catalogo
+        self.productos = {p['id_producto']: p for p in catalogo.values()}
+        self.conteos = {}    # id_producto -> cantidad contada (Decimal)
+        self.historial = []  # (id_producto, cantidad anterior o None, fue escaneo) para deshacer
+        self.escaneos = 0
+
+        if archivo is None:
+            directorio = directorio or directorio_conteos()
+            os.makedirs(directorio, exist_ok=True)
+            archivo = os.path.join(
+                directorio, f"conteo_{id_ubicacion}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            )
+            self._diario = open(archivo, 'a', encoding='utf-8')
+            self._anotar({
+                'op': 'sesion', 'id_ubicacion': id_ubicacion, 'id_usuario': id_usuario,
+                'inicio': datetime.now().isoformat(timespec='seconds'),
+            })
+        else:
+            self._diario = None
+        self.archivo = archivo
+
+    @classmethod
+    def retomar(cls, archivo, catalogo):
+        """Reconstruir una sesión desde su diario y seguir anotando en él"""
+        with open(archivo, encoding='utf-8') as f:
+            lineas = f.readlines()
+        encabezado = json.loads(lineas[0])
+        sesion = cls(encabezado['id_ubicacion'], catalogo, id_usuario=encabezado.get('id_usuario'), archivo=archivo)
+
+        for numero, linea in enumerate(lineas[1:], start=2):
+            try:
+                registro = json.loads(linea)
+                if registro['op'] == 'sumar':
+                    sesion._sumar(registro['id'], Decimal(registro['cantidad']))
+                elif registro['op'] == 'fijar':
+                    sesion._fijar(registro['id'], Decimal(registro['cantidad']))
+                elif registro['op'] == 'deshacer':
+                    sesion._deshacer()
+            except (ValueError, KeyError, InvalidOperation) as e:
+                # Una línea a medio escribir (corte de luz) solo puede ser la última
+                logging.warning(f"⚠️ Línea {numero} del diario {archivo} ignorada: {e}")
+
+        sesion._diario = open(archivo, 'a', encoding='utf-8')
+        logging.info(f"✅ Conteo retomado: {len(sesion.conteos)} productos, {sesion.escaneos} escaneos")
+        return sesion
+
+    # ========== CAPTURA ==========
+
+    def registrar(self, codigo, cantidad=1):
+        """
+        Sumar un escaneo. Devuelve el producto con su total contado
+        ({..., 'contado'}) o None si el código no está en el catálogo.
+        """
+        producto = self.catalogo.get((codigo or '').strip())
+        if producto is None:
+            return None
+        cantidad = Decimal(str(cantidad))
+        self._sumar(producto['id_producto'], cantidad)
+        self._anotar({'op': 'sumar', 'id': producto['id_producto'], 'cantidad': str(cantidad)})
+        return self.detalle(producto['id_producto'])
+
+    def fijar(self, id_producto, cantidad):
+        """Corregir a mano el total contado de un producto"""
+        cantidad = Decimal(str(cantidad))
+        self._fijar(id_producto, cantidad)
+        self._anotar({'op': 'fijar', 'id': id_producto, 'cantidad': str(cantidad)})
+        return self.detalle(id_producto)
+
+    def deshacer(self):
+        """Deshacer la última operación; devuelve el producto afectado o None"""
+        id_producto = self._deshacer()
+        if id_producto is None:
+            return None
+        self._anotar({'op': 'deshacer'})
+        return self.detalle(id_producto)
+
+    def detalle(self, id_producto):
+        producto = dict(self.productos.get(id_producto) or {'id_producto': id_producto})
+        producto['contado'] = self.conteos.get(id_producto, Decimal(0))
+        return producto
+
+    def _sumar(self, id_producto, cantidad):
+        anterior = self.conteos.get(id_producto)
+        self.historial.append((id_producto, anterior, True))
+        self.conteos[id_producto] = (anterior or Decimal(0)) + cantidad
+        self.escaneos += 1
+
+    def _fijar(self, id_producto, cantidad):
+        self.historial.append((id_producto, self.conteos.get(id_producto), False))
+        self.conteos[id_producto] = cantidad
+
+    def _deshacer(self):
+        if not self.historial:
+            return None
+        id_producto, anterior, fue_escaneo = self.historial.pop()
+        if fue_escaneo:
+            self.escaneos -= 1
+        if anterior is None:
+            self.conteos.pop(id_producto, None)
+        else:
+            self.conteos[id_producto] = anterior
+        return id_producto
+
+    def _anotar(self, registro):
+        # flush por escaneo: sobrevive a un cierre de la aplicación sin pagar un fsync cada vez
+        if self._diario is None:
+            return
+        self._diario.write(json.dumps(registro) + '\n')
+        self._diario.flush()
+
+    # ========== CIERRE ==========
+
+    def cerrar(self):
+        """Cerrar el diario conservándolo (la sesión se puede retomar)"""
+        if self._diario is not None:
+            self._diario.close()
+            self._diario = None
+
+    def descartar(self):
+        """Cerrar y borrar el diario (conteo aplicado o cancelado)"""
+        self.cerrar()
+        try:
+            os.remove(self.archivo)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Error borrando diario de conteo {self.archivo}: {e}")
@@ -0,0 +1,247 @@
+"""
+Motor de filtros en memoria para las pantallas de listas de HTF POS
+
+Las filas cargadas se guardan una vez en columnas (arreglos de NumPy/pandas):
+la clave de búsqueda de cada fila ya en minúsculas y la fecha ya convertida.
+Cada filtro (texto, igualdad, pertenencia, comparación entre columnas, rango
+de fechas) es una máscara booleana sobre todas las filas, sin recorrerlas en
+Python en cada tecla (el texto con np.char.find sobre la columna de claves).
+
+Si la búsqueda solo se alarga ("coc" -> "coca"), el texto se evalúa
+únicamente sobre las filas que ya coincidían.
+
+pandas es opcional (requirements.txt): sin él se usan listas con la misma
+interfaz y las mismas claves precalculadas.
+"""
+
+import logging
+import operator
+from datetime import date, datetime
+
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+OPERADORES = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+
+SIN_FECHA = -1
+
+
+def normalizar_texto(texto):
+    """Texto de búsqueda en minúsculas (como compararon siempre las pantallas)"""
+    return str(texto).lower()
+
+
+def a_ordinal(valor):
+    """Fecha (date, datetime o texto ISO) como ordinal del día; SIN_FECHA si no se puede"""
+    try:
+        if isinstance(valor, str):
+            valor = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+        if isinstance(valor, datetime):
+            return valor.date().toordinal()
+        if isinstance(valor, date):
+            return valor.toordinal()
+    except ValueError:
+        pass
+    return SIN_FECHA
+
+
+class MotorFiltros:
+    """
+    Filtros vectorizados sobre una lista de filas (dicts o Filas).
+
+    Args:
+        filas: Filas cargadas (se devuelven las mismas, en el mismo orden)
+        columnas_texto: Columnas que entran en la búsqueda de texto
+        columna_fecha: Columna del filtro de rango de fechas (opcional)
+    """
+
+    def __init__(self, filas, columnas_texto=(), columna_fecha=None):
+        self.filas = list(filas)
+        self.columna_fecha = columna_fecha
+        self._posiciones = {id(f): i for i, f in enumerate(self.filas)}
+        self._columnas = {}  # nombre -> arreglo (numérico o de objetos)
+
+        # Separador que no se escribe en la búsqueda: una coincidencia no cruza columnas
+        claves = [
+            normalizar_texto('\x1f'.join(str(f.get(c) or '') for c in columnas_texto))
+            for f in self.filas
+        ]
+        fechas = [a_ordinal(f.get(columna_fecha)) for f in self.filas] if columna_fecha else None
+
+        if PANDAS_AVAILABLE:
+            # Arreglo de cadenas de NumPy: la búsqueda es un solo np.char.find sobre la columna
+            self._claves = np.array(claves, dtype=str)
+            self._fechas = np.array(fechas, dtype=np.int64) if fechas is not None else None
+        else:
+            self._claves = claves
+            self._fechas = fechas
+
+        self._ultimo_texto = None
+        self._mascara_texto = None
+
+    def __len__(self):
+        return len(self.filas)
+
+    # ========== COLUMNAS ==========
+
+    def _columna(self, nombre, numerica=False):
+        """Columna como arreglo (se construye la primera vez que un filtro la usa)"""
+        clave = (nombre, numerica)
+        columna = self._columnas.get(clave)
+        if columna is None:
+            valores = [f.get(nombre) for f in self.filas]
+            if PANDAS_AVAILABLE:
+                if numerica:
+                    columna = pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').to_numpy(dtype=float, copy=True)
+                else:
+                    columna = np.empty(len(valores), dtype=object)
+                    columna[:] = valores
+            else:
+                columna = valores
+            self._columnas[clave] = columna
+        return columna
+
+    def refrescar_fila(self, fila):
+        """Volver a leer una fila modificada en su lugar (p. ej. stock actualizado)"""
+        posicion = self._posiciones.get(id(fila))
+        if posicion is None:
+            return
+        for (nombre, numerica), columna in self._columnas.items():
+            valor = fila.get(nombre)
+            if numerica and PANDAS_AVAILABLE:
+                try:
+                    valor = float(valor)
+                except (TypeError, ValueError):
+                    valor = np.nan
+            columna[posicion] = valor
+
+    # ========== MÁSCARAS ==========
+
+    def _todas(self):
+        if PANDAS_AVAILABLE:
+            return np.ones(len(self.filas), dtype=bool)
+        return [True] * len(self.filas)
+
+    @staticmethod
+    def _y(a, b):
+        if PANDAS_AVAILABLE:
+            return a & b
+        return [x and y for x, y in zip(a, b)]
+
+    def _mascara_de_texto(self, texto):
+        """Coincidencia de subcadena; si la búsqueda contiene a la anterior, solo se revisan sus coincidencias"""
+        if self._ultimo_texto is not None and self._ultimo_texto in texto:
+            previa = self._mascara_texto
+        else:
+            previa = None
+
+        if PANDAS_AVAILABLE:
+            if previa is None:
+                mascara = np.char.find(self._claves, texto) >= 0
+            else:
+                candidatos = np.flatnonzero(previa)
+                coincide = np.char.find(self._claves[candidatos], texto) >= 0
+                mascara = np.zeros(len(self.filas), dtype=bool)
+                mascara[candidatos[coincide]] = True
+        else:
+            if previa is None:
+                mascara = [texto in clave for clave in self._claves]
+            else:
+                mascara = [p and texto in clave for p, clave in zip(previa, self._claves)]
+
+        self._ultimo_texto = texto
+        self._mascara_texto = mascara
+        return mascara
+
+    def _mascara_igual(self, nombre, valor):
+        columna = self._columna(nombre)
+        if PANDAS_AVAILABLE:
+            return columna == valor
+        return [v == valor for v in columna]
+
+    def _mascara_en(self, nombre, valores):
+        columna = self._columna(nombre)
+        if PANDAS_AVAILABLE:
+            return pd.Series(columna, dtype=object).isin(list(valores)).to_numpy(dtype=bool)
+        valores = set(valores)
+        return [v in valores for v in columna]
+
+    def _mascara_condicion(self, izquierda, simbolo, derecha):
+        """Comparación columna contra columna (si es un nombre) o contra una constante"""
+        comparar = OPERADORES[simbolo]
+        a = self._columna(izquierda, numerica=True)
+        b = self._columna(derecha, numerica=True) if isinstance(derecha, str) else derecha
+        if PANDAS_AVAILABLE:
+            # Los NaN (valores nulos) comparan False, como una fila que no cumple
+            with np.errstate(invalid='ignore'):
+                return comparar(a, b)
+        if isinstance(derecha, str):
+            return [x is not None and y is not None and comparar(x, y) for x, y in zip(a, b)]
+        return [x is not None and comparar(x, b) for x in a]
+
+    def _mascara_fechas(self, desde, hasta, incluir_sin_fecha):
+        inicio = desde.toordinal() if desde else None
+        fin = hasta.toordinal() if hasta else None
+        if PANDAS_AVAILABLE:
+            fechas = self._fechas
+            mascara = np.ones(len(self.filas), dtype=bool)
+            if inicio is not None:
+                mascara &= fechas >= inicio
+            if fin is not None:
+                mascara &= fechas <= fin
+            sin_fecha = fechas == SIN_FECHA
+            return (mascara & ~sin_fecha) | (sin_fecha if incluir_sin_fecha else False)
+        return [
+            incluir_sin_fecha if f == SIN_FECHA
+            else (inicio is None or f >= inicio) and (fin is None or f <= fin)
+            for f in self._fechas
+        ]
+
+    # ========== FILTRO ==========
+
+    def filtrar(self, texto='', iguales=None, en=None, excluir=None, condiciones=None,
+                desde=None, hasta=None, incluir_sin_fecha=False):
+        """
+        Filas que cumplen todos los filtros, en el orden de carga.
+
+        Args:
+            texto: Subcadena a buscar en las columnas de texto (se normaliza)
+            iguales: {columna: valor}
+            en: {columna: valores permitidos}
+            excluir: {columna: valores excluidos}
+            condiciones: [(columna, '<=', otra_columna o constante), ...]
+            desde, hasta: Rango (inclusivo) sobre columna_fecha
+            incluir_sin_fecha: Si las filas sin fecha pasan el filtro de fechas
+        """
+        try:
+            mascara = self._todas()
+            texto = normalizar_texto(texto.strip()) if texto else ''
+            if texto:
+                mascara = self._y(mascara, self._mascara_de_texto(texto))
+            for nombre, valor in (iguales or {}).items():
+                mascara = self._y(mascara, self._mascara_igual(nombre, valor))
+            for nombre, valores in (en or {}).items():
+                mascara = self._y(mascara, self._mascara_en(nombre, valores))
+            for nombre, valores in (excluir or {}).items():
+                excluidas = self._mascara_en(nombre, valores)
+                mascara = self._y(mascara, ~excluidas if PANDAS_AVAILABLE else [not x for x in excluidas])
+            for izquierda, simbolo, derecha in (condiciones or ()):
+                mascara = self._y(mascara, self._mascara_condicion(izquierda, simbolo, derecha))
+            if self.columna_fecha and (desde or hasta):
+                mascara = self._y(mascara, self._mascara_fechas(desde, hasta, incluir_sin_fecha))
+
+            if PANDAS_AVAILABLE:
+                return [self.filas[i] for i in np.flatnonzero(mascara)]
+            return [f for f, incluida in zip(self.filas, mascara) if incluida]
+
+        except Exception as e:
+            logging.error(f"Error filtrando lista: {e}")
+            return list(self.filas)
@@ -0,0 +1,249 @@
+"""
+Monitor de latencia de la interfaz
+Mide cuánto se congela el hilo de Qt y cuánto tarda cada acción del usuario:
+
+- Retraso del event loop: un QTimer de 100 ms compara el intervalo real con
+  el esperado; la diferencia es el tiempo que el hilo estuvo ocupado.
+- Acciones: los métodos abrir_*/switch_tab/volver_* de la ventana principal
+  se miden desde el clic hasta el primer pintado de la pantalla nueva; el
+  resto de botones, desde el clic hasta que el event loop vuelve a quedar libre.
+
+Las métricas se escriben como JSON por línea en logs/metricas_ui.log.
+
+Configuración por variables de entorno (.env):
+    POS_MONITOR_UI=0                 Desactivar el monitor
+    POS_OVERLAY_RENDIMIENTO=1        Mostrar el overlay al iniciar (Ctrl+Shift+F12 lo alterna)
+    POS_UMBRAL_CONGELAMIENTO_MS      Retraso que se registra como congelamiento (250)
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer, QEvent, Signal, Qt
+from PySide6.QtWidgets import QApplication, QAbstractButton
+
+from database.instrumentacion import crear_logger_rotativo
+
+INTERVALO_MUESTREO_MS = 100
+INTERVALO_RESUMEN_MS = 60000
+MUESTRAS_VENTANA = 600  # Un minuto de muestras
+TIEMPO_MAXIMO_PINTADO_S = 10
+
+
+class FiltroPrimerPintado(QObject):
+    """Event filter de un solo uso: avisa del primer Paint del widget"""
+
+    def __init__(self, widget, al_pintar):
+        super().__init__(widget)
+        self.widget = widget
+        self.al_pintar = al_pintar
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            self.widget.removeEventFilter(self)
+            # Después de que termine este pintado
+            QTimer.singleShot(0, self.al_pintar)
+            self.deleteLater()
+        return False
+
+
+class MonitorUI(QObject):
+    """Muestreo del event loop y tiempos de acciones de la interfaz"""
+
+    # Resumen para el overlay: {'lag_p95_ms', 'lag_max_ms', 'ultima_accion', 'ultima_accion_ms', 'congelamientos'}
+    metricas_actualizadas = Signal(dict)
+
+    _instancia = None
+
+    @classmethod
+    def obtener(cls):
+        """Monitor único del proceso (None si está desactivado o no hay QApplication)"""
+        if cls._instancia is None:
+            if os.getenv('POS_MONITOR_UI', '1') == '0' or QApplication.instance() is None:
+                return None
+            cls._instancia = MonitorUI(QApplication.instance())
+        return cls._instancia
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.umbral_congelamiento_ms = float(os.getenv('POS_UMBRAL_CONGELAMIENTO_MS', '250'))
+        self.overlay_al_iniciar = os.getenv('POS_OVERLAY_RENDIMIENTO', '0') == '1'
+        self.logger = crear_logger_rotativo('pos.metricas_ui', 'metricas_ui.log', formato='%(message)s')
+
+        self.retrasos = deque(maxlen=MUESTRAS_VENTANA)
+        self.congelamientos = 0
+        self.accion_actual = None
+        self.ultima_accion = None
+        self.ultima_accion_ms = None
+        self.tiempos_acciones = {}  # nombre -> deque de ms
+        self._ultimo_tick = None
+        self._clic = None  # (nombre, inicio) del último clic aún sin atribuir
+
+        self.timer_muestreo = QTimer(self)
+        self.timer_muestreo.setTimerType(Qt.PreciseTimer)
+        self.timer_muestreo.setInterval(INTERVALO_MUESTREO_MS)
+        self.timer_muestreo.timeout.connect(self._muestrear)
+
+        self.timer_resumen = QTimer(self)
+        self.timer_resumen.setInterval(INTERVALO_RESUMEN_MS)
+        self.timer_resumen.timeout.connect(self._escribir_resumen)
+
+    def iniciar(self):
+        """Empezar a muestrear y escuchar los clics de toda la aplicación"""
+        self._ultimo_tick = time.perf_counter()
+        self.timer_muestreo.start()
+        self.timer_resumen.start()
+        QApplication.instance().installEventFilter(self)
+        logging.info("✅ Monitor de latencia de UI iniciado")
+
+    def detener(self):
+        self.timer_muestreo.stop()
+        self.timer_resumen.stop()
+        QApplication.instance().removeEventFilter(self)
+        self._escribir_resumen()
+
+    # ========== RETRASO DEL EVENT LOOP ==========
+
+    def _muestrear(self):
+        ahora = time.perf_counter()
+        retraso = max(0.0, (ahora - self._ultimo_tick) * 1000 - INTERVALO_MUESTREO_MS)
+        self._ultimo_tick = ahora
+        self.retrasos.append(retraso)
+
+        if retraso >= self.umbral_congelamiento_ms:
+            self.congelamientos += 1
+            self._registrar({
+                'tipo': 'congelamiento',
+                'ms': round(retraso, 1),
+                # La acción en curso (o la última) suele ser la responsable
+                'accion': self.accion_actual or self.ultima_accion,
+            })
+        self.metricas_actualizadas.emit(self.resumen())
+
+    def resumen(self):
+        ordenados = sorted(self.retrasos)
+        p95 = ordenados[max(0, -(-95 * len(ordenados) // 100) - 1)] if ordenados else 0
+        return {
+            'lag_p95_ms': round(p95, 1),
+            'lag_max_ms': round(ordenados[-1], 1) if ordenados else 0,
+            'ultima_accion': self.ultima_accion,
+            'ultima_accion_ms': self.ultima_accion_ms,
+            'congelamientos': self.congelamientos,
+        }
+
+    def _escribir_resumen(self):
+        acciones = {}
+        for nombre, tiempos in self.tiempos_acciones.items():
+            ordenados = sorted(tiempos)
+            acciones[nombre] = {
+                'n': len(ordenados),
+                'p50_ms': ordenados[(len(ordenados) - 1) // 2],
+                'max_ms': ordenados[-1],
+            }
+        self._registrar(dict(self.resumen(), tipo='resumen', acciones=acciones))
+
+    # ========== ACCIONES ==========
+
+    def instrumentar_ventana(self, ventana, prefijos=('abrir_', 'switch_tab', 'volver_', 'handle_')):
+        """
+        Reemplazar (en la instancia) los métodos de navegación por versiones
+        medidas. Debe llamarse antes de conectar las señales (antes de setup_ui).
+        La pantalla cuyo primer pintado se espera es la actual del stacked_widget.
+        """
+        def pantalla_actual():
+            stacked = getattr(ventana, 'stacked_widget', None)
+            return stacked.currentWidget() if stacked is not None else None
+
+        for nombre in dir(type(ventana)):
+            if not nombre.startswith(prefijos):
+                continue
+            metodo = getattr(ventana, nombre, None)
+            if callable(metodo):
+                setattr(ventana, nombre, self.medir_accion(
+                    f"{type(ventana).__name__}.{nombre}", metodo, pantalla=pantalla_actual
+                ))
+
+    def medir_accion(self, nombre, funcion, pantalla=None):
+        """
+        Envolver un slot: mide su duración y, si pantalla() devuelve un widget
+        al terminar, el tiempo hasta el primer pintado de ese widget.
+        """
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            # Anidadas (p. ej. volver_a_config → switch_tab) se atribuyen a la externa
+            if self.accion_actual:
+                return funcion(*args, **kwargs)
+            # Si la dispara un clic, medir desde el clic
+            inicio = self._clic[1] if self._clic else time.perf_counter()
+            self._clic = None
+            self.accion_actual = nombre
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                self.accion_actual = None
+                slot_ms = (time.perf_counter() - inicio) * 1000
+                widget = pantalla() if pantalla else None
+                if widget is not None:
+                    self._esperar_pintado(nombre, inicio, slot_ms, widget)
+                else:
+                    QTimer.singleShot(0, lambda: self._terminar_accion(nombre, inicio, slot_ms, None))
+        return envoltura
+
+    def _esperar_pintado(self, nombre, inicio, slot_ms, widget):
+        filtro = FiltroPrimerPintado(
+            widget, lambda: self._terminar_accion(nombre, inicio, slot_ms, 'primer_pintado')
+        )
+        # Si la pantalla nunca se pinta (quedó oculta), no dejar el filtro colgado
+        QTimer.singleShot(TIEMPO_MAXIMO_PINTADO_S * 1000, lambda: self._cancelar_filtro(widget, filtro))
+
+    @staticmethod
+    def _cancelar_filtro(widget, filtro):
+        try:
+            widget.removeEventFilter(filtro)
+        except RuntimeError:
+            pass  # El widget o el filtro ya se destruyeron
+
+    def _terminar_accion(self, nombre, inicio, slot_ms, hasta):
+        total_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        self.ultima_accion = nombre
+        self.ultima_accion_ms = total_ms
+        self.tiempos_acciones.setdefault(nombre, deque(maxlen=200)).append(total_ms)
+        self._registrar({
+            'tipo': 'accion',
+            'accion': nombre,
+            'slot_ms': round(slot_ms, 1) if slot_ms is not None else None,
+            'total_ms': total_ms,
+            'hasta': hasta or 'event_loop_libre',
+        })
+
+    def eventFilter(self, obj, event):
+        """Clics en cualquier botón de la aplicación (el slot corre después de este filtro)"""
+        if (
+            event.type() == QEvent.MouseButtonRelease
+            and isinstance(obj, QAbstractButton)
+            and self.accion_actual is None
+        ):
+            texto = obj.text().replace('\n', ' ').strip() or obj.objectName() or type(obj).__name__
+            self._clic = (f"{type(obj.window()).__name__}:{texto}", time.perf_counter())
+            # Corre cuando el event loop queda libre, ya ejecutado el slot del botón
+            QTimer.singleShot(0, self._terminar_clic)
+        return False
+
+    def _terminar_clic(self):
+        """Clic que no disparó una acción medida (botón que no navega)"""
+        if self._clic:
+            nombre, inicio = self._clic
+            self._clic = None
+            self._terminar_accion(nombre, inicio, None, None)
+
+    def _registrar(self, datos):
+        datos['ts'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        try:
+            self.logger.info(json.dumps(datos, ensure_ascii=False))
+        except Exception as e:
+            logging.debug(f"No se pudo escribir métrica de UI: {e}")
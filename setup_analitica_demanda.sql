@@ -0,0 +1,43 @@
+-- Script para el análisis de demanda (velocidad, ABC y puntos de reorden)
+-- Ejecutar este script una vez en la base de datos del POS
+--
+-- Qué cambia:
+--   * sugerencias_reabastecimiento guarda el último cálculo por fila de
+--     inventario (producto + ubicación): velocidad, pronóstico, clases ABC,
+--     stock mínimo/máximo sugeridos y cantidad a reordenar
+--   * Índice para leer las salidas del historial por fecha sin recorrer
+--     toda la tabla de movimientos
+--
+-- PostgresManager detecta la tabla; sin este script el análisis se calcula
+-- igual y solo puede aplicarse directo a inventario (analizar_demanda.py --aplicar).
+
+-- 1. Último cálculo por fila de inventario
+CREATE TABLE IF NOT EXISTS sugerencias_reabastecimiento (
+    id_inventario INTEGER PRIMARY KEY REFERENCES inventario(id_inventario) ON DELETE CASCADE,
+    id_producto INTEGER NOT NULL,
+    id_ubicacion INTEGER NOT NULL,
+    velocidad_diaria NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    pronostico_diario NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    desviacion_diaria NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    clase_ingreso CHAR(1) NOT NULL DEFAULT 'C',
+    clase_utilidad CHAR(1) NOT NULL DEFAULT 'C',
+    stock_minimo_sugerido NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    stock_maximo_sugerido NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    cantidad_reorden NUMERIC(12, 3) NOT NULL DEFAULT 0,
+    calculado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sugerencias_reorden
+    ON sugerencias_reabastecimiento (id_producto)
+    WHERE cantidad_reorden > 0;
+
+-- 2. Salidas del historial por fecha (ventas y mermas)
+CREATE INDEX IF NOT EXISTS idx_movimientos_salidas_fecha
+    ON movimientos_inventario (fecha)
+    WHERE tipo_movimiento IN ('venta', 'merma');
+
+-- 3. Verificación
+SELECT 'Análisis de demanda configurado correctamente' AS status;
+
+-- Para calcular (y opcionalmente aplicar) las sugerencias:
+-- python analizar_demanda.py [--aplicar]
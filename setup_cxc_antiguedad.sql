@@ -0,0 +1,98 @@
+-- Script para la antigüedad de saldos de cuentas por cobrar
+-- Ejecutar este script una vez en la base de datos del POS
+--
+-- Qué cambia:
+--   * cuentas_por_cobrar.ultimo_pago se guarda en la cuenta (antes se
+--     calculaba con una subconsulta correlacionada por fila)
+--   * pagado, saldo, ultimo_pago, pagada y estado se mantienen con un trigger
+--     al registrar, corregir o borrar pagos en cxc_detalle_pagos (suma o resta
+--     el monto del pago; el pagado existente de cada cuenta se conserva)
+--   * Índices para el listado paginado y la búsqueda por cliente/número
+--
+-- PostgresManager detecta la función cxc_aplicar_pagos() y usa la columna;
+-- sin este script sigue funcionando con un JOIN agrupado.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 1. Último pago guardado en la cuenta
+ALTER TABLE cuentas_por_cobrar ADD COLUMN IF NOT EXISTS ultimo_pago TIMESTAMP;
+
+-- 2. Mantener la cuenta al día con sus pagos
+-- Por diferencias (pagado + monto nuevo - monto anterior), no recalculando
+-- SUM(cxc_detalle_pagos): las cuentas con pagos anteriores a esa tabla o
+-- ajustes manuales conservan su pagado
+CREATE OR REPLACE FUNCTION cxc_ajustar_pagado(p_id_cxc INTEGER, p_delta NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE cuentas_por_cobrar cxc
+    SET pagado = cxc.pagado + p_delta,
+        saldo = cxc.total - (cxc.pagado + p_delta),
+        ultimo_pago = (
+            SELECT MAX(fecha_pago) FROM cxc_detalle_pagos WHERE id_cxc = p_id_cxc
+        ),
+        pagada = (cxc.total - (cxc.pagado + p_delta)) <= 0,
+        estado = CASE
+            WHEN cxc.estado = 'cancelada' THEN cxc.estado
+            WHEN (cxc.total - (cxc.pagado + p_delta)) <= 0 THEN 'pagada'
+            WHEN cxc.fecha_vencimiento < CURRENT_DATE THEN 'vencida'
+            ELSE 'activa'
+        END
+    WHERE cxc.id_cxc = p_id_cxc;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cxc_aplicar_pagos()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM cxc_ajustar_pagado(OLD.id_cxc, -OLD.monto);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM cxc_ajustar_pagado(NEW.id_cxc, NEW.monto);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cxc_aplicar_pagos ON cxc_detalle_pagos;
+CREATE TRIGGER trg_cxc_aplicar_pagos
+    AFTER INSERT OR UPDATE OF monto, fecha_pago, id_cxc OR DELETE ON cxc_detalle_pagos
+    FOR EACH ROW
+    EXECUTE FUNCTION cxc_aplicar_pagos();
+
+-- 3. Llenar ultimo_pago de las cuentas existentes (una sola pasada agrupada)
+UPDATE cuentas_por_cobrar cxc
+SET ultimo_pago = p.ultimo_pago
+FROM (
+    SELECT id_cxc, MAX(fecha_pago) AS ultimo_pago
+    FROM cxc_detalle_pagos
+    GROUP BY id_cxc
+) p
+WHERE cxc.id_cxc = p.id_cxc
+  AND cxc.ultimo_pago IS DISTINCT FROM p.ultimo_pago;
+
+-- 4. Índices
+CREATE INDEX IF NOT EXISTS idx_cxc_detalle_pagos_cuenta
+    ON cxc_detalle_pagos (id_cxc, fecha_pago);
+
+-- Orden del listado (fecha de vencimiento, saldo) con desempate estable para paginar
+CREATE INDEX IF NOT EXISTS idx_cxc_listado
+    ON cuentas_por_cobrar (fecha_vencimiento, saldo DESC, id_cxc)
+    WHERE activo = TRUE;
+
+-- Cuentas abiertas por cliente (antigüedad de saldos)
+CREATE INDEX IF NOT EXISTS idx_cxc_abiertas_cliente
+    ON cuentas_por_cobrar (id_cliente)
+    WHERE activo = TRUE AND saldo > 0;
+
+-- Búsqueda por nombre de cliente y número de cuenta (LIKE '%texto%')
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre_trgm
+    ON clientes USING gin (
+        LOWER(nombres || ' ' || COALESCE(apellido_paterno, '') || ' ' || COALESCE(apellido_materno, '')) gin_trgm_ops
+    );
+
+CREATE INDEX IF NOT EXISTS idx_cxc_numero_trgm
+    ON cuentas_por_cobrar USING gin (LOWER(numero_cuenta) gin_trgm_ops);
+
+ANALYZE cuentas_por_cobrar;
+ANALYZE cxc_detalle_pagos;
@@ -0,0 +1,142 @@
+-- Script para el saldo de proveedores (cuentas por pagar)
+-- Ejecutar este script una vez en la base de datos del POS
+--
+-- Qué cambia:
+--   * ca_proveedores guarda, además de saldo_actual, el número de cuentas
+--     abiertas y el próximo vencimiento
+--   * Los tres se mantienen con triggers en la misma transacción que la
+--     compra (cuentas_por_pagar) o el pago (cxp_pagos); el recálculo solo
+--     recorre las cuentas abiertas del proveedor, no su historial
+--   * pagado y estado de la cuenta se mantienen desde cxp_pagos (suma o
+--     resta el monto del pago; el pagado existente de cada cuenta se conserva)
+--   * Índices para el listado por fecha y para "por vencer / vencidas"
+--
+-- PostgresManager detecta la función cxp_recalcular_proveedor(integer) y lee
+-- las columnas; sin este script sigue funcionando con un JOIN agrupado.
+
+-- 1. Columnas precalculadas del proveedor
+ALTER TABLE ca_proveedores ADD COLUMN IF NOT EXISTS cuentas_abiertas INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE ca_proveedores ADD COLUMN IF NOT EXISTS proximo_vencimiento DATE;
+
+-- 2. Recalcular el saldo de un proveedor desde sus cuentas abiertas
+CREATE OR REPLACE FUNCTION cxp_recalcular_proveedor(p_id_proveedor INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE ca_proveedores prov
+    SET saldo_actual = a.saldo,
+        cuentas_abiertas = a.cuentas,
+        proximo_vencimiento = a.proximo_vencimiento
+    FROM (
+        SELECT COALESCE(SUM(total - pagado), 0) AS saldo,
+               COUNT(*) AS cuentas,
+               MIN(fecha_vencimiento) AS proximo_vencimiento
+        FROM cuentas_por_pagar
+        WHERE id_proveedor = p_id_proveedor
+          AND estado IN ('activa', 'vencida')
+          AND total > pagado
+    ) a
+    WHERE prov.id_proveedor = p_id_proveedor
+      AND (prov.saldo_actual, prov.cuentas_abiertas, prov.proximo_vencimiento)
+          IS DISTINCT FROM (a.saldo, a.cuentas::INTEGER, a.proximo_vencimiento);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cxp_actualizar_proveedor()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.id_proveedor IS NOT NULL THEN
+        PERFORM cxp_recalcular_proveedor(OLD.id_proveedor);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.id_proveedor IS NOT NULL
+       AND (TG_OP = 'INSERT' OR NEW.id_proveedor IS DISTINCT FROM OLD.id_proveedor) THEN
+        PERFORM cxp_recalcular_proveedor(NEW.id_proveedor);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cxp_actualizar_proveedor ON cuentas_por_pagar;
+CREATE TRIGGER trg_cxp_actualizar_proveedor
+    AFTER INSERT OR UPDATE OF total, pagado, estado, fecha_vencimiento, id_proveedor OR DELETE
+    ON cuentas_por_pagar
+    FOR EACH ROW
+    EXECUTE FUNCTION cxp_actualizar_proveedor();
+
+-- 3. Mantener pagado y estado de la cuenta con sus pagos
+-- Por diferencias (pagado + monto nuevo - monto anterior), no recalculando
+-- SUM(cxp_pagos): los pagos registrados antes de esa tabla se conservan
+CREATE OR REPLACE FUNCTION cxp_ajustar_pagado(p_id_cuenta INTEGER, p_delta NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE cuentas_por_pagar cxp
+    SET pagado = cxp.pagado + p_delta,
+        estado = CASE
+            WHEN cxp.estado = 'cancelada' THEN cxp.estado
+            WHEN (cxp.total - (cxp.pagado + p_delta)) <= 0 THEN 'pagada'
+            WHEN cxp.fecha_vencimiento < CURRENT_DATE THEN 'vencida'
+            ELSE 'activa'
+        END
+    WHERE cxp.id_cuenta_pagar = p_id_cuenta;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cxp_aplicar_pagos()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM cxp_ajustar_pagado(OLD.id_cuenta_pagar, -OLD.monto);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM cxp_ajustar_pagado(NEW.id_cuenta_pagar, NEW.monto);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cxp_aplicar_pagos ON cxp_pagos;
+CREATE TRIGGER trg_cxp_aplicar_pagos
+    AFTER INSERT OR UPDATE OF monto, id_cuenta_pagar OR DELETE ON cxp_pagos
+    FOR EACH ROW
+    EXECUTE FUNCTION cxp_aplicar_pagos();
+
+-- 4. Llenar las columnas de los proveedores existentes (una sola pasada agrupada)
+UPDATE ca_proveedores prov
+SET saldo_actual = COALESCE(a.saldo, 0),
+    cuentas_abiertas = COALESCE(a.cuentas, 0),
+    proximo_vencimiento = a.proximo_vencimiento
+FROM ca_proveedores p
+LEFT JOIN (
+    SELECT id_proveedor,
+           SUM(total - pagado) AS saldo,
+           COUNT(*) AS cuentas,
+           MIN(fecha_vencimiento) AS proximo_vencimiento
+    FROM cuentas_por_pagar
+    WHERE estado IN ('activa', 'vencida') AND total > pagado
+    GROUP BY id_proveedor
+) a ON a.id_proveedor = p.id_proveedor
+WHERE prov.id_proveedor = p.id_proveedor;
+
+-- 5. Índices
+CREATE INDEX IF NOT EXISTS idx_cxp_pagos_cuenta
+    ON cxp_pagos (id_cuenta_pagar);
+
+-- Listado de la pantalla (rango de fechas, más recientes primero)
+CREATE INDEX IF NOT EXISTS idx_cxp_fecha_cuenta
+    ON cuentas_por_pagar (fecha_cuenta DESC, id_cuenta_pagar DESC);
+
+-- Cuentas abiertas: por vencimiento ("por vencer / vencidas") y por proveedor (recálculo)
+CREATE INDEX IF NOT EXISTS idx_cxp_abiertas_vencimiento
+    ON cuentas_por_pagar (fecha_vencimiento, id_cuenta_pagar)
+    WHERE estado IN ('activa', 'vencida') AND total > pagado;
+
+CREATE INDEX IF NOT EXISTS idx_cxp_abiertas_proveedor
+    ON cuentas_por_pagar (id_proveedor)
+    WHERE estado IN ('activa', 'vencida') AND total > pagado;
+
+CREATE INDEX IF NOT EXISTS idx_proveedores_proximo_vencimiento
+    ON ca_proveedores (proximo_vencimiento)
+    WHERE cuentas_abiertas > 0;
+
+ANALYZE cuentas_por_pagar;
+ANALYZE cxp_pagos;
+ANALYZE ca_proveedores;
@@ -0,0 +1,74 @@
+-- Script para crear las tablas de rollup (pre-agregados) de ventas
+-- Ejecutar este script una vez en la base de datos del POS
+--
+-- Las tablas se mantienen de forma incremental:
+--   * En línea: PostgresManager.create_sale acumula la venta dentro de su transacción
+--   * Catch-up: PostgresManager.actualizar_rollups_ventas procesa todas las ventas
+--     pendientes (en_rollup = FALSE, índice parcial) y avanza la marca en rollup_marcas
+
+-- 1. Bandera por venta para saber si ya fue acumulada (evita doble conteo)
+ALTER TABLE ventas ADD COLUMN IF NOT EXISTS en_rollup BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_ventas_pendientes_rollup
+    ON ventas (id_venta)
+    WHERE en_rollup = FALSE;
+
+-- 2. Rollup día x producto
+CREATE TABLE IF NOT EXISTS rollup_ventas_producto_dia (
+    fecha DATE NOT NULL,
+    id_producto INTEGER NOT NULL,
+    cantidad NUMERIC(14, 3) NOT NULL DEFAULT 0,
+    total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    utilidad NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    num_lineas INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto)
+);
+
+-- 3. Rollup día x vendedor
+CREATE TABLE IF NOT EXISTS rollup_ventas_vendedor_dia (
+    fecha DATE NOT NULL,
+    id_vendedor INTEGER NOT NULL,
+    num_ventas INTEGER NOT NULL DEFAULT 0,
+    total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_vendedor)
+);
+
+-- 4. Rollup día x método de pago
+CREATE TABLE IF NOT EXISTS rollup_ventas_metodo_pago_dia (
+    fecha DATE NOT NULL,
+    metodo_pago TEXT NOT NULL,
+    num_ventas INTEGER NOT NULL DEFAULT 0,
+    total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, metodo_pago)
+);
+
+-- 5. Rollup día x hora
+CREATE TABLE IF NOT EXISTS rollup_ventas_hora (
+    fecha DATE NOT NULL,
+    hora SMALLINT NOT NULL CHECK (hora BETWEEN 0 AND 23),
+    num_ventas INTEGER NOT NULL DEFAULT 0,
+    total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, hora)
+);
+
+-- 6. Totales por turno (ventas del día y cierre de caja): se suman en vivo
+CREATE INDEX IF NOT EXISTS idx_ventas_turno
+    ON ventas (id_turno)
+    WHERE id_turno IS NOT NULL;
+
+-- 7. Marcas de agua de los procesos de catch-up
+CREATE TABLE IF NOT EXISTS rollup_marcas (
+    nombre TEXT PRIMARY KEY,
+    ultimo_id BIGINT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO rollup_marcas (nombre, ultimo_id)
+VALUES ('ventas', 0)
+ON CONFLICT (nombre) DO NOTHING;
+
+-- 8. Verificación
+SELECT 'Rollups de ventas configurados correctamente' AS status;
+
+-- El histórico existente se carga solo al iniciar la aplicación
+-- (PostgresManager.actualizar_rollups_ventas, en el hilo de arranque)
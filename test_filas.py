@@ -0,0 +1,51 @@
+"""
+Script de prueba: Filas compactas (database/filas.py) con columnas que se
+llaman como métodos de la tupla o de Fila
+"""
+
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.filas import clase_fila
+
+def test_filas():
+    """Columnas count/index/get no deben tapar los métodos de la fila"""
+    print("=" * 60)
+    print("Prueba de Filas con Columnas en Conflicto")
+    print("=" * 60)
+    
+    try:
+        clase = clase_fila(['id_producto', 'count', 'index', 'get', 'count_'])
+        fila = clase((7, 3, 1, 'x', 'y'))
+        
+        errores = []
+        if fila.id_producto != 7:
+            errores.append("fila.id_producto")
+        # Por clave se lee la columna; los métodos de la tupla y de Fila siguen funcionando
+        if (fila['count'], fila['index'], fila['get']) != (3, 1, 'x'):
+            errores.append("acceso por clave")
+        if fila.count(3) != 1 or fila.index(1) != 2 or fila.get('count') != 3:
+            errores.append("métodos de la tupla / Fila")
+        # Por atributo, la columna en conflicto lleva "_" sin tapar a otra columna
+        if (fila.count__, fila.index_, fila.get_, fila.count_) != (3, 1, 'x', 'y'):
+            errores.append("atributos renombrados")
+        if dict(fila) != {'id_producto': 7, 'count': 3, 'index': 1, 'get': 'x', 'count_': 'y'}:
+            errores.append("dict(fila)")
+        
+        if errores:
+            for error in errores:
+                print(f"❌ {error}")
+            return False
+        
+        print("\n✅ Columnas en conflicto accesibles sin tapar los métodos")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ Error durante la prueba: {e}")
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if test_filas() else 1)
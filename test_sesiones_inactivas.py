@@ -0,0 +1,65 @@
+"""
+Script de prueba: ninguna lectura ni escritura del POS debe dejar una
+sesión "idle in transaction" (ver PostgresManager.sesiones_en_transaccion)
+"""
+
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.postgres_manager import PostgresManager
+from utils.config import Config
+
+def test_sesiones_inactivas():
+    """Operaciones típicas y revisión de pg_stat_activity"""
+    print("=" * 60)
+    print("Prueba de Sesiones Idle in Transaction")
+    print("=" * 60)
+    
+    try:
+        db = PostgresManager(Config().get_postgres_config())
+        
+        # Lecturas (conexión de lectura)
+        db.initialize_database()
+        db.get_total_members()
+        db.get_ubicaciones()
+        productos = db.get_all_products()
+        db.search_products("a")
+        db.obtener_inventario_completo()
+        db.obtener_cuentas_por_cobrar()
+        db.obtener_cuentas_por_pagar()
+        print(f"✅ Lecturas completadas ({len(productos)} productos)")
+        
+        # Inicios de sesión fallidos: usuario inexistente y contraseña incorrecta
+        db.authenticate_user("__usuario_inexistente__", "x")
+        for usuario in db.query("SELECT nombre_usuario FROM usuarios WHERE activo = TRUE LIMIT 1"):
+            db.authenticate_user(usuario['nombre_usuario'], "__contrasena_incorrecta__")
+        print("✅ Inicios de sesión fallidos completados")
+        
+        # Escritura sin efecto y unidad de trabajo que solo lee
+        db.execute("UPDATE ca_ubicaciones SET nombre = nombre WHERE FALSE")
+        with db.transaccion():
+            db.get_product_by_code("__inexistente__")
+        # Lectura que falla: la conexión no debe quedar abortada ni abierta
+        db.query("SELECT * FROM tabla_que_no_existe")
+        print("✅ Escrituras completadas")
+        
+        inactivas = db.sesiones_en_transaccion()
+        db.close()
+        
+        if inactivas:
+            for sesion in inactivas:
+                print(f"❌ Sesión {sesion['pid']} ({sesion['application_name']}): {sesion['ultima_consulta']}")
+            return False
+        
+        print("\n✅ Ninguna sesión quedó idle in transaction")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ Error durante la prueba: {e}")
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if test_sesiones_inactivas() else 1)
@@ -5,12 +5,11 @@ Diálogo para Abrir Turno Automáticamente al Iniciar Sesión
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 import logging
 from datetime import datetime
 from decimal import Decimal
-import qtawesome as qta
 
 from ui.components import (
     WindowsPhoneTheme,
@@ -18,7 +17,8 @@ from ui.components import (
     StyledLabel,
     TouchMoneyInput,
     show_error_dialog,
-    show_success_dialog
+    show_success_dialog,
+    obtener_pixmap
 )
 
 
@@ -108,7 +108,7 @@ class AbrirTurnoDialog(QDialog):
         
         icon_confirmar = QLabel()
         icon_confirmar.setAlignment(Qt.AlignCenter)
-        icon_confirmar.setPixmap(qta.icon('fa5s.check', color='white').pixmap(QSize(40, 40)))
+        icon_confirmar.setPixmap(obtener_pixmap('fa5s.check', 'white', 40))
         icon_confirmar.setStyleSheet("background: transparent;")
         btn_layout.addWidget(icon_confirmar)
         
@@ -146,7 +146,7 @@ class AbrirTurnoDialog(QDialog):
         
         icon_cancelar = QLabel()
         icon_cancelar.setAlignment(Qt.AlignCenter)
-        icon_cancelar.setPixmap(qta.icon('fa5s.times', color='white').pixmap(QSize(40, 40)))
+        icon_cancelar.setPixmap(obtener_pixmap('fa5s.times', 'white', 40))
         icon_cancelar.setStyleSheet("background: transparent;")
         btn_cancelar_layout.addWidget(icon_cancelar)
         
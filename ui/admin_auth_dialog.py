@@ -9,7 +9,6 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
-import bcrypt
 import logging
 
 from ui.components import (
@@ -17,17 +16,41 @@ from ui.components import (
     StyledLabel,
     ContentPanel
 )
+from services.autenticacion import AutenticacionThread, ConcesionesSupervisor
 
 
 class AdminAuthDialog(QDialog):
     """Diálogo para solicitar autorización de administrador"""
     
+    @classmethod
+    def solicitar(cls, pg_manager, motivo, parent=None, accion=None):
+        """
+        Pedir autorización y devolver get_autorizacion(). Con 'accion', una
+        autorización concedida hace poco para la misma acción se reutiliza
+        sin mostrar el diálogo (ver ConcesionesSupervisor).
+        """
+        concesiones = ConcesionesSupervisor.obtener()
+        if accion:
+            vigente = concesiones.vigente(accion)
+            if vigente:
+                logging.info(f"Autorización vigente de {vigente['nombre_admin']} reutilizada para {accion}: {motivo}")
+                return vigente
+        
+        dialog = cls(pg_manager, motivo, parent)
+        if dialog.exec() != QDialog.Accepted:
+            return {'autorizado': False}
+        autorizacion = dialog.get_autorizacion()
+        if autorizacion['autorizado']:
+            concesiones.guardar(accion, autorizacion)
+        return autorizacion
+    
     def __init__(self, pg_manager, motivo, parent=None):
         super().__init__(parent)
         self.pg_manager = pg_manager
         self.motivo = motivo
         self.autorizado = False
         self.id_admin_autorizador = None
+        self._hilo_autenticacion = None
         
         self.setWindowTitle("Autorización Requerida")
         self.setModal(True)
@@ -128,6 +151,7 @@ class AdminAuthDialog(QDialog):
         """)
         btn_cancelar.clicked.connect(self.reject)
         buttons_layout.addWidget(btn_cancelar)
+        self.btn_cancelar = btn_cancelar
         
         btn_autorizar = QPushButton("Autorizar")
         btn_autorizar.setMinimumHeight(45)
@@ -145,6 +169,7 @@ class AdminAuthDialog(QDialog):
         """)
         btn_autorizar.clicked.connect(self.verificar_credenciales)
         buttons_layout.addWidget(btn_autorizar)
+        self.btn_autorizar = btn_autorizar
         
         layout.addLayout(buttons_layout)
         
@@ -176,43 +201,71 @@ class AdminAuthDialog(QDialog):
             self.justificacion_input.setFocus()
             return
         
-        try:
-            # Usar PostgreSQL authenticate_user para verificar credenciales
-            user_auth = self.pg_manager.authenticate_user(usuario, password)
-            
-            if not user_auth:
-                from ui.components import show_error_dialog
-                show_error_dialog(self, "Error", "Usuario no encontrado o contraseña incorrecta")
-                self.password_input.clear()
-                self.usuario_input.setFocus()
-                return
-            
-            # Verificar que sea administrador o sistemas
-            if user_auth.get('rol') not in ['administrador', 'sistemas']:
-                from ui.components import show_error_dialog
-                show_error_dialog(
-                    self, 
-                    "Acceso Denegado", 
-                    "Solo administradores pueden autorizar esta acción"
-                )
-                self.password_input.clear()
-                self.usuario_input.clear()
-                self.usuario_input.setFocus()
-                return
-            
-            # Autorización exitosa
-            self.autorizado = True
-            self.id_admin_autorizador = user_auth['id_usuario']
-            self.justificacion = justificacion
-            self.nombre_admin = user_auth['nombre_completo']
-            
-            logging.info(f"Autorización concedida por {user_auth['nombre_completo']} (ID: {user_auth['id_usuario']})")
-            self.accept()
-                
-        except Exception as e:
-            logging.error(f"Error verificando credenciales: {e}")
+        if self._hilo_autenticacion is not None:
+            return  # Ya hay una verificación en curso
+        
+        # bcrypt corre en segundo plano; el diálogo solo muestra el progreso
+        self._set_verificando(True)
+        self._justificacion_pendiente = justificacion
+        self._hilo_autenticacion = AutenticacionThread(self.pg_manager, usuario, password, self)
+        self._hilo_autenticacion.terminada.connect(self._on_autenticacion_terminada, Qt.QueuedConnection)
+        self._hilo_autenticacion.error.connect(self._on_error_autenticacion, Qt.QueuedConnection)
+        self._hilo_autenticacion.finished.connect(self._hilo_autenticacion.deleteLater)
+        self._hilo_autenticacion.start()
+    
+    def _set_verificando(self, verificando):
+        for widget in (self.usuario_input, self.password_input, self.justificacion_input,
+                       self.btn_autorizar, self.btn_cancelar):
+            widget.setEnabled(not verificando)
+        self.btn_autorizar.setText("Verificando..." if verificando else "Autorizar")
+    
+    def _on_autenticacion_terminada(self, user_auth):
+        """Resultado del hilo de autenticación"""
+        self._hilo_autenticacion = None
+        self._set_verificando(False)
+        justificacion = self._justificacion_pendiente
+        
+        if not user_auth:
             from ui.components import show_error_dialog
-            show_error_dialog(self, "Error", f"Error al verificar credenciales: {e}")
+            show_error_dialog(self, "Error", "Usuario no encontrado o contraseña incorrecta")
+            self.password_input.clear()
+            self.usuario_input.setFocus()
+            return
+        
+        # Verificar que sea administrador o sistemas
+        if user_auth.get('rol') not in ['administrador', 'sistemas']:
+            from ui.components import show_error_dialog
+            show_error_dialog(
+                self, 
+                "Acceso Denegado", 
+                "Solo administradores pueden autorizar esta acción"
+            )
+            self.password_input.clear()
+            self.usuario_input.clear()
+            self.usuario_input.setFocus()
+            return
+        
+        # Autorización exitosa
+        self.autorizado = True
+        self.id_admin_autorizador = user_auth['id_usuario']
+        self.justificacion = justificacion
+        self.nombre_admin = user_auth['nombre_completo']
+        
+        logging.info(f"Autorización concedida por {user_auth['nombre_completo']} (ID: {user_auth['id_usuario']})")
+        self.accept()
+    
+    def _on_error_autenticacion(self, mensaje):
+        self._hilo_autenticacion = None
+        self._set_verificando(False)
+        logging.error(f"Error verificando credenciales: {mensaje}")
+        from ui.components import show_error_dialog
+        show_error_dialog(self, "Error", f"Error al verificar credenciales: {mensaje}")
+    
+    def reject(self):
+        # No cerrar (ni destruir el hilo) mientras se verifica
+        if self._hilo_autenticacion is not None:
+            return
+        super().reject()
     
     def get_autorizacion(self):
         """Obtener datos de la autorización"""
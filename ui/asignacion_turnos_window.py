@@ -6,7 +6,7 @@ Usando componentes reutilizables del sistema de diseño
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QPushButton, QTableWidget, QTableWidgetItem,
+    QTableWidget, QTableWidgetItem,
     QHeaderView, QComboBox, QDateEdit, QLabel,
     QTimeEdit, QCheckBox
 )
@@ -29,7 +29,8 @@ from ui.components import (
     show_success_dialog,
     show_confirmation_dialog,
     TouchMoneyInput,
-    aplicar_estilo_fecha
+    aplicar_estilo_fecha,
+    crear_boton_fila
 )
 
 
@@ -364,6 +365,10 @@ class AsignacionTurnosWindow(QWidget):
             logging.error(f"Error cargando empleados: {e}")
             show_error_dialog(self, "Error", f"No se pudieron cargar los empleados: {e}")
     
+    def refrescar_datos(self):
+        """Recargar los turnos desde la fecha del filtro al reutilizar la pantalla"""
+        self.cargar_turnos_asignados()
+    
     def cargar_turnos_asignados(self):
         """Cargar turnos asignados desde la fecha filtro"""
         try:
@@ -459,19 +464,8 @@ class AsignacionTurnosWindow(QWidget):
             
             # Botón eliminar (solo si no está cerrado)
             if not turno['cerrado']:
-                btn_eliminar = QPushButton("Eliminar")
+                btn_eliminar = crear_boton_fila('eliminar', texto="Eliminar")
                 btn_eliminar.setMinimumHeight(30)
-                btn_eliminar.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {WindowsPhoneTheme.TILE_RED};
-                        color: white;
-                        border: none;
-                        border-radius: 3px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: #b30f00;
-                    }}
-                """)
                 btn_eliminar.clicked.connect(lambda checked, id_t=turno['id_turno']: self.eliminar_turno(id_t))
                 self.tabla_turnos.setCellWidget(row_idx, 6, btn_eliminar)
             else:
@@ -537,7 +531,7 @@ class AsignacionTurnosWindow(QWidget):
                 return
             
             # Insertar turno usando PostgreSQL
-            self.pg_manager.query("""
+            creado = self.pg_manager.execute("""
                 INSERT INTO turnos_caja (
                     numero_turno, id_usuario, fecha_apertura, monto_inicial, 
                     notas_apertura, cerrado
@@ -548,6 +542,8 @@ class AsignacionTurnosWindow(QWidget):
                 turno_nombre, id_usuario, fecha_apertura, monto_inicial, 
                 f"Turno {turno_nombre}"
             ))
+            if not creado:
+                raise Exception("la base de datos rechazó el turno")
             
             show_success_dialog(self, "Éxito", "Turno creado y asignado correctamente")
             
@@ -579,9 +575,11 @@ class AsignacionTurnosWindow(QWidget):
                 return
             
             # Eliminar turno
-            self.pg_manager.query("""
+            eliminado = self.pg_manager.execute("""
                 DELETE FROM turnos_caja WHERE id_turno = %s
             """, (id_turno,))
+            if not eliminado:
+                raise Exception("la base de datos rechazó la eliminación")
             
             show_success_dialog(self, "Éxito", "Turno eliminado correctamente")
             
@@ -439,6 +439,10 @@ class ClientesWindow(QWidget):
 
         layout.addLayout(buttons_layout)
 
+    def refrescar_datos(self):
+        """Recargar los clientes al reutilizar la pantalla (se conserva la búsqueda)"""
+        self.cargar_clientes()
+
     def cargar_clientes(self):
         """Cargar lista de clientes"""
         try:
@@ -6,9 +6,13 @@ Sistema de diseño unificado para toda la aplicación HTF POS
 from PySide6.QtWidgets import (
     QPushButton, QLabel, QFrame, QVBoxLayout, QHBoxLayout, QWidget, QDialog, QLineEdit
 )
-from PySide6.QtCore import Qt, QSize, Signal
-from PySide6.QtGui import QFont, QCursor, QDoubleValidator, QIntValidator
+from PySide6.QtCore import Qt, QSize, Signal, QTimer
+from PySide6.QtGui import QFont, QCursor, QDoubleValidator, QIntValidator, QIcon, QPixmap, QGuiApplication
 import qtawesome as qta
+import functools
+import hashlib
+import logging
+import os
 
 
 class WindowsPhoneTheme:
@@ -70,6 +74,91 @@ class WindowsPhoneTheme:
     MARGIN_LARGE = 30
 
 
+# ========== CACHÉ DE ICONOS ==========
+
+class CacheIconos:
+    """
+    Iconos de qtawesome rasterizados una sola vez por (nombre, color, tamaño).
+
+    qta.icon() crea un motor que vuelve a dibujar el glifo de la fuente en
+    cada pintado; las tablas que ponen un botón con icono por fila pagaban ese
+    costo por cada fila. Aquí el glifo se convierte en pixmap una vez y todas
+    las filas comparten el mismo QIcon.
+
+    Con POS_CACHE_ICONOS=<directorio> los pixmaps se guardan además como PNG
+    y se leen de disco en los siguientes arranques.
+    """
+
+    def __init__(self):
+        self._pixmaps = {}
+        self._iconos = {}
+        self.directorio = os.getenv('POS_CACHE_ICONOS') or None
+
+    @staticmethod
+    def _escala():
+        app = QGuiApplication.instance()
+        return app.devicePixelRatio() if app else 1.0
+
+    def pixmap(self, nombre, color='white', tamano=16):
+        """Pixmap del icono (tamaño en píxeles lógicos, cuadrado)"""
+        clave = (nombre, color, tamano, self._escala())
+        pixmap = self._pixmaps.get(clave)
+        if pixmap is None:
+            pixmap = self._leer_disco(clave)
+            if pixmap is None:
+                pixmap = qta.icon(nombre, color=color).pixmap(QSize(tamano, tamano))
+                self._guardar_disco(clave, pixmap)
+            self._pixmaps[clave] = pixmap
+        return pixmap
+
+    def icono(self, nombre, color='white', tamano=16):
+        """QIcon compartido; tamano debe coincidir con el iconSize del botón"""
+        clave = (nombre, color, tamano, self._escala())
+        icono = self._iconos.get(clave)
+        if icono is None:
+            icono = QIcon(self.pixmap(nombre, color, tamano))
+            self._iconos[clave] = icono
+        return icono
+
+    def _ruta(self, clave):
+        huella = hashlib.md5(repr(clave + (qta.__version__,)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{huella}.png")
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        if not os.path.exists(ruta):
+            return None
+        pixmap = QPixmap(ruta)
+        if pixmap.isNull():
+            return None
+        pixmap.setDevicePixelRatio(clave[3])
+        return pixmap
+
+    def _guardar_disco(self, clave, pixmap):
+        if not self.directorio:
+            return
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            pixmap.save(self._ruta(clave), 'PNG')
+        except Exception as e:
+            logging.debug(f"No se pudo guardar el icono {clave[0]} en disco: {e}")
+
+
+ICONOS = CacheIconos()
+
+
+def obtener_icono(nombre, color='white', tamano=16):
+    """QIcon cacheado de qtawesome (usar en lugar de qta.icon)"""
+    return ICONOS.icono(nombre, color, tamano)
+
+
+def obtener_pixmap(nombre, color='white', tamano=16):
+    """Pixmap cacheado de qtawesome (usar en lugar de qta.icon(...).pixmap)"""
+    return ICONOS.pixmap(nombre, color, tamano)
+
+
 class TileButton(QPushButton):
     """Botón grande estilo Windows Phone Tile"""
     
@@ -112,9 +201,7 @@ class TileButton(QPushButton):
             icon_label.setAlignment(Qt.AlignCenter)
             try:
                 icon_label.setPixmap(
-                    qta.icon(icon_name, color='white').pixmap(
-                        QSize(WindowsPhoneTheme.ICON_SIZE_LARGE, WindowsPhoneTheme.ICON_SIZE_LARGE)
-                    )
+                    obtener_pixmap(icon_name, 'white', WindowsPhoneTheme.ICON_SIZE_LARGE)
                 )
             except Exception as e:
                 # Fallback: usar emoji si qtawesome falla
@@ -175,7 +262,7 @@ class CompactNavButton(QPushButton):
             icon_label.setFixedSize(16, 16)
             try:
                 icon_label.setPixmap(
-                    qta.icon(icon_name, color='white').pixmap(QSize(16, 16))
+                    obtener_pixmap(icon_name, 'white', 16)
                 )
             except:
                 icon_label.setText("◀" if "left" in icon_name.lower() else "▶")
@@ -252,9 +339,7 @@ class InfoTile(QFrame):
             self.icon_label.setAlignment(Qt.AlignCenter)
             try:
                 self.icon_label.setPixmap(
-                    qta.icon(icon_name, color='white').pixmap(
-                        QSize(WindowsPhoneTheme.ICON_SIZE_LARGE, WindowsPhoneTheme.ICON_SIZE_LARGE)
-                    )
+                    obtener_pixmap(icon_name, 'white', WindowsPhoneTheme.ICON_SIZE_LARGE)
                 )
             except:
                 # Si falla el icono, mostrar emoji
@@ -323,9 +408,7 @@ class TabButton(QPushButton):
         icon_label = QLabel()
         icon_label.setAlignment(Qt.AlignCenter)
         icon_label.setPixmap(
-            qta.icon(icon_name, color='white').pixmap(
-                QSize(WindowsPhoneTheme.ICON_SIZE_SMALL, WindowsPhoneTheme.ICON_SIZE_SMALL)
-            )
+            obtener_pixmap(icon_name, 'white', WindowsPhoneTheme.ICON_SIZE_SMALL)
         )
         icon_label.setObjectName("tabIcon")
         layout.addWidget(icon_label)
@@ -424,7 +507,7 @@ class SearchBar(QWidget):
         
         # Icono Font Awesome
         try:
-            self.search_button.setIcon(qta.icon('fa5s.search', color='white'))
+            self.search_button.setIcon(obtener_icono('fa5s.search', 'white', 16))
             self.search_button.setIconSize(QSize(16, 16))
         except:
             pass  # Si falla, solo mostrar texto
@@ -450,6 +533,19 @@ def apply_windows_phone_stylesheet(widget):
     Aplicar la hoja de estilos Windows Phone a cualquier widget
     Debe llamarse desde la ventana principal o widget raíz
     """
+    widget.setStyleSheet(hoja_estilos_tema())
+
+
+@functools.lru_cache(maxsize=1)
+def hoja_estilos_tema():
+    """
+    Hoja de estilos completa del tema (se arma una sola vez por proceso).
+
+    Las variantes de los widgets de tabla (botones de fila, toggles, combos
+    de celda) se eligen con objectName y propiedades dinámicas, así las filas
+    no llaman a setStyleSheet: Qt resuelve la regla contra esta hoja, que ya
+    está parseada en la ventana raíz.
+    """
     theme = WindowsPhoneTheme
     
     stylesheet = f"""
@@ -816,9 +912,115 @@ def apply_windows_phone_stylesheet(widget):
         QScrollBar::handle:horizontal:hover {{
             background: {theme.TILE_BLUE};
         }}
+        
+        /* Celdas de tabla con widgets */
+        QWidget#celdaAcciones {{
+            background: transparent;
+        }}
+        
+        /* Botones de acción por fila (crear_boton_fila) */
+        QPushButton#botonFila {{
+            color: white;
+            border: none;
+            border-radius: 3px;
+        }}
+        
+        QPushButton#botonFila[variante="detalle"],
+        QPushButton#botonFila[variante="editar"] {{
+            background-color: {theme.TILE_BLUE};
+        }}
+        
+        QPushButton#botonFila[variante="detalle"]:hover,
+        QPushButton#botonFila[variante="editar"]:hover {{
+            background-color: #1976d2;
+        }}
+        
+        QPushButton#botonFila[variante="eliminar"] {{
+            background-color: {theme.TILE_RED};
+        }}
+        
+        QPushButton#botonFila[variante="eliminar"]:hover {{
+            background-color: #c62828;
+        }}
+        
+        QPushButton#botonFila[variante="agregar"] {{
+            background-color: {theme.TILE_GREEN};
+            border-radius: 5px;
+            padding: 0px;
+        }}
+        
+        QPushButton#botonFila[variante="agregar"]:hover {{
+            background-color: {theme.TILE_TEAL};
+        }}
+        
+        QPushButton#botonFila[variante="agregar"]:pressed {{
+            background-color: #1b5e20;
+        }}
+        
+        QPushButton#botonFila[variante="quitar"] {{
+            background-color: {theme.TILE_RED};
+            border-radius: 5px;
+            font-size: 14px;
+            font-weight: bold;
+        }}
+        
+        QPushButton#botonFila[variante="quitar"]:hover {{
+            background-color: {theme.TILE_ORANGE};
+        }}
+        
+        /* Toggle activo/inactivo (solo icono, sin indicador) */
+        QCheckBox#toggleEstado {{
+            spacing: 4px;
+            padding: 4px;
+            background: transparent;
+        }}
+        
+        QCheckBox#toggleEstado::indicator {{
+            width: 0px;
+            height: 0px;
+            border: none;
+            background: transparent;
+        }}
+        
+        /* Combos editables dentro de una celda */
+        QComboBox#comboCelda {{
+            padding: 4px;
+            border: none;
+            background-color: white;
+        }}
+        
+        QComboBox#comboCelda[modificado="true"] {{
+            border: 2px solid #ff8c00;
+            background-color: #fff3cd;
+        }}
     """
     
-    widget.setStyleSheet(stylesheet)
+    return stylesheet
+
+
+def crear_boton_fila(variante, icon_name=None, texto="", tooltip=None, icon_size=16):
+    """
+    Botón de acción para una celda de tabla: 'detalle', 'editar', 'eliminar',
+    'agregar' o 'quitar'. El estilo lo da el tema (QPushButton#botonFila).
+    """
+    boton = QPushButton(texto)
+    boton.setObjectName("botonFila")
+    boton.setProperty("variante", variante)
+    if icon_name:
+        boton.setIcon(obtener_icono(icon_name, 'white', icon_size))
+    if tooltip:
+        boton.setToolTip(tooltip)
+    return boton
+
+
+def cambiar_variante(widget, propiedad, valor):
+    """
+    Cambiar una propiedad dinámica que usa el tema y volver a aplicar el
+    estilo solo a ese widget (Qt no lo hace solo al cambiar la propiedad)
+    """
+    widget.setProperty(propiedad, valor)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
 
 
 # Funciones helper para crear layouts estándar
@@ -896,7 +1098,7 @@ class AlertDialog(QDialog):
         icon_name, color = self.ICON_MAP.get(dialog_type, self.ICON_MAP["info"])
         try:
             icon_label.setPixmap(
-                qta.icon(icon_name, color="white").pixmap(QSize(48, 48))
+                obtener_pixmap(icon_name, "white", 48)
             )
         except Exception:
             icon_label.setText("⚠")
@@ -1008,6 +1210,114 @@ class AlertDialog(QDialog):
         return dialog.exec() == QDialog.Accepted
 
 
+class NotificacionToast(QFrame):
+    """Notificación flotante no bloqueante que se cierra sola"""
+
+    cerrada = Signal(object)
+
+    def __init__(self, title, message, dialog_type="warning", parent=None, duracion_ms=8000):
+        super().__init__(parent)
+        self.setObjectName("notificacionToast")
+        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setFixedWidth(360)
+
+        icon_name, color = AlertDialog.ICON_MAP.get(dialog_type, AlertDialog.ICON_MAP["info"])
+        self.setStyleSheet(f"""
+            QFrame#notificacionToast {{
+                background-color: {color};
+                border: none;
+            }}
+            QLabel {{
+                color: white;
+                background: transparent;
+            }}
+        """)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(16, 14, 16, 14)
+        layout.setSpacing(12)
+
+        icon_label = QLabel()
+        icon_label.setFixedSize(32, 32)
+        try:
+            icon_label.setPixmap(obtener_pixmap(icon_name, "white", 28))
+        except Exception:
+            icon_label.setText("⚠")
+        layout.addWidget(icon_label, 0, Qt.AlignTop)
+
+        text_layout = QVBoxLayout()
+        text_layout.setSpacing(4)
+
+        title_label = QLabel(title)
+        title_label.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, WindowsPhoneTheme.FONT_SIZE_NORMAL, QFont.Bold))
+        text_layout.addWidget(title_label)
+
+        message_label = QLabel(message)
+        message_label.setWordWrap(True)
+        message_label.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, WindowsPhoneTheme.FONT_SIZE_SMALL))
+        text_layout.addWidget(message_label)
+
+        layout.addLayout(text_layout, 1)
+
+        if duracion_ms:
+            QTimer.singleShot(duracion_ms, self.close)
+
+    def mousePressEvent(self, event):
+        """Cerrar al hacer clic"""
+        self.close()
+
+    def closeEvent(self, event):
+        self.cerrada.emit(self)
+        super().closeEvent(event)
+
+
+class OverlayRendimiento(QLabel):
+    """Indicador flotante para soporte: retraso del event loop y última acción medida"""
+
+    UMBRAL_AMARILLO_MS = 50
+    UMBRAL_ROJO_MS = 250
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setFont(QFont("Consolas", WindowsPhoneTheme.FONT_SIZE_SMALL))
+        self.setContentsMargins(10, 6, 10, 6)
+        self.actualizar({'lag_p95_ms': 0, 'lag_max_ms': 0, 'ultima_accion': None,
+                         'ultima_accion_ms': None, 'congelamientos': 0})
+
+    def actualizar(self, metricas):
+        """Recibe el resumen de MonitorUI.metricas_actualizadas"""
+        p95 = metricas['lag_p95_ms']
+        if p95 >= self.UMBRAL_ROJO_MS:
+            color = WindowsPhoneTheme.TILE_RED
+        elif p95 >= self.UMBRAL_AMARILLO_MS:
+            color = WindowsPhoneTheme.TILE_ORANGE
+        else:
+            color = WindowsPhoneTheme.TILE_GREEN
+        self.setStyleSheet(f"background-color: rgba(0, 0, 0, 190); color: white; border-left: 4px solid {color};")
+
+        texto = (f"lag p95 {p95:.0f} ms · máx {metricas['lag_max_ms']:.0f} ms · "
+                 f"congelamientos {metricas['congelamientos']}")
+        if metricas['ultima_accion']:
+            accion = metricas['ultima_accion'].split('.')[-1]
+            texto += f"\n{accion}: {metricas['ultima_accion_ms']:.0f} ms"
+        if texto != self.text():
+            self.setText(texto)
+            self.adjustSize()
+            self.reposicionar()
+
+    def reposicionar(self):
+        """Esquina superior derecha de la ventana padre"""
+        if self.parent():
+            ventana = self.parent().window()
+            esquina = ventana.mapToGlobal(ventana.rect().topRight())
+            self.move(esquina.x() - self.width() - 16, esquina.y() + 16)
+
+
 def show_info_dialog(parent, title, message, detail=None, button_text="Entendido"):
     AlertDialog.show_info(parent, title, message, detail, button_text)
 
@@ -1098,7 +1408,7 @@ def show_input_dialog(parent, title, message, placeholder=""):
             icon_label.setFixedSize(120, 120)
             try:
                 icon_label.setPixmap(
-                    qta.icon("mdi.qrcode-scan", color=WindowsPhoneTheme.PRIMARY_BLUE).pixmap(QSize(120, 120))
+                    obtener_pixmap("mdi.qrcode-scan", WindowsPhoneTheme.PRIMARY_BLUE, 120)
                 )
             except:
                 icon_label.setText("📷")
@@ -0,0 +1,481 @@
+"""
+Ventana de Conteo Físico de Inventario para HTF POS
+Los escaneos se acumulan en la sesión (memoria + diario local) sin consultar
+la base de datos; al terminar se revisan las diferencias y se aplican todos
+los ajustes de una vez
+"""
+
+from decimal import Decimal
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QCheckBox, QDialog
+)
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtGui import QFont, QColor
+import logging
+
+from ui.components import (
+    WindowsPhoneTheme,
+    TileButton,
+    SectionTitle,
+    ContentPanel,
+    StyledLabel,
+    TouchNumericInput,
+    show_info_dialog,
+    show_success_dialog,
+    show_warning_dialog,
+    show_error_dialog,
+    show_confirmation_dialog
+)
+from services.conteo_fisico import SesionConteo, indexar_catalogo, sesiones_pendientes
+
+ESTILO_TABLA = f"""
+    QTableWidget {{
+        background-color: white;
+        border: none;
+        gridline-color: #e5e7eb;
+        font-family: {WindowsPhoneTheme.FONT_FAMILY};
+        font-size: {WindowsPhoneTheme.FONT_SIZE_NORMAL}px;
+    }}
+    QTableWidget::item:selected {{
+        background-color: {WindowsPhoneTheme.TILE_BLUE};
+        color: white;
+    }}
+    QHeaderView::section {{
+        background-color: {WindowsPhoneTheme.PRIMARY_BLUE};
+        color: white;
+        padding: 8px;
+        border: none;
+        font-weight: bold;
+        font-family: {WindowsPhoneTheme.FONT_FAMILY};
+        font-size: {WindowsPhoneTheme.FONT_SIZE_NORMAL}px;
+    }}
+"""
+
+
+def _formato_cantidad(valor):
+    valor = Decimal(valor or 0)
+    return f"{valor:,.0f}" if valor == valor.to_integral_value() else f"{valor:,.3f}"
+
+
+class DiferenciasConteoDialog(QDialog):
+    """Diferencias del conteo contra el sistema; aceptar = aplicar los ajustes"""
+
+    def __init__(self, diferencias, productos_contados, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diferencias del Conteo")
+        self.setModal(True)
+        self.setMinimumSize(900, 600)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        layout.addWidget(SectionTitle("DIFERENCIAS CONTRA EL SISTEMA"))
+
+        faltante = sum(d['valor_diferencia'] for d in diferencias if d['diferencia'] < 0)
+        sobrante = sum(d['valor_diferencia'] for d in diferencias if d['diferencia'] > 0)
+        resumen = StyledLabel(
+            f"{productos_contados:,} productos contados · {len(diferencias):,} con diferencia · "
+            f"Faltante: ${abs(faltante):,.2f} · Sobrante: ${sobrante:,.2f}",
+            bold=True
+        )
+        resumen.setWordWrap(True)
+        layout.addWidget(resumen)
+
+        aviso = StyledLabel(
+            "Se ajusta la diferencia mostrada. Las ventas registradas después de escanear un "
+            "producto y antes de esta revisión aparecen como faltante: revisa al terminar de contar."
+        )
+        aviso.setWordWrap(True)
+        layout.addWidget(aviso)
+
+        table = QTableWidget(len(diferencias), 6)
+        table.setHorizontalHeaderLabels(["Código", "Producto", "Sistema", "Contado", "Diferencia", "Valor"])
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.setStyleSheet(ESTILO_TABLA)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+
+        table.setUpdatesEnabled(False)
+        for row, d in enumerate(diferencias):
+            valores = [
+                d['codigo_interno'] or '', d['nombre'] or '',
+                _formato_cantidad(d['stock_sistema']), _formato_cantidad(d['contado']),
+                _formato_cantidad(d['diferencia']), f"${d['valor_diferencia']:,.2f}",
+            ]
+            for col, texto in enumerate(valores):
+                item = QTableWidgetItem(texto)
+                if col >= 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if col == 4:
+                    item.setForeground(QColor('#b91c1c') if d['diferencia'] < 0 else QColor('#15803d'))
+                table.setItem(row, col, item)
+        table.setUpdatesEnabled(True)
+        layout.addWidget(table)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
+
+        btn_aplicar = TileButton("Aplicar Ajustes", "fa5s.check", WindowsPhoneTheme.TILE_GREEN)
+        btn_aplicar.setMaximumHeight(120)
+        btn_aplicar.clicked.connect(self.accept)
+        buttons_layout.addWidget(btn_aplicar)
+
+        btn_volver = TileButton("Seguir Contando", "fa5s.arrow-left", WindowsPhoneTheme.TILE_BLUE)
+        btn_volver.setMaximumHeight(120)
+        btn_volver.clicked.connect(self.reject)
+        buttons_layout.addWidget(btn_volver)
+
+        layout.addLayout(buttons_layout)
+
+
+class ConteoFisicoWindow(QWidget):
+    """Captura de un conteo físico por ubicación y conciliación en bloque"""
+
+    cerrar_solicitado = Signal()
+
+    def __init__(self, pg_manager, user_data, parent=None):
+        super().__init__(parent)
+        self.pg_manager = pg_manager
+        self.user_data = user_data
+        self.sesion = None
+        self.filas = {}  # id_producto -> fila de la tabla
+
+        self.setup_ui()
+        self.cargar_ubicaciones()
+        # Después de mostrarse la pantalla, no mientras se construye
+        QTimer.singleShot(0, self.ofrecer_sesion_pendiente)
+
+    def setup_ui(self):
+        """Configurar interfaz principal"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(WindowsPhoneTheme.MARGIN_MEDIUM,
+                                  WindowsPhoneTheme.MARGIN_MEDIUM,
+                                  WindowsPhoneTheme.MARGIN_MEDIUM,
+                                  WindowsPhoneTheme.MARGIN_MEDIUM)
+        layout.setSpacing(WindowsPhoneTheme.MARGIN_SMALL)
+
+        # Ubicación y captura
+        captura_panel = ContentPanel()
+        captura_layout = QHBoxLayout(captura_panel)
+        captura_layout.setSpacing(12)
+
+        captura_layout.addWidget(StyledLabel("Ubicación:", bold=True))
+        self.combo_ubicacion = QComboBox()
+        self.combo_ubicacion.setMinimumHeight(45)
+        self.combo_ubicacion.setMinimumWidth(200)
+        captura_layout.addWidget(self.combo_ubicacion)
+
+        captura_layout.addWidget(StyledLabel("Cantidad:", bold=True))
+        self.input_cantidad = TouchNumericInput(minimum=1, maximum=99999, default_value=1)
+        self.input_cantidad.setMaximumWidth(110)
+        captura_layout.addWidget(self.input_cantidad)
+
+        self.input_codigo = QLineEdit()
+        self.input_codigo.setPlaceholderText("Escanear código de barras o código interno...")
+        self.input_codigo.setMinimumHeight(50)
+        self.input_codigo.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, WindowsPhoneTheme.FONT_SIZE_LARGE))
+        self.input_codigo.returnPressed.connect(self.registrar_escaneo)
+        self.input_codigo.setEnabled(False)
+        captura_layout.addWidget(self.input_codigo, 1)
+
+        layout.addWidget(captura_panel)
+
+        # Productos contados
+        lista_panel = ContentPanel()
+        lista_layout = QVBoxLayout(lista_panel)
+
+        self.info_label = StyledLabel("Sin conteo en curso", bold=True)
+        lista_layout.addWidget(self.info_label)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Código", "Producto", "Contado"])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setStyleSheet(ESTILO_TABLA)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        lista_layout.addWidget(self.table)
+
+        self.check_no_contados = QCheckBox("Poner en 0 los productos de la ubicación que no se contaron")
+        lista_layout.addWidget(self.check_no_contados)
+
+        layout.addWidget(lista_panel)
+
+        # Botones al pie
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
+
+        self.btn_iniciar = TileButton("Nuevo Conteo", "fa5s.play", WindowsPhoneTheme.TILE_GREEN)
+        self.btn_iniciar.clicked.connect(self.iniciar_conteo)
+        buttons_layout.addWidget(self.btn_iniciar)
+
+        self.btn_deshacer = TileButton("Deshacer", "fa5s.undo", WindowsPhoneTheme.TILE_ORANGE)
+        self.btn_deshacer.clicked.connect(self.deshacer)
+        buttons_layout.addWidget(self.btn_deshacer)
+
+        self.btn_revisar = TileButton("Revisar y\nAplicar", "fa5s.clipboard-check", WindowsPhoneTheme.TILE_BLUE)
+        self.btn_revisar.clicked.connect(self.revisar_diferencias)
+        buttons_layout.addWidget(self.btn_revisar)
+
+        self.btn_cancelar = TileButton("Cancelar\nConteo", "fa5s.trash", WindowsPhoneTheme.TILE_RED)
+        self.btn_cancelar.clicked.connect(self.cancelar_conteo)
+        buttons_layout.addWidget(self.btn_cancelar)
+
+        btn_volver = TileButton("Volver", "fa5s.arrow-left", WindowsPhoneTheme.TILE_RED)
+        btn_volver.clicked.connect(self.volver)
+        buttons_layout.addWidget(btn_volver)
+
+        layout.addLayout(buttons_layout)
+        self.actualizar_estado()
+
+    def refrescar_datos(self):
+        """Al reutilizar la pantalla solo se recargan las ubicaciones si no hay conteo en curso"""
+        if self.sesion is None:
+            self.cargar_ubicaciones()
+        else:
+            self.input_codigo.setFocus()
+
+    def cargar_ubicaciones(self):
+        """Cargar ubicaciones activas en el combo"""
+        self.combo_ubicacion.clear()
+        for ubicacion in self.pg_manager.get_ubicaciones():
+            self.combo_ubicacion.addItem(ubicacion['nombre'], ubicacion['id_ubicacion'])
+
+    def actualizar_estado(self):
+        """Habilitar controles según haya o no un conteo en curso"""
+        activo = self.sesion is not None
+        self.combo_ubicacion.setEnabled(not activo)
+        self.btn_iniciar.setEnabled(not activo)
+        self.input_codigo.setEnabled(activo)
+        self.input_cantidad.setEnabled(activo)
+        self.btn_deshacer.setEnabled(activo)
+        self.btn_revisar.setEnabled(activo)
+        self.btn_cancelar.setEnabled(activo)
+
+        if activo:
+            self.info_label.setText(
+                f"{self.combo_ubicacion.currentText()}: {len(self.sesion.conteos):,} productos · "
+                f"{self.sesion.escaneos:,} escaneos"
+            )
+        else:
+            self.info_label.setText("Sin conteo en curso")
+
+    # ========== SESIÓN ==========
+
+    def _cargar_catalogo(self):
+        productos = self.pg_manager.obtener_catalogo_conteo()
+        if not productos:
+            show_error_dialog(self, "Error", "No se pudo cargar el catálogo de productos")
+            return None
+        return indexar_catalogo(productos)
+
+    def iniciar_conteo(self):
+        """Abrir una sesión para la ubicación seleccionada (una consulta: el catálogo)"""
+        id_ubicacion = self.combo_ubicacion.currentData()
+        if id_ubicacion is None:
+            show_warning_dialog(self, "Validación", "Seleccione una ubicación")
+            return
+
+        catalogo = self._cargar_catalogo()
+        if catalogo is None:
+            return
+
+        try:
+            self.sesion = SesionConteo(id_ubicacion, catalogo, id_usuario=self.user_data.get('id_usuario'))
+        except Exception as e:
+            logging.error(f"Error abriendo diario de conteo: {e}")
+            show_error_dialog(self, "Error", f"No se pudo iniciar el conteo:\n{str(e)}")
+            return
+
+        self._limpiar_tabla()
+        self.actualizar_estado()
+        self.input_codigo.setFocus()
+        logging.info(f"Conteo físico iniciado en ubicación {id_ubicacion}: {self.sesion.archivo}")
+
+    def ofrecer_sesion_pendiente(self):
+        """Si quedó un conteo sin aplicar (cierre de la caja), ofrecer retomarlo"""
+        pendientes = sesiones_pendientes()
+        if not pendientes:
+            return
+
+        pendiente = pendientes[-1]
+        indice = self.combo_ubicacion.findData(pendiente['id_ubicacion'])
+        ubicacion = self.combo_ubicacion.itemText(indice) if indice >= 0 else f"#{pendiente['id_ubicacion']}"
+        if not show_confirmation_dialog(
+            self,
+            "Conteo pendiente",
+            f"Hay un conteo sin aplicar de {ubicacion} iniciado el {pendiente['inicio']}.",
+            "¿Desea retomarlo?",
+            confirm_text="Retomar",
+            cancel_text="Después"
+        ):
+            return
+
+        catalogo = self._cargar_catalogo()
+        if catalogo is None:
+            return
+
+        try:
+            self.sesion = SesionConteo.retomar(pendiente['archivo'], catalogo)
+        except Exception as e:
+            logging.error(f"Error retomando conteo {pendiente['archivo']}: {e}")
+            show_error_dialog(self, "Error", f"No se pudo retomar el conteo:\n{str(e)}")
+            return
+
+        if indice >= 0:
+            self.combo_ubicacion.setCurrentIndex(indice)
+        self._limpiar_tabla()
+        self.table.setUpdatesEnabled(False)
+        for id_producto in self.sesion.conteos:
+            self._mostrar_producto(self.sesion.detalle(id_producto), seleccionar=False)
+        self.table.setUpdatesEnabled(True)
+        self.actualizar_estado()
+
+    # ========== CAPTURA ==========
+
+    def registrar_escaneo(self):
+        """Sumar el código escaneado al conteo (sin consultar la base de datos)"""
+        codigo = self.input_codigo.text().strip()
+        self.input_codigo.clear()
+        if not codigo or self.sesion is None:
+            return
+
+        producto = self.sesion.registrar(codigo, self.input_cantidad.value() or 1)
+        if producto is None:
+            show_warning_dialog(self, "Código no encontrado", f"El código {codigo} no corresponde a un producto inventariable")
+            self.input_codigo.setFocus()
+            return
+
+        self.input_cantidad.setValue(1)
+        self._mostrar_producto(producto)
+        self.actualizar_estado()
+
+    def deshacer(self):
+        """Deshacer el último escaneo o corrección"""
+        if self.sesion is None:
+            return
+        producto = self.sesion.deshacer()
+        if producto is None:
+            return
+
+        if producto['id_producto'] in self.sesion.conteos:
+            self._mostrar_producto(producto)
+        else:
+            self._quitar_producto(producto['id_producto'])
+        self.actualizar_estado()
+        self.input_codigo.setFocus()
+
+    def _mostrar_producto(self, producto, seleccionar=True):
+        """Actualizar (o agregar) solo la fila del producto"""
+        fila = self.filas.get(producto['id_producto'])
+        if fila is None:
+            fila = self.table.rowCount()
+            self.table.insertRow(fila)
+            self.filas[producto['id_producto']] = fila
+            self.table.setItem(fila, 0, QTableWidgetItem(producto.get('codigo_interno') or ''))
+            self.table.setItem(fila, 1, QTableWidgetItem(producto.get('nombre') or ''))
+            item = QTableWidgetItem()
+            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(fila, 2, item)
+
+        self.table.item(fila, 2).setText(_formato_cantidad(producto['contado']))
+        if seleccionar:
+            self.table.selectRow(fila)
+            self.table.scrollToItem(self.table.item(fila, 0))
+
+    def _quitar_producto(self, id_producto):
+        fila = self.filas.pop(id_producto, None)
+        if fila is None:
+            return
+        self.table.removeRow(fila)
+        self.filas = {k: (f - 1 if f > fila else f) for k, f in self.filas.items()}
+
+    def _limpiar_tabla(self):
+        self.table.setRowCount(0)
+        self.filas = {}
+
+    # ========== CONCILIACIÓN ==========
+
+    def revisar_diferencias(self):
+        """Calcular diferencias (una consulta) y, si se confirman, aplicar todo en un commit"""
+        if self.sesion is None:
+            return
+        no_contados_en_cero = self.check_no_contados.isChecked()
+        if not self.sesion.conteos and not no_contados_en_cero:
+            show_warning_dialog(self, "Conteo vacío", "Todavía no se ha escaneado ningún producto")
+            return
+
+        diferencias = self.pg_manager.obtener_diferencias_conteo(
+            self.sesion.id_ubicacion, self.sesion.conteos, no_contados_en_cero
+        )
+        if diferencias is None:
+            show_error_dialog(self, "Error", "No se pudieron calcular las diferencias")
+            return
+
+        if not diferencias:
+            if show_confirmation_dialog(
+                self, "Sin diferencias", "El conteo coincide con el sistema.",
+                "¿Cerrar el conteo?", confirm_text="Cerrar", cancel_text="Seguir"
+            ):
+                self._terminar_sesion()
+            return
+
+        dialogo = DiferenciasConteoDialog(diferencias, len(self.sesion.conteos), self)
+        if dialogo.exec() != QDialog.Accepted:
+            self.input_codigo.setFocus()
+            return
+
+        # Se aplican las diferencias revisadas, no el conteo contra el stock de ese momento
+        movimientos = self.pg_manager.aplicar_conteo_fisico(
+            self.sesion.id_ubicacion,
+            diferencias,
+            id_usuario=self.user_data.get('id_usuario'),
+            motivo=f"Conteo físico {self.combo_ubicacion.currentText()}"
+        )
+        if movimientos is None:
+            show_error_dialog(self, "Error", "No se pudieron aplicar los ajustes. El conteo se conserva.")
+            return
+
+        show_success_dialog(self, "Conteo aplicado", f"Se registraron {len(movimientos):,} ajustes de inventario")
+        self._terminar_sesion()
+
+    def cancelar_conteo(self):
+        """Descartar el conteo en curso y su diario"""
+        if self.sesion is None:
+            return
+        if not show_confirmation_dialog(
+            self, "Cancelar conteo", "Se perderán los productos contados.",
+            "¿Desea cancelar el conteo?", confirm_text="Cancelar conteo", cancel_text="Seguir"
+        ):
+            return
+        self._terminar_sesion()
+
+    def _terminar_sesion(self):
+        self.sesion.descartar()
+        self.sesion = None
+        self._limpiar_tabla()
+        self.check_no_contados.setChecked(False)
+        self.actualizar_estado()
+
+    def volver(self):
+        """Salir conservando el conteo: el diario queda para retomarlo"""
+        if self.sesion is not None:
+            show_info_dialog(self, "Conteo en curso", "El conteo queda guardado y puede continuarlo al volver.")
+        self.cerrar_solicitado.emit()
+
+    def liberar(self):
+        """Cerrar el diario antes de destruir la pantalla (queda para retomarlo)"""
+        if self.sesion is not None:
+            self.sesion.cerrar()
+            self.sesion = None
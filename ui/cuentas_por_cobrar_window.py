@@ -7,12 +7,13 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTableWidget, QTableWidgetItem,
     QHeaderView, QLineEdit, QSizePolicy, QFrame,
-    QComboBox, QDateEdit, QLabel, QCheckBox, QScrollArea
+    QComboBox, QDateEdit, QLabel, QCheckBox, QScrollArea, QDialog
 )
 from PySide6.QtCore import Qt, Signal, QDate, QThread, QTimer
 from PySide6.QtGui import QFont
 from datetime import datetime, timedelta
 import logging
+import threading
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -28,34 +29,54 @@ from ui.components import (
     show_error_dialog,
     aplicar_estilo_fecha
 )
+from ui.registrar_pago_dialog import RegistrarPagoDialog
+
+
+# Tramos de antigüedad en el orden en que se muestran
+TRAMOS_ANTIGUEDAD = [('d0_30', "0-30"), ('d31_60', "31-60"), ('d61_90', "61-90"), ('d90_mas', "90+")]
 
 
 class CuentasCobrarLoaderThread(QThread):
-    """Hilo para cargar cuentas por cobrar de forma asíncrona"""
+    """Hilo para cargar una página de cuentas por cobrar de forma asíncrona"""
 
-    cuentas_loaded = Signal(list)
+    cuentas_loaded = Signal(list, object)  # filas de la página, resumen (None si no se pidió)
     error_occurred = Signal(str)
 
-    def __init__(self, pg_manager, filtros=None):
+    def __init__(self, pg_manager, filtros=None, limite=50, desplazamiento=0, con_resumen=True):
         super().__init__()
         self.pg_manager = pg_manager
         self.filtros = filtros or {}
+        self.limite = limite
+        self.desplazamiento = desplazamiento
+        self.con_resumen = con_resumen
         self._is_running = True
+        self.id_hilo = None  # Para cancelar su consulta en el servidor (ver stop)
         self.setTerminationEnabled(True)
 
     def run(self):
         """Cargar cuentas por cobrar desde la base de datos"""
         try:
+            self.id_hilo = threading.get_ident()
             if not self._is_running:
                 logging.info("Thread cancelado antes de iniciar")
                 return
 
             logging.info("Cargando cuentas por cobrar...")
-            rows = self.pg_manager.obtener_cuentas_por_cobrar(filtros=self.filtros)
+            # Conexión propia del hilo: stop() cancela solo estas consultas
+            with self.pg_manager.conexion_de_carga(reporte=True):
+                if not self._is_running:
+                    return
+                # Total y antigüedad solo cuando cambian los filtros (no al cambiar de página)
+                resumen = self.pg_manager.resumir_cuentas_por_cobrar(self.filtros) if self.con_resumen else None
+                if not self._is_running:
+                    return
+                rows = self.pg_manager.obtener_cuentas_por_cobrar(
+                    filtros=self.filtros, limite=self.limite, desplazamiento=self.desplazamiento
+                )
 
             if self._is_running:
                 logging.info(f"✅ Thread obtuvo {len(rows)} registros")
-                self.cuentas_loaded.emit(rows)
+                self.cuentas_loaded.emit(rows, resumen)
             else:
                 logging.info("Thread cancelado antes de emitir datos")
 
@@ -67,9 +88,11 @@ class CuentasCobrarLoaderThread(QThread):
                 logging.info(f"Error en thread cancelado: {e}")
 
     def stop(self):
-        """Detener el thread de forma segura"""
+        """Detener el thread de forma segura y liberar la conexión cancelando su consulta"""
         logging.info("🛑 Señal de parada enviada al thread")
         self._is_running = False
+        if self.id_hilo is not None:
+            self.pg_manager.cancelar_consulta(self.id_hilo)
 
 
 class CuentasPorCobrarWindow(QWidget):
@@ -82,13 +105,19 @@ class CuentasPorCobrarWindow(QWidget):
         super().__init__(parent)
         self.pg_manager = pg_manager
         self.user_data = user_data
-        self.cuentas_data = []
-        self.cuentas_filtradas = []
+        self.cuentas_data = []  # Filas de la página actual (paginación en el servidor)
+        self.total_cuentas = 0
         self.loader_thread = None
         self.pagina_actual = 0  # Para paginación
         self.items_por_pagina = 50
         self._is_visible = True
 
+        # Los filtros consultan al servidor: esperar a que el usuario deje de escribir
+        self.timer_filtros = QTimer(self)
+        self.timer_filtros.setSingleShot(True)
+        self.timer_filtros.setInterval(300)
+        self.timer_filtros.timeout.connect(self.cargar_cuentas)
+
         self.setup_ui()
         self.cargar_cuentas()
 
@@ -165,6 +194,10 @@ class CuentasPorCobrarWindow(QWidget):
         filters_row2 = self.create_fecha_filters()
         filters_layout.addLayout(filters_row2)
         
+        # Saldo por antigüedad de las cuentas filtradas
+        self.antiguedad_label = StyledLabel("", bold=True, size=WindowsPhoneTheme.FONT_SIZE_SMALL)
+        filters_layout.addWidget(self.antiguedad_label)
+        
         return filters_panel
     
     def create_estado_filter(self):
@@ -327,6 +360,11 @@ class CuentasPorCobrarWindow(QWidget):
         btn_ver_detalles.setMaximumWidth(150)
         info_buttons_layout.addWidget(btn_ver_detalles)
         
+        btn_antiguedad = TileButton("Antigüedad", "fa5s.hourglass-half", WindowsPhoneTheme.TILE_ORANGE)
+        btn_antiguedad.clicked.connect(self.ver_antiguedad_clientes)
+        btn_antiguedad.setMaximumWidth(150)
+        info_buttons_layout.addWidget(btn_antiguedad)
+        
         btn_registrar_pago = TileButton("Registrar Pago", "fa5s.credit-card", WindowsPhoneTheme.TILE_GREEN)
         btn_registrar_pago.clicked.connect(self.registrar_pago)
         btn_registrar_pago.setMaximumWidth(180)
@@ -343,8 +381,12 @@ class CuentasPorCobrarWindow(QWidget):
         """Manejar cambios en la selección de la tabla"""
         pass  # Los botones ahora están siempre habilitados
     
-    def cargar_cuentas(self):
-        """Cargar cuentas por cobrar"""
+    def refrescar_datos(self):
+        """Recargar las cuentas al reutilizar la pantalla (la carga se detiene al ocultarla)"""
+        self.cargar_cuentas()
+    
+    def cargar_cuentas(self, con_resumen=True):
+        """Cargar la página actual de cuentas por cobrar (y el resumen si cambiaron los filtros)"""
         self.detener_carga()
 
         # Limpiar tabla y mostrar indicador de carga en info label
@@ -353,7 +395,12 @@ class CuentasPorCobrarWindow(QWidget):
 
         # Crear y iniciar thread
         filtros = self.obtener_filtros()
-        self.loader_thread = CuentasCobrarLoaderThread(self.pg_manager, filtros)
+        self.loader_thread = CuentasCobrarLoaderThread(
+            self.pg_manager, filtros,
+            limite=self.items_por_pagina,
+            desplazamiento=self.pagina_actual * self.items_por_pagina,
+            con_resumen=con_resumen
+        )
         self.loader_thread.cuentas_loaded.connect(self.on_cuentas_cargadas)
         self.loader_thread.error_occurred.connect(self.on_error_carga)
         self.loader_thread.start()
@@ -383,54 +430,22 @@ class CuentasPorCobrarWindow(QWidget):
         return filtros
 
     def aplicar_filtros(self):
-        """Aplicar filtros a los datos cargados"""
-        if not self.cuentas_data:
-            return
+        """Volver a la primera página y consultar con los filtros nuevos"""
+        self.pagina_actual = 0
+        self.timer_filtros.start()
 
-        filtros = self.obtener_filtros()
-        self.cuentas_filtradas = self.filtrar_cuentas(self.cuentas_data, filtros)
-        self.pagina_actual = 0  # Resetear paginación al filtrar
+    def on_cuentas_cargadas(self, cuentas, resumen):
+        """Manejar la página cargada"""
+        self.cuentas_data = cuentas
+        if resumen is not None:
+            self.total_cuentas = resumen['cuentas']
+            self.actualizar_antiguedad(resumen)
         self.actualizar_tabla()
 
-    def filtrar_cuentas(self, cuentas, filtros):
-        """Filtrar cuentas según criterios"""
-        filtradas = cuentas.copy()
-
-        # Filtrar por búsqueda general
-        if 'busqueda' in filtros:
-            busqueda = filtros['busqueda'].lower()
-            filtradas = [
-                c for c in filtradas 
-                if busqueda in c.get('cliente', '').lower() or 
-                   busqueda in c.get('numero_cuenta', '').lower()
-            ]
-
-        # Filtrar por estado
-        if 'estado' in filtros:
-            estado_filter = filtros['estado']
-            filtradas = [c for c in filtradas if c.get('estado') == estado_filter]
-
-        # Filtrar por fechas
-        if 'fecha_desde' in filtros:
-            fecha_desde = filtros['fecha_desde']
-            filtradas = [c for c in filtradas if c.get('fecha_vencimiento') and c.get('fecha_vencimiento') >= fecha_desde]
-
-        if 'fecha_hasta' in filtros:
-            fecha_hasta = filtros['fecha_hasta']
-            filtradas = [c for c in filtradas if c.get('fecha_vencimiento') and c.get('fecha_vencimiento') <= fecha_hasta]
-
-        # Solo pendientes
-        if filtros.get('solo_pendientes'):
-            filtradas = [c for c in filtradas if c.get('estado') in ['activa', 'vencida'] and c.get('saldo', 0) > 0]
-
-        return filtradas
-
-    def on_cuentas_cargadas(self, cuentas):
-        """Manejar cuentas cargadas"""
-        self.cuentas_data = cuentas
-        self.pagina_actual = 0
-        self.aplicar_filtros()
-        self.actualizar_info_label()
+    def actualizar_antiguedad(self, resumen):
+        """Mostrar el saldo total y por tramo de antigüedad"""
+        tramos = " | ".join(f"{etiqueta} días: ${resumen[clave]:,.2f}" for clave, etiqueta in TRAMOS_ANTIGUEDAD)
+        self.antiguedad_label.setText(f"Saldo: ${resumen['saldo']:,.2f}   —   {tramos}")
 
     def on_error_carga(self, error_msg):
         """Manejar error en carga"""
@@ -442,15 +457,8 @@ class CuentasPorCobrarWindow(QWidget):
         """Actualizar la tabla con datos filtrados y paginados"""
         self.table.setRowCount(0)
         
-        # Calcular rango de paginación
-        total_items = len(self.cuentas_filtradas)
-        inicio = self.pagina_actual * self.items_por_pagina
-        fin = min(inicio + self.items_por_pagina, total_items)
-        
-        # Obtener items de la página actual
-        items_pagina = self.cuentas_filtradas[inicio:fin]
-
-        for cuenta in items_pagina:
+        # La página ya viene recortada del servidor
+        for cuenta in self.cuentas_data:
             row = self.table.rowCount()
             self.table.insertRow(row)
 
@@ -516,11 +524,11 @@ class CuentasPorCobrarWindow(QWidget):
     
     def actualizar_info_label(self):
         """Actualizar etiqueta de información con datos de paginación"""
-        total_items = len(self.cuentas_filtradas)
+        total_items = self.total_cuentas
         total_pages = (total_items + self.items_por_pagina - 1) // self.items_por_pagina if total_items > 0 else 0
         
         inicio = self.pagina_actual * self.items_por_pagina + 1
-        fin = min((self.pagina_actual + 1) * self.items_por_pagina, total_items)
+        fin = min(self.pagina_actual * self.items_por_pagina + len(self.cuentas_data), total_items)
         
         if total_items == 0:
             self.info_label.setText("No se encontraron cuentas por cobrar")
@@ -537,15 +545,15 @@ class CuentasPorCobrarWindow(QWidget):
         """Ir a la página anterior"""
         if self.pagina_actual > 0:
             self.pagina_actual -= 1
-            self.actualizar_tabla()
+            self.cargar_cuentas(con_resumen=False)
     
     def proxima_pagina(self):
         """Ir a la página siguiente"""
-        total_items = len(self.cuentas_filtradas)
+        total_items = self.total_cuentas
         max_pagina = (total_items - 1) // self.items_por_pagina
         if self.pagina_actual < max_pagina:
             self.pagina_actual += 1
-            self.actualizar_tabla()
+            self.cargar_cuentas(con_resumen=False)
 
     def on_seleccion_cambiada(self):
         """Manejar cambio de selección"""
@@ -578,6 +586,44 @@ class CuentasPorCobrarWindow(QWidget):
 
         show_info_dialog(self, "Detalles de Cuenta por Cobrar", detalles)
 
+    def ver_antiguedad_clientes(self):
+        """Antigüedad de saldos por cliente (una consulta agrupada)"""
+        filtros = self.obtener_filtros()
+        # El rango de fechas del listado no aplica: se muestran todas las cuentas abiertas
+        filtros.pop('fecha_desde', None)
+        filtros.pop('fecha_hasta', None)
+        clientes = self.pg_manager.obtener_antiguedad_cxc(filtros)
+        if not clientes:
+            show_info_dialog(self, "Antigüedad de Saldos", "No hay cuentas por cobrar abiertas.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Antigüedad de Saldos por Cliente")
+        dialog.setMinimumSize(900, 500)
+        layout = QVBoxLayout(dialog)
+
+        columnas = ["Cliente", "Cuentas", "Saldo"] + [f"{etiqueta} días" for _, etiqueta in TRAMOS_ANTIGUEDAD]
+        tabla = QTableWidget(len(clientes), len(columnas))
+        tabla.setHorizontalHeaderLabels(columnas)
+        tabla.verticalHeader().setVisible(False)
+        tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        tabla.setAlternatingRowColors(True)
+        tabla.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        for row, cliente in enumerate(clientes):
+            tabla.setItem(row, 0, QTableWidgetItem(cliente['cliente']))
+            tabla.setItem(row, 1, QTableWidgetItem(str(cliente['cuentas'])))
+            valores = [cliente['saldo']] + [cliente[clave] for clave, _ in TRAMOS_ANTIGUEDAD]
+            for col, valor in enumerate(valores, 2):
+                item = QTableWidgetItem(f"${valor:,.2f}" if valor else "")
+                item.setData(Qt.TextAlignmentRole, Qt.AlignRight | Qt.AlignVCenter)
+                if col >= 5 and valor:  # 61 días o más
+                    item.setForeground(Qt.red)
+                tabla.setItem(row, col, item)
+
+        layout.addWidget(tabla)
+        dialog.exec()
+
     def registrar_pago(self):
         """Registrar un pago para la cuenta seleccionada"""
         current_row = self.table.currentRow()
@@ -585,8 +631,29 @@ class CuentasPorCobrarWindow(QWidget):
             show_warning_dialog(self, "Selección Requerida", "Por favor selecciona una cuenta para registrar un pago.")
             return
 
-        # Por ahora mostrar mensaje
-        show_info_dialog(self, "Funcionalidad Pendiente", "La funcionalidad de registro de pagos estará disponible próximamente.")
+        cuenta = self.table.item(current_row, 0).data(Qt.UserRole)
+        if cuenta.get('estado') == 'cancelada' or (cuenta.get('saldo') or 0) <= 0:
+            show_warning_dialog(self, "Sin Saldo", "La cuenta seleccionada no tiene saldo pendiente.")
+            return
+
+        dialogo = RegistrarPagoDialog(f"{cuenta['numero_cuenta']} · {cuenta.get('cliente', '')}", cuenta['saldo'], self)
+        if dialogo.exec() != QDialog.Accepted:
+            return
+
+        resultado = self.pg_manager.registrar_pago_cxc(
+            cuenta['id_cxc'], dialogo.monto, dialogo.metodo_pago,
+            id_usuario=self.user_data.get('id_usuario')
+        )
+        if resultado is None:
+            show_error_dialog(self, "Error", "No se pudo registrar el pago")
+            return
+
+        show_info_dialog(
+            self, "Pago Registrado",
+            f"Pago de ${dialogo.monto:,.2f} registrado. Saldo restante: ${resultado['saldo']:,.2f}"
+        )
+        # La página y la antigüedad de saldos cambian con el pago
+        self.cargar_cuentas(con_resumen=True)
 
     def ver_historial_pagos(self):
         """Ver historial de pagos de la cuenta seleccionada"""
@@ -12,7 +12,6 @@ from PySide6.QtCore import Qt, Signal, QDate, QTimer
 from PySide6.QtGui import QFont
 import logging
 from datetime import datetime
-import qtawesome as qta
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -26,8 +25,10 @@ from ui.components import (
     show_info_dialog,
     show_warning_dialog,
     show_error_dialog,
-    aplicar_estilo_fecha
+    aplicar_estilo_fecha,
+    crear_boton_fila
 )
+from ui.registrar_pago_dialog import RegistrarPagoDialog
 
 
 class CuentasPorPagarWindow(QWidget):
@@ -39,8 +40,8 @@ class CuentasPorPagarWindow(QWidget):
         super().__init__(parent)
         self.pg_manager = pg_manager
         self.user_data = user_data
-        self.cuentas_data = []  # Almacenar todas las cuentas cargadas
-        self.cuentas_filtradas = []  # Cuentas después de aplicar filtros
+        self.cuentas_data = []  # Cuentas de la página actual (paginación en el servidor)
+        self.total_cuentas = 0
         self.pagina_actual = 0
         self.items_por_pagina = 50
 
@@ -84,12 +85,16 @@ class CuentasPorPagarWindow(QWidget):
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
         
+        btn_por_vencer = TileButton("Por Vencer", "fa5s.calendar-times", WindowsPhoneTheme.TILE_ORANGE)
+        btn_por_vencer.clicked.connect(self.ver_por_vencer)
+        
         btn_exportar = TileButton("Exportar", "fa5s.download", WindowsPhoneTheme.TILE_GREEN)
         btn_exportar.clicked.connect(self.exportar_datos)
         
         btn_cerrar = TileButton("Cerrar", "fa5s.times", WindowsPhoneTheme.TILE_RED)
         btn_cerrar.clicked.connect(self.cerrar_solicitado.emit)
         
+        buttons_layout.addWidget(btn_por_vencer)
         buttons_layout.addWidget(btn_exportar)
         buttons_layout.addWidget(btn_cerrar)
         
@@ -117,7 +122,7 @@ class CuentasPorPagarWindow(QWidget):
         self.fecha_desde.setCalendarPopup(True)
         self.fecha_desde.setMinimumHeight(40)
         self.fecha_desde.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, WindowsPhoneTheme.FONT_SIZE_NORMAL))
-        self.fecha_desde.dateChanged.connect(self.cargar_cuentas_completo)
+        self.fecha_desde.dateChanged.connect(self.aplicar_filtros)
         aplicar_estilo_fecha(self.fecha_desde)
         desde_layout.addWidget(self.fecha_desde)
         filters_layout.addWidget(desde_container, stretch=1)
@@ -134,7 +139,7 @@ class CuentasPorPagarWindow(QWidget):
         self.fecha_hasta.setCalendarPopup(True)
         self.fecha_hasta.setMinimumHeight(40)
         self.fecha_hasta.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, WindowsPhoneTheme.FONT_SIZE_NORMAL))
-        self.fecha_hasta.dateChanged.connect(self.cargar_cuentas_completo)
+        self.fecha_hasta.dateChanged.connect(self.aplicar_filtros)
         aplicar_estilo_fecha(self.fecha_hasta)
         hasta_layout.addWidget(self.fecha_hasta)
         filters_layout.addWidget(hasta_container, stretch=1)
@@ -207,6 +212,10 @@ class CuentasPorPagarWindow(QWidget):
         self.info_label = StyledLabel("", size=WindowsPhoneTheme.FONT_SIZE_SMALL)
         info_layout.addWidget(self.info_label, stretch=1)
 
+        # Saldo pendiente y vencido del listado filtrado
+        self.saldo_label = StyledLabel("", bold=True, size=WindowsPhoneTheme.FONT_SIZE_SMALL)
+        info_layout.addWidget(self.saldo_label)
+
         # Botones de paginación
         self.btn_pagina_anterior = CompactNavButton(
             "Anterior",
@@ -234,89 +243,63 @@ class CuentasPorPagarWindow(QWidget):
         """Reiniciar timer cuando cambia el texto de búsqueda"""
         self.scanner_timer.start()
 
+    def refrescar_datos(self):
+        """Recargar las cuentas del rango de fechas elegido al reutilizar la pantalla"""
+        self.cargar_cuentas_completo()
+
+    def obtener_filtros(self):
+        """Filtros actuales para la consulta"""
+        filtros = {
+            'fecha_desde': self.fecha_desde.date().toPython(),
+            'fecha_hasta': self.fecha_hasta.date().toPython(),
+        }
+
+        search_text = self.search_bar.text().strip()
+        if search_text:
+            filtros['busqueda'] = search_text
+
+        estado_filtro = self.estado_combo.currentText()
+        if estado_filtro != "Todos":
+            filtros['estado'] = estado_filtro
+
+        return filtros
+
     def cargar_cuentas_completo(self):
-        """Cargar cuentas por pagar desde la base de datos"""
+        """Cargar el total y el saldo del listado filtrado y su primera página"""
         try:
-            fecha_desde = self.fecha_desde.date().toPython()
-            fecha_hasta = self.fecha_hasta.date().toPython()
-
-            # Consulta PostgreSQL
-            cuentas = self.pg_manager.query("""
-                SELECT
-                    cxp.id_cuenta_pagar,
-                    cxp.numero_cuenta,
-                    cxp.fecha_cuenta,
-                    prov.razon_social as proveedor,
-                    cxp.total,
-                    cxp.saldo,
-                    cxp.estado
-                FROM cuentas_por_pagar cxp
-                LEFT JOIN ca_proveedores prov ON cxp.id_proveedor = prov.id_proveedor
-                WHERE cxp.fecha_cuenta >= %s AND cxp.fecha_cuenta <= %s
-                ORDER BY cxp.fecha_cuenta DESC
-            """, (fecha_desde, fecha_hasta))
-
-            # Convertir a formato esperado
-            self.cuentas_data = []
-            for cuenta in cuentas:
-                cuenta_dict = {
-                    'id_cuenta_pagar': cuenta['id_cuenta_pagar'],
-                    'numero_cuenta': cuenta['numero_cuenta'],
-                    'fecha_cuenta': cuenta['fecha_cuenta'],
-                    'proveedor': cuenta['proveedor'] or 'N/A',
-                    'total': cuenta['total'],
-                    'saldo': cuenta['saldo'],
-                    'estado': cuenta['estado']
-                }
-                self.cuentas_data.append(cuenta_dict)
-
-            # Aplicar filtros
-            self.aplicar_filtros()
+            resumen = self.pg_manager.resumir_cuentas_por_pagar(self.obtener_filtros())
+            self.total_cuentas = resumen['cuentas']
+
+            texto = f"Saldo pendiente: ${resumen['saldo']:,.2f}"
+            if resumen['vencidas']:
+                texto += f"  |  Vencido: ${resumen['saldo_vencido']:,.2f} ({resumen['vencidas']} cuentas)"
+            self.saldo_label.setText(texto)
+
+            self.pagina_actual = 0
+            self.cargar_pagina()
 
         except Exception as e:
             logging.error(f"Error cargando cuentas por pagar: {e}")
             show_warning_dialog(self, "Error", f"Error al cargar cuentas: {e}")
 
     def aplicar_filtros(self):
-        """Aplicar filtros a los datos de cuentas"""
-        try:
-            # Filtro de búsqueda
-            search_text = self.search_bar.text().lower().strip()
-
-            # Filtro de estado
-            estado_filtro = self.estado_combo.currentText()
-            if estado_filtro == "Todos":
-                estado_filtro = None
-
-            # Aplicar filtros
-            self.cuentas_filtradas = []
-            for cuenta in self.cuentas_data:
-                # Filtro de búsqueda
-                if search_text:
-                    searchable = f"{cuenta['numero_cuenta']} {cuenta['proveedor']} {cuenta['total']}".lower()
-                    if search_text not in searchable:
-                        continue
-
-                # Filtro de estado
-                if estado_filtro and cuenta['estado'] != estado_filtro:
-                    continue
-
-                self.cuentas_filtradas.append(cuenta)
-
-            # Actualizar paginación
-            self.pagina_actual = 0
-            self.actualizar_tabla()
+        """Los filtros se aplican en la base de datos"""
+        self.cargar_cuentas_completo()
 
-        except Exception as e:
-            logging.error(f"Error aplicando filtros: {e}")
+    def cargar_pagina(self):
+        """Consultar solo las cuentas de la página actual"""
+        self.cuentas_data = self.pg_manager.obtener_cuentas_por_pagar(
+            self.obtener_filtros(),
+            limite=self.items_por_pagina,
+            desplazamiento=self.pagina_actual * self.items_por_pagina
+        )
+        self.actualizar_tabla()
 
     def actualizar_tabla(self):
-        """Actualizar tabla con datos filtrados y paginados"""
+        """Actualizar tabla con la página cargada"""
         try:
-            # Calcular índices de paginación
             inicio = self.pagina_actual * self.items_por_pagina
-            fin = inicio + self.items_por_pagina
-            cuentas_pagina = self.cuentas_filtradas[inicio:fin]
+            cuentas_pagina = self.cuentas_data
 
             # Configurar tabla
             self.history_table.setRowCount(len(cuentas_pagina))
@@ -342,35 +325,22 @@ class CuentasPorPagarWindow(QWidget):
                 self.history_table.setItem(row, 5, QTableWidgetItem(cuenta['estado'].title()))
 
                 # Botón detalles con icono
-                btn_detalles = QPushButton()
-                btn_detalles.setIcon(qta.icon('fa5s.eye', color='white'))
-                btn_detalles.setToolTip("Ver detalle de la cuenta")
+                btn_detalles = crear_boton_fila('detalle', 'fa5s.eye', tooltip="Ver detalle de la cuenta")
                 btn_detalles.setFixedWidth(40)
                 btn_detalles.setMinimumHeight(35)
-                btn_detalles.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {WindowsPhoneTheme.TILE_BLUE};
-                        color: white;
-                        border: none;
-                        border-radius: 3px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: #1976d2;
-                    }}
-                """)
                 btn_detalles.clicked.connect(lambda checked, cid=cuenta['id_cuenta_pagar']: self.ver_detalles_cuenta(cid))
                 self.history_table.setCellWidget(row, 6, btn_detalles)
 
             # Actualizar controles de paginación
-            total_paginas = (len(self.cuentas_filtradas) + self.items_por_pagina - 1) // self.items_por_pagina
+            total_cuentas = self.total_cuentas
+            total_paginas = (total_cuentas + self.items_por_pagina - 1) // self.items_por_pagina
             self.btn_pagina_anterior.setEnabled(self.pagina_actual > 0)
             self.btn_proxima_pagina.setEnabled(self.pagina_actual < total_paginas - 1)
 
             # Actualizar etiqueta de información
-            total_cuentas = len(self.cuentas_filtradas)
             if total_cuentas > 0:
                 self.info_label.setText(
-                    f"Mostrando {inicio + 1}-{min(fin, total_cuentas)} de {total_cuentas} cuentas "
+                    f"Mostrando {inicio + 1}-{inicio + len(cuentas_pagina)} de {total_cuentas} cuentas "
                     f"(Página {self.pagina_actual + 1} de {total_paginas})"
                 )
             else:
@@ -383,14 +353,14 @@ class CuentasPorPagarWindow(QWidget):
         """Ir a página anterior"""
         if self.pagina_actual > 0:
             self.pagina_actual -= 1
-            self.actualizar_tabla()
+            self.cargar_pagina()
 
     def proxima_pagina(self):
         """Ir a página siguiente"""
-        total_paginas = (len(self.cuentas_filtradas) + self.items_por_pagina - 1) // self.items_por_pagina
+        total_paginas = (self.total_cuentas + self.items_por_pagina - 1) // self.items_por_pagina
         if self.pagina_actual < total_paginas - 1:
             self.pagina_actual += 1
-            self.actualizar_tabla()
+            self.cargar_pagina()
 
     def limpiar_filtros(self):
         """Limpiar todos los filtros"""
@@ -400,6 +370,46 @@ class CuentasPorPagarWindow(QWidget):
         self.fecha_hasta.setDate(QDate.currentDate())
         self.cargar_cuentas_completo()
 
+    def ver_por_vencer(self):
+        """Cuentas abiertas vencidas o que vencen en los próximos 7 días"""
+        cuentas = self.pg_manager.obtener_cxp_por_vencer(dias=7)
+        if not cuentas:
+            show_info_dialog(self, "Por Vencer", "No hay cuentas vencidas ni por vencer en los próximos 7 días.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Cuentas Vencidas y por Vencer (7 días)")
+        dialog.setModal(True)
+        dialog.resize(800, 450)
+        layout = QVBoxLayout(dialog)
+
+        tabla = QTableWidget(len(cuentas), 5)
+        tabla.setHorizontalHeaderLabels(["Número", "Proveedor", "Vence", "Días", "Saldo"])
+        tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        tabla.verticalHeader().setVisible(False)
+        tabla.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+
+        for row, cuenta in enumerate(cuentas):
+            tabla.setItem(row, 0, QTableWidgetItem(cuenta['numero_cuenta']))
+            tabla.setItem(row, 1, QTableWidgetItem(cuenta['proveedor']))
+            tabla.setItem(row, 2, QTableWidgetItem(cuenta['fecha_vencimiento'].strftime('%d/%m/%Y')))
+            dias = cuenta['dias_para_vencer']
+            dias_item = QTableWidgetItem(f"Vencida hace {-dias}" if dias < 0 else ("Hoy" if dias == 0 else f"En {dias}"))
+            if dias < 0:
+                dias_item.setForeground(Qt.red)
+            tabla.setItem(row, 3, dias_item)
+            saldo_item = QTableWidgetItem(f"${cuenta['saldo']:,.2f}")
+            saldo_item.setData(Qt.TextAlignmentRole, Qt.AlignRight | Qt.AlignVCenter)
+            tabla.setItem(row, 4, saldo_item)
+
+        layout.addWidget(tabla)
+
+        btn_cerrar = TileButton("Cerrar", "fa5s.times", WindowsPhoneTheme.TILE_RED)
+        btn_cerrar.clicked.connect(dialog.accept)
+        layout.addWidget(btn_cerrar)
+
+        dialog.exec()
+
     def ver_detalles_cuenta(self, id_cuenta):
         """Ver detalles de una cuenta por pagar"""
         try:
@@ -460,10 +470,19 @@ class CuentasPorPagarWindow(QWidget):
                 productos_label.setWordWrap(True)
                 layout.addWidget(productos_label)
 
+            buttons_layout = QHBoxLayout()
+
+            # Registrar pago si la cuenta tiene saldo
+            if cuenta['estado'] != 'cancelada' and cuenta['saldo'] > 0:
+                btn_pagar = TileButton("Registrar Pago", "fa5s.credit-card", WindowsPhoneTheme.TILE_GREEN)
+                btn_pagar.clicked.connect(lambda: self.registrar_pago(cuenta, dialog))
+                buttons_layout.addWidget(btn_pagar)
+
             # Botón cerrar
             btn_cerrar = TileButton("Cerrar", "fa5s.times", WindowsPhoneTheme.TILE_RED)
             btn_cerrar.clicked.connect(dialog.accept)
-            layout.addWidget(btn_cerrar)
+            buttons_layout.addWidget(btn_cerrar)
+            layout.addLayout(buttons_layout)
 
             dialog.exec()
 
@@ -471,6 +490,30 @@ class CuentasPorPagarWindow(QWidget):
             logging.error(f"Error mostrando detalles: {e}")
             show_error_dialog(self, "Error", f"Error al mostrar detalles: {e}")
 
+    def registrar_pago(self, cuenta, dialog_detalles):
+        """Registrar un pago a la cuenta y recargar saldos y página"""
+        dialogo = RegistrarPagoDialog(
+            f"{cuenta['numero_cuenta']} · {cuenta['razon_social'] or 'N/A'}", cuenta['saldo'], self
+        )
+        if dialogo.exec() != QDialog.Accepted:
+            return
+
+        resultado = self.pg_manager.registrar_pago_cxp(
+            cuenta['id_cuenta_pagar'], dialogo.monto, dialogo.metodo_pago,
+            id_usuario=self.user_data.get('id_usuario')
+        )
+        if resultado is None:
+            show_error_dialog(self, "Error", "No se pudo registrar el pago")
+            return
+
+        dialog_detalles.accept()
+        show_info_dialog(
+            self, "Pago Registrado",
+            f"Pago de ${dialogo.monto:,.2f} registrado. Saldo restante: ${resultado['saldo']:,.2f}"
+        )
+        # El saldo pendiente/vencido del listado y la página cambian con el pago
+        self.cargar_cuentas_completo()
+
     def exportar_datos(self):
         """Exportar datos a archivo Excel"""
         try:
@@ -490,25 +533,12 @@ class CuentasPorPagarWindow(QWidget):
                 )
                 return
             
-            # Obtener rango de fechas
-            fecha_desde = self.fecha_desde.date().toPython()
-            fecha_hasta = self.fecha_hasta.date().toPython()
-            
-            # Obtener datos de cuentas por pagar usando PostgreSQL
-            cuentas_raw = self.pg_manager.query("""
-                SELECT
-                    cxp.numero_cuenta,
-                    cxp.fecha_cuenta,
-                    prov.razon_social as proveedor,
-                    cxp.total,
-                    cxp.saldo,
-                    cxp.estado,
-                    cxp.numero_factura
-                FROM cuentas_por_pagar cxp
-                LEFT JOIN ca_proveedores prov ON cxp.id_proveedor = prov.id_proveedor
-                WHERE cxp.fecha_cuenta >= %s AND cxp.fecha_cuenta <= %s
-                ORDER BY cxp.fecha_cuenta DESC
-            """, (fecha_desde, fecha_hasta))
+            # Cuentas del rango de fechas (sin paginar)
+            filtros = {
+                'fecha_desde': self.fecha_desde.date().toPython(),
+                'fecha_hasta': self.fecha_hasta.date().toPython(),
+            }
+            cuentas_raw = self.pg_manager.obtener_cuentas_por_pagar(filtros)
             
             # Crear libro de Excel
             wb = Workbook()
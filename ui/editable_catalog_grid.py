@@ -11,7 +11,7 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor, QBrush
 import logging
 
-from ui.components import WindowsPhoneTheme, TileButton, StyledLabel, show_info_dialog, show_warning_dialog, show_error_dialog, create_page_layout, ContentPanel, SearchBar
+from ui.components import WindowsPhoneTheme, TileButton, StyledLabel, show_info_dialog, show_warning_dialog, show_error_dialog, create_page_layout, ContentPanel, SearchBar, cambiar_variante
 
 
 class EditableCatalogGrid(QWidget):
@@ -325,18 +325,12 @@ class EditableCatalogGrid(QWidget):
             
             # Unidad Medida (editable - Combo)
             combo_unidad = QComboBox()
+            combo_unidad.setObjectName("comboCelda")
             combo_unidad.addItems(self.UNIDADES_MEDIDA)
             valor_actual = str(producto.get('unidad_medida', '') or '')
             if valor_actual in self.UNIDADES_MEDIDA:
                 combo_unidad.setCurrentText(valor_actual)
             combo_unidad.currentTextChanged.connect(lambda text, r=row: self._on_combo_changed(r, 17, text))
-            combo_unidad.setStyleSheet("""
-                QComboBox {
-                    padding: 4px;
-                    border: none;
-                    background-color: white;
-                }
-            """)
             tabla.setCellWidget(row, 17, combo_unidad)
             
             # Activo (editable)
@@ -366,13 +360,7 @@ class EditableCatalogGrid(QWidget):
                 # Resaltar celda modificada
                 widget = tabla.cellWidget(row, col)
                 if widget:
-                    widget.setStyleSheet(f"""
-                        QComboBox {{
-                            padding: 4px;
-                            border: 2px solid #ff8c00;
-                            background-color: #fff3cd;
-                        }}
-                    """)
+                    cambiar_variante(widget, "modificado", True)
                 
                 self.cambios_pendientes[codigo][campo] = text
                 self.actualizar_label_cambios()
@@ -435,39 +423,44 @@ class EditableCatalogGrid(QWidget):
             total_guardados = 0
             errores = []
             
-            for codigo, cambios in self.cambios_pendientes.items():
-                try:
-                    # Convertir valores booleanos
-                    for campo in ['activo', 'requiere_refrigeracion', 'es_inventariable', 'permite_venta_sin_stock', 'aplica_ieps', 'aplica_iva']:
-                        if campo in cambios:
-                            cambios[campo] = cambios[campo].lower() in ['sí', 'si', 'true', '1']
-                    
-                    # Convertir precios y costos a float
-                    for campo in ['precio_venta', 'precio_mayoreo', 'costo_promedio', 'porcentaje_ieps', 'porcentaje_iva']:
-                        if campo in cambios and cambios[campo]:
+            # Todo el lote en un solo commit al final
+            with self.pg_manager.transaccion():
+                for codigo, cambios in self.cambios_pendientes.items():
+                    try:
+                        # Convertir valores booleanos
+                        for campo in ['activo', 'requiere_refrigeracion', 'es_inventariable', 'permite_venta_sin_stock', 'aplica_ieps', 'aplica_iva']:
+                            if campo in cambios:
+                                cambios[campo] = cambios[campo].lower() in ['sí', 'si', 'true', '1']
+                        
+                        # Convertir precios y costos a float
+                        for campo in ['precio_venta', 'precio_mayoreo', 'costo_promedio', 'porcentaje_ieps', 'porcentaje_iva']:
+                            if campo in cambios and cambios[campo]:
+                                try:
+                                    cambios[campo] = float(cambios[campo])
+                                except ValueError:
+                                    cambios[campo] = 0.0
+                        
+                        # Convertir cantidades a int/float según corresponda
+                        if 'cantidad_mayoreo' in cambios and cambios['cantidad_mayoreo']:
                             try:
-                                cambios[campo] = float(cambios[campo])
+                                cambios['cantidad_mayoreo'] = int(float(cambios['cantidad_mayoreo']))
                             except ValueError:
-                                cambios[campo] = 0.0
-                    
-                    # Convertir cantidades a int/float según corresponda
-                    if 'cantidad_mayoreo' in cambios and cambios['cantidad_mayoreo']:
-                        try:
-                            cambios['cantidad_mayoreo'] = int(float(cambios['cantidad_mayoreo']))
-                        except ValueError:
-                            cambios['cantidad_mayoreo'] = None
-                    
-                    # Convertir cantidad_medida a float (puede ser None/vacío)
-                    if 'cantidad_medida' in cambios:
-                        cambios['cantidad_medida'] = float(cambios['cantidad_medida']) if cambios['cantidad_medida'].strip() else None
-                    
-                    # Actualizar en base de datos
-                    self.pg_manager.actualizar_producto(codigo, cambios)
-                    total_guardados += 1
+                                cambios['cantidad_mayoreo'] = None
+                        
+                        # Convertir cantidad_medida a float (puede ser None/vacío)
+                        if 'cantidad_medida' in cambios:
+                            cambios['cantidad_medida'] = float(cambios['cantidad_medida']) if cambios['cantidad_medida'].strip() else None
+                        
+                        # Un savepoint por producto: si uno falla, los demás se guardan
+                        with self.pg_manager.transaccion() as bloque:
+                            self.pg_manager.actualizar_producto(codigo, cambios)
+                        if bloque.fallida:
+                            raise Exception("no se pudo actualizar")
+                        total_guardados += 1
                     
-                except Exception as e:
-                    errores.append(f"{codigo}: {str(e)}")
-                    logging.error(f"Error actualizando {codigo}: {e}")
+                    except Exception as e:
+                        errores.append(f"{codigo}: {str(e)}")
+                        logging.error(f"Error actualizando {codigo}: {e}")
             
             # Limpiar cambios y recargar
             self.cambios_pendientes = {}
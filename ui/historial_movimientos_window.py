@@ -13,6 +13,7 @@ from PySide6.QtCore import Qt, Signal, QDate, QThread, QTimer
 from PySide6.QtGui import QFont
 from datetime import datetime, timedelta
 import logging
+import threading
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -28,6 +29,7 @@ from ui.components import (
     show_error_dialog,
     aplicar_estilo_fecha
 )
+from services.filtro_listas import MotorFiltros
 
 
 class MovimientosLoaderThread(QThread):
@@ -41,19 +43,25 @@ class MovimientosLoaderThread(QThread):
         self.pg_manager = pg_manager
         self.limite = limite
         self._is_running = True
+        self.id_hilo = None  # Para cancelar su consulta en el servidor (ver stop)
         # Marcar thread como daemon para que no bloquee la aplicación
         self.setTerminationEnabled(True)
     
     def run(self):
         """Cargar movimientos desde la base de datos en un hilo separado"""
         try:
+            self.id_hilo = threading.get_ident()
             if not self._is_running:
                 logging.info("Thread cancelado antes de iniciar")
                 return
             
             logging.info(f"Cargando movimientos (límite: {self.limite})...")
-            # Usar el método de postgres_manager que retorna movimientos completos
-            rows = self.pg_manager.obtener_movimientos_completos(limite=self.limite)
+            # Conexión propia del hilo: stop() cancela solo esta consulta
+            with self.pg_manager.conexion_de_carga(reporte=True):
+                if not self._is_running:
+                    return
+                # Usar el método de postgres_manager que retorna movimientos completos
+                rows = self.pg_manager.obtener_movimientos_completos(limite=self.limite)
             
             if self._is_running:  # Verificar si el thread aún debe ejecutarse
                 logging.info(f"✅ Thread obtuvo {len(rows)} registros")
@@ -69,9 +77,11 @@ class MovimientosLoaderThread(QThread):
                 logging.info(f"Error en thread cancelado: {e}")
     
     def stop(self):
-        """Detener el thread de forma segura"""
+        """Detener el thread de forma segura y liberar la conexión cancelando su consulta"""
         logging.info("🛑 Señal de parada enviada al thread")
         self._is_running = False
+        if self.id_hilo is not None:
+            self.pg_manager.cancelar_consulta(self.id_hilo)
 
 
 class HistorialMovimientosWindow(QWidget):
@@ -85,6 +95,7 @@ class HistorialMovimientosWindow(QWidget):
         self.user_data = user_data
         self.movimientos_data = []
         self.movimientos_filtrados = []
+        self.motor_filtros = MotorFiltros([])
         self.loader_thread = None
         self.pagina_actual = 0  # Para paginación
         self.items_por_pagina = 50
@@ -399,6 +410,10 @@ class HistorialMovimientosWindow(QWidget):
         
         return info_buttons_panel
     
+    def refrescar_datos(self):
+        """Recargar los movimientos al reutilizar la pantalla (la carga se detiene al ocultarla)"""
+        self.cargar_movimientos()
+    
     def cargar_movimientos(self):
         """Cargar todos los movimientos desde la base de datos de forma asíncrona"""
         try:
@@ -448,24 +463,11 @@ class HistorialMovimientosWindow(QWidget):
                 logging.info("Descartando datos - ventana no está visible")
                 return
             
-            self.movimientos_data = []
-            
-            for row in rows:
-                self.movimientos_data.append({
-                    'id_movimiento': row['id_movimiento'],
-                    'fecha': row['fecha'],
-                    'tipo_movimiento': row['tipo_movimiento'],
-                    'codigo_interno': row['codigo_interno'],
-                    'tipo_producto': row['tipo_producto'],
-                    'cantidad': row['cantidad'],
-                    'stock_anterior': row['stock_anterior'],
-                    'stock_nuevo': row['stock_nuevo'],
-                    'motivo': row['motivo'] or '',
-                    'id_usuario': row['id_usuario'],
-                    'id_venta': row['id_venta'],
-                    'nombre_producto': row['nombre_producto'],
-                    'nombre_usuario': row['nombre_usuario'] or 'Usuario desconocido'
-                })
+            # Filas compactas de solo lectura: se guardan tal cual, sin copiarlas a otro dict
+            self.movimientos_data = rows
+            self.motor_filtros = MotorFiltros(
+                rows, ('codigo_interno', 'nombre_producto', 'nombre_usuario', 'motivo'), columna_fecha='fecha'
+            )
             
             self.aplicar_filtros()
             logging.info(f"✅ Obtuvieron {len(self.movimientos_data)} movimientos completos")
@@ -496,49 +498,20 @@ class HistorialMovimientosWindow(QWidget):
         )
         self.info_label.setText("Error al cargar movimientos")
     
+    def _filtrar_movimientos(self):
+        """Movimientos cargados que cumplen los filtros activos (máscaras, sin recorrer filas)"""
+        tipo_seleccionado = self.tipo_combo.currentText()
+        return self.motor_filtros.filtrar(
+            self.search_bar.text(),
+            iguales={'tipo_movimiento': tipo_seleccionado.lower()} if tipo_seleccionado != "Todos" else None,
+            desde=self.fecha_inicio.date().toPython(),
+            hasta=self.fecha_fin.date().toPython()
+        )
+    
     def aplicar_filtros(self):
         """Aplicar todos los filtros activos"""
         try:
-            # Obtener criterios de filtro
-            texto_busqueda = self.search_bar.text().strip().lower()
-            tipo_seleccionado = self.tipo_combo.currentText()
-            fecha_desde = self.fecha_inicio.date().toPython()
-            fecha_hasta = self.fecha_fin.date().toPython()
-            
-            # Filtrar datos
-            self.movimientos_filtrados = []
-            for mov in self.movimientos_data:
-                # Filtro de texto
-                if texto_busqueda:
-                    if not any([
-                        texto_busqueda in str(mov['codigo_interno']).lower(),
-                        texto_busqueda in str(mov['nombre_producto']).lower(),
-                        texto_busqueda in str(mov['nombre_usuario']).lower(),
-                        texto_busqueda in (mov['motivo'] or '').lower()
-                    ]):
-                        continue
-                
-                # Filtro de tipo
-                if tipo_seleccionado != "Todos":
-                    if mov['tipo_movimiento'].lower() != tipo_seleccionado.lower():
-                        continue
-                
-                # Filtro de fecha - Convertir fecha_mov a date object si es datetime
-                fecha_mov = mov['fecha']
-                if isinstance(fecha_mov, datetime):
-                    fecha_mov = fecha_mov.date()
-                elif isinstance(fecha_mov, str):
-                    try:
-                        # Si es string, intentar parsearlo
-                        fecha_mov = datetime.fromisoformat(fecha_mov.replace('Z', '+00:00')).date()
-                    except:
-                        continue
-                
-                # Ahora comparar date con date
-                if not (fecha_desde <= fecha_mov <= fecha_hasta):
-                    continue
-                
-                self.movimientos_filtrados.append(mov)
+            self.movimientos_filtrados = self._filtrar_movimientos()
             
             # Resetear paginación cuando se aplican nuevos filtros
             self.pagina_actual = 0
@@ -670,42 +643,7 @@ class HistorialMovimientosWindow(QWidget):
                 cell.alignment = Alignment(horizontal="center", vertical="center")
             
             # Obtener movimientos filtrados actuales
-            texto_busqueda = self.search_bar.text().strip().lower()
-            tipo_seleccionado = self.tipo_combo.currentText()
-            fecha_desde = self.fecha_inicio.date().toPython()
-            fecha_hasta = self.fecha_fin.date().toPython()
-            
-            movimientos_exportar = []
-            for mov in self.movimientos_data:
-                if texto_busqueda:
-                    if not any([
-                        texto_busqueda in str(mov['codigo_interno']).lower(),
-                        texto_busqueda in str(mov['nombre_producto']).lower(),
-                        texto_busqueda in str(mov['nombre_usuario']).lower(),
-                        texto_busqueda in (mov['motivo'] or '').lower()
-                    ]):
-                        continue
-                
-                if tipo_seleccionado != "Todos":
-                    if mov['tipo_movimiento'].lower() != tipo_seleccionado.lower():
-                        continue
-                
-                # Convertir fecha_mov a date object si es datetime
-                fecha_mov = mov['fecha']
-                if isinstance(fecha_mov, datetime):
-                    fecha_mov = fecha_mov.date()
-                elif isinstance(fecha_mov, str):
-                    try:
-                        # Si es string, intentar parsearlo
-                        fecha_mov = datetime.fromisoformat(fecha_mov.replace('Z', '+00:00')).date()
-                    except:
-                        continue
-                
-                # Ahora comparar date con date
-                if not (fecha_desde <= fecha_mov <= fecha_hasta):
-                    continue
-                
-                movimientos_exportar.append(mov)
+            movimientos_exportar = self._filtrar_movimientos()
             
             # Datos
             for row_idx, mov in enumerate(movimientos_exportar, start=2):
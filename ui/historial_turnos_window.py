@@ -30,6 +30,7 @@ from ui.components import (
     aplicar_estilo_fecha,
     create_page_layout
 )
+from services.filtro_listas import MotorFiltros
 
 
 class HistorialTurnosWindow(QWidget):
@@ -43,6 +44,7 @@ class HistorialTurnosWindow(QWidget):
         self.user_data = user_data
         self.turnos_data = []
         self.turnos_filtrados = []
+        self.motor_filtros = MotorFiltros([])
         
         # Timer para detectar entrada del escáner
         self.scanner_timer = QTimer()
@@ -249,6 +251,10 @@ class HistorialTurnosWindow(QWidget):
         
         return panel_layout
     
+    def refrescar_datos(self):
+        """Recargar los turnos al reutilizar la pantalla"""
+        self.cargar_turnos()
+    
     def cargar_turnos(self):
         """Cargar turnos desde la base de datos"""
         try:
@@ -297,6 +303,7 @@ class HistorialTurnosWindow(QWidget):
                 
                 self.turnos_data.append(turno_dict)
             
+            self.motor_filtros = MotorFiltros(self.turnos_data, ('nombre_usuario',), columna_fecha='fecha_apertura')
             self.aplicar_filtros()
                 
         except Exception as e:
@@ -308,42 +315,22 @@ class HistorialTurnosWindow(QWidget):
         self.scanner_timer.start()
     
     def aplicar_filtros(self):
-        """Aplicar filtros a los datos de turnos"""
-        # Obtener valores de filtros
-        texto_busqueda = self.search_bar.text().strip().lower()
+        """Aplicar filtros a los datos de turnos (máscaras sobre los turnos cargados)"""
         estado_filtro = self.estado_combo.currentText()
-        fecha_inicio = self.fecha_inicio.date().toPython()
-        fecha_fin = self.fecha_fin.date().toPython()
-        
-        # Filtrar datos
-        self.turnos_filtrados = []
-        for turno in self.turnos_data:
-            # Filtro de búsqueda por usuario
-            if texto_busqueda and texto_busqueda not in turno['nombre_usuario'].lower():
-                continue
-            
-            # Filtro de estado
-            if estado_filtro == "Abiertos" and turno['cerrado']:
-                continue
-            elif estado_filtro == "Cerrados" and not turno['cerrado']:
-                continue
-            
-            # Filtro de fechas
-            if turno['fecha_apertura']:
-                try:
-                    # Convertir string a datetime si es necesario
-                    if isinstance(turno['fecha_apertura'], str):
-                        fecha_apertura = datetime.fromisoformat(turno['fecha_apertura'].replace('Z', '+00:00')).date()
-                    else:
-                        fecha_apertura = turno['fecha_apertura'].date()
-                    
-                    if fecha_apertura < fecha_inicio or fecha_apertura > fecha_fin:
-                        continue
-                except Exception as e:
-                    logging.error(f"Error procesando fecha de turno: {e}")
-                    continue
-            
-            self.turnos_filtrados.append(turno)
+        iguales = {}
+        if estado_filtro == "Abiertos":
+            iguales['cerrado'] = False
+        elif estado_filtro == "Cerrados":
+            iguales['cerrado'] = True
+        
+        # Los turnos sin fecha de apertura no se descartan por el rango de fechas
+        self.turnos_filtrados = self.motor_filtros.filtrar(
+            self.search_bar.text(),
+            iguales=iguales,
+            desde=self.fecha_inicio.date().toPython(),
+            hasta=self.fecha_fin.date().toPython(),
+            incluir_sin_fecha=True
+        )
         
         # Actualizar tabla
         self.actualizar_tabla()
@@ -465,6 +452,12 @@ class HistorialTurnosWindow(QWidget):
         detalles += f"Fecha: {fecha_apertura_str}\n"
         detalles += f"Monto inicial: ${float(turno['monto_inicial']):.2f}\n\n"
         
+        # Ventas del turno (suma indexada por turno)
+        resumen = self.pg_manager.obtener_resumen_ventas_turno(turno['id_turno'])
+        detalles += "--- VENTAS ---\n"
+        detalles += f"Comandas: {resumen['num_ventas']}\n"
+        detalles += f"Total vendido: ${float(resumen['total']):.2f}\n\n"
+        
         if turno['cerrado']:
             detalles += "--- CIERRE ---\n"
             # Convertir fecha_cierre si es string
@@ -26,6 +26,7 @@ from ui.components import (
     show_error_dialog
 )
 from ui.editable_catalog_grid import EditableCatalogGrid
+from services.filtro_listas import MotorFiltros
 
 
 class InventarioWindow(QWidget):
@@ -33,11 +34,24 @@ class InventarioWindow(QWidget):
     
     cerrar_solicitado = Signal()
     
-    def __init__(self, postgres_manager, user_data, parent=None):
+    def __init__(self, postgres_manager, user_data, parent=None, motor_alertas=None):
         super().__init__(parent)
         self.pg_manager = postgres_manager  # Cambiado de db_manager a pg_manager
         self.user_data = user_data
         self.productos_data = []
+        self.productos_por_inventario = {}  # id_inventario -> fila de productos_data
+        self.motor_filtros = MotorFiltros([])
+        
+        # Motor de alertas de stock (conjunto vivo, evita recorrer todo el inventario)
+        self.motor_alertas = motor_alertas
+        if self.motor_alertas:
+            self.motor_alertas.alerta_nueva.connect(self.on_cambio_alerta_stock)
+            self.motor_alertas.alerta_actualizada.connect(self.on_cambio_alerta_stock)
+            self.motor_alertas.alerta_resuelta.connect(self.on_cambio_alerta_stock)
+        
+        # Productos con stock modificado desde la última carga (refresco incremental)
+        self._productos_modificados = set()
+        self.pg_manager.agregar_observador_stock(self._marcar_productos_modificados)
         
         # Timer para detectar entrada del escáner
         self.scanner_timer = QTimer()
@@ -289,7 +303,14 @@ class InventarioWindow(QWidget):
         try:
             logging.info("Cargando inventario completo...")
             # Usar el método de postgres_manager en lugar de acceso directo
+            self._productos_modificados.clear()
             self.productos_data = self.pg_manager.obtener_inventario_completo()
+            self.productos_por_inventario = {
+                p['id_inventario']: p for p in self.productos_data if p.get('id_inventario')
+            }
+            self.motor_filtros = MotorFiltros(
+                self.productos_data, ('codigo_interno', 'nombre', 'seccion', 'codigo_barras')
+            )
             
             # Poblar combo de categorías
             categorias = sorted(set(p.get('categoria') for p in self.productos_data if p.get('categoria')))
@@ -316,6 +337,40 @@ class InventarioWindow(QWidget):
                 detail=str(e)
             )
     
+    def _marcar_productos_modificados(self, ids_producto):
+        """Observador de stock: anotar los productos a refrescar (puede llamarse desde un QThread)"""
+        self._productos_modificados.update(ids_producto)
+    
+    def refrescar_datos(self):
+        """
+        Refresco al reutilizar la pantalla: solo se consulta el stock de los
+        productos modificados desde la última carga, sin reconstruir la tabla completa
+        """
+        if not self._productos_modificados:
+            return
+        
+        ids = list(self._productos_modificados)
+        self._productos_modificados.clear()
+        
+        filas = self.pg_manager.obtener_estado_stock(ids)
+        for fila in filas:
+            producto = self.productos_por_inventario.get(fila['id_inventario'])
+            if producto is None:
+                # Fila de inventario nueva (p. ej. primera entrada en otra ubicación)
+                self.cargar_inventario()
+                return
+            producto['stock_actual'] = fila['stock_actual']
+            producto['stock_minimo'] = fila['stock_minimo']
+            producto['stock_maximo'] = fila['stock_maximo']
+            self.motor_filtros.refrescar_fila(producto)
+        
+        self.aplicar_filtros()
+        logging.info(f"Inventario refrescado: {len(ids)} productos modificados")
+    
+    def liberar(self):
+        """Dejar de observar el stock antes de destruir la pantalla"""
+        self.pg_manager.quitar_observador_stock(self._marcar_productos_modificados)
+    
     def mostrar_inventario(self, productos):
         """Mostrar productos en la tabla"""
         self.inventory_table.setRowCount(0)
@@ -414,55 +469,40 @@ class InventarioWindow(QWidget):
         self.scanner_timer.start()
     
     def aplicar_filtros(self):
-        """Aplicar todos los filtros seleccionados"""
+        """Aplicar todos los filtros seleccionados (máscaras sobre el inventario cargado)"""
         try:
-            texto_busqueda = self.search_bar.text().lower()
             categoria_seleccionada = self.categoria_combo.currentText()
             stock_seleccionado = self.stock_combo.currentText()
             ubicacion_seleccionada = self.ubicacion_combo.currentText()
-            solo_activos = self.check_solo_activos.isChecked()
-            
-            productos_filtrados = []
-            
-            for producto in self.productos_data:
-                # Filtro de búsqueda de texto
-                if texto_busqueda:
-                    texto_match = (
-                        texto_busqueda in producto['codigo_interno'].lower()
-                        or texto_busqueda in producto['nombre'].lower()
-                        or (producto.get('seccion') and texto_busqueda in producto['seccion'].lower())
-                        or (producto.get('codigo_barras') and texto_busqueda in producto['codigo_barras'].lower())
-                    )
-                    if not texto_match:
-                        continue
-                
-                # Filtro de categoría (usar categoria de ca_categorias_producto)
-                if categoria_seleccionada != "Todas":
-                    if producto.get('categoria') != categoria_seleccionada:
-                        continue
-                
-                # Filtro de estado de stock
+            
+            iguales = {}
+            if categoria_seleccionada != "Todas":
+                iguales['categoria'] = categoria_seleccionada
+            if ubicacion_seleccionada != "Todas":
+                iguales['ubicacion'] = ubicacion_seleccionada
+            if self.check_solo_activos.isChecked():
+                iguales['activo'] = True
+            
+            # Los filtros de stock parten del conjunto de alertas en lugar de
+            # comparar cada fila del inventario
+            en, excluir, condiciones = {}, {}, []
+            if self.motor_alertas and stock_seleccionado != "Todos":
                 if stock_seleccionado == "Bajo Stock":
-                    if producto['stock_actual'] > producto['stock_minimo']:
-                        continue
+                    en['id_inventario'] = self.motor_alertas.ids_inventario(('sin_stock', 'bajo_stock'))
                 elif stock_seleccionado == "Sin Stock":
-                    if producto['stock_actual'] > 0:
-                        continue
-                elif stock_seleccionado == "Stock Normal":
-                    if producto['stock_actual'] <= producto['stock_minimo']:
-                        continue
-                
-                # Filtro de ubicación
-                if ubicacion_seleccionada != "Todas":
-                    if producto.get('ubicacion') != ubicacion_seleccionada:
-                        continue
-                
-                # Filtro de activos
-                if solo_activos and not producto['activo']:
-                    continue
-                
-                productos_filtrados.append(producto)
-            
+                    en['id_inventario'] = self.motor_alertas.ids_inventario(('sin_stock',))
+                else:
+                    excluir['id_inventario'] = self.motor_alertas.ids_inventario()
+            elif stock_seleccionado == "Bajo Stock":
+                condiciones.append(('stock_actual', '<=', 'stock_minimo'))
+            elif stock_seleccionado == "Sin Stock":
+                condiciones.append(('stock_actual', '<=', 0))
+            elif stock_seleccionado == "Stock Normal":
+                condiciones.append(('stock_actual', '>', 'stock_minimo'))
+            
+            productos_filtrados = self.motor_filtros.filtrar(
+                self.search_bar.text(), iguales=iguales, en=en, excluir=excluir, condiciones=condiciones
+            )
             self.mostrar_inventario(productos_filtrados)
             
         except Exception as e:
@@ -482,12 +522,39 @@ class InventarioWindow(QWidget):
         self.check_solo_activos.setChecked(True)
         self.aplicar_filtros()
     
+    def _productos_en_alerta(self, tipos):
+        """Filas del inventario cargado que están en el conjunto de alertas"""
+        filas = [
+            self.productos_por_inventario[id_inventario]
+            for id_inventario in self.motor_alertas.ids_inventario(tipos)
+            if id_inventario in self.productos_por_inventario
+        ]
+        filas.sort(key=lambda p: p['nombre'])
+        return filas
+    
+    def on_cambio_alerta_stock(self, alerta):
+        """Actualizar el stock de la fila afectada y refrescar si hay filtro de stock"""
+        producto = self.productos_por_inventario.get(alerta.get('id_inventario'))
+        if not producto:
+            return
+        
+        producto['stock_actual'] = alerta['stock_actual']
+        producto['stock_minimo'] = alerta['stock_minimo']
+        producto['stock_maximo'] = alerta['stock_maximo']
+        self.motor_filtros.refrescar_fila(producto)
+        
+        if self.stock_combo.currentText() != "Todos":
+            self.aplicar_filtros()
+    
     def filtrar_bajo_stock(self):
         """Filtrar productos con stock bajo o menor al mínimo"""
-        productos_bajo_stock = [
-            p for p in self.productos_data
-            if p['stock_actual'] <= p['stock_minimo']
-        ]
+        if self.motor_alertas:
+            productos_bajo_stock = self._productos_en_alerta(('sin_stock', 'bajo_stock'))
+        else:
+            productos_bajo_stock = [
+                p for p in self.productos_data
+                if p['stock_actual'] <= p['stock_minimo']
+            ]
         
         if productos_bajo_stock:
             self.mostrar_inventario(productos_bajo_stock)
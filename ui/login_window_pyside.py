@@ -15,8 +15,10 @@ from ui.components import (
     WindowsPhoneTheme,
     show_error_dialog,
     show_info_dialog,
-    show_success_dialog
+    show_success_dialog,
+    obtener_icono
 )
+from services.autenticacion import AutenticacionThread, SesionesTurno
 
 class LoginWindow(QMainWindow):
     # Signal que se emite cuando el login es exitoso
@@ -25,6 +27,10 @@ class LoginWindow(QMainWindow):
     def __init__(self, pg_manager=None):
         super().__init__()
         self.pg_manager = pg_manager
+        self._login_pendiente = False  # Intento de acceso antes de que la BD estuviera lista
+        self._hilo_autenticacion = None
+        self._usuario_verificando = None
+        self.sesiones = SesionesTurno.obtener()
 
         # Tokens del sistema de diseño
         self.theme = WindowsPhoneTheme
@@ -138,6 +144,7 @@ class LoginWindow(QMainWindow):
         self.username_input.setFont(QFont(self.theme.FONT_FAMILY, 12))
         self.username_input.setMaximumWidth(form_max_width)
         self.username_input.returnPressed.connect(self.handle_login)
+        self.username_input.textChanged.connect(self.actualizar_aviso_pin)
         
         # Campo de contraseña
         password_label = QLabel("Contraseña")
@@ -157,11 +164,9 @@ class LoginWindow(QMainWindow):
         # Icono para mostrar/ocultar contraseña (sin overlays para evitar recortes)
         self._toggle_password_action = None
         try:
-            import qtawesome as qta
-
             self.password_input.setTextMargins(0, 0, 36, 0)
             self._toggle_password_action = self.password_input.addAction(
-                qta.icon('fa5s.eye', color=self.theme.PRIMARY_BLUE),
+                obtener_icono('fa5s.eye', self.theme.PRIMARY_BLUE),
                 QLineEdit.TrailingPosition
             )
             self._toggle_password_action.setToolTip("Mostrar contraseña")
@@ -178,12 +183,12 @@ class LoginWindow(QMainWindow):
         self.login_button.setCursor(Qt.PointingHandCursor)
         self.login_button.clicked.connect(self.handle_login)
         
-        # Info de usuario por defecto
-        info_label = QLabel("")
-        info_label.setObjectName("infoLabel")
-        info_label.setAlignment(Qt.AlignCenter)
-        info_label.setFont(QFont(self.theme.FONT_FAMILY, 9))
-        info_label.setMaximumWidth(form_max_width)
+        # Info de usuario por defecto (aviso de PIN de turno)
+        self.info_label = QLabel("")
+        self.info_label.setObjectName("infoLabel")
+        self.info_label.setAlignment(Qt.AlignCenter)
+        self.info_label.setFont(QFont(self.theme.FONT_FAMILY, 9))
+        self.info_label.setMaximumWidth(form_max_width)
         
         # Agregar widgets al layout
         layout.addWidget(login_title)
@@ -195,7 +200,7 @@ class LoginWindow(QMainWindow):
         layout.addSpacing(self.theme.MARGIN_SMALL)
         layout.addWidget(self.login_button)
         layout.addSpacing(self.theme.MARGIN_SMALL)
-        layout.addWidget(info_label)
+        layout.addWidget(self.info_label)
         
         parent_layout.addWidget(login_frame)
         
@@ -306,9 +311,29 @@ class LoginWindow(QMainWindow):
     def update_connection_status(self):
         """Actualizar estado de conexión (no se muestra en el login)."""
         return
+    
+    def set_pg_manager(self, pg_manager):
+        """Recibir la conexión abierta en segundo plano y atender el acceso pendiente"""
+        self.pg_manager = pg_manager
+        if self._login_pendiente:
+            self._login_pendiente = False
+            self.login_button.setEnabled(True)
+            self.handle_login()
+            
+    def actualizar_aviso_pin(self, username):
+        """Indicar si el usuario puede reanudar su turno con PIN"""
+        if self.sesiones.activa(username.strip()):
+            self.password_input.setPlaceholderText("Contraseña o PIN del turno")
+            self.info_label.setText("Turno activo: puedes reanudar con tu PIN")
+        else:
+            self.password_input.setPlaceholderText("Ingresa tu contraseña")
+            self.info_label.setText("")
             
     def handle_login(self):
         """Manejar el evento de login"""
+        if self._hilo_autenticacion is not None:
+            return  # Ya hay una verificación en curso
+        
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
         
@@ -323,73 +348,104 @@ class LoginWindow(QMainWindow):
             self.password_input.setFocus()
             return
         
-        # Verificar que existe conexión a la base de datos
-        if not self.pg_manager:
-            self.show_error("No hay conexión a la base de datos")
+        # Reanudación rápida con el PIN del turno (sin bcrypt ni base de datos)
+        user = self.sesiones.reanudar(username, password)
+        if user:
+            logging.info(f"Sesión reanudada con PIN: {username}")
+            self._acceso_concedido(user)
             return
         
-        # Deshabilitar botón mientras se procesa
-        self.login_button.setEnabled(False)
-        self.login_button.setText("VERIFICANDO...")
+        # La conexión se abre en segundo plano: esperar a que esté lista
+        if not self.pg_manager:
+            self._login_pendiente = True
+            self.login_button.setEnabled(False)
+            self.login_button.setText("CONECTANDO...")
+            return
         
+        # bcrypt tarda cientos de ms a propósito: verificar en segundo plano
+        self._set_verificando(True)
+        self._usuario_verificando = username
+        self._hilo_autenticacion = AutenticacionThread(self.pg_manager, username, password, self)
+        # Encoladas: los slots tocan la ventana y deben correr en el hilo de Qt
+        self._hilo_autenticacion.terminada.connect(self._on_autenticacion_terminada, Qt.QueuedConnection)
+        self._hilo_autenticacion.error.connect(self._on_error_autenticacion, Qt.QueuedConnection)
+        self._hilo_autenticacion.finished.connect(self._hilo_autenticacion.deleteLater)
+        self._hilo_autenticacion.start()
+        
+    def _set_verificando(self, verificando):
+        """Estado de progreso mientras se verifica la contraseña"""
+        self.username_input.setEnabled(not verificando)
+        self.password_input.setEnabled(not verificando)
+        self.login_button.setEnabled(not verificando)
+        self.login_button.setText("VERIFICANDO..." if verificando else "INICIAR SESIÓN")
+        if not verificando:
+            self.login_button.setStyleSheet("")  # Restaurar estilo original
+            
+    def _on_autenticacion_terminada(self, user):
+        """Resultado del hilo de autenticación"""
+        username = self._usuario_verificando
+        self._hilo_autenticacion = None
+        self._usuario_verificando = None
+        self._set_verificando(False)
+        
+        if user:
+            logging.info(f"Login exitoso: {username} (Rol: {user['rol']})")
+            self._acceso_concedido(user)
+        else:
+            logging.warning(f"Login fallido para usuario: {username}")
+            # Si tenía sesión con PIN, el intento cuenta para revocarla
+            self.sesiones.registrar_fallo(username)
+            self.actualizar_aviso_pin(username)
+            self.show_error("Usuario o contraseña incorrectos")
+            self.password_input.clear()
+            self.password_input.setFocus()
+            
+    def _on_error_autenticacion(self, mensaje):
+        self._hilo_autenticacion = None
+        self._usuario_verificando = None
+        self._set_verificando(False)
+        self.show_error("Error inesperado durante la autenticación")
+        
+    def _acceso_concedido(self, user):
+        """Mostrar el acceso concedido y pasar a la ventana principal"""
         try:
-            # Autenticar usuario en PostgreSQL local
-            user = self.pg_manager.authenticate_user(username, password)
+            # Mostrar mensaje de éxito visual
+            self.login_button.setText("✓ ACCESO CONCEDIDO")
+            self.login_button.setStyleSheet("""
+                QPushButton {
+                    background: #00a300;
+                    color: white;
+                    border: none;
+                    border-radius: 0px;
+                    padding: 15px;
+                    font-weight: bold;
+                }
+            """)
             
-            if user:
-                logging.info(f"Login exitoso: {username} (Rol: {user['rol']})")
-                
-                # Mostrar mensaje de éxito visual
-                self.login_button.setText("✓ ACCESO CONCEDIDO")
-                self.login_button.setStyleSheet("""
-                    QPushButton {
-                        background: #00a300;
-                        color: white;
-                        border: none;
-                        border-radius: 0px;
-                        padding: 15px;
-                        font-weight: bold;
-                    }
-                """)
-                
-                # Emitir señal de login exitoso con datos del usuario
-                self.login_success.emit(user)
-                
-                # Cerrar ventana de login
-                self.close()
-            else:
-                logging.warning(f"Login fallido para usuario: {username}")
-                self.show_error("Usuario o contraseña incorrectos")
-                self.password_input.clear()
-                self.password_input.setFocus()
-                
+            # Emitir señal de login exitoso con datos del usuario
+            self.login_success.emit(user)
+            
+            # Cerrar ventana de login
+            self.close()
         except Exception as e:
             logging.error(f"Error en login: {e}")
             self.show_error(f"Error inesperado durante la autenticación")
-        
         finally:
-            # Rehabilitar botón y restaurar texto
-            self.login_button.setEnabled(True)
             self.login_button.setText("INICIAR SESIÓN")
-            self.login_button.setStyleSheet("")  # Restaurar estilo original
+            self.login_button.setStyleSheet("")
 
     def toggle_password_visibility(self):
         """Mostrar/ocultar texto en el campo de contraseña."""
         if not self._toggle_password_action:
             return
 
-        try:
-            import qtawesome as qta
-        except Exception:
-            return
-
         if self.password_input.echoMode() == QLineEdit.Password:
             self.password_input.setEchoMode(QLineEdit.Normal)
-            self._toggle_password_action.setIcon(qta.icon('fa5s.eye-slash', color=self.theme.PRIMARY_BLUE))
+            self._toggle_password_action.setIcon(obtener_icono('fa5s.eye-slash', self.theme.PRIMARY_BLUE))
             self._toggle_password_action.setToolTip("Ocultar contraseña")
         else:
             self.password_input.setEchoMode(QLineEdit.Password)
-            self._toggle_password_action.setIcon(qta.icon('fa5s.eye', color=self.theme.PRIMARY_BLUE))
+            self._toggle_password_action.setIcon(obtener_icono('fa5s.eye', self.theme.PRIMARY_BLUE))
             self._toggle_password_action.setToolTip("Mostrar contraseña")
             
     def show_error(self, message):
@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
     QGroupBox
 )
 from PySide6.QtCore import Qt, Signal, QSize, QTimer
-from PySide6.QtGui import QFont, QIcon, QPalette, QColor, QCursor
+from PySide6.QtGui import QFont, QIcon, QPalette, QColor, QCursor, QKeySequence, QShortcut
 import logging
 import subprocess
 import sys
@@ -32,34 +32,40 @@ from ui.components import (
     show_success_dialog,
     show_error_dialog,
     show_warning_dialog,
-    show_info_dialog
+    show_info_dialog,
+    NotificacionToast,
+    OverlayRendimiento,
+    obtener_icono
 )
 
-# Importar ventanas de ventas
-from ui.ventas import (
+# Pantallas: cada módulo se importa la primera vez que se abre (ver ui/registro_pantallas.py)
+from ui.registro_pantallas import (
     NuevaVentaWindow,
     VentasDiaWindow,
     HistorialVentasWindow,
-    CierreCajaWindow
+    CierreCajaWindow,
+    InventarioWindow,
+    CuentasPorPagarWindow,
+    NuevaCompraWindow,
+    NuevoProductoWindow,
+    NuevoClienteWindow,
+    ProductosWindow,
+    ProveedoresWindow,
+    ClientesWindow,
+    TipoCuentaPagarWindow,
+    HistorialMovimientosWindow,
+    HistorialTurnosWindow,
+    AsignacionTurnosWindow,
+    UbicacionesWindow,
+    MovimientoInventarioWindow,
+    ConteoFisicoWindow,
+    CuentasPorCobrarWindow,
+    RendimientoWindow
 )
-
-# Importar ventanas disponibles
-from ui.inventario_window import InventarioWindow
-from ui.cuentas_por_pagar_window import CuentasPorPagarWindow
-from ui.nueva_compra_window import NuevaCompraWindow
-from ui.nuevo_producto_window import NuevoProductoWindow
-from ui.nuevo_cliente_window import NuevoClienteWindow
-from ui.productos_window import ProductosWindow
-from ui.proveedores_window import ProveedoresWindow
-from ui.clientes_window import ClientesWindow
-from ui.tipo_cuenta_pagar_window import TipoCuentaPagarWindow
-from ui.historial_movimientos_window import HistorialMovimientosWindow
-from ui.historial_turnos_window import HistorialTurnosWindow
-from ui.asignacion_turnos_window import AsignacionTurnosWindow
-from ui.ubicaciones_window import UbicacionesWindow
-from ui.movimiento_inventario_window import MovimientoInventarioWindow
-from ui.cuentas_por_cobrar_window import CuentasPorCobrarWindow
+from ui.pool_pantallas import PoolPantallas
 from database.postgres_manager import PostgresManager
+from services.alertas_stock import MotorAlertasStock
+from services.monitor_ui import MonitorUI
 
 
 class MainPOSWindow(QMainWindow):
@@ -97,8 +103,27 @@ class MainPOSWindow(QMainWindow):
         # Aplicar estilos Windows Phone
         apply_windows_phone_stylesheet(self)
         
+        # Medir la navegación (antes de setup_ui, para que las señales usen los métodos medidos)
+        self.monitor_ui = MonitorUI.obtener()
+        if self.monitor_ui:
+            self.monitor_ui.instrumentar_ventana(self)
+        
         self.setup_ui()
         
+        # Overlay de latencia (Ctrl+Shift+F12)
+        self.overlay_rendimiento = None
+        if self.monitor_ui:
+            self.overlay_rendimiento = OverlayRendimiento(self)
+            self.monitor_ui.metricas_actualizadas.connect(self.overlay_rendimiento.actualizar)
+            QShortcut(QKeySequence("Ctrl+Shift+F12"), self, self.alternar_overlay_rendimiento)
+            if self.monitor_ui.overlay_al_iniciar:
+                self.alternar_overlay_rendimiento()
+        
+        # Motor de alertas de stock (se reevalúa solo con cada venta/movimiento)
+        self.motor_alertas_stock = MotorAlertasStock(self.pg_manager, self)
+        self.motor_alertas_stock.alerta_nueva.connect(self.mostrar_alerta_stock)
+        self.motor_alertas_stock.cargar_inicial()
+        
         # Iniciar monitor de entradas (desactivado)
         # self.iniciar_monitor_entradas()
         
@@ -125,6 +150,9 @@ class MainPOSWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         main_layout.addWidget(self.stacked_widget)
         
+        # Pantallas secundarias ya construidas (se reutilizan al volver a abrirlas)
+        self.pool_pantallas = PoolPantallas(self.stacked_widget, parent=self)
+        
         # Crear las páginas de cada pestaña
         self.create_sales_page()
         self.create_inventory_page()
@@ -264,7 +292,7 @@ class MainPOSWindow(QMainWindow):
             {"text": "Inventario", "icon": "fa5s.warehouse", "color": WindowsPhoneTheme.TILE_GREEN, "callback": self.abrir_inventario},
             {"text": "Movimientos", "icon": "fa5s.exchange-alt", "color": WindowsPhoneTheme.TILE_PURPLE, "callback": self.abrir_historial_movimientos},
             {"text": "Ajustes del\nInventario", "icon": "fa5s.tools", "color": WindowsPhoneTheme.TILE_ORANGE, "callback": self.abrir_movimiento_inventario},
-            {"text": "Conteo\nFísico", "icon": "fa5s.clipboard-check", "color": WindowsPhoneTheme.TILE_TEAL, "callback": self.show_mock_dialog},
+            {"text": "Conteo\nFísico", "icon": "fa5s.clipboard-check", "color": WindowsPhoneTheme.TILE_TEAL, "callback": self.abrir_conteo_fisico},
         ]
         
         # Agregar los botones al grid
@@ -317,6 +345,11 @@ class MainPOSWindow(QMainWindow):
             btn_logout = TileButton("Cerrar\nSesión", "fa5s.sign-out-alt", WindowsPhoneTheme.TILE_RED)
             btn_logout.clicked.connect(self.handle_logout)
             grid.addWidget(btn_logout, 1, 2)
+            
+            # Fila 3 - Diagnóstico
+            btn_rendimiento = TileButton("Rendimiento\nBase de Datos", "fa5s.tachometer-alt", WindowsPhoneTheme.TILE_PURPLE)
+            btn_rendimiento.clicked.connect(self.abrir_rendimiento)
+            grid.addWidget(btn_rendimiento, 2, 0)
         else:
             # Si no es administrador, mostrar mensaje
             no_access_label = StyledLabel(
@@ -559,15 +592,10 @@ class MainPOSWindow(QMainWindow):
 
             def _add_password_toggle(self, line_edit: QLineEdit):
                 """Agrega acción de mostrar/ocultar contraseña al QLineEdit."""
-                try:
-                    import qtawesome as qta
-                except Exception:
-                    return None
-
                 # Reservar espacio para el icono dentro del input
                 line_edit.setTextMargins(0, 0, 36, 0)
                 action = line_edit.addAction(
-                    qta.icon('fa5s.eye', color=WindowsPhoneTheme.PRIMARY_BLUE),
+                    obtener_icono('fa5s.eye', WindowsPhoneTheme.PRIMARY_BLUE),
                     QLineEdit.TrailingPosition
                 )
                 action.setToolTip("Mostrar contraseña")
@@ -578,18 +606,13 @@ class MainPOSWindow(QMainWindow):
 
             def _toggle_password_visibility(self, line_edit: QLineEdit, action):
                 """Alterna visibilidad de contraseña para un campo."""
-                try:
-                    import qtawesome as qta
-                except Exception:
-                    return
-
                 if line_edit.echoMode() == QLineEdit.Password:
                     line_edit.setEchoMode(QLineEdit.Normal)
-                    action.setIcon(qta.icon('fa5s.eye-slash', color=WindowsPhoneTheme.PRIMARY_BLUE))
+                    action.setIcon(obtener_icono('fa5s.eye-slash', WindowsPhoneTheme.PRIMARY_BLUE))
                     action.setToolTip("Ocultar contraseña")
                 else:
                     line_edit.setEchoMode(QLineEdit.Password)
-                    action.setIcon(qta.icon('fa5s.eye', color=WindowsPhoneTheme.PRIMARY_BLUE))
+                    action.setIcon(obtener_icono('fa5s.eye', WindowsPhoneTheme.PRIMARY_BLUE))
                     action.setToolTip("Mostrar contraseña")
             
             def cambiar(self):
@@ -682,19 +705,20 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de ventas del turno
-            ventas_dia_widget = VentasDiaWindow(
-                self.pg_manager,
-                None,  # supabase_service (deshabilitado)
-                self.user_data,
-                self.turno_id,  # Pasar ID del turno actual
-                self
-            )
-            ventas_dia_widget.cerrar_solicitado.connect(self.volver_a_ventas)
+            def crear():
+                # Crear widget de ventas del turno
+                ventas_dia_widget = VentasDiaWindow(
+                    self.pg_manager,
+                    None,  # supabase_service (deshabilitado)
+                    self.user_data,
+                    self.turno_id,  # Pasar ID del turno actual
+                    self
+                )
+                ventas_dia_widget.cerrar_solicitado.connect(self.volver_a_ventas)
+                return ventas_dia_widget
             
-            # Agregar al stack y cambiar a esa vista
-            self.stacked_widget.addWidget(ventas_dia_widget)
-            self.stacked_widget.setCurrentWidget(ventas_dia_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('ventas_dia', crear)
             
             # Forzar actualización del layout
             QTimer.singleShot(0, self.update_layout)
@@ -715,27 +739,28 @@ class MainPOSWindow(QMainWindow):
             # Verificar desde qué pestaña se está abriendo
             current_index = self.stacked_widget.currentIndex()
             
-            # Crear widget de historial
-            historial_widget = HistorialVentasWindow(
-                self.pg_manager, 
-                self.user_data, 
-                self
-            )
+            def crear():
+                # Crear widget de historial
+                historial_widget = HistorialVentasWindow(
+                    self.pg_manager, 
+                    self.user_data, 
+                    self
+                )
             
-            # Conectar señal según la vista actual
-            # Índice 0 = Punto de Venta, Índice 1 = Ventas, Índice 2 = Inventario, Índice 5 = Admin/Config
-            if current_index == 1:
-                historial_widget.cerrar_solicitado.connect(self.volver_a_inventario)
-            elif current_index == 2:
-                historial_widget.cerrar_solicitado.connect(self.volver_a_administracion)
-            elif current_index == 5:
-                historial_widget.cerrar_solicitado.connect(self.volver_a_config)
-            else:
-                historial_widget.cerrar_solicitado.connect(self.volver_a_ventas)
+                # Conectar señal según la vista actual
+                # Índice 0 = Punto de Venta, Índice 1 = Ventas, Índice 2 = Inventario, Índice 5 = Admin/Config
+                if current_index == 1:
+                    historial_widget.cerrar_solicitado.connect(self.volver_a_inventario)
+                elif current_index == 2:
+                    historial_widget.cerrar_solicitado.connect(self.volver_a_administracion)
+                elif current_index == 5:
+                    historial_widget.cerrar_solicitado.connect(self.volver_a_config)
+                else:
+                    historial_widget.cerrar_solicitado.connect(self.volver_a_ventas)
+                return historial_widget
             
-            # Agregar al stack y cambiar a esa vista
-            self.stacked_widget.addWidget(historial_widget)
-            self.stacked_widget.setCurrentWidget(historial_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar(f'historial_ventas:{current_index}', crear)
             
             # Forzar actualización del layout
             QTimer.singleShot(0, self.update_layout)
@@ -822,10 +847,12 @@ class MainPOSWindow(QMainWindow):
         self.updateGeometry()
         
     def remover_widget_temporal(self, widget):
-        """Remover un widget temporal del stack"""
+        """Remover un widget temporal del stack (las pantallas del pool se conservan)"""
         try:
+            if self.pool_pantallas.contiene(widget):
+                return
             index = self.stacked_widget.indexOf(widget)
-            if index > 4:  # Solo remover widgets temporales (después de las 5 páginas principales)
+            if index > 5:  # Solo remover widgets temporales (después de las 6 páginas principales)
                 self.stacked_widget.removeWidget(widget)
                 widget.deleteLater()
         except Exception as e:
@@ -842,15 +869,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de proveedores
-            proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
+            def crear():
+                # Crear ventana de proveedores
+                proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
 
-            # Conectar señal de cerrar
-            proveedores_window.cerrar_solicitado.connect(self.volver_a_config)
+                # Conectar señal de cerrar
+                proveedores_window.cerrar_solicitado.connect(self.volver_a_config)
+                return proveedores_window
 
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(proveedores_window)
-            self.stacked_widget.setCurrentWidget(proveedores_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('proveedores:config', crear)
 
             # Actualizar título
             self.top_bar.set_title("PROVEEDORES")
@@ -870,15 +898,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de proveedores
-            proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
+            def crear():
+                # Crear ventana de proveedores
+                proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
 
-            # Conectar señal de cerrar para volver a Compras y Gastos (pestaña 3)
-            proveedores_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+                # Conectar señal de cerrar para volver a Compras y Gastos (pestaña 3)
+                proveedores_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+                return proveedores_window
 
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(proveedores_window)
-            self.stacked_widget.setCurrentWidget(proveedores_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('proveedores:compras', crear)
 
             # Actualizar título
             self.top_bar.set_title("PROVEEDORES")
@@ -901,15 +930,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de cuentas por pagar
-            cuentas_widget = CuentasPorPagarWindow(self.pg_manager, self.user_data)
+            def crear():
+                # Crear widget de cuentas por pagar
+                cuentas_widget = CuentasPorPagarWindow(self.pg_manager, self.user_data)
             
-            # Conectar señal de cierre
-            cuentas_widget.cerrar_solicitado.connect(self.volver_a_config)
+                # Conectar señal de cierre
+                cuentas_widget.cerrar_solicitado.connect(self.volver_a_config)
+                return cuentas_widget
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(cuentas_widget)
-            self.stacked_widget.setCurrentWidget(cuentas_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('cuentas_por_pagar:config', crear)
             
         except Exception as e:
             logging.error(f"Error abriendo cuentas por pagar: {e}")
@@ -924,21 +954,40 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de historial de turnos
-            turnos_widget = HistorialTurnosWindow(self.pg_manager, self.user_data)
+            def crear():
+                # Crear widget de historial de turnos
+                turnos_widget = HistorialTurnosWindow(self.pg_manager, self.user_data)
             
-            # Conectar señal de cierre
-            turnos_widget.cerrar_solicitado.connect(self.volver_a_config)
+                # Conectar señal de cierre
+                turnos_widget.cerrar_solicitado.connect(self.volver_a_config)
+                return turnos_widget
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(turnos_widget)
-            self.stacked_widget.setCurrentWidget(turnos_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('historial_turnos', crear)
             
             logging.info("Abriendo historial de turnos")
             
         except Exception as e:
             logging.error(f"Error abriendo historial de turnos: {e}")
     
+    def abrir_rendimiento(self):
+        """Abrir widget de estadísticas de rendimiento de la base de datos"""
+        try:
+            self.top_bar.set_title("RENDIMIENTO DE BASE DE DATOS")
+            self.nav_bar.hide()
+            
+            def crear():
+                rendimiento_widget = RendimientoWindow(self.pg_manager, self.user_data)
+                rendimiento_widget.cerrar_solicitado.connect(self.volver_a_config)
+                return rendimiento_widget
+            
+            self.pool_pantallas.mostrar('rendimiento', crear)
+            
+            logging.info("Abriendo estadísticas de rendimiento")
+            
+        except Exception as e:
+            logging.error(f"Error abriendo estadísticas de rendimiento: {e}")
+    
     def abrir_asignacion_turnos(self):
         """Abrir widget de asignación de turnos"""
         try:
@@ -948,15 +997,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de asignación de turnos
-            asignacion_widget = AsignacionTurnosWindow(self.pg_manager, self.user_data)
+            def crear():
+                # Crear widget de asignación de turnos
+                asignacion_widget = AsignacionTurnosWindow(self.pg_manager, self.user_data)
             
-            # Conectar señal de cierre
-            asignacion_widget.cerrar_solicitado.connect(self.volver_a_config)
+                # Conectar señal de cierre
+                asignacion_widget.cerrar_solicitado.connect(self.volver_a_config)
+                return asignacion_widget
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(asignacion_widget)
-            self.stacked_widget.setCurrentWidget(asignacion_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('asignacion_turnos', crear)
             
             logging.info("Abriendo asignación de turnos")
             
@@ -972,15 +1022,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de cuentas por cobrar
-            cuentas_widget = CuentasPorCobrarWindow(self.pg_manager, self.user_data)
+            def crear():
+                # Crear widget de cuentas por cobrar
+                cuentas_widget = CuentasPorCobrarWindow(self.pg_manager, self.user_data)
             
-            # Conectar señal de cierre para volver a clientes (pestaña 4)
-            cuentas_widget.cerrar_solicitado.connect(self.volver_a_clientes)
+                # Conectar señal de cierre para volver a clientes (pestaña 4)
+                cuentas_widget.cerrar_solicitado.connect(self.volver_a_clientes)
+                return cuentas_widget
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(cuentas_widget)
-            self.stacked_widget.setCurrentWidget(cuentas_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('cuentas_por_cobrar', crear)
             
             # Forzar actualización del layout
             QTimer.singleShot(0, self.update_layout)
@@ -1023,15 +1074,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear widget de ubicaciones
-            ubicaciones_widget = UbicacionesWindow(self.pg_manager, self.user_data)
+            def crear():
+                # Crear widget de ubicaciones
+                ubicaciones_widget = UbicacionesWindow(self.pg_manager, self.user_data)
             
-            # Conectar señal de cierre
-            ubicaciones_widget.cerrar_solicitado.connect(self.volver_a_config)
+                # Conectar señal de cierre
+                ubicaciones_widget.cerrar_solicitado.connect(self.volver_a_config)
+                return ubicaciones_widget
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(ubicaciones_widget)
-            self.stacked_widget.setCurrentWidget(ubicaciones_widget)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('ubicaciones', crear)
             
             logging.info("Abriendo gestión de ubicaciones")
             
@@ -1047,13 +1099,14 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de clientes
-            clientes_window = ClientesWindow(self.pg_manager, self.user_data, self)
-            clientes_window.cerrar_solicitado.connect(self.volver_a_config)
+            def crear():
+                # Crear ventana de clientes
+                clientes_window = ClientesWindow(self.pg_manager, self.user_data, self)
+                clientes_window.cerrar_solicitado.connect(self.volver_a_config)
+                return clientes_window
 
-            # Agregar al stack y cambiar a esa vista
-            self.stacked_widget.addWidget(clientes_window)
-            self.stacked_widget.setCurrentWidget(clientes_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('clientes:config', crear)
 
             # Forzar actualización del layout
             self.stacked_widget.update()
@@ -1073,13 +1126,14 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de tipos de cuenta por pagar
-            tipos_cxp_window = TipoCuentaPagarWindow(self.pg_manager, self.user_data, self)
-            tipos_cxp_window.cerrar_solicitado.connect(self.volver_a_config)
+            def crear():
+                # Crear ventana de tipos de cuenta por pagar
+                tipos_cxp_window = TipoCuentaPagarWindow(self.pg_manager, self.user_data, self)
+                tipos_cxp_window.cerrar_solicitado.connect(self.volver_a_config)
+                return tipos_cxp_window
 
-            # Agregar al stack y cambiar a esa vista
-            self.stacked_widget.addWidget(tipos_cxp_window)
-            self.stacked_widget.setCurrentWidget(tipos_cxp_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('tipos_cuenta_pagar', crear)
 
             # Forzar actualización del layout
             self.stacked_widget.update()
@@ -1144,19 +1198,21 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear ventana de inventario
-            inventario_window = InventarioWindow(
-                self.pg_manager,
-                self.user_data,
-                self
-            )
+            def crear():
+                # Crear ventana de inventario
+                inventario_window = InventarioWindow(
+                    self.pg_manager,
+                    self.user_data,
+                    self,
+                    motor_alertas=self.motor_alertas_stock
+                )
             
-            # Conectar señal de cerrar
-            inventario_window.cerrar_solicitado.connect(self.volver_a_administracion)
+                # Conectar señal de cerrar
+                inventario_window.cerrar_solicitado.connect(self.volver_a_administracion)
+                return inventario_window
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(inventario_window)
-            self.stacked_widget.setCurrentWidget(inventario_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('inventario', crear)
             
             # Actualizar título
             self.top_bar.set_title("INVENTARIO")
@@ -1175,19 +1231,20 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear ventana de productos
-            productos_window = ProductosWindow(
-                self.pg_manager,
-                self.user_data,
-                self
-            )
+            def crear():
+                # Crear ventana de productos
+                productos_window = ProductosWindow(
+                    self.pg_manager,
+                    self.user_data,
+                    self
+                )
             
-            # Conectar señal de cerrar
-            productos_window.cerrar_solicitado.connect(self.volver_a_inventario)
+                # Conectar señal de cerrar
+                productos_window.cerrar_solicitado.connect(self.volver_a_inventario)
+                return productos_window
             
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(productos_window)
-            self.stacked_widget.setCurrentWidget(productos_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('productos', crear)
             
             # Actualizar título
             self.top_bar.set_title("CATÁLOGO DE PRODUCTOS")
@@ -1338,19 +1395,20 @@ class MainPOSWindow(QMainWindow):
     def abrir_historial_movimientos(self):
         """Abrir ventana de historial de movimientos"""
         try:
-            # Crear ventana de historial
-            historial_window = HistorialMovimientosWindow(
-                self.pg_manager,
-                self.user_data,
-                parent=self
-            )
+            def crear():
+                # Crear ventana de historial
+                historial_window = HistorialMovimientosWindow(
+                    self.pg_manager,
+                    self.user_data,
+                    parent=self
+                )
             
-            # Conectar señal de cerrar
-            historial_window.cerrar_solicitado.connect(self.volver_a_administracion)
+                # Conectar señal de cerrar
+                historial_window.cerrar_solicitado.connect(self.volver_a_administracion)
+                return historial_window
             
-            # Agregar al stacked widget
-            index = self.stacked_widget.addWidget(historial_window)
-            self.stacked_widget.setCurrentIndex(index)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('historial_movimientos', crear)
             
             # Ocultar barra de navegación
             self.nav_bar.hide()
@@ -1363,6 +1421,28 @@ class MainPOSWindow(QMainWindow):
         except Exception as e:
             logging.error(f"Error abriendo historial de movimientos: {e}")
     
+    def abrir_conteo_fisico(self):
+        """Abrir ventana de conteo físico (se conserva en el pool con el conteo en curso)"""
+        try:
+            def crear():
+                conteo_window = ConteoFisicoWindow(self.pg_manager, self.user_data, parent=self)
+                conteo_window.cerrar_solicitado.connect(self.volver_a_inventario)
+                return conteo_window
+            
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('conteo_fisico', crear)
+            
+            # Ocultar barra de navegación
+            self.nav_bar.hide()
+            
+            # Actualizar título
+            self.top_bar.set_title("CONTEO FÍSICO")
+            
+            logging.info("Ventana de conteo físico abierta")
+            
+        except Exception as e:
+            logging.error(f"Error abriendo conteo físico: {e}")
+    
     def abrir_movimiento_inventario(self):
         """Abrir ventana de movimientos de inventario (ajustes)"""
         try:
@@ -1448,13 +1528,14 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
             
-            # Crear ventana de cuentas por pagar
-            cuentas_window = CuentasPorPagarWindow(self.pg_manager, self.user_data, parent=self)
-            cuentas_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+            def crear():
+                # Crear ventana de cuentas por pagar
+                cuentas_window = CuentasPorPagarWindow(self.pg_manager, self.user_data, parent=self)
+                cuentas_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+                return cuentas_window
             
-            # Agregar al stacked widget y mostrar
-            self.stacked_widget.addWidget(cuentas_window)
-            self.stacked_widget.setCurrentWidget(cuentas_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('cuentas_por_pagar:compras', crear)
             
             # Cambiar título
             self.top_bar.set_title("CUENTAS POR PAGAR")
@@ -1471,15 +1552,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de proveedores
-            proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
+            def crear():
+                # Crear ventana de proveedores
+                proveedores_window = ProveedoresWindow(self.pg_manager, self.user_data, self)
 
-            # Conectar señal de cerrar para volver a Compras y Gastos (pestaña 3)
-            proveedores_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+                # Conectar señal de cerrar para volver a Compras y Gastos (pestaña 3)
+                proveedores_window.cerrar_solicitado.connect(self.volver_a_compras_gastos)
+                return proveedores_window
 
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(proveedores_window)
-            self.stacked_widget.setCurrentWidget(proveedores_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('proveedores:compras', crear)
 
             # Actualizar título
             self.top_bar.set_title("PROVEEDORES")
@@ -1499,8 +1581,14 @@ class MainPOSWindow(QMainWindow):
             # Mostrar barra de navegación
             self.nav_bar.show()
             
+            # Obtener el widget actual
+            current_widget = self.stacked_widget.currentWidget()
+            
             # Cambiar al índice de compras y gastos (3)
             self.stacked_widget.setCurrentIndex(3)
+            
+            # Remover el formulario temporal (las pantallas del pool se conservan)
+            QTimer.singleShot(100, lambda: self.remover_widget_temporal(current_widget))
             self.top_bar.set_title("COMPRAS Y GASTOS")
             
             logging.info("Volviendo a página de compras y gastos")
@@ -1548,8 +1636,14 @@ class MainPOSWindow(QMainWindow):
             # Mostrar barra de navegación
             self.nav_bar.show()
             
+            # Obtener el widget actual
+            current_widget = self.stacked_widget.currentWidget()
+            
             # Cambiar al índice de clientes (4)
             self.stacked_widget.setCurrentIndex(4)
+            
+            # Remover el formulario temporal (las pantallas del pool se conservan)
+            QTimer.singleShot(100, lambda: self.remover_widget_temporal(current_widget))
             self.top_bar.set_title("CLIENTES")
             
             logging.info("Volviendo a página de clientes")
@@ -1568,15 +1662,16 @@ class MainPOSWindow(QMainWindow):
             # Ocultar barra de navegación
             self.nav_bar.hide()
 
-            # Crear ventana de clientes
-            clientes_window = ClientesWindow(self.pg_manager, self.user_data, self)
+            def crear():
+                # Crear ventana de clientes
+                clientes_window = ClientesWindow(self.pg_manager, self.user_data, self)
 
-            # Conectar señal de cerrar para volver a Clientes (pestaña 4)
-            clientes_window.cerrar_solicitado.connect(self.volver_a_clientes)
+                # Conectar señal de cerrar para volver a Clientes (pestaña 4)
+                clientes_window.cerrar_solicitado.connect(self.volver_a_clientes)
+                return clientes_window
 
-            # Agregar al stack y mostrar
-            self.stacked_widget.addWidget(clientes_window)
-            self.stacked_widget.setCurrentWidget(clientes_window)
+            # Mostrar (se reutiliza si ya estaba construida)
+            self.pool_pantallas.mostrar('clientes:directorio', crear)
 
             # Actualizar título
             self.top_bar.set_title("DIRECTORIO DE CLIENTES")
@@ -1626,12 +1721,45 @@ class MainPOSWindow(QMainWindow):
         # Establecer posición
         notificacion.move(x, y)
     
+    def mostrar_alerta_stock(self, alerta):
+        """Mostrar notificación no bloqueante cuando un producto entra en alerta de stock"""
+        try:
+            titulos = {
+                'sin_stock': ("Sin stock", "error"),
+                'bajo_stock': ("Stock bajo", "warning"),
+                'sobre_stock': ("Sobre stock", "info"),
+            }
+            titulo, tipo = titulos.get(alerta['tipo_alerta'], ("Alerta de stock", "warning"))
+            ubicacion = f" ({alerta['ubicacion']})" if alerta.get('ubicacion') else ""
+            mensaje = (
+                f"{alerta['nombre']}{ubicacion}\n"
+                f"Stock: {alerta['stock_actual']} | Mín: {alerta['stock_minimo']} | Máx: {alerta['stock_maximo']}"
+            )
+            
+            notificacion = NotificacionToast(titulo, mensaje, tipo, self)
+            notificacion.cerrada.connect(self.remover_notificacion)
+            self.posicionar_notificacion(notificacion)
+            self.notificaciones_activas.append(notificacion)
+            notificacion.show()
+        except Exception as e:
+            logging.error(f"Error mostrando alerta de stock: {e}")
+    
     def remover_notificacion(self, notificacion):
         """Remover notificación de la lista activa"""
         if notificacion in self.notificaciones_activas:
             self.notificaciones_activas.remove(notificacion)
             logging.debug(f"Notificación removida. Activas: {len(self.notificaciones_activas)}")
     
+    def alternar_overlay_rendimiento(self):
+        """Mostrar u ocultar el overlay con el retraso del event loop"""
+        if not self.overlay_rendimiento:
+            return
+        if self.overlay_rendimiento.isVisible():
+            self.overlay_rendimiento.hide()
+        else:
+            self.overlay_rendimiento.reposicionar()
+            self.overlay_rendimiento.show()
+    
     def closeEvent(self, event):
         """Evento al cerrar la ventana principal"""
         try:
@@ -1683,6 +1811,15 @@ class MainPOSWindow(QMainWindow):
                 except Exception as e:
                     logging.error(f"Error deteniendo monitor de entradas: {e}")
             
+            # Dejar de escuchar cambios de stock
+            self.motor_alertas_stock.detener()
+            
+            # Destruir las pantallas conservadas (dejan de observar el stock)
+            self.pool_pantallas.vaciar()
+            
+            if self.overlay_rendimiento:
+                self.overlay_rendimiento.close()
+            
             # Cerrar todas las notificaciones activas
             for notificacion in list(self.notificaciones_activas):
                 try:
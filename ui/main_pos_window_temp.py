@@ -32,7 +32,8 @@ from ui.components import (
     show_success_dialog,
     show_error_dialog,
     show_warning_dialog,
-    show_info_dialog
+    show_info_dialog,
+    obtener_icono
 )
 
 # Importar ventanas de ventas
@@ -608,15 +609,10 @@ class MainPOSWindow(QMainWindow):
 
             def _add_password_toggle(self, line_edit: QLineEdit):
                 """Agrega acción de mostrar/ocultar contraseña al QLineEdit."""
-                try:
-                    import qtawesome as qta
-                except Exception:
-                    return None
-
                 # Reservar espacio para el icono dentro del input
                 line_edit.setTextMargins(0, 0, 36, 0)
                 action = line_edit.addAction(
-                    qta.icon('fa5s.eye', color=WindowsPhoneTheme.PRIMARY_BLUE),
+                    obtener_icono('fa5s.eye', WindowsPhoneTheme.PRIMARY_BLUE),
                     QLineEdit.TrailingPosition
                 )
                 action.setToolTip("Mostrar contraseña")
@@ -627,18 +623,13 @@ class MainPOSWindow(QMainWindow):
 
             def _toggle_password_visibility(self, line_edit: QLineEdit, action):
                 """Alterna visibilidad de contraseña para un campo."""
-                try:
-                    import qtawesome as qta
-                except Exception:
-                    return
-
                 if line_edit.echoMode() == QLineEdit.Password:
                     line_edit.setEchoMode(QLineEdit.Normal)
-                    action.setIcon(qta.icon('fa5s.eye-slash', color=WindowsPhoneTheme.PRIMARY_BLUE))
+                    action.setIcon(obtener_icono('fa5s.eye-slash', WindowsPhoneTheme.PRIMARY_BLUE))
                     action.setToolTip("Ocultar contraseña")
                 else:
                     line_edit.setEchoMode(QLineEdit.Password)
-                    action.setIcon(qta.icon('fa5s.eye', color=WindowsPhoneTheme.PRIMARY_BLUE))
+                    action.setIcon(obtener_icono('fa5s.eye', WindowsPhoneTheme.PRIMARY_BLUE))
                     action.setToolTip("Mostrar contraseña")
             
             def cambiar(self):
@@ -13,7 +13,6 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, QDate, QEvent, QTimer
 from PySide6.QtGui import QFont
 import logging
-from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -392,64 +391,35 @@ class MovimientoInventarioWindow(QWidget):
                 else:
                     tipo_movimiento_db = "merma"  # Por defecto para salidas
             
-            # Obtener stock actual del producto seleccionado
-            stock_anterior = self.producto_seleccionado.get('stock_actual', 0)
-            
-            # Calcular nuevo stock
-            if self.tipo_movimiento == "entrada":
-                nuevo_stock = stock_anterior + cantidad
-                fecha_entrada = datetime.now().isoformat()
-                fecha_salida = None
-            elif self.tipo_movimiento == "ajuste":
-                nuevo_stock = stock_anterior + cantidad
-                fecha_entrada = datetime.now().isoformat() if cantidad > 0 else None
-                fecha_salida = datetime.now().isoformat() if cantidad < 0 else None
-            else:  # salida
-                nuevo_stock = stock_anterior - cantidad
-                fecha_entrada = None
-                fecha_salida = datetime.now().isoformat()
+            # Cantidad con signo: las salidas restan, los ajustes traen su signo
+            if self.tipo_movimiento == "salida":
+                cantidad_movimiento = -cantidad
+            else:
+                cantidad_movimiento = cantidad
             
-            # Actualizar stock en inventario
-            exito = self.pg_manager.actualizar_stock(
-                self.producto_seleccionado['codigo_interno'],
-                self.producto_seleccionado['tipo_producto'],
-                nuevo_stock,
-                fecha_entrada=fecha_entrada,
-                fecha_salida=fecha_salida
-            )
+            if observaciones:
+                motivo_texto = f"{motivo_texto}: {observaciones}"
             
-            if not exito:
-                show_error_dialog(
-                    self,
-                    "Error",
-                    "No se pudo actualizar el stock",
-                    detail="Hubo un error al actualizar el stock en el inventario"
-                )
-                return
-            
-            # Registrar el movimiento
-            movimiento_data = {
-                'codigo_interno': self.producto_seleccionado['codigo_interno'],
-                'tipo_producto': self.producto_seleccionado['tipo_producto'],
-                'tipo_movimiento': self.tipo_movimiento if self.tipo_movimiento == "ajuste" else ('entrada' if self.tipo_movimiento == "entrada" else tipo_movimiento_db),
-                'cantidad': cantidad if self.tipo_movimiento in ["entrada", "ajuste"] else -cantidad,
-                'stock_anterior': stock_anterior,
-                'stock_nuevo': nuevo_stock,
-                'motivo': motivo_texto if self.tipo_movimiento != "entrada" else None,
+            # Stock y movimiento en una sola operación atómica
+            movimiento = self.pg_manager.registrar_movimiento_inventario({
+                'id_producto': self.producto_seleccionado['id_producto'],
+                'tipo_movimiento': tipo_movimiento_db,
+                'cantidad': cantidad_movimiento,
+                'motivo': motivo_texto,
                 'id_usuario': self.user_data.get('id_usuario') if self.user_data else None
-            }
-            
-            exito = self.pg_manager.registrar_movimiento_inventario(movimiento_data)
+            })
             
-            if not exito:
+            if not movimiento:
                 show_error_dialog(
                     self,
                     "Error",
                     "No se pudo registrar el movimiento",
-                    detail="El movimiento de inventario no se pudo registrar"
+                    detail="No se actualizó el inventario (revisa el stock disponible)"
                 )
                 return
             
+            nuevo_stock = movimiento['stock_nuevo']
+            
             show_success_dialog(
                 self,
                 "Movimiento registrado",
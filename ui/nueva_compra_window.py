@@ -14,7 +14,6 @@ from PySide6.QtCore import Qt, Signal, QDate, QTimer, QEvent
 from PySide6.QtGui import QFont, QIcon
 import logging
 from datetime import datetime
-import qtawesome as qta
 
 from ui.components import (
     WindowsPhoneTheme,
@@ -30,7 +29,8 @@ from ui.components import (
     show_warning_dialog,
     show_error_dialog,
     show_success_dialog,
-    show_confirmation_dialog
+    show_confirmation_dialog,
+    obtener_icono
 )
 from database.postgres_manager import PostgresManager
 
@@ -586,7 +586,7 @@ class NuevaCompraWindow(QWidget):
 
             # Botón eliminar
             btn_eliminar = QPushButton()
-            btn_eliminar.setIcon(qta.icon('fa5s.trash', color='red'))
+            btn_eliminar.setIcon(obtener_icono('fa5s.trash', 'red'))
             btn_eliminar.setToolTip("Eliminar producto")
             btn_eliminar.clicked.connect(lambda checked, r=row: self.eliminar_producto(r))
             self.productos_table.setCellWidget(row, 4, btn_eliminar)
@@ -1209,25 +1209,25 @@ class NuevoProductoWindow(QWidget):
                 'activo': self.activo_check.isChecked()
             }
 
-            # Guardar producto en la tabla unificada
-            success = self.pg_manager.insertar_producto(producto_data)
-
-            if success:
-                # Obtener ID de ubicación seleccionada para el inventario
-                id_ubicacion = self.ubicacion_combo.currentData()
-
-                # Crear registro en inventario con la ubicación
-                inventario_data = {
-                    'codigo_interno': producto_data['codigo_interno'],
-                    'tipo_producto': 'producto',  # Ahora todos son productos unificados
-                    'stock_actual': producto_data['stock_actual'],
-                    'stock_minimo': producto_data['stock_minimo'],
-                    'id_ubicacion': id_ubicacion,
-                    'activo': producto_data['activo']
-                }
-
-                self.pg_manager.crear_inventario(inventario_data)
-
+            # Producto e inventario inicial en una transacción: o quedan los dos o ninguno
+            with self.pg_manager.transaccion() as unidad:
+                id_producto = self.pg_manager.insertar_producto(producto_data)
+
+                if id_producto:
+                    # Crear registro en inventario con la ubicación seleccionada
+                    inventario_data = {
+                        'id_producto': id_producto,
+                        'codigo_interno': producto_data['codigo_interno'],
+                        'tipo_producto': 'producto',  # Ahora todos son productos unificados
+                        'stock_actual': producto_data['stock_actual'],
+                        'stock_minimo': producto_data['stock_minimo'],
+                        'id_ubicacion': self.ubicacion_combo.currentData(),
+                        'activo': producto_data['activo']
+                    }
+
+                    self.pg_manager.crear_inventario(inventario_data)
+
+            if id_producto and not unidad.fallida:
                 # Mostrar mensaje de éxito
                 show_success_dialog(
                     self,
@@ -0,0 +1,128 @@
+"""
+Diálogo para definir el PIN de reanudación del turno
+Se muestra una vez por turno, después de un login con contraseña
+"""
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton
+)
+from PySide6.QtCore import Qt, QRegularExpression
+from PySide6.QtGui import QFont, QRegularExpressionValidator
+
+from ui.components import (
+    WindowsPhoneTheme,
+    StyledLabel,
+    show_warning_dialog
+)
+from services.autenticacion import LONGITUD_PIN, pin_valido
+
+
+class PinTurnoDialog(QDialog):
+    """Pedir (opcionalmente) un PIN corto para volver al turno sin contraseña"""
+
+    def __init__(self, user_data, parent=None):
+        super().__init__(parent)
+        self.user_data = user_data
+        self.pin = None
+
+        self.setWindowTitle("PIN de Turno")
+        self.setModal(True)
+        self.setMinimumWidth(420)
+
+        self.setStyleSheet(f"""
+            QDialog {{
+                background-color: {WindowsPhoneTheme.BG_LIGHT};
+            }}
+            QPushButton#dialogPrimaryButton {{
+                background-color: {WindowsPhoneTheme.PRIMARY_BLUE};
+                color: white;
+                border: none;
+                font-weight: bold;
+            }}
+            QPushButton#dialogSecondaryButton {{
+                background-color: transparent;
+                color: {WindowsPhoneTheme.PRIMARY_BLUE};
+                border: 3px solid rgba(30, 58, 138, 0.35);
+                font-weight: bold;
+            }}
+        """)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Configurar interfaz del diálogo"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(30, 30, 30, 30)
+        layout.setSpacing(15)
+
+        title = QLabel("PIN DE REANUDACIÓN")
+        title.setAlignment(Qt.AlignCenter)
+        title.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, 18, QFont.Bold))
+        title.setStyleSheet(f"color: {WindowsPhoneTheme.PRIMARY_BLUE};")
+        layout.addWidget(title)
+
+        instruccion = StyledLabel(
+            f"{self.user_data['nombre_completo']}, define un PIN de {LONGITUD_PIN[0]} a {LONGITUD_PIN[1]} "
+            "dígitos para volver a tu turno sin escribir la contraseña. "
+            "Solo vale en esta caja y hasta que termine el turno.",
+            size=12
+        )
+        instruccion.setAlignment(Qt.AlignCenter)
+        instruccion.setWordWrap(True)
+        layout.addWidget(instruccion)
+
+        validador = QRegularExpressionValidator(QRegularExpression(f"\\d{{0,{LONGITUD_PIN[1]}}}"))
+
+        self.pin_input = QLineEdit()
+        self.pin_input.setPlaceholderText("PIN")
+        self.pin_input.setEchoMode(QLineEdit.Password)
+        self.pin_input.setValidator(validador)
+        self.pin_input.setAlignment(Qt.AlignCenter)
+        self.pin_input.setMinimumHeight(50)
+        self.pin_input.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, 16))
+        layout.addWidget(self.pin_input)
+
+        self.confirmacion_input = QLineEdit()
+        self.confirmacion_input.setPlaceholderText("Confirmar PIN")
+        self.confirmacion_input.setEchoMode(QLineEdit.Password)
+        self.confirmacion_input.setValidator(validador)
+        self.confirmacion_input.setAlignment(Qt.AlignCenter)
+        self.confirmacion_input.setMinimumHeight(50)
+        self.confirmacion_input.setFont(QFont(WindowsPhoneTheme.FONT_FAMILY, 16))
+        self.confirmacion_input.returnPressed.connect(self.guardar)
+        layout.addWidget(self.confirmacion_input)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
+
+        btn_omitir = QPushButton("Omitir")
+        btn_omitir.setObjectName("dialogSecondaryButton")
+        btn_omitir.setMinimumHeight(45)
+        btn_omitir.clicked.connect(self.reject)
+        buttons_layout.addWidget(btn_omitir)
+
+        btn_guardar = QPushButton("Guardar PIN")
+        btn_guardar.setObjectName("dialogPrimaryButton")
+        btn_guardar.setMinimumHeight(45)
+        btn_guardar.clicked.connect(self.guardar)
+        buttons_layout.addWidget(btn_guardar)
+
+        layout.addLayout(buttons_layout)
+        self.pin_input.setFocus()
+
+    def guardar(self):
+        pin = self.pin_input.text()
+        if not pin_valido(pin):
+            show_warning_dialog(self, "PIN inválido", f"El PIN debe tener de {LONGITUD_PIN[0]} a {LONGITUD_PIN[1]} dígitos")
+            self.pin_input.setFocus()
+            return
+        if pin != self.confirmacion_input.text():
+            show_warning_dialog(self, "PIN inválido", "Los PIN no coinciden")
+            self.confirmacion_input.clear()
+            self.confirmacion_input.setFocus()
+            return
+        self.pin = pin
+        self.accept()
+
+    def get_pin(self):
+        return self.pin
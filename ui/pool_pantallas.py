@@ -0,0 +1,124 @@
+"""
+Pool de pantallas para la ventana principal de HTF POS
+Conserva las pantallas ya construidas (tablas, estilos, iconos) en un LRU
+con presupuesto de memoria. Volver a una pantalla la muestra de inmediato y
+solo refresca sus datos (método refrescar_datos del widget, si lo tiene).
+
+Configuración por variables de entorno (.env):
+    POS_PANTALLAS_EN_MEMORIA    Máximo de pantallas conservadas (8)
+    POS_PRESUPUESTO_WIDGETS     Presupuesto aproximado en widgets (20000)
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QWidget, QTableWidget
+
+# Una celda de tabla pesa bastante menos que un widget; se cuentan como fracción
+COSTO_CELDA = 0.1
+
+
+class PoolPantallas(QObject):
+    """
+    LRU de pantallas dentro de un QStackedWidget.
+
+    Cada pantalla se identifica por una clave (p. ej. 'inventario' o
+    'historial_ventas:2' si depende de la pestaña de origen). El costo de
+    una pantalla se estima en widgets (widgets hijos + celdas de tabla) y se
+    recalcula al desalojar, porque crece conforme se cargan datos.
+    """
+
+    def __init__(self, stacked_widget, max_pantallas=None, presupuesto_widgets=None, parent=None):
+        super().__init__(parent)
+        self.stacked_widget = stacked_widget
+        self.max_pantallas = max_pantallas or int(os.getenv('POS_PANTALLAS_EN_MEMORIA', '8'))
+        self.presupuesto_widgets = presupuesto_widgets or int(os.getenv('POS_PRESUPUESTO_WIDGETS', '20000'))
+        self.pantallas = OrderedDict()  # clave -> widget (la más reciente al final)
+
+    def mostrar(self, clave, fabrica):
+        """
+        Mostrar la pantalla de la clave, construyéndola con fabrica() si no
+        está en el pool. Devuelve el widget mostrado.
+        """
+        widget = self.pantallas.get(clave)
+        if widget is not None:
+            self.pantallas.move_to_end(clave)
+            # Refrescar antes de mostrarla: los cambios a la tabla no se pintan uno por uno
+            self._refrescar(clave, widget)
+            self.stacked_widget.setCurrentWidget(widget)
+            return widget
+
+        inicio = time.perf_counter()
+        widget = fabrica()
+        self.pantallas[clave] = widget
+        self.stacked_widget.addWidget(widget)
+        self.stacked_widget.setCurrentWidget(widget)
+        logging.info(f"Pantalla '{clave}' construida en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        self._desalojar()
+        return widget
+
+    def contiene(self, widget):
+        """Si el widget pertenece al pool (no debe destruirse al salir de él)"""
+        return any(w is widget for w in self.pantallas.values())
+
+    def descartar(self, clave):
+        """Sacar una pantalla del pool y destruirla (p. ej. si quedó inválida)"""
+        widget = self.pantallas.pop(clave, None)
+        if widget is not None:
+            self._destruir(clave, widget)
+
+    def vaciar(self):
+        """Destruir todas las pantallas del pool (cierre de sesión)"""
+        for clave in list(self.pantallas):
+            self.descartar(clave)
+
+    @staticmethod
+    def costo(widget):
+        """Costo aproximado de una pantalla en widgets"""
+        celdas = sum(t.rowCount() * t.columnCount() for t in widget.findChildren(QTableWidget))
+        return len(widget.findChildren(QWidget)) + int(celdas * COSTO_CELDA)
+
+    def costo_total(self):
+        return sum(self.costo(w) for w in self.pantallas.values())
+
+    def _refrescar(self, clave, widget):
+        refrescar = getattr(widget, 'refrescar_datos', None)
+        if not refrescar:
+            return
+        inicio = time.perf_counter()
+        try:
+            refrescar()
+            logging.info(f"Pantalla '{clave}' reutilizada, datos refrescados en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        except Exception as e:
+            logging.error(f"Error refrescando pantalla '{clave}': {e}")
+
+    def _desalojar(self):
+        """Destruir las pantallas menos usadas hasta quedar dentro del presupuesto"""
+        actual = self.stacked_widget.currentWidget()
+        costos = {clave: self.costo(w) for clave, w in self.pantallas.items()}
+        total = sum(costos.values())
+
+        for clave in list(self.pantallas):
+            if len(self.pantallas) <= self.max_pantallas and total <= self.presupuesto_widgets:
+                break
+            widget = self.pantallas[clave]
+            if widget is actual:
+                continue
+            del self.pantallas[clave]
+            total -= costos[clave]
+            self._destruir(clave, widget)
+            logging.info(f"Pantalla '{clave}' desalojada del pool ({costos[clave]} widgets, quedan {total})")
+
+    def _destruir(self, clave, widget):
+        try:
+            liberar = getattr(widget, 'liberar', None)
+            if liberar:
+                liberar()
+            self.stacked_widget.removeWidget(widget)
+            widget.deleteLater()
+        except Exception as e:
+            logging.error(f"Error destruyendo pantalla '{clave}': {e}")
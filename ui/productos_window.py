@@ -12,7 +12,6 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, QSize
 from PySide6.QtGui import QFont
 import logging
-import qtawesome as qta
 
 from ui.components import (
     WindowsPhoneTheme,
@@ -24,7 +23,8 @@ from ui.components import (
     show_success_dialog,
     show_warning_dialog,
     show_error_dialog,
-    show_confirmation_dialog
+    show_confirmation_dialog,
+    obtener_icono
 )
 
 # Importar ventana de nuevo producto
@@ -163,11 +163,7 @@ class FormularioProductoDialog(QDialog):
     def cargar_categorias(self):
         """Cargar categorías disponibles"""
         try:
-            # Usar consulta SQL directa para obtener categorías
-            sql = "SELECT id_categoria, nombre FROM ca_categorias_producto ORDER BY nombre"
-            categorias_data = self.pg_manager.query(sql)
-            
-            for cat in categorias_data:
+            for cat in self.pg_manager.obtener_categorias_producto():
                 self.input_categoria.addItem(cat['nombre'], cat['id_categoria'])
         except Exception as e:
             logging.error(f"Error cargando categorías: {e}")
@@ -371,8 +367,44 @@ class ProductosWindow(QWidget):
 
         return panel
 
+    def refrescar_datos(self):
+        """
+        Refresco al reutilizar la pantalla: si el catálogo tiene los mismos
+        productos en el mismo orden solo se reescriben las celdas que cambiaron,
+        sin reconstruir la tabla (un checkbox por fila); si no, recarga completa
+        """
+        productos = self._consultar_productos()
+        if productos is None:
+            return
+
+        if [p['id_producto'] for p in productos] != [p['id_producto'] for p in self.productos]:
+            self.productos = productos
+            self.actualizar_tabla()
+            logging.info(f"Productos recargados: {len(self.productos)} productos")
+            return
+
+        modificados = 0
+        for i, (producto, nuevo) in enumerate(zip(self.productos, productos)):
+            if producto != nuevo:
+                # Actualizar el mismo dict: la señal del checkbox de la fila lo referencia
+                producto.update(nuevo)
+                self._escribir_celdas(i, producto)
+                modificados += 1
+        logging.info(f"Productos refrescados: {modificados} filas modificadas")
+
     def cargar_productos(self):
         """Cargar productos desde la base de datos"""
+        productos = self._consultar_productos()
+        if productos is None:
+            show_error_dialog(self, "Error", "No se pudieron cargar los productos")
+            return
+
+        self.productos = productos
+        self.actualizar_tabla()
+        logging.info(f"Cargados {len(self.productos)} productos")
+
+    def _consultar_productos(self):
+        """Productos activos con su stock total, o None si la consulta falló"""
         try:
             # Consulta personalizada que incluye id_categoria y stock
             sql = """
@@ -390,7 +422,7 @@ class ProductosWindow(QWidget):
             """
             productos_data = self.pg_manager.query(sql)
             
-            self.productos = []
+            productos = []
             for item in productos_data:
                 producto = {
                     'id_producto': item['id_producto'],
@@ -403,76 +435,70 @@ class ProductosWindow(QWidget):
                     'activo': item['activo'],
                     'stock_actual': item['stock_actual'] or 0
                 }
-                self.productos.append(producto)
-            
-            self.actualizar_tabla()
-            logging.info(f"Cargados {len(self.productos)} productos")
+                productos.append(producto)
+            return productos
 
         except Exception as e:
             logging.error(f"Error cargando productos: {e}")
-            show_error_dialog(self, "Error", "No se pudieron cargar los productos")
+            return None
 
     def actualizar_tabla(self):
         """Actualizar tabla con los datos de productos"""
-        self.table.setRowCount(0)
-
-        for i, producto in enumerate(self.productos):
-            self.table.insertRow(i)
-            self.table.setRowHeight(i, 60)  # Altura consistente
-
-            # Código
-            codigo_item = QTableWidgetItem(producto['codigo_interno'])
-            codigo_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 0, codigo_item)
-
-            # Nombre
-            nombre_item = QTableWidgetItem(producto['nombre'])
-            self.table.setItem(i, 1, nombre_item)
-
-            # Precio
-            precio_item = QTableWidgetItem(f"${producto['precio_venta']:.2f}")
-            precio_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 2, precio_item)
-
-            # Categoría
-            categoria = producto.get('categoria') or '-'
-            categoria_item = QTableWidgetItem(categoria)
-            self.table.setItem(i, 3, categoria_item)
-
-            # Stock
-            stock_item = QTableWidgetItem(str(producto.get('stock_actual', 0)))
-            stock_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 4, stock_item)
-
-            # Estado - Checkbox para activar/desactivar con iconos
-            estado_checkbox = QCheckBox()
-            estado_checkbox.setChecked(producto['activo'])
-
-            # Configurar icono según estado
-            if producto['activo']:
-                icon = qta.icon('fa5s.toggle-on', color=WindowsPhoneTheme.TILE_GREEN)
-            else:
-                icon = qta.icon('fa5s.toggle-off', color=WindowsPhoneTheme.TILE_RED)
-
-            estado_checkbox.setIcon(icon)
-            estado_checkbox.setIconSize(QSize(24, 24))
-
-            estado_checkbox.setStyleSheet(f"""
-                QCheckBox {{
-                    spacing: 4px;
-                    padding: 4px;
-                }}
-                QCheckBox::indicator {{
-                    width: 0px;
-                    height: 0px;
-                    border: none;
-                    background: transparent;
-                }}
-            """)
-
-            # Conectar el cambio de estado a nuestro método
-            estado_checkbox.stateChanged.connect(lambda state, p=producto, row=i: self.on_estado_changed(state, p, row))
-            self.table.setCellWidget(i, 5, estado_checkbox)
+        # Sin repintar fila por fila mientras se reconstruye
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.table.setRowCount(0)
+
+            for i, producto in enumerate(self.productos):
+                self.table.insertRow(i)
+                self.table.setRowHeight(i, 60)  # Altura consistente
+                self._escribir_celdas(i, producto)
+
+                # Estado - Checkbox para activar/desactivar con iconos
+                estado_checkbox = QCheckBox()
+                estado_checkbox.setObjectName("toggleEstado")
+                estado_checkbox.setChecked(producto['activo'])
+
+                # Configurar icono según estado
+                if producto['activo']:
+                    icon = obtener_icono('fa5s.toggle-on', WindowsPhoneTheme.TILE_GREEN, 24)
+                else:
+                    icon = obtener_icono('fa5s.toggle-off', WindowsPhoneTheme.TILE_RED, 24)
+
+                estado_checkbox.setIcon(icon)
+                estado_checkbox.setIconSize(QSize(24, 24))
+
+                # Conectar el cambio de estado a nuestro método
+                estado_checkbox.stateChanged.connect(lambda state, p=producto, row=i: self.on_estado_changed(state, p, row))
+                self.table.setCellWidget(i, 5, estado_checkbox)
+        finally:
+            self.table.setUpdatesEnabled(True)
+
+    def _escribir_celdas(self, i, producto):
+        """Celdas de texto de una fila (el checkbox de estado se crea aparte)"""
+        # Código
+        codigo_item = QTableWidgetItem(producto['codigo_interno'])
+        codigo_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 0, codigo_item)
+
+        # Nombre
+        nombre_item = QTableWidgetItem(producto['nombre'])
+        self.table.setItem(i, 1, nombre_item)
+
+        # Precio
+        precio_item = QTableWidgetItem(f"${producto['precio_venta']:.2f}")
+        precio_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 2, precio_item)
+
+        # Categoría
+        categoria = producto.get('categoria') or '-'
+        categoria_item = QTableWidgetItem(categoria)
+        self.table.setItem(i, 3, categoria_item)
+
+        # Stock
+        stock_item = QTableWidgetItem(str(producto.get('stock_actual', 0)))
+        stock_item.setTextAlignment(Qt.AlignCenter)
+        self.table.setItem(i, 4, stock_item)
 
     def abrir_formulario_nuevo(self):
         """Abrir ventana de nuevo producto"""
@@ -535,9 +561,10 @@ class ProductosWindow(QWidget):
         
         # Solicitar autorización de administrador
         motivo = f"{accion} producto: {producto['nombre']} (Código: {producto['codigo_interno']})"
-        auth_dialog = AdminAuthDialog(self.pg_manager, motivo, parent=self)
+        # Una autorización reciente cubre los siguientes cambios de estado
+        autorizacion = AdminAuthDialog.solicitar(self.pg_manager, motivo, parent=self, accion='estado_producto')
         
-        if auth_dialog.exec() != QDialog.Accepted:
+        if not autorizacion['autorizado']:
             # Revertir el cambio del checkbox
             checkbox = self.table.cellWidget(row, 5)
             if checkbox:
@@ -561,7 +588,7 @@ class ProductosWindow(QWidget):
                     id_usuario_modifico = %s
                 WHERE id_producto = %s
             """
-            self.pg_manager.execute(sql, (nuevo_estado, auth_dialog.id_admin_autorizador, producto['id_producto']))
+            self.pg_manager.execute(sql, (nuevo_estado, autorizacion['id_admin'], producto['id_producto']))
             
             # Actualizar el producto en la lista local
             producto['activo'] = nuevo_estado
@@ -570,9 +597,9 @@ class ProductosWindow(QWidget):
             checkbox = self.table.cellWidget(row, 5)
             if checkbox:
                 if nuevo_estado:
-                    icon = qta.icon('fa5s.toggle-on', color=WindowsPhoneTheme.TILE_GREEN)
+                    icon = obtener_icono('fa5s.toggle-on', WindowsPhoneTheme.TILE_GREEN, 24)
                 else:
-                    icon = qta.icon('fa5s.toggle-off', color=WindowsPhoneTheme.TILE_RED)
+                    icon = obtener_icono('fa5s.toggle-off', WindowsPhoneTheme.TILE_RED, 24)
 
                 checkbox.setIcon(icon)
                 checkbox.setIconSize(QSize(24, 24))
@@ -583,7 +610,7 @@ class ProductosWindow(QWidget):
                 f"El producto '{producto['nombre']}' ha sido {accion.lower()}do correctamente."
             )
             
-            logging.info(f"Producto {producto['id_producto']} {accion.lower()}do por admin {auth_dialog.id_admin_autorizador}")
+            logging.info(f"Producto {producto['id_producto']} {accion.lower()}do por admin {autorizacion['id_admin']}")
             
         except Exception as e:
             # Revertir el cambio del checkbox en caso de error
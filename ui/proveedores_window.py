@@ -336,9 +336,9 @@ class ProveedoresWindow(QWidget):
 
         # Tabla de proveedores
         self.tabla_proveedores = QTableWidget()
-        self.tabla_proveedores.setColumnCount(7)
+        self.tabla_proveedores.setColumnCount(9)
         self.tabla_proveedores.setHorizontalHeaderLabels([
-            "ID", "Código", "Razón Social", "Contacto", "Teléfono", "Email", "Estado"
+            "ID", "Código", "Razón Social", "Contacto", "Teléfono", "Email", "Saldo", "Próx. Venc.", "Estado"
         ])
 
         # Configurar tabla
@@ -356,7 +356,9 @@ class ProveedoresWindow(QWidget):
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Contacto
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Teléfono
         header.setSectionResizeMode(5, QHeaderView.Stretch)  # Email
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Estado
+        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Saldo
+        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # Próximo vencimiento
+        header.setSectionResizeMode(8, QHeaderView.ResizeToContents)  # Estado
 
         # Aplicar estilos a la tabla
         self.tabla_proveedores.setStyleSheet(f"""
@@ -411,16 +413,15 @@ class ProveedoresWindow(QWidget):
 
         layout.addLayout(buttons_layout)
 
+    def refrescar_datos(self):
+        """Recargar los proveedores al reutilizar la pantalla (se conserva la búsqueda)"""
+        self.cargar_proveedores()
+
     def cargar_proveedores(self):
         """Cargar lista de proveedores"""
         try:
-            sql = """
-                SELECT id_proveedor, codigo, razon_social, nombre_comercial, 
-                       contacto_nombre, contacto_telefono, contacto_email, activo
-                FROM ca_proveedores
-                ORDER BY razon_social
-            """
-            proveedores = self.pg_manager.query(sql)
+            # Saldos precalculados (setup_cxp_saldos.sql), sin recorrer el historial
+            proveedores = self.pg_manager.obtener_saldos_proveedores()
             self.tabla_proveedores.setRowCount(0)
 
             for proveedor in proveedores:
@@ -450,12 +451,27 @@ class ProveedoresWindow(QWidget):
                 email = proveedor['contacto_email'] if proveedor['contacto_email'] else "N/A"
                 self.tabla_proveedores.setItem(row, 5, QTableWidgetItem(email))
 
+                # Saldo pendiente y cuentas abiertas
+                saldo_item = QTableWidgetItem(
+                    f"${proveedor['saldo_actual']:,.2f} ({proveedor['cuentas_abiertas']})"
+                    if proveedor['cuentas_abiertas'] else "-"
+                )
+                saldo_item.setData(Qt.TextAlignmentRole, Qt.AlignRight | Qt.AlignVCenter)
+                self.tabla_proveedores.setItem(row, 6, saldo_item)
+
+                # Próximo vencimiento (en rojo si ya venció)
+                vencimiento = proveedor['proximo_vencimiento']
+                vencimiento_item = QTableWidgetItem(vencimiento.strftime('%d/%m/%Y') if vencimiento else "-")
+                if vencimiento and vencimiento < date.today():
+                    vencimiento_item.setForeground(Qt.red)
+                self.tabla_proveedores.setItem(row, 7, vencimiento_item)
+
                 # Estado
                 estado = "Activo" if proveedor['activo'] else "Inactivo"
                 estado_item = QTableWidgetItem(estado)
                 if not proveedor['activo']:
                     estado_item.setForeground(Qt.red)
-                self.tabla_proveedores.setItem(row, 6, estado_item)
+                self.tabla_proveedores.setItem(row, 8, estado_item)
 
         except Exception as e:
             logging.error(f"Error cargando proveedores: {e}")
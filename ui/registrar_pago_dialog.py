@@ -0,0 +1,93 @@
+"""
+Diálogo para registrar un pago a una cuenta (por cobrar o por pagar)
+Captura monto y método; la ventana que lo abre registra el pago
+"""
+
+from decimal import Decimal
+
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox
+from PySide6.QtCore import Qt
+
+from ui.components import (
+    WindowsPhoneTheme,
+    TileButton,
+    SectionTitle,
+    StyledLabel,
+    TouchMoneyInput,
+    show_warning_dialog
+)
+
+# Métodos de pago (valor guardado, texto mostrado)
+METODOS_PAGO = [
+    ('efectivo', "Efectivo"),
+    ('transferencia', "Transferencia"),
+    ('tarjeta_debito', "Tarjeta de débito"),
+    ('tarjeta_credito', "Tarjeta de crédito"),
+    ('cheque', "Cheque"),
+    ('deposito', "Depósito"),
+]
+
+
+class RegistrarPagoDialog(QDialog):
+    """Monto (hasta el saldo de la cuenta) y método de pago"""
+
+    def __init__(self, descripcion, saldo, parent=None):
+        super().__init__(parent)
+        self.saldo = Decimal(str(saldo))
+        self.monto = None
+        self.metodo_pago = None
+
+        self.setWindowTitle("Registrar Pago")
+        self.setModal(True)
+        self.setMinimumWidth(500)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        layout.addWidget(SectionTitle("REGISTRAR PAGO"))
+
+        info = StyledLabel(f"{descripcion}\nSaldo: ${self.saldo:,.2f}", bold=True)
+        info.setWordWrap(True)
+        layout.addWidget(info)
+
+        layout.addWidget(StyledLabel("Monto:"))
+        self.monto_input = TouchMoneyInput(minimum=0.0, maximum=float(self.saldo), default_value=float(self.saldo))
+        self.monto_input.setMinimumHeight(60)
+        layout.addWidget(self.monto_input)
+
+        layout.addWidget(StyledLabel("Método de pago:"))
+        self.combo_metodo = QComboBox()
+        self.combo_metodo.setMinimumHeight(40)
+        for valor, texto in METODOS_PAGO:
+            self.combo_metodo.addItem(texto, valor)
+        layout.addWidget(self.combo_metodo)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
+
+        btn_registrar = TileButton("Registrar", "fa5s.check", WindowsPhoneTheme.TILE_GREEN)
+        btn_registrar.setMaximumHeight(120)
+        btn_registrar.clicked.connect(self.confirmar)
+        buttons_layout.addWidget(btn_registrar)
+
+        btn_cancelar = TileButton("Cancelar", "fa5s.times", WindowsPhoneTheme.TILE_RED)
+        btn_cancelar.setMaximumHeight(120)
+        btn_cancelar.clicked.connect(self.reject)
+        buttons_layout.addWidget(btn_cancelar)
+
+        layout.addLayout(buttons_layout)
+        self.monto_input.setFocus(Qt.OtherFocusReason)
+
+    def confirmar(self):
+        """Validar el monto y cerrar el diálogo"""
+        monto = Decimal(str(self.monto_input.value())).quantize(Decimal('0.01'))
+        if monto <= 0:
+            show_warning_dialog(self, "Monto inválido", "El monto del pago debe ser mayor a cero")
+            return
+        if monto > self.saldo:
+            show_warning_dialog(self, "Monto inválido", f"El monto no puede ser mayor al saldo (${self.saldo:,.2f})")
+            return
+        self.monto = monto
+        self.metodo_pago = self.combo_metodo.currentData()
+        self.accept()
@@ -0,0 +1,100 @@
+"""
+Registro de pantallas de HTF POS con importación diferida
+Los módulos de cada pantalla (y sus dependencias pesadas, como pandas) se
+importan la primera vez que se abre la pantalla, no al iniciar la aplicación.
+precargar() los importa todos por adelantado desde un hilo en segundo plano.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+
+class PantallaPerezosa:
+    """
+    Referencia a una clase de pantalla que se importa en el primer uso.
+    Se llama igual que la clase: PantallaPerezosa(...)(pg_manager, user_data, parent)
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, modulo, clase):
+        self.modulo = modulo
+        self.clase = clase
+        self._clase = None
+
+    def cargar(self):
+        """Importar el módulo (una sola vez) y devolver la clase real"""
+        if self._clase is None:
+            with self._lock:
+                if self._clase is None:
+                    inicio = time.perf_counter()
+                    modulo = importlib.import_module(self.modulo)
+                    self._clase = getattr(modulo, self.clase)
+                    logging.info(
+                        f"Pantalla {self.clase} importada en {(time.perf_counter() - inicio) * 1000:.0f} ms"
+                    )
+        return self._clase
+
+    @property
+    def cargada(self):
+        return self._clase is not None
+
+    def __call__(self, *args, **kwargs):
+        return self.cargar()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<PantallaPerezosa {self.modulo}.{self.clase}{'' if self._clase else ' (sin importar)'}>"
+
+
+# ========== PANTALLAS ==========
+
+NuevaVentaWindow = PantallaPerezosa('ui.ventas.nueva_venta', 'NuevaVentaWindow')
+VentasDiaWindow = PantallaPerezosa('ui.ventas.ventas_dia', 'VentasDiaWindow')
+HistorialVentasWindow = PantallaPerezosa('ui.ventas.historial', 'HistorialVentasWindow')
+CierreCajaWindow = PantallaPerezosa('ui.ventas.cierre_caja', 'CierreCajaWindow')
+InventarioWindow = PantallaPerezosa('ui.inventario_window', 'InventarioWindow')
+CuentasPorPagarWindow = PantallaPerezosa('ui.cuentas_por_pagar_window', 'CuentasPorPagarWindow')
+NuevaCompraWindow = PantallaPerezosa('ui.nueva_compra_window', 'NuevaCompraWindow')
+NuevoProductoWindow = PantallaPerezosa('ui.nuevo_producto_window', 'NuevoProductoWindow')
+NuevoClienteWindow = PantallaPerezosa('ui.nuevo_cliente_window', 'NuevoClienteWindow')
+ProductosWindow = PantallaPerezosa('ui.productos_window', 'ProductosWindow')
+ProveedoresWindow = PantallaPerezosa('ui.proveedores_window', 'ProveedoresWindow')
+ClientesWindow = PantallaPerezosa('ui.clientes_window', 'ClientesWindow')
+TipoCuentaPagarWindow = PantallaPerezosa('ui.tipo_cuenta_pagar_window', 'TipoCuentaPagarWindow')
+HistorialMovimientosWindow = PantallaPerezosa('ui.historial_movimientos_window', 'HistorialMovimientosWindow')
+HistorialTurnosWindow = PantallaPerezosa('ui.historial_turnos_window', 'HistorialTurnosWindow')
+AsignacionTurnosWindow = PantallaPerezosa('ui.asignacion_turnos_window', 'AsignacionTurnosWindow')
+UbicacionesWindow = PantallaPerezosa('ui.ubicaciones_window', 'UbicacionesWindow')
+MovimientoInventarioWindow = PantallaPerezosa('ui.movimiento_inventario_window', 'MovimientoInventarioWindow')
+ConteoFisicoWindow = PantallaPerezosa('ui.conteo_fisico_window', 'ConteoFisicoWindow')
+CuentasPorCobrarWindow = PantallaPerezosa('ui.cuentas_por_cobrar_window', 'CuentasPorCobrarWindow')
+RendimientoWindow = PantallaPerezosa('ui.rendimiento_window', 'RendimientoWindow')
+
+# Orden de precarga: primero lo que el cajero abre primero
+PANTALLAS = [
+    NuevaVentaWindow, VentasDiaWindow, CierreCajaWindow, HistorialVentasWindow,
+    InventarioWindow, ProductosWindow, MovimientoInventarioWindow, NuevoProductoWindow,
+    ClientesWindow, NuevoClienteWindow, CuentasPorCobrarWindow,
+    NuevaCompraWindow, CuentasPorPagarWindow, ProveedoresWindow, TipoCuentaPagarWindow,
+    HistorialMovimientosWindow, HistorialTurnosWindow, AsignacionTurnosWindow,
+    UbicacionesWindow, ConteoFisicoWindow, RendimientoWindow,
+]
+
+
+def precargar(detener=None):
+    """
+    Importar todas las pantallas pendientes (pensado para un hilo en segundo
+    plano mientras el usuario está en el login). Devuelve los ms empleados.
+    detener: callable opcional que devuelve True para cortar la precarga.
+    """
+    inicio = time.perf_counter()
+    for pantalla in PANTALLAS:
+        if detener and detener():
+            break
+        try:
+            pantalla.cargar()
+        except Exception as e:
+            logging.error(f"Error precargando {pantalla.clase}: {e}")
+    return (time.perf_counter() - inicio) * 1000
@@ -0,0 +1,262 @@
+"""
+Ventana de Rendimiento de Base de Datos para HTF POS
+Muestra los tiempos por método de PostgresManager, por sentencia SQL y las
+consultas lentas registradas (ver database/instrumentacion.py)
+"""
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QHeaderView, QTabWidget
+)
+from PySide6.QtCore import Qt, Signal, QTimer
+import logging
+
+# Importar componentes del sistema de diseño
+from ui.components import (
+    WindowsPhoneTheme,
+    TileButton,
+    ContentPanel,
+    StyledLabel,
+    show_info_dialog,
+    show_confirmation_dialog,
+    create_page_layout
+)
+
+
+class RendimientoWindow(QWidget):
+    """Widget con las estadísticas de rendimiento de la base de datos"""
+
+    cerrar_solicitado = Signal()
+
+    INTERVALO_ACTUALIZACION_MS = 5000
+
+    def __init__(self, pg_manager, user_data, parent=None):
+        super().__init__(parent)
+        self.pg_manager = pg_manager
+        self.user_data = user_data
+        self.lentas = []
+
+        self.setup_ui()
+        self.cargar_estadisticas()
+
+        # Refrescar mientras la ventana está abierta
+        self.timer_actualizacion = QTimer(self)
+        self.timer_actualizacion.timeout.connect(self.cargar_estadisticas)
+        self.timer_actualizacion.start(self.INTERVALO_ACTUALIZACION_MS)
+
+    def setup_ui(self):
+        """Configurar interfaz"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+
+        content = QWidget()
+        content_layout = create_page_layout("")
+        content.setLayout(content_layout)
+
+        panel = ContentPanel()
+        panel_layout = QVBoxLayout(panel)
+
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setStyleSheet(f"""
+            QTabBar::tab {{
+                background-color: {WindowsPhoneTheme.BG_LIGHT};
+                color: {WindowsPhoneTheme.TEXT_PRIMARY};
+                padding: 12px 20px;
+                border: 1px solid {WindowsPhoneTheme.BORDER_COLOR};
+                border-bottom: none;
+                font-weight: bold;
+                font-family: '{WindowsPhoneTheme.FONT_FAMILY}';
+                font-size: {WindowsPhoneTheme.FONT_SIZE_NORMAL}px;
+            }}
+            QTabBar::tab:selected {{
+                background-color: white;
+                border-bottom: 3px solid {WindowsPhoneTheme.TILE_BLUE};
+                color: {WindowsPhoneTheme.PRIMARY_BLUE};
+            }}
+        """)
+
+        self.tabla_metodos = self._crear_tabla([
+            "Método", "Llamadas", "Errores", "Filas prom.", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Máx (ms)", "Total (s)"
+        ])
+        self.tab_widget.addTab(self.tabla_metodos, "Métodos")
+
+        self.tabla_consultas = self._crear_tabla([
+            "Sentencia", "Llamadas", "Errores", "Filas prom.", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Máx (ms)", "Total (s)"
+        ])
+        self.tab_widget.addTab(self.tabla_consultas, "Sentencias SQL")
+
+        self.tabla_lentas = self._crear_tabla(
+            ["Fecha", "ms", "Pantalla", "Método", "Filas", "Sentencia"], columna_estirada=5
+        )
+        self.tabla_lentas.itemDoubleClicked.connect(self.mostrar_detalle_lenta)
+        self.tab_widget.addTab(self.tabla_lentas, "Consultas lentas")
+
+        panel_layout.addWidget(self.tab_widget)
+        content_layout.addWidget(panel)
+
+        # Información y botones
+        botones_layout = QHBoxLayout()
+        botones_layout.setSpacing(WindowsPhoneTheme.TILE_SPACING)
+
+        self.label_info = StyledLabel("", bold=True)
+        botones_layout.addWidget(self.label_info)
+        botones_layout.addStretch()
+
+        btn_refrescar = TileButton("Actualizar", "fa5s.sync", WindowsPhoneTheme.TILE_BLUE)
+        btn_refrescar.setMaximumHeight(120)
+        btn_refrescar.clicked.connect(self.cargar_estadisticas)
+        botones_layout.addWidget(btn_refrescar)
+
+        btn_reiniciar = TileButton("Reiniciar", "fa5s.eraser", WindowsPhoneTheme.TILE_ORANGE)
+        btn_reiniciar.setMaximumHeight(120)
+        btn_reiniciar.clicked.connect(self.reiniciar_estadisticas)
+        botones_layout.addWidget(btn_reiniciar)
+
+        btn_volver = TileButton("Volver", "fa5s.arrow-left", WindowsPhoneTheme.TILE_RED)
+        btn_volver.setMaximumHeight(120)
+        btn_volver.clicked.connect(self.cerrar)
+        botones_layout.addWidget(btn_volver)
+
+        content_layout.addLayout(botones_layout)
+        layout.addWidget(content)
+
+    def _crear_tabla(self, columnas, columna_estirada=0):
+        """Tabla de solo lectura, ordenable, con la columna de texto estirada"""
+        tabla = QTableWidget()
+        tabla.setColumnCount(len(columnas))
+        tabla.setHorizontalHeaderLabels(columnas)
+        tabla.setSelectionBehavior(QTableWidget.SelectRows)
+        tabla.setSelectionMode(QTableWidget.SingleSelection)
+        tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        tabla.verticalHeader().setVisible(False)
+        tabla.setSortingEnabled(True)
+
+        header = tabla.horizontalHeader()
+        for col in range(len(columnas)):
+            header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(columna_estirada, QHeaderView.Stretch)
+
+        tabla.setStyleSheet(f"""
+            QTableWidget {{
+                background-color: white;
+                border: none;
+                gridline-color: #e5e7eb;
+                font-family: {WindowsPhoneTheme.FONT_FAMILY};
+                font-size: {WindowsPhoneTheme.FONT_SIZE_NORMAL}px;
+            }}
+            QTableWidget::item:selected {{
+                background-color: {WindowsPhoneTheme.TILE_BLUE};
+                color: white;
+            }}
+            QHeaderView::section {{
+                background-color: {WindowsPhoneTheme.PRIMARY_BLUE};
+                color: white;
+                padding: 8px;
+                border: none;
+                font-weight: bold;
+                font-family: {WindowsPhoneTheme.FONT_FAMILY};
+                font-size: {WindowsPhoneTheme.FONT_SIZE_NORMAL}px;
+            }}
+        """)
+        return tabla
+
+    @staticmethod
+    def _item_numero(valor, decimales=2):
+        """Celda numérica que ordena por valor y no por texto"""
+        item = QTableWidgetItem()
+        item.setData(Qt.DisplayRole, round(float(valor), decimales) if valor is not None else 0)
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        return item
+
+    def _llenar_resumenes(self, tabla, filas):
+        """filas: [(texto, resumen)] ordenadas por tiempo total"""
+        tabla.setSortingEnabled(False)
+        tabla.setRowCount(len(filas))
+        for row, (texto, r) in enumerate(filas):
+            tabla.setItem(row, 0, QTableWidgetItem(texto))
+            tabla.setItem(row, 1, self._item_numero(r['llamadas'], 0))
+            item_errores = self._item_numero(r['errores'], 0)
+            if r['errores']:
+                item_errores.setForeground(Qt.red)
+            tabla.setItem(row, 2, item_errores)
+            tabla.setItem(row, 3, self._item_numero(r['filas_promedio'], 1))
+            tabla.setItem(row, 4, self._item_numero(r['p50_ms']))
+            tabla.setItem(row, 5, self._item_numero(r['p95_ms']))
+            tabla.setItem(row, 6, self._item_numero(r['p99_ms']))
+            tabla.setItem(row, 7, self._item_numero(r['max_ms']))
+            tabla.setItem(row, 8, self._item_numero(r['total_ms'] / 1000, 3))
+        tabla.setSortingEnabled(True)
+
+    def cargar_estadisticas(self):
+        """Leer las estadísticas del proceso y llenar las tablas"""
+        try:
+            datos = self.pg_manager.obtener_estadisticas()
+
+            metodos = sorted(datos['metodos'].items(), key=lambda x: -x[1]['total_ms'])
+            self._llenar_resumenes(self.tabla_metodos, metodos)
+
+            consultas = sorted(datos['consultas'].values(), key=lambda r: -r['total_ms'])
+            self._llenar_resumenes(self.tabla_consultas, [((r['sql'] or '')[:200], r) for r in consultas])
+
+            self.lentas = list(reversed(datos['lentas']))
+            self.tabla_lentas.setSortingEnabled(False)
+            self.tabla_lentas.setRowCount(len(self.lentas))
+            for row, lenta in enumerate(self.lentas):
+                item_fecha = QTableWidgetItem(lenta['fecha'].replace('T', ' '))
+                item_fecha.setData(Qt.UserRole, row)
+                self.tabla_lentas.setItem(row, 0, item_fecha)
+                self.tabla_lentas.setItem(row, 1, self._item_numero(lenta['ms'], 1))
+                self.tabla_lentas.setItem(row, 2, QTableWidgetItem(lenta['origen'] or '-'))
+                self.tabla_lentas.setItem(row, 3, QTableWidgetItem(lenta['metodo'] or '-'))
+                self.tabla_lentas.setItem(row, 4, self._item_numero(lenta['filas'], 0))
+                self.tabla_lentas.setItem(row, 5, QTableWidgetItem(lenta['sql'][:200]))
+            self.tabla_lentas.setSortingEnabled(True)
+
+            referencias = datos.get('referencias', {}).values()
+            aciertos = sum(r['aciertos'] for r in referencias)
+            lecturas = aciertos + sum(r['fallos'] for r in referencias)
+            interrumpidas = datos.get('interrumpidas', {})
+            self.label_info.setText(
+                f"Desde {datos['desde'].replace('T', ' ')}  ·  "
+                f"{len(datos['lentas'])} consultas sobre {datos['umbral_lento_ms']:.0f} ms  ·  "
+                f"Caché de catálogos: {aciertos}/{lecturas} aciertos  ·  "
+                f"Canceladas: {interrumpidas.get('canceladas', 0)}, "
+                f"tiempo agotado: {interrumpidas.get('tiempo_agotado', 0)}"
+            )
+        except Exception as e:
+            logging.error(f"Error cargando estadísticas de rendimiento: {e}")
+
+    def mostrar_detalle_lenta(self, item):
+        """Mostrar la sentencia completa y su plan (si se capturó)"""
+        fila = self.tabla_lentas.item(item.row(), 0).data(Qt.UserRole)
+        if fila is None or fila >= len(self.lentas):
+            return
+        lenta = self.lentas[fila]
+        mensaje = (
+            f"{lenta['ms']:.1f} ms · {lenta['filas']} filas\n"
+            f"Pantalla: {lenta['origen'] or '-'}\n"
+            f"Método: {lenta['metodo'] or '-'}\n"
+            f"Parámetros: {lenta['parametros']}"
+        )
+        detalle = lenta['sql']
+        if lenta.get('plan'):
+            detalle += "\n\n" + lenta['plan']
+        show_info_dialog(self, f"Consulta {lenta['huella']}", mensaje, detail=detalle)
+
+    def reiniciar_estadisticas(self):
+        if show_confirmation_dialog(
+            self, "Reiniciar estadísticas",
+            "¿Poner en cero los contadores y la lista de consultas lentas?"
+        ):
+            self.pg_manager.reiniciar_estadisticas()
+            self.cargar_estadisticas()
+
+    def refrescar_datos(self):
+        """Al reutilizar la pantalla: recargar y reanudar el refresco periódico"""
+        self.cargar_estadisticas()
+        self.timer_actualizacion.start(self.INTERVALO_ACTUALIZACION_MS)
+
+    def cerrar(self):
+        self.timer_actualizacion.stop()
+        self.cerrar_solicitado.emit()
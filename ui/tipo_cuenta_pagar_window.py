@@ -7,12 +7,11 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem,
     QCheckBox, QDialog, QHeaderView, QComboBox,
-    QAbstractItemView, QPushButton
+    QAbstractItemView
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 import logging
-import qtawesome as qta
 
 from ui.components import (
     WindowsPhoneTheme,
@@ -24,7 +23,8 @@ from ui.components import (
     show_success_dialog,
     show_warning_dialog,
     show_error_dialog,
-    show_confirmation_dialog
+    show_confirmation_dialog,
+    crear_boton_fila
 )
 
 
@@ -335,6 +335,10 @@ class TipoCuentaPagarWindow(QWidget):
 
         return panel
 
+    def refrescar_datos(self):
+        """Recargar el catálogo al reutilizar la pantalla"""
+        self.cargar_tipos_cuenta()
+
     def cargar_tipos_cuenta(self):
         """Cargar tipos de cuenta desde la base de datos"""
         try:
@@ -397,48 +401,22 @@ class TipoCuentaPagarWindow(QWidget):
 
             # Botones de acción con iconos
             acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent;")
+            acciones_widget.setObjectName("celdaAcciones")
             acciones_layout = QHBoxLayout(acciones_widget)
             acciones_layout.setContentsMargins(5, 5, 5, 5)
             acciones_layout.setSpacing(5)
 
             # Botón Editar con icono
-            btn_editar = QPushButton()
-            btn_editar.setIcon(qta.icon('fa5s.edit', color='white'))
-            btn_editar.setToolTip("Editar tipo de cuenta")
+            btn_editar = crear_boton_fila('editar', 'fa5s.edit', tooltip="Editar tipo de cuenta")
             btn_editar.setMinimumHeight(30)
             btn_editar.setFixedWidth(40)
-            btn_editar.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {WindowsPhoneTheme.TILE_BLUE};
-                    color: white;
-                    border: none;
-                    border-radius: 3px;
-                }}
-                QPushButton:hover {{
-                    background-color: #1976d2;
-                }}
-            """)
             btn_editar.clicked.connect(lambda checked, tc=tipo_cuenta: self.editar_tipo_cuenta(tc))
             acciones_layout.addWidget(btn_editar)
 
             # Botón Eliminar con icono
-            btn_eliminar = QPushButton()
-            btn_eliminar.setIcon(qta.icon('fa5s.trash', color='white'))
-            btn_eliminar.setToolTip("Eliminar tipo de cuenta")
+            btn_eliminar = crear_boton_fila('eliminar', 'fa5s.trash', tooltip="Eliminar tipo de cuenta")
             btn_eliminar.setMinimumHeight(30)
             btn_eliminar.setFixedWidth(40)
-            btn_eliminar.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {WindowsPhoneTheme.TILE_RED};
-                    color: white;
-                    border: none;
-                    border-radius: 3px;
-                }}
-                QPushButton:hover {{
-                    background-color: #c62828;
-                }}
-            """)
             btn_eliminar.clicked.connect(lambda checked, tc=tipo_cuenta: self.eliminar_tipo_cuenta(tc))
             acciones_layout.addWidget(btn_eliminar)
 
@@ -7,12 +7,11 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem,
     QCheckBox, QDialog, QHeaderView,
-    QAbstractItemView, QPushButton
+    QAbstractItemView
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 import logging
-import qtawesome as qta
 
 from ui.components import (
     WindowsPhoneTheme,
@@ -24,7 +23,8 @@ from ui.components import (
     show_success_dialog,
     show_warning_dialog,
     show_error_dialog,
-    show_confirmation_dialog
+    show_confirmation_dialog,
+    crear_boton_fila
 )
 
 
@@ -172,6 +172,8 @@ class FormularioUbicacionDialog(QDialog):
                     'activa': activa
                 }).execute()
                 msg = "creada"
+            # Escribe fuera de PostgresManager: los combos deben ver el cambio
+            self.pg_manager.referencias.invalidar('ca_ubicaciones')
             
             show_success_dialog(
                 self,
@@ -302,6 +304,10 @@ class UbicacionesWindow(QWidget):
         
         return panel
     
+    def refrescar_datos(self):
+        """Recargar las ubicaciones al reutilizar la pantalla"""
+        self.cargar_ubicaciones()
+    
     def cargar_ubicaciones(self):
         """Cargar ubicaciones desde la base de datos"""
         try:
@@ -350,48 +356,22 @@ class UbicacionesWindow(QWidget):
             
             # Botones de acción con iconos
             acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent;")
+            acciones_widget.setObjectName("celdaAcciones")
             acciones_layout = QHBoxLayout(acciones_widget)
             acciones_layout.setContentsMargins(5, 5, 5, 5)
             acciones_layout.setSpacing(5)
             
             # Botón Editar con icono
-            btn_editar = QPushButton()
-            btn_editar.setIcon(qta.icon('fa5s.edit', color='white'))
-            btn_editar.setToolTip("Editar ubicación")
+            btn_editar = crear_boton_fila('editar', 'fa5s.edit', tooltip="Editar ubicación")
             btn_editar.setMinimumHeight(30)
             btn_editar.setFixedWidth(40)
-            btn_editar.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {WindowsPhoneTheme.TILE_BLUE};
-                    color: white;
-                    border: none;
-                    border-radius: 3px;
-                }}
-                QPushButton:hover {{
-                    background-color: #1976d2;
-                }}
-            """)
             btn_editar.clicked.connect(lambda checked, u=ubicacion: self.editar_ubicacion(u))
             acciones_layout.addWidget(btn_editar)
             
             # Botón Eliminar con icono
-            btn_eliminar = QPushButton()
-            btn_eliminar.setIcon(qta.icon('fa5s.trash', color='white'))
-            btn_eliminar.setToolTip("Eliminar ubicación")
+            btn_eliminar = crear_boton_fila('eliminar', 'fa5s.trash', tooltip="Eliminar ubicación")
             btn_eliminar.setMinimumHeight(30)
             btn_eliminar.setFixedWidth(40)
-            btn_eliminar.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {WindowsPhoneTheme.TILE_RED};
-                    color: white;
-                    border: none;
-                    border-radius: 3px;
-                }}
-                QPushButton:hover {{
-                    background-color: #c62828;
-                }}
-            """)
             btn_eliminar.clicked.connect(lambda checked, u=ubicacion: self.eliminar_ubicacion(u))
             acciones_layout.addWidget(btn_eliminar)
             
@@ -441,6 +421,7 @@ class UbicacionesWindow(QWidget):
             self.pg_manager.client.table('ca_ubicaciones').delete().eq(
                 'id_ubicacion', id_ubicacion
             ).execute()
+            self.pg_manager.referencias.invalidar('ca_ubicaciones')
             
             show_success_dialog(
                 self,
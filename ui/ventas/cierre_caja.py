@@ -232,17 +232,12 @@ class CierreCajaWindow(QWidget):
             # Obtener monto inicial del turno
             monto_inicial = float(self.turno_abierto.get('monto_inicial', 0))
             
-            # Obtener ventas del turno actual desde PostgreSQL
+            # Totales del turno actual (suma indexada por turno)
             try:
-                ventas = self.pg_manager.query(f"""
-                    SELECT id_venta, fecha, total, id_vendedor
-                    FROM ventas
-                    WHERE id_turno = {self.turno_abierto['id_turno']}
-                    ORDER BY fecha DESC
-                """)
+                resumen = self.pg_manager.obtener_resumen_ventas_turno(self.turno_abierto['id_turno'])
                 
-                total_ventas_turno = sum(float(v.get('total', 0)) for v in ventas)
-                num_ventas = len(ventas)
+                total_ventas_turno = float(resumen['total'])
+                num_ventas = resumen['num_ventas']
             except Exception as e:
                 logging.error(f"Error obteniendo ventas del turno: {e}")
                 total_ventas_turno = 0
@@ -8,11 +8,11 @@ from PySide6.QtWidgets import (
     QPushButton, QTableWidget, QTableWidgetItem,
     QHeaderView, QDateEdit, QSizePolicy, QComboBox, QAbstractItemView
 )
-from PySide6.QtCore import Qt, Signal, QDate, QTimer
+from PySide6.QtCore import Qt, Signal, QDate, QThread, QTimer
 from PySide6.QtGui import QFont
 import logging
+import threading
 from datetime import datetime
-import qtawesome as qta
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -25,9 +25,70 @@ from ui.components import (
     SearchBar,
     show_info_dialog,
     show_warning_dialog,
-    aplicar_estilo_fecha
+    aplicar_estilo_fecha,
+    crear_boton_fila
 )
 
+# Ventas del periodo con su vendedor (carga de la tabla y exportación)
+SQL_HISTORIAL_VENTAS = """
+    SELECT 
+        v.id_venta,
+        v.fecha,
+        v.total,
+        u.nombre_completo as nombre_usuario
+    FROM ventas v
+    LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
+    WHERE v.fecha >= %s AND v.fecha <= %s
+    ORDER BY v.fecha DESC
+"""
+
+
+class HistorialVentasLoaderThread(QThread):
+    """Hilo para cargar el historial de ventas del periodo de forma asíncrona"""
+    
+    ventas_loaded = Signal(list)
+    error_occurred = Signal(str)
+    
+    def __init__(self, pg_manager, fecha_desde, fecha_hasta):
+        super().__init__()
+        self.pg_manager = pg_manager
+        self.fecha_desde = fecha_desde
+        self.fecha_hasta = fecha_hasta
+        self._is_running = True
+        self.id_hilo = None  # Para cancelar su consulta en el servidor (ver stop)
+        self.setTerminationEnabled(True)
+    
+    def run(self):
+        """Cargar ventas desde la base de datos (conexión de reportes)"""
+        try:
+            self.id_hilo = threading.get_ident()
+            if not self._is_running:
+                return
+            
+            # Conexión propia del hilo: stop() cancela solo esta consulta
+            with self.pg_manager.conexion_de_carga(reporte=True):
+                if not self._is_running:
+                    return
+                ventas = self.pg_manager.query(
+                    SQL_HISTORIAL_VENTAS, (self.fecha_desde, self.fecha_hasta), compactas=True, reporte=True
+                )
+            
+            if self._is_running:
+                self.ventas_loaded.emit(ventas)
+            else:
+                logging.info("Thread cancelado antes de emitir datos")
+                
+        except Exception as e:
+            if self._is_running:
+                logging.error(f"Error en thread de historial de ventas: {e}")
+                self.error_occurred.emit(str(e))
+    
+    def stop(self):
+        """Detener el thread y liberar la conexión cancelando su consulta"""
+        self._is_running = False
+        if self.id_hilo is not None:
+            self.pg_manager.cancelar_consulta(self.id_hilo)
+
 
 class HistorialVentasWindow(QWidget):
     """Widget para ver historial de ventas"""
@@ -42,6 +103,8 @@ class HistorialVentasWindow(QWidget):
         self.ventas_filtradas = []  # Ventas después de aplicar filtros
         self.pagina_actual = 0
         self.items_por_pagina = 50
+        self.loader_thread = None
+        self._usuario_pendiente = None  # Usuario a volver a filtrar cuando termine la carga
         
         # Timer para detectar entrada del escáner
         self.scanner_timer = QTimer()
@@ -286,56 +349,73 @@ class HistorialVentasWindow(QWidget):
         self.fecha_hasta.setDate(QDate.currentDate())
         self.cargar_historial_completo()
     
+    def refrescar_datos(self):
+        """Recargar el rango de fechas al reutilizar la pantalla, conservando el usuario filtrado"""
+        self._usuario_pendiente = self.usuario_combo.currentText()
+        self.cargar_historial_completo()
+    
+    def hideEvent(self, event):
+        """Al ocultar la pantalla, la carga en curso se cancela en el servidor"""
+        self.detener_carga()
+        super().hideEvent(event)
+    
+    def detener_carga(self):
+        """Detener la carga en progreso (la consulta se cancela y la conexión queda libre)"""
+        try:
+            if self.loader_thread and self.loader_thread.isRunning():
+                logging.info("🛑 Deteniendo carga del historial de ventas")
+                self.loader_thread.stop()
+                self.loader_thread.quit()
+                if not self.loader_thread.wait(500):
+                    self.loader_thread.terminate()
+                    self.loader_thread.wait(500)
+        except Exception as e:
+            logging.error(f"Error al detener carga: {e}")
+    
     def cargar_historial_completo(self):
-        """Cargar historial completo de ventas desde la base de datos"""
+        """Cargar historial completo de ventas desde la base de datos (en segundo plano)"""
         try:
             fecha_desde = self.fecha_desde.date().toPython()
             fecha_hasta = self.fecha_hasta.date().toPython()
             
-            # Usar consulta PostgreSQL en lugar de Supabase
-            ventas = self.pg_manager.query("""
-                SELECT 
-                    v.id_venta,
-                    v.fecha,
-                    v.total,
-                    u.nombre_completo as nombre_usuario
-                FROM ventas v
-                LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
-                WHERE v.fecha >= %s AND v.fecha <= %s
-                ORDER BY v.fecha DESC
-            """, (fecha_desde, fecha_hasta))
-            
-            # Convertir a formato esperado por el código
-            self.ventas_data = []
-            for venta in ventas:
-                venta_dict = {
-                    'id_venta': venta['id_venta'],
-                    'fecha': venta['fecha'],
-                    'total': venta['total'],
-                    'usuarios': {'nombre_completo': venta['nombre_usuario']} if venta['nombre_usuario'] else None
-                }
-                self.ventas_data.append(venta_dict)
-            
-            # Cargar usuarios para el filtro
-            self.cargar_usuarios_filtro()
-            
-            # Aplicar filtros
-            self.aplicar_filtros()
+            # Un cambio de fechas reemplaza a la carga anterior
+            self.detener_carga()
+            self.loader_thread = HistorialVentasLoaderThread(self.pg_manager, fecha_desde, fecha_hasta)
+            self.loader_thread.ventas_loaded.connect(self.on_historial_cargado, Qt.QueuedConnection)
+            self.loader_thread.error_occurred.connect(self.on_error_carga, Qt.QueuedConnection)
+            self.loader_thread.start()
             
         except Exception as e:
             logging.error(f"Error cargando historial: {e}")
             show_warning_dialog(self, "Error", f"Error al cargar historial: {e}")
     
+    def on_historial_cargado(self, ventas):
+        """Mostrar las ventas cargadas por el hilo"""
+        # Filas compactas de solo lectura: se guardan tal cual, sin copiarlas a otro dict
+        self.ventas_data = ventas
+        
+        # Cargar usuarios para el filtro
+        self.cargar_usuarios_filtro()
+        
+        usuario, self._usuario_pendiente = self._usuario_pendiente, None
+        indice = self.usuario_combo.findText(usuario) if usuario else -1
+        if indice > 0:
+            # currentTextChanged vuelve a aplicar los filtros
+            self.usuario_combo.setCurrentIndex(indice)
+        else:
+            self.aplicar_filtros()
+    
+    def on_error_carga(self, mensaje):
+        show_warning_dialog(self, "Error", f"Error al cargar historial: {mensaje}")
+    
     def cargar_usuarios_filtro(self):
         """Cargar lista de usuarios para el filtro"""
         try:
             # Obtener usuarios únicos de las ventas
             usuarios = set()
             for venta in self.ventas_data:
-                if venta.get('usuarios') and isinstance(venta['usuarios'], dict):
-                    nombre = venta['usuarios'].get('nombre_completo')
-                    if nombre:
-                        usuarios.add(nombre)
+                if venta['nombre_usuario']:
+                    usuarios.add(venta['nombre_usuario'])
             
             # Actualizar combo
             self.usuario_combo.clear()
@@ -360,7 +440,7 @@ class HistorialVentasWindow(QWidget):
             if usuario_filtro and usuario_filtro != "Todos":
                 self.ventas_filtradas = [
                     v for v in self.ventas_filtradas 
-                    if v.get('usuarios', {}).get('nombre_completo', '') == usuario_filtro
+                    if v['nombre_usuario'] == usuario_filtro
                 ]
             
             # Filtro por búsqueda de texto
@@ -370,7 +450,7 @@ class HistorialVentasWindow(QWidget):
                     if (
                         search_text in str(v.get('id_venta', '')).lower() or
                         search_text in str(v.get('total', '')).lower() or
-                        search_text in v.get('usuarios', {}).get('nombre_completo', '').lower()
+                        search_text in (v['nombre_usuario'] or '').lower()
                     )
                 ]
             
@@ -421,26 +501,13 @@ class HistorialVentasWindow(QWidget):
                 self.history_table.setItem(row, 3, total_item)
                 
                 # Usuario
-                usuario_name = venta.get('usuarios', {}).get('nombre_completo', 'N/A') if isinstance(venta.get('usuarios'), dict) else venta.get('usuario', 'N/A')
+                usuario_name = venta['nombre_usuario'] or 'N/A'
                 self.history_table.setItem(row, 4, QTableWidgetItem(usuario_name))
                 
                 # Botón detalles con icono
-                btn_detalles = QPushButton()
-                btn_detalles.setIcon(qta.icon('fa5s.eye', color='white'))
-                btn_detalles.setToolTip("Ver detalle de la venta")
+                btn_detalles = crear_boton_fila('detalle', 'fa5s.eye', tooltip="Ver detalle de la venta")
                 btn_detalles.setFixedWidth(40)
                 btn_detalles.setMinimumHeight(35)
-                btn_detalles.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {WindowsPhoneTheme.TILE_BLUE};
-                        color: white;
-                        border: none;
-                        border-radius: 3px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: #1976d2;
-                    }}
-                """)
                 btn_detalles.clicked.connect(lambda checked, vid=venta['id_venta']: self.ver_detalles(vid))
                 self.history_table.setCellWidget(row, 5, btn_detalles)
             
@@ -507,28 +574,9 @@ class HistorialVentasWindow(QWidget):
             fecha_hasta = self.fecha_hasta.date().toPython()
             
             # Obtener datos de ventas usando PostgreSQL
-            ventas_raw = self.pg_manager.query("""
-                SELECT 
-                    v.id_venta,
-                    v.fecha,
-                    v.total,
-                    u.nombre_completo as nombre_usuario
-                FROM ventas v
-                LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
-                WHERE v.fecha >= %s AND v.fecha <= %s
-                ORDER BY v.fecha DESC
-            """, (fecha_desde, fecha_hasta))
-            
-            # Convertir a formato esperado
-            ventas = []
-            for venta in ventas_raw:
-                venta_dict = {
-                    'id_venta': venta['id_venta'],
-                    'fecha': venta['fecha'],
-                    'total': venta['total'],
-                    'usuarios': {'nombre_completo': venta['nombre_usuario']} if venta['nombre_usuario'] else None
-                }
-                ventas.append(venta_dict)
+            ventas = self.pg_manager.query(
+                SQL_HISTORIAL_VENTAS, (fecha_desde, fecha_hasta), compactas=True, reporte=True
+            )
             
             # Crear libro de Excel
             wb = Workbook()
@@ -575,7 +623,7 @@ class HistorialVentasWindow(QWidget):
                 total_cell.border = border
                 
                 # Usuario
-                ws.cell(row=row, column=5, value=venta.get('usuario', 'N/A')).border = border
+                ws.cell(row=row, column=5, value=venta['nombre_usuario'] or 'N/A').border = border
             
             # Ajustar anchos de columna
             ws.column_dimensions['A'].width = 12
@@ -583,7 +631,58 @@ class HistorialVentasWindow(QWidget):
             ws.column_dimensions['C'].width = 10
             ws.column_dimensions['D'].width = 15
             ws.column_dimensions['E'].width = 25
-            
+
+            # Hoja de resumen desde los rollups (pre-agregados, sin recorrer detalles)
+            if self.pg_manager.rollups_disponibles():
+                ws_resumen = wb.create_sheet("Resumen")
+                fila = 1
+                periodo = self.pg_manager.obtener_resumen_ventas_periodo(fecha_desde, fecha_hasta)
+                if periodo:
+                    ws_resumen.cell(row=fila, column=1, value="Periodo").font = Font(bold=True, size=12)
+                    fila += 1
+                    for concepto, valor, formato in (
+                        ("Ventas", periodo['num_ventas'], None),
+                        ("Total", periodo['total'], '$#,##0.00'),
+                        ("Ticket promedio", periodo['ticket_promedio'], '$#,##0.00'),
+                    ):
+                        ws_resumen.cell(row=fila, column=1, value=concepto).border = border
+                        valor_cell = ws_resumen.cell(row=fila, column=2, value=valor)
+                        valor_cell.border = border
+                        if formato:
+                            valor_cell.number_format = formato
+                        fila += 1
+                    fila += 1
+                
+                # (título, dimensión, columna del concepto, encabezado y columna de la cantidad)
+                secciones = [
+                    ("Por método de pago", 'metodo_pago', 'metodo_pago', "Ventas", 'num_ventas'),
+                    ("Por vendedor", 'vendedor', 'nombre_completo', "Ventas", 'num_ventas'),
+                    ("Por producto", 'producto', 'nombre', "Cantidad", 'cantidad'),
+                ]
+                for titulo, dimension, columna_nombre, encabezado, columna_cantidad in secciones:
+                    filas = self.pg_manager.obtener_rollup_ventas(dimension, fecha_desde, fecha_hasta)
+                    ws_resumen.cell(row=fila, column=1, value=titulo).font = Font(bold=True, size=12)
+                    fila += 1
+                    for col, header in enumerate(["Concepto", encabezado, "Total"], 1):
+                        cell = ws_resumen.cell(row=fila, column=col, value=header)
+                        cell.fill = header_fill
+                        cell.font = header_font
+                        cell.alignment = header_alignment
+                        cell.border = border
+                    fila += 1
+                    for dato in filas:
+                        ws_resumen.cell(row=fila, column=1, value=dato.get(columna_nombre) or 'N/A').border = border
+                        ws_resumen.cell(row=fila, column=2, value=dato[columna_cantidad]).border = border
+                        total_cell = ws_resumen.cell(row=fila, column=3, value=dato['total'])
+                        total_cell.number_format = '$#,##0.00'
+                        total_cell.border = border
+                        fila += 1
+                    fila += 1
+
+                ws_resumen.column_dimensions['A'].width = 35
+                ws_resumen.column_dimensions['B'].width = 12
+                ws_resumen.column_dimensions['C'].width = 15
+
             # Guardar archivo
             fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
             desktop = os.path.join(os.path.expanduser("~"), "Desktop")
@@ -17,7 +17,6 @@ from PySide6.QtPrintSupport import QPrinter, QPrintDialog
 import logging
 import time
 from datetime import datetime
-import qtawesome as qta
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -32,7 +31,9 @@ from ui.components import (
     show_success_dialog,
     show_warning_dialog,
     show_error_dialog,
-    show_confirmation_dialog
+    show_confirmation_dialog,
+    obtener_icono,
+    crear_boton_fila
 )
 
 # Importar gestores de impresión
@@ -298,32 +299,15 @@ class NuevaVentaWindow(QWidget):
     def _create_add_button(self, producto):
         """Crear botón de agregar centrado dentro de la celda."""
         container = QWidget()
-        container.setStyleSheet("background: transparent;")
+        container.setObjectName("celdaAcciones")
         
         layout = QHBoxLayout(container)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setAlignment(Qt.AlignCenter)
         
-        btn = QPushButton()
-        btn.setIcon(qta.icon('fa5s.plus', color='white'))
+        btn = crear_boton_fila('agregar', 'fa5s.plus', tooltip="Agregar al carrito")
         btn.setCursor(QCursor(Qt.PointingHandCursor))
-        btn.setToolTip("Agregar al carrito")
         btn.setFixedSize(40, 40)
-        btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {WindowsPhoneTheme.TILE_GREEN};
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 0px;
-            }}
-            QPushButton:hover {{
-                background-color: {WindowsPhoneTheme.TILE_TEAL};
-            }}
-            QPushButton:pressed {{
-                background-color: #1b5e20;
-            }}
-        """)
         
         btn.clicked.connect(lambda _, p=producto: self.agregar_al_carrito(p))
         layout.addWidget(btn, 0, Qt.AlignCenter)
@@ -337,27 +321,12 @@ class NuevaVentaWindow(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setAlignment(Qt.AlignCenter)
 
-        btn = QPushButton()
+        btn = crear_boton_fila('quitar', tooltip="Quitar del carrito")
         btn.setCursor(QCursor(Qt.PointingHandCursor))
-        btn.setToolTip("Quitar del carrito")
         btn.setFixedSize(28, 28)  # Mismo tamaño que el botón de agregar
-        btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {WindowsPhoneTheme.TILE_RED};
-                color: white;
-                border: none;
-                border-radius: 5px;
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background-color: {WindowsPhoneTheme.TILE_ORANGE};
-            }}
-        """)
 
         try:
-            import qtawesome as qta
-            btn.setIcon(qta.icon('fa5s.trash', color='white'))
+            btn.setIcon(obtener_icono('fa5s.trash', 'white', 12))
             btn.setIconSize(QSize(12, 12))  # Mismo tamaño de icono
         except Exception:
             btn.setText("×")
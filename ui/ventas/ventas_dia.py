@@ -6,13 +6,12 @@ Usando componentes reutilizables del sistema de diseño
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, 
     QTableWidget, QTableWidgetItem,
-    QHeaderView, QSizePolicy, QDialog, QPushButton, QLabel
+    QHeaderView, QSizePolicy, QDialog, QLabel
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 import logging
 from datetime import datetime, date
-import qtawesome as qta
 
 # Importar componentes del sistema de diseño
 from ui.components import (
@@ -23,7 +22,8 @@ from ui.components import (
     show_info_dialog,
     show_warning_dialog,
     SectionTitle,
-    ContentPanel
+    ContentPanel,
+    crear_boton_fila
 )
 
 
@@ -99,6 +99,10 @@ class VentasDiaWindow(QWidget):
         
         parent_layout.addLayout(widgets_layout)
         
+    def refrescar_datos(self):
+        """Actualizar los totales del turno al reutilizar la pantalla"""
+        self.actualizar_datos()
+    
     def actualizar_datos(self):
         """Actualizar datos de ventas del turno"""
         try:
@@ -114,23 +118,11 @@ class VentasDiaWindow(QWidget):
                 self.ventas_count.setText("0")
                 return
             
-            # Obtener ventas del turno usando PostgreSQL
-            ventas = self.pg_manager.query("""
-                SELECT v.id_venta, v.fecha, v.total, u.nombre_completo
-                FROM ventas v
-                LEFT JOIN usuarios u ON v.id_vendedor = u.id_usuario
-                WHERE v.id_turno = %s
-                ORDER BY v.fecha DESC
-            """, (self.turno_id,))
-            
-            total_vendido = sum(
-                float(v[2] if isinstance(v, tuple) else v['total']) 
-                for v in (ventas or [])
-            ) if ventas else 0
-            num_ventas = len(ventas) if ventas else 0
+            # Totales del turno (suma indexada por turno)
+            resumen = self.pg_manager.obtener_resumen_ventas_turno(self.turno_id)
             
-            self.total_value.setText(f"${total_vendido:.2f}")
-            self.ventas_count.setText(str(num_ventas))
+            self.total_value.setText(f"${float(resumen['total']):.2f}")
+            self.ventas_count.setText(str(resumen['num_ventas']))
 
         except Exception as e:
             logging.error(f"Error actualizando datos: {e}")
@@ -365,22 +357,9 @@ class DetalleVentasDiaDialog(QDialog):
                 self.tabla_ventas.setItem(row, 4, QTableWidgetItem("Completada"))
                 
                 # Botón ver detalle con icono
-                btn_ver = QPushButton()
-                btn_ver.setIcon(qta.icon('fa5s.eye', color='white'))
-                btn_ver.setToolTip("Ver detalle de la venta")
+                btn_ver = crear_boton_fila('detalle', 'fa5s.eye', tooltip="Ver detalle de la venta")
                 btn_ver.setFixedWidth(40)
                 btn_ver.setMinimumHeight(35)
-                btn_ver.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {WindowsPhoneTheme.TILE_BLUE};
-                        color: white;
-                        border: none;
-                        border-radius: 3px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: #1976d2;
-                    }}
-                """)
                 btn_ver.clicked.connect(lambda checked, v_id=venta['id_venta']: self.ver_detalle_comanda(v_id))
                 self.tabla_ventas.setCellWidget(row, 5, btn_ver)
                 
@@ -26,6 +26,11 @@ class Config:
         # Eliminar comillas si las hay
         password = os.getenv('DB_PASSWORD', 'postgres')
         self.DB_PASSWORD = password.strip('"\'') if password else 'postgres'
+        
+        # Base de reportes opcional (p. ej. una réplica): DSN de libpq o URI postgresql://
+        self.DB_REPORTES_DSN = os.getenv('DB_REPORTES_DSN', '').strip('"\'')
+        # Retraso máximo tolerado de la réplica en segundos; si lo pasa, los reportes van a la principal
+        self.DB_REPORTES_RETRASO_MAX_S = float(os.getenv('DB_REPORTES_RETRASO_MAX_S', '30'))
 
     def validate_config(self):
         """Validar configuración básica"""
@@ -49,5 +54,7 @@ class Config:
             'port': self.DB_PORT,
             'database': self.DB_NAME,
             'user': self.DB_USER,
-            'password': self.DB_PASSWORD
+            'password': self.DB_PASSWORD,
+            'reportes_dsn': self.DB_REPORTES_DSN or None,
+            'reportes_retraso_max_s': self.DB_REPORTES_RETRASO_MAX_S
         }
\ No newline at end of file